@@ -64,7 +64,7 @@ try:
     from src.ui.auth import AuthComponents
     from src.ui.components.components import UIComponents
     from src.config.settings import Settings
-    from src.security import AuditLogger, AuditAction, DataEncryption, SecureStorage
+    from src.security import AuditAction, DataEncryption, SecureStorage, get_audit_logger
 
     # Legacy imports for backward compatibility
     try:
@@ -102,8 +102,7 @@ try:
     
     # Initialize security components
     try:
-        db_connection = container.get_db_connection()
-        audit_logger = AuditLogger(db_connection)
+        audit_logger = get_audit_logger()
         secure_storage = SecureStorage()
     except Exception as e:
         logger.error(f"Failed to initialize security components: {e}")
@@ -14,7 +14,7 @@ from src.container import get_container
 from src.ui.auth import AuthComponents
 from src.ui.components.components import UIComponents
 from src.ui.forms import FormComponents
-from src.security import AuditLogger, AuditAction
+from src.security import AuditAction, get_audit_logger
 from src.models.cost import CostModel, RecurringCostModel
 from src.utils.business_rules import BusinessRuleValidator
 from src.utils.date_utils import DateUtils
@@ -31,7 +31,7 @@ if not AuthComponents.is_authenticated():
 container = get_container()
 cost_service = container.get_cost_service()
 analytics_service = container.get_analytics_service()
-audit_logger = AuditLogger(container.get_db_connection())
+audit_logger = get_audit_logger()
 business_validator = BusinessRuleValidator()
 
 # Get current user for audit logging
@@ -0,0 +1,81 @@
+"""
+Maintain the month-end cash_ledger balance checkpoints.
+
+Commands:
+  install   create checkpoint tables and invalidation triggers
+  refresh   bring checkpoints up to the last complete month (or --through)
+  rebuild   drop all checkpoints and recompute them from cash_ledger
+  check     compare checkpoints against raw ledger sums; exits 1 on mismatch
+
+Usage:
+  python scripts/ledger_checkpoints.py rebuild
+  python scripts/ledger_checkpoints.py refresh --through 2025-06
+  python scripts/ledger_checkpoints.py check
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+# Allow running this script directly without setting PYTHONPATH
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.repositories.base import DatabaseConnection  # noqa: E402
+from src.services.ledger_checkpoints import LedgerCheckpoints  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Cash Flow Dashboard ledger checkpoint maintenance")
+    parser.add_argument(
+        "--db", default=os.environ.get("CASHFLOW_DB_PATH", "cashflow.db"), help="SQLite database path"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (
+        ("install", "Create checkpoint tables and triggers"),
+        ("refresh", "Add missing and invalidated checkpoints"),
+        ("rebuild", "Recompute all checkpoints from cash_ledger"),
+        ("check", "Verify checkpoints against cash_ledger"),
+    ):
+        sub = subparsers.add_parser(name, help=help_text)
+        if name in ("refresh", "rebuild"):
+            sub.add_argument("--through", help="Last month to checkpoint (YYYY-MM)")
+
+    args = parser.parse_args(argv)
+    service = LedgerCheckpoints(DatabaseConnection(args.db))
+    print(f"Using DB: {args.db}")
+
+    if args.command == "install":
+        if not service.install():
+            print("  skipped (cash_ledger or its bank_account_id column missing)")
+            return 1
+        print("Installed. Run 'refresh' to build the checkpoints.")
+        return 0
+
+    if args.command in ("refresh", "rebuild"):
+        if args.command == "refresh":
+            written = service.refresh(args.through)
+        else:
+            written = service.rebuild(args.through)
+        for account, count in sorted(written.items()):
+            print(f"  {account or '(no account)':<20} {count} checkpoints")
+        if not written:
+            print("  nothing to do")
+        return 0
+
+    result = service.check()
+    status = "OK" if result["ok"] else f"{len(result['mismatches'])} mismatches"
+    print(f"  {result['checked']} checkpoints checked: {status}")
+    for m in result["mismatches"][:10]:
+        print(
+            f"      {m['account'] or '(no account)'} {m['month']} {m['measure']}: "
+            f"expected {m['expected']}, checkpoint {m['actual']}"
+        )
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
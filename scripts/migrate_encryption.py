@@ -1,7 +1,13 @@
 #!/usr/bin/env python3
 """
-Migration script for upgrading encryption from static salt to random salt per operation.
-This script should be run once when upgrading to the new encryption system.
+Migration script that re-encrypts stored ciphertexts into the current envelope format.
+
+Handles both older formats: the static-salt era and the per-message salt
+format whose every decryption costs a PBKDF2 derivation. Envelopes written
+under an earlier ENCRYPTION_KEY_ID are re-encrypted under the current one.
+Rows already in the
+envelope format under the current key id are left alone, so the script can
+be re-run safely.
 """
 
 import os
@@ -41,10 +47,21 @@ def get_encrypted_columns():
         'api_keys': ['encrypted_key'],
         'settings': ['encrypted_value'],
         'sensitive_data': ['encrypted_content'],
+        'audit_log': ['details'],
         # Add more tables/columns as needed
     }
 
 
+def get_row_filters():
+    """Extra conditions for columns that only sometimes hold ciphertext."""
+    return {
+        ('audit_log', 'details'): 'details_encrypted = 1',
+    }
+
+
+BATCH_SIZE = 500
+
+
 def migrate_database_encryption(db_path: Path, encryption: DataEncryption):
     """Migrate encrypted data in a specific database."""
     logger.info(f"Migrating encryption in database: {db_path}")
@@ -72,10 +89,20 @@ def migrate_database_encryption(db_path: Path, encryption: DataEncryption):
                     if column in existing_columns:
                         logger.info(f"Migrating {table}.{column}")
                         
-                        # Get all rows with encrypted data
-                        cursor.execute(f"SELECT rowid, {column} FROM {table} WHERE {column} IS NOT NULL AND {column} != '';")
+                        # Get all rows not yet in an envelope under the current key id;
+                        # substr rather than LIKE, since "_" in a key id is a LIKE wildcard
+                        row_filter = get_row_filters().get((table, column))
+                        prefix = encryption.envelope_prefix
+                        cursor.execute(
+                            f"SELECT rowid, {column} FROM {table} "
+                            f"WHERE {column} IS NOT NULL AND {column} != '' "
+                            f"AND substr({column}, 1, ?) != ?"
+                            + (f" AND {row_filter}" if row_filter else ""),
+                            (len(prefix), prefix),
+                        )
                         rows = cursor.fetchall()
                         
+                        updates = []
                         for rowid, encrypted_data in rows:
                             try:
                                 # Attempt migration
@@ -83,12 +110,21 @@ def migrate_database_encryption(db_path: Path, encryption: DataEncryption):
                                 
                                 # Only update if migration actually changed the data
                                 if migrated_data != encrypted_data:
-                                    cursor.execute(f"UPDATE {table} SET {column} = ? WHERE rowid = ?", 
-                                                 (migrated_data, rowid))
-                                    migrated_count += 1
+                                    updates.append((migrated_data, rowid))
                                     
                             except Exception as e:
                                 logger.warning(f"Failed to migrate row {rowid} in {table}.{column}: {e}")
+
+                            # Write and commit in batches so an interrupted run keeps its progress
+                            if len(updates) >= BATCH_SIZE:
+                                cursor.executemany(f"UPDATE {table} SET {column} = ? WHERE rowid = ?", updates)
+                                conn.commit()
+                                migrated_count += len(updates)
+                                updates = []
+
+                        if updates:
+                            cursor.executemany(f"UPDATE {table} SET {column} = ? WHERE rowid = ?", updates)
+                            migrated_count += len(updates)
         
         conn.commit()
         conn.close()
@@ -167,7 +203,7 @@ def main():
     print("\n⚠️  Important:")
     print("1. Test your application thoroughly")
     print("2. Keep database backups until you're sure everything works")
-    print("3. The old static salt method is no longer supported")
+    print("3. Older ciphertexts still decrypt, but every read costs a PBKDF2 derivation")
 
 
 if __name__ == "__main__":
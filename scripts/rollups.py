@@ -0,0 +1,81 @@
+"""
+Maintain the materialized daily/monthly rollup tables.
+
+Commands:
+  install   create rollup tables and maintenance triggers
+  rebuild   recompute rollups from raw tables (optionally --source/--since)
+  check     compare rollups against raw sums; exits 1 on mismatch
+
+Usage:
+  python scripts/rollups.py rebuild
+  python scripts/rollups.py rebuild --source cash_ledger --since 2025-01-01
+  python scripts/rollups.py check
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from datetime import date
+
+# Allow running this script directly without setting PYTHONPATH
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from src.repositories.base import DatabaseConnection  # noqa: E402
+from src.services.rollup_service import ROLLUP_SOURCES, RollupService  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Cash Flow Dashboard rollup maintenance")
+    parser.add_argument(
+        "--db", default=os.environ.get("CASHFLOW_DB_PATH", "cashflow.db"), help="SQLite database path"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (
+        ("install", "Create rollup tables and triggers"),
+        ("rebuild", "Recompute rollups from raw tables"),
+        ("check", "Verify rollups against raw tables"),
+    ):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument(
+            "--source", action="append", choices=sorted(ROLLUP_SOURCES), help="Limit to a source table"
+        )
+        if name == "rebuild":
+            sub.add_argument("--since", type=date.fromisoformat, help="Only rebuild from this date (YYYY-MM-DD)")
+
+    args = parser.parse_args(argv)
+    service = RollupService(DatabaseConnection(args.db))
+    print(f"Using DB: {args.db}")
+
+    if args.command == "install":
+        for source, ok in service.install(args.source).items():
+            print(f"  {source:<14} {'installed' if ok else 'skipped (table/columns missing)'}")
+        print("Run 'rebuild' before rollups are used by reports.")
+        return 0
+
+    if args.command == "rebuild":
+        for source, days in service.rebuild(args.source, since=args.since).items():
+            print(f"  {source:<14} {days} daily rows")
+        return 0
+
+    failed = False
+    for source, result in service.check_consistency(args.source).items():
+        if result.get("error"):
+            print(f"  {source:<14} {result['error']}")
+            continue
+        status = "OK" if result["ok"] else f"{len(result['mismatches'])} mismatches"
+        print(f"  {source:<14} {result['checked_keys']} keys checked: {status}")
+        for m in result["mismatches"][:10]:
+            print(
+                f"      {m['grain']} {m['period']} [{m['category']}/{m['currency']}] "
+                f"{m['measure']}: expected {m['expected']}, rollup {m['actual']}"
+            )
+        failed = failed or not result["ok"]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,372 @@
+"""
+Read-only analytics API over AnalyticsService and ReportingService.
+
+Handlers are async and run the blocking SQLite work on a bounded thread pool
+sized to the pool's reader connections. Every response carries an ETag and
+Last-Modified derived from the change counters of the tables it reads
+(see ``table_versions``), so clients revalidate with If-None-Match and get a
+304 until the data changes. Encoded bodies are cached by ETag and compressed
+once per encoding (gzip, or brotli when the ``brotli`` package is installed).
+
+Daily series are paginated with opaque cursors over date windows: each page
+covers ``limit`` days and ``next_cursor`` points at the first day of the next
+window.
+"""
+
+import asyncio
+import base64
+import gzip
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from src.container import get_container
+from src.repositories.base import DatabaseConnection
+from src.services.analytics_service import AnalyticsService
+from src.services.cache_memory import MemoryCache
+from src.services.reporting_service import ReportingService, ReportType
+from src.services.table_versions import TableVersions, VersionSnapshot
+
+router = APIRouter(prefix="/api/v1/analytics", tags=["analytics"])
+
+DEFAULT_PAGE_DAYS = 31
+MAX_PAGE_DAYS = 366
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 500
+RESPONSE_CACHE_TTL = 300.0
+RESPONSE_CACHE_BYTES = 32 * 1024 * 1024
+
+SALES_TABLES = ("sales_orders", "costs")
+BOOKING_TABLES = ("bookings",)
+LAG_TABLES = ("bookings", "leads")
+LEDGER_TABLES = ("cash_ledger",)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_response_cache = MemoryCache(max_bytes=RESPONSE_CACHE_BYTES)
+
+
+class AnalyticsAPI:
+    """Services shared by the analytics handlers."""
+
+    def __init__(self, db_connection: DatabaseConnection):
+        self.analytics = AnalyticsService(db_connection)
+        self.reporting = ReportingService(db_connection)
+        self.versions = TableVersions(db_connection)
+
+
+def get_analytics_api() -> AnalyticsAPI:
+    return AnalyticsAPI(get_container().get_db_connection())
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Thread pool for blocking queries, one thread per reader connection."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = os.environ.get("ANALYTICS_API_WORKERS")
+            if workers is None:
+                workers = get_container().get_settings().database.pool_max_readers
+            _executor = ThreadPoolExecutor(
+                max_workers=int(workers), thread_name_prefix="analytics-api"
+            )
+        return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+async def run_blocking(func: Callable, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+
+# ----------------------------------------------------------------------
+# Cursors
+# ----------------------------------------------------------------------
+def encode_cursor(day: date) -> str:
+    return base64.urlsafe_b64encode(day.isoformat().encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> date:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return date.fromisoformat(base64.urlsafe_b64decode(padded).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_window(
+    start_date: date, end_date: date, cursor: Optional[str], limit: int
+) -> Tuple[date, date, Optional[str]]:
+    """Date window of one page and the cursor of the page after it."""
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+    window_start = decode_cursor(cursor) if cursor else start_date
+    if not start_date <= window_start <= end_date:
+        raise HTTPException(status_code=400, detail="Cursor is outside the requested range")
+    window_end = min(end_date, window_start + timedelta(days=limit - 1))
+    next_cursor = encode_cursor(window_end + timedelta(days=1)) if window_end < end_date else None
+    return window_start, window_end, next_cursor
+
+
+# ----------------------------------------------------------------------
+# Conditional, compressed responses
+# ----------------------------------------------------------------------
+def _cache_key(request: Request) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return f"{request.url.path}?{query}"
+
+
+def _not_modified(request: Request, snapshot: VersionSnapshot, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return snapshot.last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _negotiate_encoding(request: Request) -> Optional[str]:
+    accepted = {
+        part.split(";")[0].strip().lower()
+        for part in request.headers.get("accept-encoding", "").split(",")
+    }
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """Compress ``body`` for ``encoding``; small bodies are sent as they are."""
+    if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body), encoding
+    return gzip.compress(body, compresslevel=6), encoding
+
+
+def _encode_json(payload: Any) -> bytes:
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":"), default=str).encode(
+        "utf-8"
+    )
+
+
+def _json_response(body: bytes, encoding: Optional[str], headers: Dict[str, str]) -> Response:
+    headers = dict(headers, Vary="Accept-Encoding")
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def cached_json(
+    request: Request,
+    api: AnalyticsAPI,
+    tables: Sequence[str],
+    compute: Callable[[], Any],
+) -> Response:
+    """Serve ``compute()`` as JSON with validators from ``tables``' versions.
+
+    Returns 304 when the client's copy is current, and reuses the encoded
+    body of an earlier request with the same ETag.
+    """
+    encoding = _negotiate_encoding(request)
+    snapshot = await run_blocking(api.versions.snapshot, tables)
+    if snapshot is None:
+        body = await run_blocking(lambda: _compress(_encode_json(compute()), encoding))
+        return _json_response(*body, {"Cache-Control": "no-store"})
+
+    etag = snapshot.etag(_cache_key(request))
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(snapshot.last_modified, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+    if _not_modified(request, snapshot, etag):
+        return Response(status_code=304, headers=headers)
+
+    key = f"{etag}:{encoding or 'identity'}"
+    encoded = _response_cache.get(key)
+    if encoded is None:
+        body = _response_cache.get(f"{etag}:identity")
+        if body is None:
+            body = await run_blocking(lambda: _encode_json(compute()))
+            _response_cache.set(f"{etag}:identity", (body, None), RESPONSE_CACHE_TTL)
+        else:
+            body = body[0]
+        encoded = _compress(body, encoding)
+        _response_cache.set(key, encoded, RESPONSE_CACHE_TTL)
+    return _json_response(*encoded, headers)
+
+
+def _paged(items: List[Dict[str, Any]], window: Tuple[date, date, Optional[str]]) -> Dict[str, Any]:
+    window_start, window_end, next_cursor = window
+    return {
+        "items": items,
+        "window": {"start_date": window_start, "end_date": window_end},
+        "next_cursor": next_cursor,
+    }
+
+
+def _records(frame) -> List[Dict[str, Any]]:
+    return [] if frame is None or frame.empty else frame.to_dict("records")
+
+
+# ----------------------------------------------------------------------
+# Endpoints
+# ----------------------------------------------------------------------
+@router.get("/cash-flow-metrics")
+async def cash_flow_metrics(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    api: AnalyticsAPI = Depends(get_analytics_api),
+):
+    def compute():
+        metrics = api.analytics.get_cash_flow_metrics(start_date, end_date)
+        return dict(
+            jsonable_encoder(metrics),
+            profit_margin=metrics.profit_margin,
+            burn_rate=metrics.burn_rate,
+        )
+
+    return await cached_json(request, api, SALES_TABLES, compute)
+
+
+@router.get("/daily-trends")
+async def daily_trends(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_DAYS, ge=1, le=MAX_PAGE_DAYS),
+    api: AnalyticsAPI = Depends(get_analytics_api),
+):
+    window = page_window(start_date, end_date, cursor, limit)
+    return await cached_json(
+        request,
+        api,
+        SALES_TABLES,
+        lambda: _paged(api.analytics.daily_trends(window[0], window[1]), window),
+    )
+
+
+@router.get("/bookings/summary")
+async def bookings_summary(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    api: AnalyticsAPI = Depends(get_analytics_api),
+):
+    return await cached_json(
+        request,
+        api,
+        BOOKING_TABLES,
+        lambda: api.analytics.bookings_summary(start_date, end_date),
+    )
+
+
+@router.get("/bookings/daily")
+async def bookings_daily(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_DAYS, ge=1, le=MAX_PAGE_DAYS),
+    api: AnalyticsAPI = Depends(get_analytics_api),
+):
+    window = page_window(start_date, end_date, cursor, limit)
+    return await cached_json(
+        request,
+        api,
+        BOOKING_TABLES,
+        lambda: _paged(
+            _records(api.analytics.bookings_by_date_daily(window[0], window[1])), window
+        ),
+    )
+
+
+@router.get("/cash-ledger/daily")
+async def cash_ledger_daily(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_DAYS, ge=1, le=MAX_PAGE_DAYS),
+    api: AnalyticsAPI = Depends(get_analytics_api),
+):
+    window = page_window(start_date, end_date, cursor, limit)
+    return await cached_json(
+        request,
+        api,
+        LEDGER_TABLES,
+        lambda: _paged(_records(api.analytics.cash_ledger_by_date(window[0], window[1])), window),
+    )
+
+
+@router.get("/lead-booking-lag")
+async def lead_booking_lag(
+    request: Request,
+    start_date: date,
+    end_date: date,
+    api: AnalyticsAPI = Depends(get_analytics_api),
+):
+    return await cached_json(
+        request,
+        api,
+        LAG_TABLES,
+        lambda: api.analytics.lead_to_booking_lag(start_date.isoformat(), end_date.isoformat()),
+    )
+
+
+@router.get("/reports/{report_type}")
+async def report(
+    request: Request,
+    report_type: str,
+    start_date: date,
+    end_date: date,
+    include_details: bool = True,
+    api: AnalyticsAPI = Depends(get_analytics_api),
+):
+    if report_type not in (
+        ReportType.PROFIT_LOSS,
+        ReportType.CASH_FLOW,
+        ReportType.BALANCE_SHEET,
+        ReportType.EXECUTIVE_SUMMARY,
+    ):
+        raise HTTPException(status_code=404, detail=f"Unknown report type: {report_type}")
+
+    def compute():
+        reports = api.reporting.generate_reports(
+            start_date, end_date, report_types=(report_type,), include_details=include_details
+        )
+        return reports[report_type]
+
+    return await cached_json(request, api, SALES_TABLES, compute)
@@ -0,0 +1,41 @@
+"""
+Streaming download endpoints for ledger, sales and cost exports.
+"""
+
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from src.container import get_container
+from src.services.report_export import ExportError, ReportExporter, iterate_in_thread
+from src.services.reporting_service import ReportFormat
+
+router = APIRouter(prefix="/api/v1/exports", tags=["exports"])
+
+
+def get_report_exporter() -> ReportExporter:
+    return ReportExporter(get_container().get_db_connection())
+
+
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query(ReportFormat.CSV),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    exporter: ReportExporter = Depends(get_report_exporter),
+):
+    try:
+        body = exporter.export(dataset, format, start_date, end_date)
+    except ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filename = exporter.filename(dataset, format)
+    # StreamingResponse may pull each block on a different threadpool worker;
+    # the export and its pooled connection stay on one thread of their own
+    return StreamingResponse(
+        iterate_in_thread(body),
+        media_type=exporter.media_type(format),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,8 +1,46 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from src.api.zapier_test_endpoints import router as zapier_router
+from src.api.export_endpoints import router as export_router
+from src.api.analytics_endpoints import router as analytics_router, shutdown_executor
+from src.api.webhook_endpoints import router as webhook_router
+from src.container import get_container
+from src.security.audit_writer import shutdown_audit_writers
+from src.services.async_tasks import start_background_workers, stop_background_workers
+from src.services.ledger_checkpoints import LedgerCheckpoints
+from src.services.table_versions import TableVersions
+from src.services.webhook_ingest import get_webhook_ingestor, shutdown_webhook_ingestor
+from src.utils.log_pipeline import shutdown_log_pipelines
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Change counters behind the analytics ETags
+    db = get_container().get_db_connection()
+    TableVersions(db).install()
+    # Month-end balances behind the bank and ledger balance lookups
+    checkpoints = LedgerCheckpoints(db)
+    if checkpoints.install():
+        checkpoints.refresh()
+    get_webhook_ingestor()
+    # Workers for jobs queued through async_tasks
+    start_background_workers()
+    yield
+    stop_background_workers()
+    shutdown_webhook_ingestor()
+    # Commit queued and spilled audit rows before the process exits
+    shutdown_audit_writers()
+    shutdown_executor()
+    # Last, so records logged while shutting down are written too
+    shutdown_log_pipelines()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.include_router(zapier_router)
+app.include_router(export_router)
+app.include_router(analytics_router)
+app.include_router(webhook_router)
 
 
 # Optional root endpoint
@@ -0,0 +1,53 @@
+"""
+Webhook ingestion endpoints backed by the batched ``WebhookIngestor``.
+"""
+
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import JSONResponse
+
+from src.services.webhook_ingest import (
+    QueueFullError,
+    WebhookError,
+    get_webhook_ingestor,
+)
+
+router = APIRouter(prefix="/api/v1/webhooks", tags=["webhooks"])
+
+# Seconds a sender is told to wait when the queue is full
+RETRY_AFTER_SECONDS = 1
+
+
+async def accept_webhook(payload: Dict[str, Any], key: Optional[str] = None) -> JSONResponse:
+    """Enqueue a webhook and answer once its batch has committed.
+
+    New events get 202, retried deliveries of a stored event get 200.
+    """
+    try:
+        result = await get_webhook_ingestor().ingest_async(payload, key)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    except WebhookError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing webhook: {str(e)}")
+    status_code = 202 if result["status"] == "accepted" else 200
+    return JSONResponse(status_code=status_code, content=result)
+
+
+@router.post("")
+async def ingest_webhook(
+    payload: Dict[str, Any],
+    idempotency_key: Optional[str] = Header(None),
+):
+    return await accept_webhook(payload, idempotency_key)
+
+
+@router.get("/metrics")
+def webhook_metrics():
+    return get_webhook_ingestor().metrics()
@@ -3,42 +3,68 @@ from typing import Dict, Any
 import logging
 from datetime import datetime
 
+from src.services.webhook_ingest import (
+    QueueFullError,
+    WebhookError,
+    WebhookEvent,
+    get_webhook_ingestor,
+)
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def handle_webhook_event(payload: Dict[str, Any]) -> Dict[str, Any]:
+def handle_webhook_event(payload: Dict[str, Any], dry_run: bool = False) -> Dict[str, Any]:
     """
     Process incoming webhook events and route them to appropriate handlers.
-    
+
+    This is synchronous: it blocks until the event's batch has committed, for
+    up to 30 seconds (``WebhookIngestor.ingest``). Call it only from ``def``
+    routes, which FastAPI runs in its threadpool; ``async def`` routes must
+    use ``WebhookIngestor.ingest_async`` instead.
+
     Args:
         payload: The webhook payload
-        
+        dry_run: Validate and map the event without persisting it
+
     Returns:
         Dict containing status and processing results
     """
+    event_type = payload.get("type")
+
+    # Log the incoming webhook
+    logger.info(f"Processing webhook event: {event_type}")
+    logger.debug(f"Webhook payload: {payload}")
+
+    handlers = {
+        "incoming_stripe_payout": _handle_stripe_payout,
+        "incoming_wire": _handle_incoming_wire,
+        "outgoing_payment": _handle_outgoing_payment,
+    }
+    if event_type not in handlers:
+        error_msg = f"Unsupported event type: {event_type}"
+        logger.warning(error_msg)
+        raise HTTPException(status_code=400, detail=error_msg)
+
     try:
-        event_type = payload.get("type")
-        
-        # Log the incoming webhook
-        logger.info(f"Processing webhook event: {event_type}")
-        logger.debug(f"Webhook payload: {payload}")
-        
-        # Route to appropriate handler based on event type
-        if event_type == "incoming_stripe_payout":
-            return _handle_stripe_payout(payload)
-        elif event_type == "incoming_wire":
-            return _handle_incoming_wire(payload)
-        elif event_type == "outgoing_payment":
-            return _handle_outgoing_payment(payload)
+        if dry_run:
+            event = WebhookEvent.from_payload(payload)
+            ingested = {"status": "dry_run", "idempotency_key": event.key}
         else:
-            error_msg = f"Unsupported event type: {event_type}"
-            logger.warning(error_msg)
-            raise HTTPException(status_code=400, detail=error_msg)
-            
+            # Persist through the batched, idempotent ingestion pipeline
+            ingested = get_webhook_ingestor().ingest(payload)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except WebhookError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error processing webhook: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error processing webhook: {str(e)}")
 
+    result = handlers[event_type](payload)
+    result["ingest_status"] = ingested["status"]
+    result["idempotency_key"] = ingested["idempotency_key"]
+    return result
+
 def _handle_stripe_payout(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Handle Stripe payout webhook events."""
     return {
@@ -13,8 +13,8 @@ def test_stripe_payout():
         "description": "Stripe payout batch #107381"
     }
     
-    # Call the actual webhook handler
-    return handle_webhook_event(payload)
+    # Run the real handler without recording the sample as a cost
+    return handle_webhook_event(payload, dry_run=True)
 
 @router.post("/zapier/test/incoming_wire")
 def test_incoming_wire():
@@ -26,8 +26,8 @@ def test_incoming_wire():
         "description": "Wire from Guest (Invoice #7851)"
     }
     
-    # Call the actual webhook handler
-    return handle_webhook_event(payload)
+    # Run the real handler without recording the sample as a cost
+    return handle_webhook_event(payload, dry_run=True)
 
 @router.post("/zapier/test/outgoing_ocbc")
 def test_outgoing_ocbc():
@@ -40,5 +40,5 @@ def test_outgoing_ocbc():
         "description": "Monthly Google Ads payment"
     }
     
-    # Call the actual webhook handler
-    return handle_webhook_event(payload)
+    # Run the real handler without recording the sample as a cost
+    return handle_webhook_event(payload, dry_run=True)
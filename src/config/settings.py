@@ -26,6 +26,9 @@ class DatabaseConfig(BaseSettings):
     users_db_path: str = Field(default="users.db", env="USERS_DATABASE_PATH")
     connection_timeout: float = Field(default=30.0, env="DATABASE_TIMEOUT")
     enable_foreign_keys: bool = Field(default=True, env="DATABASE_FOREIGN_KEYS")
+    pool_max_size: int = Field(default=8, ge=1, env="DATABASE_POOL_MAX_SIZE")
+    pool_max_readers: int = Field(default=8, ge=1, env="DATABASE_POOL_MAX_READERS")
+    pool_idle_timeout: float = Field(default=300.0, env="DATABASE_POOL_IDLE_TIMEOUT")
 
     @property
     def absolute_path(self) -> str:
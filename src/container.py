@@ -44,7 +44,7 @@ class Container:
     def configure(self, settings: Optional[Settings] = None) -> None:
         """Configure the container with settings."""
         self._settings = settings or Settings()
-        self._db_connection = DatabaseConnection(self._settings.database.path)
+        self._db_connection = self._create_db_connection(self._settings)
 
         # Register core services
         self._register_repositories()
@@ -60,9 +60,21 @@ class Container:
         """Get database connection."""
         if not self._db_connection:
             settings = self.get_settings()
-            self._db_connection = DatabaseConnection(settings.database.path)
+            self._db_connection = self._create_db_connection(settings)
         return self._db_connection
 
+    @staticmethod
+    def _create_db_connection(settings: Settings) -> DatabaseConnection:
+        """Create the database connection with pool limits from settings."""
+        db_config = settings.database
+        return DatabaseConnection(
+            db_config.path,
+            max_size=db_config.pool_max_size,
+            max_readers=db_config.pool_max_readers,
+            idle_timeout=db_config.pool_idle_timeout,
+            timeout=db_config.connection_timeout,
+        )
+
     def _register_repositories(self) -> None:
         """Register repository instances."""
         db = self.get_db_connection()
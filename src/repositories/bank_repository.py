@@ -3,8 +3,12 @@ from typing import Optional, List, Dict, Any
 from datetime import date
 import uuid
 
+import numpy as np
+import pandas as pd
+
 from src.repositories.base import DatabaseConnection
 from src.services.error_handler import get_error_handler
+from src.services.ledger_checkpoints import LedgerCheckpoints
 
 
 class BankRepository:
@@ -23,6 +27,7 @@ class BankRepository:
         from src.container import get_container
         self.db = db or get_container().get_db_connection()
         self.error_handler = get_error_handler()
+        self.checkpoints = LedgerCheckpoints(self.db)
         self.create_tables_if_missing()
 
     def create_tables_if_missing(self) -> None:
@@ -72,9 +77,14 @@ class BankRepository:
             # Ensure optional column on cash_ledger
             try:
                 cur.execute("PRAGMA table_info(cash_ledger)")
-                cols = [row[1] for row in cur.fetchall()]
+                cols = [row["name"] for row in cur.fetchall()]
                 if "bank_account_id" not in cols:
                     cur.execute("ALTER TABLE cash_ledger ADD COLUMN bank_account_id TEXT NULL")
+                # Covers the per-account balance sums and daily flow ranges
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_cash_ledger_account_date "
+                    "ON cash_ledger(bank_account_id, entry_date, amount)"
+                )
             except Exception as e:
                 # Log but don't raise
                 self.error_handler.handle_database_error(
@@ -220,68 +230,124 @@ class BankRepository:
                 raise
 
     def get_account_balances(self, as_of_date: Optional[date | str] = None) -> List[Dict[str, Any]]:
+        """Balances of all active accounts, optionally as of a date.
+
+        Ledger totals come from the month-end checkpoints plus the entries
+        after them (see ``LedgerCheckpoints``); opening balances and
+        adjustments for every account come from one grouped query.
+        """
         as_of = self._iso(as_of_date) if as_of_date else None
-        with self.db.get_connection() as conn:
-            cur = conn.cursor()
+        ledger = self.checkpoints.totals_as_of(date.fromisoformat(as_of) if as_of else None)
+        adjustment_filter = "WHERE date <= :as_of" if as_of else ""
+        query = f"""
+            WITH adjustments AS (
+                SELECT bank_account_id, SUM(amount) AS total
+                  FROM bank_adjustments {adjustment_filter}
+              GROUP BY bank_account_id
+            )
+            SELECT a.id AS account_id,
+                   a.name,
+                   a.currency,
+                   COALESCE(ob.opening_balance, 0) AS opening_balance,
+                   COALESCE(adj.total, 0) AS adjustments_total
+              FROM bank_accounts a
+              LEFT JOIN bank_opening_balances ob ON ob.bank_account_id = a.id
+              LEFT JOIN adjustments adj ON adj.bank_account_id = a.id
+             WHERE a.is_active = 1
+          ORDER BY a.name
+        """
+        with self.db.get_connection(readonly=True) as conn:
+            rows = conn.execute(query, {"as_of": as_of}).fetchall()
 
-            # Load accounts
-            cur.execute("SELECT * FROM bank_accounts WHERE is_active = 1 ORDER BY name")
-            accounts = cur.fetchall()
-            results: List[Dict[str, Any]] = []
+        results: List[Dict[str, Any]] = []
+        for row in rows:
+            opening_balance = float(row["opening_balance"] or 0.0)
+            adjustments_total = float(row["adjustments_total"] or 0.0)
+            totals = ledger.get(row["account_id"])
+            net = totals.net if totals else 0.0
+            results.append(
+                {
+                    "account_id": row["account_id"],
+                    "name": row["name"],
+                    "currency": row["currency"],
+                    "opening_balance": opening_balance,
+                    "inflows": totals.inflow if totals else 0.0,
+                    "outflows": totals.outflow if totals else 0.0,
+                    "adjustments_total": adjustments_total,
+                    "current_balance": opening_balance + net + adjustments_total,
+                }
+            )
+        return results
 
-            for a in accounts:
-                account_id = a.get("id")
-                # Opening balance
-                cur.execute(
-                    "SELECT opening_balance, as_of_date FROM bank_opening_balances WHERE bank_account_id = ?",
-                    (account_id,),
-                )
-                ob_row = cur.fetchone() or {}
-                opening_balance = float(ob_row.get("opening_balance", 0.0) or 0.0)
+    def get_daily_balances(
+        self,
+        start_date: date | str,
+        end_date: date | str,
+        account_ids: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """Closing balance of each active account for every day in a range.
 
-                # Ledger sums (net, inflows, outflows)
-                if as_of:
-                    cur.execute(
-                        "SELECT COALESCE(SUM(amount),0) as net, COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END),0) as inflows, COALESCE(SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END),0) as outflows FROM cash_ledger WHERE bank_account_id = ? AND entry_date <= ?",
-                        (account_id, as_of),
-                    )
-                else:
-                    cur.execute(
-                        "SELECT COALESCE(SUM(amount),0) as net, COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END),0) as inflows, COALESCE(SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END),0) as outflows FROM cash_ledger WHERE bank_account_id = ?",
-                        (account_id,),
-                    )
-                ledger_row = cur.fetchone() or {"net": 0.0, "inflows": 0.0, "outflows": 0.0}
-                net_ledger = float(ledger_row.get("net", 0.0) or 0.0)
-                inflows = float(ledger_row.get("inflows", 0.0) or 0.0)
-                outflows = float(ledger_row.get("outflows", 0.0) or 0.0)
+        Balances before ``start_date`` and the per-day ledger and adjustment
+        flows inside the range are read with two grouped queries; the running
+        balance is a NumPy cumsum over a days x accounts matrix.
 
-                # Adjustments
-                if as_of:
-                    cur.execute(
-                        "SELECT COALESCE(SUM(amount),0) AS total FROM bank_adjustments WHERE bank_account_id = ? AND date <= ?",
-                        (account_id, as_of),
-                    )
-                else:
-                    cur.execute(
-                        "SELECT COALESCE(SUM(amount),0) AS total FROM bank_adjustments WHERE bank_account_id = ?",
-                        (account_id,),
-                    )
-                adj_total_row = cur.fetchone() or {"total": 0.0}
-                adjustments_total = float(adj_total_row.get("total", 0.0) or 0.0)
+        Returns a long DataFrame with columns: date, account_id, name, balance.
+        """
+        start, end = self._iso(start_date), self._iso(end_date)
+        days = pd.date_range(start, end, freq="D")
+        empty = pd.DataFrame(columns=["date", "account_id", "name", "balance"])
+        if days.empty:
+            return empty
+        day_before = (days[0] - pd.Timedelta(days=1)).date()
+        accounts = [
+            a
+            for a in self.get_account_balances(day_before)
+            if account_ids is None or a["account_id"] in account_ids
+        ]
+        if not accounts:
+            return empty
 
-                current_balance = opening_balance + net_ledger + adjustments_total
+        ids = [a["account_id"] for a in accounts]
+        placeholders = ", ".join("?" for _ in ids)
+        with self.db.get_connection(readonly=True) as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            flows = cur.execute(
+                f"""
+                SELECT bank_account_id, day, SUM(amount)
+                  FROM (
+                        SELECT bank_account_id, DATE(entry_date) AS day, amount
+                          FROM cash_ledger
+                         WHERE bank_account_id IN ({placeholders})
+                           AND entry_date BETWEEN ? AND ?
+                        UNION ALL
+                        SELECT bank_account_id, DATE(date) AS day, amount
+                          FROM bank_adjustments
+                         WHERE bank_account_id IN ({placeholders})
+                           AND date BETWEEN ? AND ?
+                       )
+              GROUP BY bank_account_id, day
+                """,
+                [*ids, start, end, *ids, start, end],
+            ).fetchall()
 
-                results.append(
-                    {
-                        "account_id": account_id,
-                        "name": a.get("name"),
-                        "currency": a.get("currency", "USD"),
-                        "opening_balance": opening_balance,
-                        "inflows": inflows,
-                        "outflows": outflows,
-                        "adjustments_total": adjustments_total,
-                        "current_balance": current_balance,
-                    }
-                )
+        daily = np.zeros((len(days), len(ids)))
+        if flows:
+            column = {account_id: i for i, account_id in enumerate(ids)}
+            flow_ids, flow_days, amounts = zip(*flows)
+            rows = days.get_indexer(pd.to_datetime(list(flow_days)))
+            cols = np.array([column[a] for a in flow_ids])
+            values = np.asarray(amounts, dtype=float)
+            known = rows >= 0
+            np.add.at(daily, (rows[known], cols[known]), values[known])
+        opening = np.array([a["current_balance"] for a in accounts])
+        balances = opening + np.cumsum(daily, axis=0)
 
-            return results
+        return pd.DataFrame(
+            {
+                "date": np.repeat(days.date, len(ids)),
+                "account_id": np.tile(ids, len(days)),
+                "name": np.tile([a["name"] for a in accounts], len(days)),
+                "balance": balances.ravel(),
+            }
+        )
@@ -4,8 +4,11 @@ Base repository classes and database connection management.
 
 import sqlite3
 import threading
+import time
+import weakref
 import logging
-from typing import Optional, Dict, Any, List, Union
+from collections import deque
+from typing import Callable, Deque, Optional, Dict, Any, List, Tuple, Union
 from contextlib import contextmanager
 from abc import ABC, abstractmethod
 import os
@@ -19,19 +22,295 @@ logger = logging.getLogger(__name__)
 T = TypeVar("T")
 
 
+# PRAGMAs applied to every pooled SQLite connection
+SQLITE_PRAGMAS: Tuple[str, ...] = (
+    "PRAGMA journal_mode=WAL",  # Write-Ahead Logging
+    "PRAGMA synchronous=NORMAL",  # Balance safety/performance
+    "PRAGMA cache_size=10000",  # 10MB cache
+    "PRAGMA temp_store=MEMORY",  # Use memory for temp tables
+    "PRAGMA mmap_size=268435456",  # 256MB memory map
+    "PRAGMA foreign_keys=ON",  # Enable foreign keys
+)
+
+
+class _PoolLane:
+    """Idle connections and open-connection count for one pool lane."""
+
+    def __init__(self, name: str, max_size: int):
+        self.name = name
+        self.max_size = max(1, max_size)
+        self.idle: Deque[Tuple[sqlite3.Connection, float]] = deque()
+        self.size = 0  # open connections, idle or checked out
+        self.in_use = 0
+
+
+class _ThreadCheckouts:
+    """Per-thread record of checked-out connections (supports nested use)."""
+
+    def __init__(self):
+        # Each entry: [connection, lane name, nesting depth]
+        self.entries: List[List[Any]] = []
+
+
+class ConnectionPool:
+    """Bounded, thread-safe SQLite connection pool.
+
+    - Two lanes: read-write connections and read-only (``query_only``) readers,
+      so WAL readers never queue behind writers for a connection.
+    - Each lane is capped; callers wait up to ``timeout`` for a free connection.
+    - Idle connections older than ``idle_timeout`` seconds are closed.
+    - Checkouts are re-entrant per thread: nested requests reuse the held
+      connection, so a block sees its own uncommitted writes.
+    - Connections still held by a thread when it exits are returned to the pool.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = 8,
+        max_readers: int = 8,
+        idle_timeout: float = 300.0,
+        timeout: float = 30.0,
+        row_factory: Optional[Callable] = None,
+        pragmas: Tuple[str, ...] = SQLITE_PRAGMAS,
+    ):
+        self.db_path = db_path
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.row_factory = row_factory
+        self.pragmas = pragmas
+        # Every connection to ":memory:" is a separate database, so share one
+        self.in_memory = db_path == ":memory:" or db_path.startswith("file::memory:")
+        if self.in_memory:
+            max_size = 1
+
+        self._cond = threading.Condition()
+        self._lanes = {
+            "write": _PoolLane("write", max_size),
+            "read": _PoolLane("read", max_readers),
+        }
+        self._owners: Dict[sqlite3.Connection, Tuple[str, int]] = {}
+        self._generation = 0
+        self._local = threading.local()
+        self._stats = {
+            "checkouts": 0,
+            "reused_checkouts": 0,
+            "pool_hits": 0,
+            "pool_misses": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "idle_evictions": 0,
+            "thread_exit_returns": 0,
+        }
+
+    def _create_connection(self, readonly: bool) -> sqlite3.Connection:
+        """Open a connection and apply the standard PRAGMAs."""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        if self.row_factory is not None:
+            conn.row_factory = self.row_factory
+        return conn
+
+    def _lane_for(self, readonly: bool) -> _PoolLane:
+        if readonly and not self.in_memory:
+            return self._lanes["read"]
+        return self._lanes["write"]
+
+    def _checkouts(self) -> _ThreadCheckouts:
+        holder = getattr(self._local, "checkouts", None)
+        if holder is None:
+            holder = _ThreadCheckouts()
+            # Runs when the thread's locals are torn down (thread exit)
+            weakref.finalize(holder, self._return_abandoned, holder.entries)
+            self._local.checkouts = holder
+        return holder
+
+    def acquire(self, readonly: bool = False) -> sqlite3.Connection:
+        """Check out a connection; pair every call with ``release``."""
+        holder = self._checkouts()
+        for entry in holder.entries:
+            if entry[1] == "write" or (readonly and entry[1] == "read"):
+                entry[2] += 1
+                with self._cond:
+                    self._stats["reused_checkouts"] += 1
+                return entry[0]
+
+        lane = self._lane_for(readonly)
+        conn = self._checkout(lane, readonly)
+        holder.entries.append([conn, lane.name, 1])
+        return conn
+
+    def _checkout(self, lane: _PoolLane, readonly: bool) -> sqlite3.Connection:
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        with self._cond:
+            self._evict_idle_locked(started)
+            while True:
+                if lane.idle:
+                    conn, _ = lane.idle.pop()  # most recently used first
+                    self._stats["pool_hits"] += 1
+                    break
+                if lane.size < lane.max_size:
+                    lane.size += 1  # reserve the slot, connect outside the lock
+                    conn = None
+                    self._stats["pool_misses"] += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise sqlite3.OperationalError(
+                        f"Timed out waiting for a {lane.name} connection "
+                        f"(pool size {lane.max_size})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+
+        if conn is None:
+            try:
+                conn = self._create_connection(readonly and lane.name == "read")
+            except Exception:
+                with self._cond:
+                    lane.size -= 1
+                    self._cond.notify()
+                raise
+
+        waited_for = time.monotonic() - started
+        with self._cond:
+            if conn not in self._owners:
+                self._owners[conn] = (lane.name, self._generation)
+                self._stats["connections_created"] += 1
+            lane.in_use += 1
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_time_total"] += waited_for
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited_for)
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection obtained from ``acquire``."""
+        holder = self._checkouts()
+        for i, entry in enumerate(holder.entries):
+            if entry[0] is conn:
+                entry[2] -= 1
+                if entry[2] > 0:
+                    return
+                del holder.entries[i]
+                break
+        self._return(conn)
+
+    def _return(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                # Never hand a half-finished transaction to the next borrower
+                conn.rollback()
+        except sqlite3.Error:
+            pass
+        with self._cond:
+            lane_name, generation = self._owners.get(conn, ("write", -1))
+            lane = self._lanes[lane_name]
+            lane.in_use = max(0, lane.in_use - 1)
+            if generation != self._generation:
+                self._close_locked(conn, lane)
+            else:
+                lane.idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _return_abandoned(self, entries: List[List[Any]]) -> None:
+        """Give back connections left checked out by an exited thread."""
+        for conn, _, _ in list(entries):
+            with self._cond:
+                self._stats["thread_exit_returns"] += 1
+            self._return(conn)
+        entries.clear()
+
+    def _close_locked(self, conn: sqlite3.Connection, lane: _PoolLane) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._owners.pop(conn, None)
+        lane.size = max(0, lane.size - 1)
+        self._stats["connections_closed"] += 1
+
+    def _evict_idle_locked(self, now: float) -> None:
+        if self.idle_timeout is None:
+            return
+        for lane in self._lanes.values():
+            # Oldest idle connections sit at the left end
+            while lane.idle and now - lane.idle[0][1] > self.idle_timeout:
+                conn, _ = lane.idle.popleft()
+                self._close_locked(conn, lane)
+                self._stats["idle_evictions"] += 1
+
+    def evict_idle(self) -> None:
+        """Close connections idle for longer than ``idle_timeout``."""
+        with self._cond:
+            self._evict_idle_locked(time.monotonic())
+
+    @contextmanager
+    def connection(self, readonly: bool = False):
+        """Context manager around ``acquire``/``release``."""
+        conn = self.acquire(readonly=readonly)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self) -> None:
+        """Close idle connections; checked-out ones close when released."""
+        with self._cond:
+            self._generation += 1
+            for lane in self._lanes.values():
+                while lane.idle:
+                    conn, _ = lane.idle.pop()
+                    self._close_locked(conn, lane)
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Live pool metrics: checkouts, wait time and size per lane."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["avg_wait_time"] = (
+                stats["wait_time_total"] / stats["waits"] if stats["waits"] else 0.0
+            )
+            stats["size"] = sum(lane.size for lane in self._lanes.values())
+            stats["in_use"] = sum(lane.in_use for lane in self._lanes.values())
+            stats["idle"] = sum(len(lane.idle) for lane in self._lanes.values())
+            stats["lanes"] = {
+                name: {
+                    "max_size": lane.max_size,
+                    "size": lane.size,
+                    "in_use": lane.in_use,
+                    "idle": len(lane.idle),
+                }
+                for name, lane in self._lanes.items()
+            }
+            return stats
+
+
 class DatabaseConnection:
-    """Thread-safe database connection manager with connection pooling."""
+    """Thread-safe database connection manager backed by a bounded connection pool."""
 
     _instance = None
     _lock = threading.Lock()
-    _connections = {}
 
-    def __new__(cls, db_path: str = "cashflow.db"):
+    def __new__(cls, db_path: str = "cashflow.db", **pool_options: Any):
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
                     cls._instance = super().__new__(cls)
                     cls._instance.db_path = db_path
+                    cls._instance._pool_options = pool_options
+                    cls._instance._pool = None
         return cls._instance
 
     @staticmethod
@@ -39,20 +318,30 @@ class DatabaseConnection:
         """Convert row to dictionary"""
         return {col[0]: row[idx] for idx, col in enumerate(cursor.description)}
 
-    @contextmanager
-    def get_connection(self):
-        """Get a database connection for the current thread."""
-        thread_id = threading.get_ident()
+    def __reduce__(self):
+        # Pickles by path: another process opens its own pool
+        return _restore_database_connection, (self.db_path, self._pool_options)
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """Connection pool for this database (created on first use)."""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    options = {"timeout": 30.0, **self._pool_options}
+                    self._pool = ConnectionPool(
+                        self.db_path, row_factory=self._dict_factory, **options
+                    )
+        return self._pool
 
-        if thread_id not in self._connections:
-            self._connections[thread_id] = sqlite3.connect(
-                self.db_path, check_same_thread=False, timeout=30.0
-            )
-            self._connections[thread_id].row_factory = self._dict_factory
-            # Enable foreign keys
-            self._connections[thread_id].execute("PRAGMA foreign_keys = ON")
+    @contextmanager
+    def get_connection(self, readonly: bool = False):
+        """Check out a pooled connection for the current thread.
 
-        conn = self._connections[thread_id]
+        Pass ``readonly=True`` for pure reads to use the reader lane.
+        """
+        pool = self.pool
+        conn = pool.acquire(readonly=readonly)
         try:
             yield conn
         except Exception as e:
@@ -60,13 +349,23 @@ class DatabaseConnection:
             logger.error(f"Database error: {e}")
             raise
         finally:
-            conn.commit()
+            try:
+                conn.commit()
+            finally:
+                pool.release(conn)
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Live connection pool metrics."""
+        return self.pool.get_stats()
 
     def close_all_connections(self):
         """Close all database connections."""
-        for conn in self._connections.values():
-            conn.close()
-        self._connections.clear()
+        if self._pool is not None:
+            self._pool.close_all()
+
+
+def _restore_database_connection(db_path: str, pool_options: Dict[str, Any]) -> "DatabaseConnection":
+    return DatabaseConnection(db_path, **pool_options)
 
 
 class BaseRepository(ABC, Generic[T]):
@@ -99,7 +398,7 @@ class BaseRepository(ABC, Generic[T]):
 
     def find_by_id(self, id: str) -> Optional[T]:
         """Find entity by ID."""
-        with self.db.get_connection() as conn:
+        with self.db.get_connection(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute(f"SELECT * FROM {self._table_name} WHERE id = ?", (id,))
             row = cursor.fetchone()
@@ -107,7 +406,7 @@ class BaseRepository(ABC, Generic[T]):
 
     def find_all(self, limit: Optional[int] = None, offset: int = 0) -> List[T]:
         """Find all entities with optional pagination."""
-        with self.db.get_connection() as conn:
+        with self.db.get_connection(readonly=True) as conn:
             cursor = conn.cursor()
             query = f"SELECT * FROM {self._table_name}"
             params = []
@@ -174,7 +473,7 @@ class BaseRepository(ABC, Generic[T]):
 
     def count(self) -> int:
         """Count total entities."""
-        with self.db.get_connection() as conn:
+        with self.db.get_connection(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute(f"SELECT COUNT(*) FROM {self._table_name}")
             return cursor.fetchone()[0]
@@ -1,10 +1,14 @@
-from typing import List, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from datetime import date
+import logging
+import sqlite3
+import threading
 import uuid
 
 from src.container import get_container
 from src.repositories.base import DatabaseConnection
 from src.services.error_handler import get_error_handler
+from src.services.cache_invalidation import notify_table_write
 
 # Import models for type hints only (avoid runtime dependency cycles)
 try:
@@ -13,6 +17,54 @@ except Exception:
     LeadModel = object  # type: ignore
     BookingModel = object  # type: ignore
 
+logger = logging.getLogger(__name__)
+
+# Rows per executemany/commit in bulk mode
+DEFAULT_BATCH_SIZE = 5000
+# Keep IN (...) lists well under SQLITE_MAX_VARIABLE_NUMBER
+_KEY_LOOKUP_CHUNK = 500
+# INSERT ... ON CONFLICT DO UPDATE needs SQLite 3.24+
+SUPPORTS_UPSERT = sqlite3.sqlite_version_info >= (3, 24, 0)
+
+_LEADS_UPSERT_SQL = """
+    INSERT INTO leads (
+        lead_id, email, created_at, mql_yes, sql_yes,
+        utm_source, utm_medium, utm_campaign, raw_source, unique_key
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(unique_key) DO UPDATE SET
+        email = excluded.email,
+        mql_yes = excluded.mql_yes,
+        sql_yes = excluded.sql_yes,
+        utm_source = excluded.utm_source,
+        utm_medium = excluded.utm_medium,
+        utm_campaign = excluded.utm_campaign,
+        raw_source = excluded.raw_source
+"""
+
+_BOOKINGS_UPSERT_SQL = """
+    INSERT INTO bookings (
+        booking_id, booking_date, arrival_date, departure_date, guests, amount, email, raw_source
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(booking_id) DO UPDATE SET
+        booking_date = excluded.booking_date,
+        arrival_date = excluded.arrival_date,
+        departure_date = excluded.departure_date,
+        guests = excluded.guests,
+        amount = excluded.amount,
+        email = excluded.email,
+        raw_source = excluded.raw_source
+"""
+
+# Databases whose schema has been checked by this process
+_schema_checked: Set[Any] = set()
+_schema_lock = threading.Lock()
+
+
+def reset_schema_cache() -> None:
+    """Forget which databases have had their schema checked (e.g. after recreating a file)."""
+    with _schema_lock:
+        _schema_checked.clear()
+
 
 class IngestRepository:
     """
@@ -21,6 +73,11 @@ class IngestRepository:
     Schema:
       - leads(lead_id PK, email, created_at, mql_yes, sql_yes, utm_source, utm_medium, utm_campaign, raw_source, unique_key UNIQUE)
       - bookings(booking_id PK, booking_date, arrival_date, departure_date, guests, amount, email, raw_source)
+
+    Upserts run in bulk mode by default: batched ``executemany`` of
+    ``INSERT ... ON CONFLICT DO UPDATE``, one transaction per batch. Pass
+    ``bulk=False`` for the per-row SELECT + UPDATE/INSERT path, which is also
+    used automatically for a batch that fails as a whole.
     """
 
     def __init__(self, db: Optional[DatabaseConnection] = None) -> None:
@@ -66,14 +123,24 @@ class IngestRepository:
             # Ensure required columns exist (idempotent)
             self.ensure_columns(conn)
 
+    def ensure_schema(self) -> None:
+        """Run ``create_tables_if_missing`` once per database per process."""
+        key = getattr(self.db, "db_path", None) or id(self.db)
+        if key in _schema_checked:
+            return
+        with _schema_lock:
+            if key not in _schema_checked:
+                self.create_tables_if_missing()
+                _schema_checked.add(key)
+
     def column_exists(self, conn, table: str, column: str) -> bool:
         """Return True if a column exists on a table using PRAGMA table_info.
-        Uses tuple indexing (row[1] is the column name) to avoid KeyError.
+        Reads the column name as row["name"] for dict rows, else row[1].
         """
         try:
             cur = conn.cursor()
             cur.execute(f"PRAGMA table_info({table})")
-            cols = [row[1] for row in cur.fetchall()]
+            cols = [row["name"] if isinstance(row, dict) else row[1] for row in cur.fetchall()]
             return column in cols
         except Exception:
             # If PRAGMA fails for any reason, be conservative and return False
@@ -99,150 +166,342 @@ class IngestRepository:
     def _to_iso(d: Optional[date]) -> Optional[str]:
         return d.isoformat() if d else None
 
-    def upsert_leads(self, records: List["LeadModel"], raw_source: str = "airtable:Main") -> Dict[str, int]:
+    def upsert_leads(
+        self,
+        records: List["LeadModel"],
+        raw_source: str = "airtable:Main",
+        bulk: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> Dict[str, int]:
         """
         Idempotent upsert for leads.
         unique_key = f"{email}|{created_at}"
         If exists -> update MQL/SQL/UTM fields. Else insert new row with UUID4 lead_id.
         """
-        inserted = 0
-        updated = 0
-        self.create_tables_if_missing()
+        written_dates: List[Optional[str]] = []
+        self.ensure_schema()
         with self.db.get_connection() as conn:
             cur = conn.cursor()
-            for r in records:
-                try:
-                    email = (getattr(r, "email", None) or "").strip().lower()
-                    created_at = self._to_iso(getattr(r, "created_date", None))
-                    if not created_at:
-                        # Skip if no created date (shouldn't happen due to model)
-                        continue
-                    unique_key = f"{email}|{created_at}"
-
-                    cur.execute("SELECT lead_id FROM leads WHERE unique_key = ?", (unique_key,))
-                    row = cur.fetchone()
-                    if row:
-                        # Update existing
-                        cur.execute(
-                            """
-                            UPDATE leads
-                               SET email = ?,
-                                   mql_yes = ?,
-                                   sql_yes = ?,
-                                   utm_source = ?,
-                                   utm_medium = ?,
-                                   utm_campaign = ?,
-                                   raw_source = ?
-                             WHERE unique_key = ?
-                            """,
-                            (
-                                email,
-                                bool(getattr(r, "is_mql", False)),
-                                bool(getattr(r, "is_sql", False)),
-                                getattr(r, "utm_source", None),
-                                getattr(r, "utm_medium", None),
-                                getattr(r, "utm_campaign", None),
-                                raw_source,
-                                unique_key,
-                            ),
-                        )
-                        updated += 1
-                    else:
-                        lead_id = str(uuid.uuid4())
-                        cur.execute(
-                            """
-                            INSERT INTO leads (
-                                lead_id, email, created_at, mql_yes, sql_yes,
-                                utm_source, utm_medium, utm_campaign, raw_source, unique_key
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            """,
-                            (
-                                lead_id,
-                                email,
-                                created_at,
-                                bool(getattr(r, "is_mql", False)),
-                                bool(getattr(r, "is_sql", False)),
-                                getattr(r, "utm_source", None),
-                                getattr(r, "utm_medium", None),
-                                getattr(r, "utm_campaign", None),
-                                raw_source,
-                                unique_key,
-                            ),
-                        )
-                        inserted += 1
-                except Exception as e:
-                    # Log but continue processing
-                    self.error_handler.handle_database_error(e, operation="upsert_leads", affected_table="leads")
-                    continue
+            if bulk and SUPPORTS_UPSERT:
+                inserted, updated = self._bulk_upsert(
+                    conn, cur, "leads", records, raw_source, batch_size, written_dates
+                )
+            else:
+                inserted, updated = self._upsert_lead_rows(cur, records, raw_source, written_dates)
+        if written_dates:
+            notify_table_write("leads", written_dates)
         return {"inserted": inserted, "updated": updated}
 
-    def upsert_bookings(self, records: List["BookingModel"], raw_source: str = "airtable:Bookings<>Able") -> Dict[str, int]:
+    def _lead_params(self, r: "LeadModel", raw_source: str) -> Optional[Tuple]:
+        """Insert parameters for a lead (without lead_id), or None to skip it."""
+        email = (getattr(r, "email", None) or "").strip().lower()
+        created_at = self._to_iso(getattr(r, "created_date", None))
+        if not created_at:
+            # Skip if no created date (shouldn't happen due to model)
+            return None
+        return (
+            email,
+            created_at,
+            bool(getattr(r, "is_mql", False)),
+            bool(getattr(r, "is_sql", False)),
+            getattr(r, "utm_source", None),
+            getattr(r, "utm_medium", None),
+            getattr(r, "utm_campaign", None),
+            raw_source,
+            f"{email}|{created_at}",
+        )
+
+    def _upsert_lead_rows(
+        self, cur, records: Iterable["LeadModel"], raw_source: str, written_dates: List[Optional[str]]
+    ) -> Tuple[int, int]:
+        """Per-row path: SELECT by unique_key, then UPDATE or INSERT."""
+        inserted = 0
+        updated = 0
+        for r in records:
+            try:
+                email = (getattr(r, "email", None) or "").strip().lower()
+                created_at = self._to_iso(getattr(r, "created_date", None))
+                if not created_at:
+                    # Skip if no created date (shouldn't happen due to model)
+                    continue
+                unique_key = f"{email}|{created_at}"
+
+                cur.execute("SELECT lead_id FROM leads WHERE unique_key = ?", (unique_key,))
+                row = cur.fetchone()
+                if row:
+                    # Update existing
+                    cur.execute(
+                        """
+                        UPDATE leads
+                           SET email = ?,
+                               mql_yes = ?,
+                               sql_yes = ?,
+                               utm_source = ?,
+                               utm_medium = ?,
+                               utm_campaign = ?,
+                               raw_source = ?
+                         WHERE unique_key = ?
+                        """,
+                        (
+                            email,
+                            bool(getattr(r, "is_mql", False)),
+                            bool(getattr(r, "is_sql", False)),
+                            getattr(r, "utm_source", None),
+                            getattr(r, "utm_medium", None),
+                            getattr(r, "utm_campaign", None),
+                            raw_source,
+                            unique_key,
+                        ),
+                    )
+                    updated += 1
+                    written_dates.append(created_at)
+                else:
+                    lead_id = str(uuid.uuid4())
+                    cur.execute(
+                        """
+                        INSERT INTO leads (
+                            lead_id, email, created_at, mql_yes, sql_yes,
+                            utm_source, utm_medium, utm_campaign, raw_source, unique_key
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        (
+                            lead_id,
+                            email,
+                            created_at,
+                            bool(getattr(r, "is_mql", False)),
+                            bool(getattr(r, "is_sql", False)),
+                            getattr(r, "utm_source", None),
+                            getattr(r, "utm_medium", None),
+                            getattr(r, "utm_campaign", None),
+                            raw_source,
+                            unique_key,
+                        ),
+                    )
+                    inserted += 1
+                    written_dates.append(created_at)
+            except Exception as e:
+                # Log but continue processing
+                self.error_handler.handle_database_error(e, operation="upsert_leads", affected_table="leads")
+                continue
+        return inserted, updated
+
+    def upsert_bookings(
+        self,
+        records: List["BookingModel"],
+        raw_source: str = "airtable:Bookings<>Able",
+        bulk: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> Dict[str, int]:
         """
         Idempotent upsert for bookings by booking_id.
         If booking_id exists -> update numeric/date fields; else insert.
         """
-        inserted = 0
-        updated = 0
-        self.create_tables_if_missing()
+        written_dates: List[Optional[str]] = []
+        self.ensure_schema()
         with self.db.get_connection() as conn:
             cur = conn.cursor()
-            for r in records:
-                try:
-                    booking_id = getattr(r, "booking_id", None)
-                    if not booking_id:
-                        continue
-
-                    cur.execute("SELECT booking_id FROM bookings WHERE booking_id = ?", (booking_id,))
-                    row = cur.fetchone()
-                    if row:
-                        cur.execute(
-                            """
-                            UPDATE bookings
-                               SET booking_date = ?,
-                                   arrival_date = ?,
-                                   departure_date = ?,
-                                   guests = ?,
-                                   amount = ?,
-                                   email = ?,
-                                   raw_source = ?
-                             WHERE booking_id = ?
-                            """,
-                            (
-                                self._to_iso(getattr(r, "booking_date", None)),
-                                self._to_iso(getattr(r, "arrival_date", None)),
-                                self._to_iso(getattr(r, "departure_date", None)),
-                                int(getattr(r, "guests", 0) or 0),
-                                float(getattr(r, "amount", 0.0) or 0.0),
-                                (getattr(r, "email", None) or None),
-                                raw_source,
-                                booking_id,
-                            ),
-                        )
-                        updated += 1
-                    else:
-                        cur.execute(
-                            """
-                            INSERT INTO bookings (
-                                booking_id, booking_date, arrival_date, departure_date, guests, amount, email, raw_source
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                            """,
-                            (
-                                booking_id,
-                                self._to_iso(getattr(r, "booking_date", None)),
-                                self._to_iso(getattr(r, "arrival_date", None)),
-                                self._to_iso(getattr(r, "departure_date", None)),
-                                int(getattr(r, "guests", 0) or 0),
-                                float(getattr(r, "amount", 0.0) or 0.0),
-                                (getattr(r, "email", None) or None),
-                                raw_source,
-                            ),
-                        )
-                        inserted += 1
-                except Exception as e:
-                    self.error_handler.handle_database_error(e, operation="upsert_bookings", affected_table="bookings")
-                    continue
+            if bulk and SUPPORTS_UPSERT:
+                inserted, updated = self._bulk_upsert(
+                    conn, cur, "bookings", records, raw_source, batch_size, written_dates
+                )
+            else:
+                inserted, updated = self._upsert_booking_rows(cur, records, raw_source, written_dates)
+        if written_dates:
+            notify_table_write("bookings", written_dates)
         return {"inserted": inserted, "updated": updated}
 
+    def _booking_params(self, r: "BookingModel", raw_source: str) -> Optional[Tuple]:
+        """Insert parameters for a booking, or None to skip it."""
+        booking_id = getattr(r, "booking_id", None)
+        if not booking_id:
+            return None
+        return (
+            booking_id,
+            self._to_iso(getattr(r, "booking_date", None)),
+            self._to_iso(getattr(r, "arrival_date", None)),
+            self._to_iso(getattr(r, "departure_date", None)),
+            int(getattr(r, "guests", 0) or 0),
+            float(getattr(r, "amount", 0.0) or 0.0),
+            (getattr(r, "email", None) or None),
+            raw_source,
+        )
+
+    def _upsert_booking_rows(
+        self, cur, records: Iterable["BookingModel"], raw_source: str, written_dates: List[Optional[str]]
+    ) -> Tuple[int, int]:
+        """Per-row path: SELECT by booking_id, then UPDATE or INSERT."""
+        inserted = 0
+        updated = 0
+        for r in records:
+            try:
+                booking_id = getattr(r, "booking_id", None)
+                if not booking_id:
+                    continue
+
+                cur.execute("SELECT booking_id FROM bookings WHERE booking_id = ?", (booking_id,))
+                row = cur.fetchone()
+                if row:
+                    cur.execute(
+                        """
+                        UPDATE bookings
+                           SET booking_date = ?,
+                               arrival_date = ?,
+                               departure_date = ?,
+                               guests = ?,
+                               amount = ?,
+                               email = ?,
+                               raw_source = ?
+                         WHERE booking_id = ?
+                        """,
+                        (
+                            self._to_iso(getattr(r, "booking_date", None)),
+                            self._to_iso(getattr(r, "arrival_date", None)),
+                            self._to_iso(getattr(r, "departure_date", None)),
+                            int(getattr(r, "guests", 0) or 0),
+                            float(getattr(r, "amount", 0.0) or 0.0),
+                            (getattr(r, "email", None) or None),
+                            raw_source,
+                            booking_id,
+                        ),
+                    )
+                    updated += 1
+                    # The previous booking_date is unknown here: invalidate all months
+                    written_dates.append(None)
+                else:
+                    cur.execute(
+                        """
+                        INSERT INTO bookings (
+                            booking_id, booking_date, arrival_date, departure_date, guests, amount, email, raw_source
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """,
+                        (
+                            booking_id,
+                            self._to_iso(getattr(r, "booking_date", None)),
+                            self._to_iso(getattr(r, "arrival_date", None)),
+                            self._to_iso(getattr(r, "departure_date", None)),
+                            int(getattr(r, "guests", 0) or 0),
+                            float(getattr(r, "amount", 0.0) or 0.0),
+                            (getattr(r, "email", None) or None),
+                            raw_source,
+                        ),
+                    )
+                    inserted += 1
+                    written_dates.append(self._to_iso(getattr(r, "booking_date", None)))
+            except Exception as e:
+                self.error_handler.handle_database_error(e, operation="upsert_bookings", affected_table="bookings")
+                continue
+        return inserted, updated
+
+    # ------------------------------------------------------------------
+    # Bulk mode
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _existing_keys(conn, table: str, key_column: str, keys: Set[str]) -> Set[str]:
+        """Subset of ``keys`` already present in ``table``."""
+        cur = conn.cursor()
+        cur.row_factory = None  # plain tuples; skip the dict factory for key lookups
+        found: Set[str] = set()
+        key_list = list(keys)
+        for i in range(0, len(key_list), _KEY_LOOKUP_CHUNK):
+            chunk = key_list[i : i + _KEY_LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            cur.execute(
+                f"SELECT {key_column} FROM {table} WHERE {key_column} IN ({placeholders})",
+                chunk,
+            )
+            found.update(row[0] for row in cur.fetchall())
+        return found
+
+    def _bulk_upsert(
+        self,
+        conn,
+        cur,
+        table: str,
+        records: Iterable[Any],
+        raw_source: str,
+        batch_size: int,
+        written_dates: List[Optional[str]],
+    ) -> Tuple[int, int]:
+        """Batched ON CONFLICT upsert with exact inserted/updated counts.
+
+        Counts come from looking up which keys of a batch already exist
+        before writing it: ``changes()`` counts an upsert as one change
+        either way and ``executemany`` cannot use RETURNING. Duplicate keys
+        within the input count as an insert followed by updates, like the
+        per-row path. A batch that fails is rolled back and replayed row by
+        row so a single bad record does not lose the others.
+        """
+        is_leads = table == "leads"
+        if is_leads:
+            to_params, sql, row_fallback = self._lead_params, _LEADS_UPSERT_SQL, self._upsert_lead_rows
+            key_column, key_index, date_index = "unique_key", -1, 1
+        else:
+            to_params, sql, row_fallback = self._booking_params, _BOOKINGS_UPSERT_SQL, self._upsert_booking_rows
+            key_column, key_index, date_index = "booking_id", 0, 1
+        operation = f"upsert_{table}"
+        batch_size = max(1, batch_size)
+
+        inserted = 0
+        updated = 0
+        batch: List[Tuple] = []
+        batch_records: List[Any] = []
+
+        def flush() -> None:
+            nonlocal inserted, updated
+            keys = [p[key_index] for p in batch]
+            seen = self._existing_keys(conn, table, key_column, set(keys))
+            batch_inserted = batch_updated = 0
+            batch_dates: List[Optional[str]] = []
+            is_new: List[bool] = []
+            for key, p in zip(keys, batch):
+                is_new.append(key not in seen)
+                if key in seen:
+                    batch_updated += 1
+                    # An updated booking may have moved month: invalidate all (as the per-row path)
+                    batch_dates.append(p[date_index] if is_leads else None)
+                else:
+                    batch_inserted += 1
+                    batch_dates.append(p[date_index])
+                    seen.add(key)
+            if is_leads:
+                # lead_id is only used by rows that insert; existing keys take the update branch
+                params = [
+                    (str(uuid.uuid4()) if new else None,) + p for new, p in zip(is_new, batch)
+                ]
+            else:
+                params = batch
+            try:
+                cur.executemany(sql, params)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"Bulk {operation} batch of {len(batch)} failed, retrying row by row: {e}")
+                row_inserted, row_updated = row_fallback(cur, batch_records, raw_source, written_dates)
+                conn.commit()
+                inserted += row_inserted
+                updated += row_updated
+                return
+            inserted += batch_inserted
+            updated += batch_updated
+            written_dates.extend(batch_dates)
+
+        for r in records:
+            try:
+                params = to_params(r, raw_source)
+            except Exception as e:
+                self.error_handler.handle_database_error(e, operation=operation, affected_table=table)
+                continue
+            if params is None:
+                continue
+            batch.append(params)
+            batch_records.append(r)
+            if len(batch) >= batch_size:
+                flush()
+                batch, batch_records = [], []
+        if batch:
+            flush()
+        return inserted, updated
+
 
 # Module-level singleton accessor
 _ingest_repo: Optional[IngestRepository] = None
@@ -4,7 +4,7 @@ Provides authentication, RBAC, encryption, and audit logging
 """
 
 from .auth import AuthManager
-from .audit import AuditLogger, AuditAction, AuditLevel
+from .audit import AuditLogger, AuditAction, AuditLevel, get_audit_logger
 from .encryption import DataEncryption, SecureStorage, HTTPSEnforcer
 
 __all__ = [
@@ -12,6 +12,7 @@ __all__ = [
     "AuditLogger",
     "AuditAction",
     "AuditLevel",
+    "get_audit_logger",
     "DataEncryption",
     "SecureStorage",
     "HTTPSEnforcer",
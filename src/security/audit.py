@@ -2,14 +2,58 @@
 Audit Logging for Financial Operations
 """
 
+import base64
 import logging
 import json
+import os
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Iterable, Optional, List, Tuple
 from enum import Enum
 from ..repositories.base import DatabaseConnection
-from .encryption import SecureStorage
+from .audit_writer import AuditWriter
+from .encryption import DataEncryption, SecureStorage
+
+# Columns of the lightweight audit rows; ``details`` stays undecrypted
+AUDIT_SUMMARY_COLUMNS = (
+    "id",
+    "timestamp",
+    "user_id",
+    "action",
+    "entity_type",
+    "entity_id",
+    "amount",
+    "currency",
+    "level",
+    "details_encrypted",
+    "ip_address",
+    "user_agent",
+)
+MAX_PAGE_SIZE = 1000
+_AUDIT_INSERT = """
+    INSERT INTO audit_log (
+        timestamp, user_id, action, entity_type, entity_id,
+        amount, currency, level, details, details_encrypted,
+        ip_address, user_agent
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+DECRYPT_WORKERS = min(8, os.cpu_count() or 1)
+
+_decrypt_executor: Optional[ThreadPoolExecutor] = None
+_decrypt_executor_lock = threading.Lock()
+
+
+def _get_decrypt_executor() -> ThreadPoolExecutor:
+    global _decrypt_executor
+    with _decrypt_executor_lock:
+        if _decrypt_executor is None:
+            _decrypt_executor = ThreadPoolExecutor(
+                max_workers=DECRYPT_WORKERS, thread_name_prefix="audit-decrypt"
+            )
+        return _decrypt_executor
 
 
 class AuditAction(str, Enum):
@@ -36,6 +80,91 @@ class AuditLevel(str, Enum):
     CRITICAL = "critical"
 
 
+class AuditDetails:
+    """Handle to the ``details`` of one audit row, decrypted on first access."""
+
+    __slots__ = ("raw", "encrypted", "_storage", "_value", "_loaded")
+
+    def __init__(self, raw: Optional[str], encrypted: bool, storage: SecureStorage):
+        self.raw = raw
+        self.encrypted = encrypted
+        self._storage = storage
+        self._value: Optional[Dict[str, Any]] = None
+        self._loaded = False
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def get(self) -> Dict[str, Any]:
+        if not self._loaded:
+            self._set(self._load())
+        return self._value
+
+    def _set(self, value: Dict[str, Any]) -> None:
+        self._value = value
+        self._loaded = True
+
+    def _load(self) -> Dict[str, Any]:
+        if not self.raw:
+            return {}
+        try:
+            if self.encrypted:
+                return self._storage.retrieve_sensitive_data(self.raw, as_dict=True)
+            value = json.loads(self.raw)
+            return value if isinstance(value, dict) else {"value": value}
+        except Exception as e:
+            logging.getLogger(__name__).error(f"Failed to decrypt audit details: {str(e)}")
+            return {"error": "Failed to decrypt"}
+
+
+@dataclass
+class AuditRecord:
+    """One audit row without its decrypted details."""
+
+    id: int
+    timestamp: str
+    user_id: str
+    action: str
+    entity_type: str
+    entity_id: str
+    amount: Optional[float]
+    currency: Optional[str]
+    level: str
+    details_encrypted: bool
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+    details: AuditDetails = field(repr=False)
+
+    def to_dict(self, include_details: bool = False) -> Dict[str, Any]:
+        row = {column: getattr(self, column) for column in AUDIT_SUMMARY_COLUMNS}
+        if include_details:
+            row["details"] = self.details.get()
+        return row
+
+
+@dataclass
+class AuditPage:
+    """A page of audit rows, newest first, and the cursor of the next page."""
+
+    records: List[AuditRecord]
+    next_cursor: Optional[str]
+
+
+def encode_audit_cursor(timestamp: str, row_id: int) -> str:
+    raw = json.dumps([timestamp, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_audit_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(timestamp), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid audit cursor")
+
+
 class AuditLogger:
     """Comprehensive audit logging for financial operations"""
 
@@ -43,10 +172,62 @@ class AuditLogger:
         self,
         db_connection: DatabaseConnection,
         secure_storage: Optional[SecureStorage] = None,
+        writer: Optional[AuditWriter] = None,
     ):
+        """With a ``writer``, entries are queued and stored in the background."""
         self.db = db_connection
         self.secure_storage = secure_storage or SecureStorage()
         self.logger = logging.getLogger(__name__)
+        self.writer = writer
+        self._schema_ready = False
+
+    def start_writer(self, **options: Any) -> AuditWriter:
+        """Store entries through a started background writer from now on."""
+        if self.writer is None:
+            self.ensure_schema()
+            self.writer = AuditWriter(
+                self._write_audit_rows, prepare=self._prepare_audit_row, **options
+            )
+        self.writer.start()
+        return self.writer
+
+    def ensure_schema(self) -> None:
+        """Create the audit_log table and its keyset index if missing."""
+        if self._schema_ready:
+            return
+        with self.db.get_connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS audit_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    user_id TEXT,
+                    action TEXT,
+                    entity_type TEXT,
+                    entity_id TEXT,
+                    amount REAL,
+                    currency TEXT,
+                    level TEXT,
+                    details TEXT,
+                    details_encrypted BOOLEAN DEFAULT 0,
+                    ip_address TEXT,
+                    user_agent TEXT
+                )
+                """
+            )
+            try:
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp_id "
+                    "ON audit_log(timestamp, id)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_audit_log_user_timestamp_id "
+                    "ON audit_log(user_id, timestamp, id)"
+                )
+            except sqlite3.OperationalError as e:
+                # An older audit_log table with a different layout
+                self.logger.warning(f"Audit log indexes not created: {str(e)}")
+        self._schema_ready = True
 
     def log_financial_operation(
         self,
@@ -70,28 +251,50 @@ class AuditLogger:
                 "amount": amount,
                 "currency": currency,
                 "level": level.value,
-                "details": details or {},
+                "details": dict(details) if details else {},
                 "ip_address": self._get_client_ip(),
                 "user_agent": self._get_user_agent(),
             }
 
-            # Encrypt sensitive details
-            if details and self._contains_sensitive_data(details):
-                audit_entry["details"] = self.secure_storage.store_sensitive_data(
-                    f"audit_{entity_id}_{datetime.now().timestamp()}", details
-                )
-                audit_entry["details_encrypted"] = True
+            # Encryption, storage and the log line happen on the writer thread
+            if self.writer is not None:
+                self.writer.submit(audit_entry)
+                return
+
+            self._seal_audit_entry(audit_entry)
 
             # Store in database
             self._store_audit_entry(audit_entry)
 
             # Log to application logger with PII masking
-            masked_entry = self._mask_audit_entry(audit_entry)
-            self.logger.info(f"Audit: {json.dumps(masked_entry, default=str)}")
+            self._log_audit_line(audit_entry)
 
         except Exception as e:
             self.logger.error(f"Failed to log audit entry: {str(e)}")
 
+    def _seal_audit_entry(self, audit_entry: Dict[str, Any]) -> None:
+        """Encrypt sensitive details in place"""
+        details = audit_entry["details"]
+        if details and self._contains_sensitive_data(details):
+            audit_entry["details"] = self.secure_storage.store_sensitive_data(
+                f"audit_{audit_entry['entity_id']}_{datetime.now().timestamp()}", details
+            )
+            audit_entry["details_encrypted"] = True
+
+    def _log_audit_line(self, audit_entry: Dict[str, Any]) -> None:
+        masked_entry = self._mask_audit_entry(audit_entry)
+        self.logger.info(f"Audit: {json.dumps(masked_entry, default=str)}")
+
+    def _prepare_audit_row(self, audit_entry: Dict[str, Any]) -> Tuple[Any, ...]:
+        """Writer-thread half of ``log_financial_operation``"""
+        self._seal_audit_entry(audit_entry)
+        self._log_audit_line(audit_entry)
+        return self._audit_row(audit_entry)
+
+    def _write_audit_rows(self, rows: List[Tuple[Any, ...]]) -> None:
+        with self.db.get_connection() as conn:
+            conn.executemany(_AUDIT_INSERT, rows)
+
     def log_authentication_event(
         self,
         user_email: str,
@@ -161,6 +364,93 @@ class AuditLogger:
             level=level,
         )
 
+    def get_audit_page(
+        self,
+        user_id: Optional[str] = None,
+        entity_type: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> AuditPage:
+        """One page of audit rows, newest first, with lazily decrypted details.
+
+        Pages are keyset-paginated on (timestamp, id): pass the returned
+        ``next_cursor`` to get the following page.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        if self.writer is not None:
+            # Make entries logged so far visible to this read
+            self.writer.flush(timeout=1.0)
+        try:
+            self.ensure_schema()
+        except Exception as e:
+            self.logger.debug(f"Audit log schema check failed: {str(e)}")
+
+        query = f"SELECT {', '.join(AUDIT_SUMMARY_COLUMNS)}, details FROM audit_log WHERE 1=1"
+        params: List[Any] = []
+        if user_id:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        if entity_type:
+            query += " AND entity_type = ?"
+            params.append(entity_type)
+        if start_date:
+            query += " AND timestamp >= ?"
+            params.append(start_date.isoformat())
+        if end_date:
+            query += " AND timestamp <= ?"
+            params.append(end_date.isoformat())
+        if cursor:
+            query += " AND (timestamp, id) < (?, ?)"
+            params.extend(decode_audit_cursor(cursor))
+        query += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self.db.get_connection(readonly=True) as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            rows = cur.execute(query, params).fetchall()
+
+        records = [self._record(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = records[-1]
+            next_cursor = encode_audit_cursor(last.timestamp, last.id)
+        return AuditPage(records, next_cursor)
+
+    def _record(self, row: Tuple[Any, ...]) -> AuditRecord:
+        values = dict(zip(AUDIT_SUMMARY_COLUMNS, row))
+        encrypted = bool(values["details_encrypted"])
+        values["details_encrypted"] = encrypted
+        return AuditRecord(
+            **values, details=AuditDetails(row[-1], encrypted, self.secure_storage)
+        )
+
+    def decrypt_details(
+        self, records: Iterable[AuditRecord], parallel: Optional[bool] = None
+    ) -> Dict[int, Dict[str, Any]]:
+        """Decrypt the details of a batch of rows, keyed by row id.
+
+        Envelope-format rows take microseconds and are decrypted inline;
+        pages holding legacy salted rows (one PBKDF2 derivation each) are
+        spread over a thread pool, as the key derivation releases the GIL.
+        """
+        records = list(records)
+        pending = [r for r in records if not r.details.loaded]
+        if parallel is None:
+            parallel = len(pending) > 1 and any(
+                r.details.encrypted
+                and r.details.raw
+                and not DataEncryption.is_envelope(r.details.raw)
+                for r in pending
+            )
+        if parallel:
+            loaded = _get_decrypt_executor().map(lambda r: r.details._load(), pending)
+            for record, value in zip(pending, loaded):
+                record.details._set(value)
+        return {record.id: record.details.get() for record in records}
+
     def get_audit_trail(
         self,
         user_id: Optional[str] = None,
@@ -171,89 +461,48 @@ class AuditLogger:
     ) -> List[Dict[str, Any]]:
         """Retrieve audit trail with filters"""
         try:
-            with self.db.get_connection() as conn:
-                query = "SELECT * FROM audit_log WHERE 1=1"
-                params = []
-
-                if user_id:
-                    query += " AND user_id = ?"
-                    params.append(user_id)
-
-                if entity_type:
-                    query += " AND entity_type = ?"
-                    params.append(entity_type)
-
-                if start_date:
-                    query += " AND timestamp >= ?"
-                    params.append(start_date.isoformat())
-
-                if end_date:
-                    query += " AND timestamp <= ?"
-                    params.append(end_date.isoformat())
-
-                query += " ORDER BY timestamp DESC LIMIT ?"
-                params.append(limit)
-
-                cursor = conn.execute(query, params)
-                results = []
-
-                for row in cursor.fetchall():
-                    audit_entry = dict(row)
-
-                    # Decrypt sensitive details if needed
-                    if audit_entry.get("details_encrypted"):
-                        try:
-                            audit_entry["details"] = (
-                                self.secure_storage.retrieve_sensitive_data(
-                                    audit_entry["details"], as_dict=True
-                                )
-                            )
-                        except Exception as e:
-                            self.logger.error(
-                                f"Failed to decrypt audit details: {str(e)}"
-                            )
-                            audit_entry["details"] = {"error": "Failed to decrypt"}
-
-                    results.append(audit_entry)
-
-                return results
+            page = self.get_audit_page(user_id, entity_type, start_date, end_date, limit)
+            encrypted = [r for r in page.records if r.details_encrypted]
+            self.decrypt_details(encrypted)
+            results = []
+            for record in page.records:
+                audit_entry = record.to_dict()
+                audit_entry["details"] = (
+                    record.details.get() if record.details_encrypted else record.details.raw
+                )
+                results.append(audit_entry)
+            return results
 
         except Exception as e:
             self.logger.error(f"Failed to retrieve audit trail: {str(e)}")
             return []
 
+    def _audit_row(self, audit_entry: Dict[str, Any]) -> Tuple[Any, ...]:
+        return (
+            audit_entry["timestamp"],
+            audit_entry["user_id"],
+            audit_entry["action"],
+            audit_entry["entity_type"],
+            audit_entry["entity_id"],
+            audit_entry.get("amount"),
+            audit_entry.get("currency"),
+            audit_entry["level"],
+            (
+                json.dumps(audit_entry["details"])
+                if not audit_entry.get("details_encrypted")
+                else audit_entry["details"]
+            ),
+            audit_entry.get("details_encrypted", False),
+            audit_entry["ip_address"],
+            audit_entry["user_agent"],
+        )
+
     def _store_audit_entry(self, audit_entry: Dict[str, Any]) -> None:
         """Store audit entry in database"""
         with self.db.get_connection() as conn:
             # dev fallback
             try:
-                conn.execute(
-                    """
-                    INSERT INTO audit_log (
-                        timestamp, user_id, action, entity_type, entity_id,
-                        amount, currency, level, details, details_encrypted,
-                        ip_address, user_agent
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                    (
-                        audit_entry["timestamp"],
-                        audit_entry["user_id"],
-                        audit_entry["action"],
-                        audit_entry["entity_type"],
-                        audit_entry["entity_id"],
-                        audit_entry.get("amount"),
-                        audit_entry.get("currency"),
-                        audit_entry["level"],
-                    (
-                        json.dumps(audit_entry["details"])
-                        if not audit_entry.get("details_encrypted")
-                        else audit_entry["details"]
-                    ),
-                    audit_entry.get("details_encrypted", False),
-                    audit_entry["ip_address"],
-                    audit_entry["user_agent"],
-                ),
-            )
+                conn.execute(_AUDIT_INSERT, self._audit_row(audit_entry))
             except sqlite3.OperationalError:
                 # development mode fallback – swallow the error so app doesn't crash
                 pass
@@ -318,3 +567,21 @@ class AuditLogger:
         """Get user agent string"""
         # In production, extract from request headers
         return "Streamlit/1.28.1"
+
+
+_default_logger: Optional[AuditLogger] = None
+_default_logger_lock = threading.Lock()
+
+
+def get_audit_logger() -> AuditLogger:
+    """Process-wide audit logger on the application database, writing in the background."""
+    global _default_logger
+    with _default_logger_lock:
+        if _default_logger is None:
+            from ..container import get_container
+
+            _default_logger = AuditLogger(get_container().get_db_connection())
+            _default_logger.start_writer(
+                name="audit_log", db_path=_default_logger.db.db_path
+            )
+        return _default_logger
@@ -0,0 +1,485 @@
+"""
+Background, batched writer for audit records.
+
+Callers hand records to ``submit``, which only puts them on a bounded
+in-memory queue. A single writer thread turns queued records into rows with
+``prepare`` (encryption, masking and log lines happen here, off the request
+path) and commits them with ``write_batch``, one transaction per batch of up
+to ``batch_size`` rows or whatever arrived within ``flush_interval``.
+
+When the queue is full, ``submit`` waits up to ``put_timeout`` for room and
+then spills the prepared row to a JSON-lines file instead of dropping it.
+Batches that fail to commit are spilled the same way. The writer replays the
+spill file once the queue is idle, and ``stop`` drains the queue and the
+spill file, so every submitted record reaches the database. Running writers
+are stopped from an ``atexit`` hook; the API lifespan stops them too.
+
+Spill files may be shared by several writers and processes on the same
+database: the default path depends on the writer's name and a digest of the
+database path, in an ``audit_spill`` directory next to the database (or
+under ``logs/``, or ``AUDIT_SPILL_DIR``) created for the owner only. Spill
+files are opened without following symlinks and made readable by the owner
+only, as audit rows carry user ids, IPs and details. A replay
+first takes an ``O_EXCL`` lock file next to the spill file, then renames the
+spill file to a name unique to the process, so each spilled row is replayed
+by exactly one writer. Appends and replays also ``flock`` the file, and an
+append that finds the file renamed under it retries on the new spill file.
+"""
+
+import atexit
+import glob
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+try:
+    import fcntl
+except ImportError:  # Windows: the O_EXCL replay lock still applies
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 10_000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 0.05
+DEFAULT_PUT_TIMEOUT = 0.005
+# Minimum seconds between attempts to replay the spill file
+DEFAULT_RETRY_INTERVAL = 1.0
+# Longest the writer blocks on the queue before re-checking for shutdown
+_POLL_INTERVAL = 0.1
+# Replay lock files older than this are treated as left by a crashed replay
+STALE_LOCK_SECONDS = 300.0
+SPILL_FILE_MODE = 0o600
+SPILL_DIR_MODE = 0o700
+SPILL_DIR_NAME = "audit_spill"
+# Never follow a symlink planted at a spill or lock path
+_NOFOLLOW = getattr(os, "O_NOFOLLOW", 0)
+
+_writers: "weakref.WeakSet[AuditWriter]" = weakref.WeakSet()
+
+
+def default_spill_path(name: str, db_path: Optional[str] = None) -> str:
+    """Spill file for writer ``name`` on the database at ``db_path``.
+
+    The file lives in ``AUDIT_SPILL_DIR``, else in an ``audit_spill``
+    directory next to the database file, else under ``logs/``. Its name
+    carries a digest of the database path, so processes writing to different
+    databases never replay each other's rows.
+    """
+    file_db = db_path and db_path != ":memory:" and not db_path.startswith("file:")
+    directory = os.environ.get("AUDIT_SPILL_DIR") or os.path.join(
+        os.path.dirname(os.path.abspath(db_path)) if file_db else os.path.abspath("logs"),
+        SPILL_DIR_NAME,
+    )
+    os.makedirs(directory, mode=SPILL_DIR_MODE, exist_ok=True)
+    if db_path:
+        target = os.path.abspath(db_path) if file_db else db_path
+        name = f"{name}_{hashlib.sha1(target.encode('utf-8')).hexdigest()[:12]}"
+    return os.path.join(directory, f"cashflow_audit_{name}.spill.jsonl")
+
+
+def _open_private(path: str, flags: int) -> int:
+    """Open ``path`` without following symlinks; files we own are made 0600."""
+    fd = os.open(path, flags | _NOFOLLOW, SPILL_FILE_MODE)
+    try:
+        info = os.fstat(fd)
+        if hasattr(os, "getuid") and info.st_uid == os.getuid():
+            if info.st_mode & 0o777 != SPILL_FILE_MODE:
+                os.fchmod(fd, SPILL_FILE_MODE)
+    except OSError:
+        os.close(fd)
+        raise
+    return fd
+
+
+class AuditWriter:
+    """Bounded queue plus a background thread committing audit rows in batches."""
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[Sequence[Any]]], None],
+        prepare: Optional[Callable[[Any], Optional[Sequence[Any]]]] = None,
+        name: str = "audit",
+        spill_path: Optional[str] = None,
+        db_path: Optional[str] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        put_timeout: float = DEFAULT_PUT_TIMEOUT,
+        retry_interval: float = DEFAULT_RETRY_INTERVAL,
+    ):
+        self.write_batch = write_batch
+        self.prepare = prepare or (lambda record: record)
+        self.name = name
+        self.spill_path = spill_path or default_spill_path(name, db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.retry_interval = retry_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._spill_lock = threading.Lock()
+        self._last_replay = 0.0
+        # Records submitted but not yet committed or spilled
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "spilled": 0,
+            "replayed": 0,
+            "dropped": 0,
+            "failed_batches": 0,
+            "batches": 0,
+            "max_depth": 0,
+            "last_flush_ms": 0.0,
+        }
+        _writers.add(self)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._writer_loop, name=f"audit-writer-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Stop the writer after committing the queue and the spill file."""
+        if self._running:
+            self._running = False
+            if self._thread is not None:
+                self._thread.join(timeout)
+                self._thread = None
+        # Records that raced with shutdown are written from this thread
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            self._flush(leftover)
+        self.replay_spill(force=True)
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Block until every record submitted so far is committed or spilled."""
+        if not self._running:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+    def submit(self, record: Any) -> None:
+        """Queue ``record``; spills it to disk if the queue stays full.
+
+        Before ``start`` (or after ``stop``) the record is written at once.
+        """
+        if not self._running:
+            self._flush([record], track=False)
+            return
+        with self._idle:
+            self._pending += 1
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            try:
+                self._queue.put(record, timeout=self.put_timeout)
+            except queue.Full:
+                try:
+                    row = self._prepare(record)
+                    if row is not None:
+                        self._spill([row])
+                finally:
+                    self._done(1)
+                return
+        with self._stats_lock:
+            self.stats["enqueued"] += 1
+            depth = self._queue.qsize()
+            if depth > self.stats["max_depth"]:
+                self.stats["max_depth"] = depth
+
+    # ------------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------------
+    def _writer_loop(self) -> None:
+        self._safe_replay(force=True)
+        while self._running or not self._queue.empty():
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif self._running:
+                self._safe_replay()
+
+    def _safe_replay(self, force: bool = False) -> None:
+        # An error here must not end the writer thread; the spill is retried
+        try:
+            self.replay_spill(force=force)
+        except Exception as e:
+            logger.error("Replaying audit spill %s failed, will retry: %s", self.spill_path, e)
+
+    def _collect(self) -> List[Any]:
+        """Block for the first record, then gather until size or time trigger."""
+        try:
+            first = self._queue.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._running:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                continue
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, _POLL_INTERVAL)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _prepare(self, record: Any) -> Optional[Sequence[Any]]:
+        try:
+            return self.prepare(record)
+        except Exception as e:
+            logger.error("Audit record dropped, could not be prepared: %s", e)
+            with self._stats_lock:
+                self.stats["dropped"] += 1
+            return None
+
+    def _flush(self, batch: List[Any], track: bool = True) -> None:
+        started = time.perf_counter()
+        rows = [row for row in map(self._prepare, batch) if row is not None]
+        try:
+            if rows:
+                self.write_batch(rows)
+        except Exception as e:
+            logger.error("Audit batch of %d failed, spilling to disk: %s", len(rows), e)
+            with self._stats_lock:
+                self.stats["failed_batches"] += 1
+            try:
+                self._spill(rows)
+            except OSError as spill_error:
+                logger.error(
+                    "Audit batch of %d lost, spill file unwritable: %s", len(rows), spill_error
+                )
+                with self._stats_lock:
+                    self.stats["dropped"] += len(rows)
+        else:
+            with self._stats_lock:
+                self.stats["batches"] += 1
+                self.stats["written"] += len(rows)
+                self.stats["last_flush_ms"] = (time.perf_counter() - started) * 1000
+        if track:
+            self._done(len(batch))
+
+    def _done(self, count: int) -> None:
+        with self._idle:
+            self._pending -= count
+            if self._pending <= 0:
+                self._idle.notify_all()
+
+    # ------------------------------------------------------------------
+    # Spill file
+    # ------------------------------------------------------------------
+    def _spill(self, rows: List[Sequence[Any]]) -> None:
+        self._append_spill(rows)
+        with self._stats_lock:
+            self.stats["spilled"] += len(rows)
+
+    def _append_spill(self, rows: List[Sequence[Any]]) -> None:
+        data = "".join(json.dumps(list(row), default=str) + "\n" for row in rows).encode("utf-8")
+        with self._spill_lock:
+            while True:
+                fd = _open_private(self.spill_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+                try:
+                    if fcntl is not None:
+                        fcntl.flock(fd, fcntl.LOCK_EX)
+                        # A replay renamed the file after we opened it
+                        try:
+                            current = os.stat(self.spill_path).st_ino
+                        except FileNotFoundError:
+                            current = None
+                        if current != os.fstat(fd).st_ino:
+                            continue
+                    os.write(fd, data)
+                    os.fsync(fd)
+                    return
+                finally:
+                    os.close(fd)
+
+    def _read_spill(self, handle, path: str) -> Iterator[List[Any]]:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A line cut short by a crash mid-write
+                logger.error("Skipping unreadable line in %s", path)
+
+    @property
+    def _lock_path(self) -> str:
+        return self.spill_path + ".lock"
+
+    def _claim_replay(self) -> bool:
+        """Take the process-safe replay lock; False if another replay holds it."""
+        for _ in range(2):
+            try:
+                fd = _open_private(self._lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+            except FileExistsError:
+                if not self._break_stale_lock():
+                    return False
+                continue
+            with os.fdopen(fd, "w") as handle:
+                handle.write(str(os.getpid()))
+            return True
+        return False
+
+    def _break_stale_lock(self) -> bool:
+        """Remove a lock left by a dead process or a replay that hung."""
+        try:
+            with os.fdopen(os.open(self._lock_path, os.O_RDONLY | _NOFOLLOW)) as handle:
+                pid = int(handle.read().strip() or 0)
+            age = time.time() - os.path.getmtime(self._lock_path)
+        except (OSError, ValueError):
+            # Vanished or still being written by its owner
+            return False
+        if pid and pid != os.getpid() and age < STALE_LOCK_SECONDS:
+            try:
+                os.kill(pid, 0)
+                return False
+            except ProcessLookupError:
+                pass
+            except OSError:
+                # Alive but not ours to signal
+                return False
+        elif age < STALE_LOCK_SECONDS:
+            return False
+        try:
+            os.remove(self._lock_path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _replay_files(self) -> List[str]:
+        """Files to replay: ones left by crashed replays, then the spill file."""
+        pending = sorted(glob.glob(glob.escape(self.spill_path) + ".replay*"))
+        if os.path.exists(self.spill_path):
+            claimed = f"{self.spill_path}.replay.{os.getpid()}.{threading.get_ident()}"
+            try:
+                os.replace(self.spill_path, claimed)
+                pending.append(claimed)
+            except FileNotFoundError:
+                pass
+        return pending
+
+    def replay_spill(self, force: bool = False) -> int:
+        """Commit spilled rows; returns how many were written."""
+        now = time.monotonic()
+        if not force and now - self._last_replay < self.retry_interval:
+            return 0
+        self._last_replay = now
+        if not os.path.exists(self.spill_path) and not glob.glob(
+            glob.escape(self.spill_path) + ".replay*"
+        ):
+            return 0
+        if not self._claim_replay():
+            return 0
+
+        written = 0
+        try:
+            with self._spill_lock:
+                replaying = self._replay_files()
+            for path in replaying:
+                written += self._replay_file(path)
+        finally:
+            try:
+                os.remove(self._lock_path)
+            except FileNotFoundError:
+                pass
+        with self._stats_lock:
+            self.stats["replayed"] += written
+        return written
+
+    def _replay_file(self, path: str) -> int:
+        with os.fdopen(_open_private(path, os.O_RDONLY), "rb") as handle:
+            if fcntl is not None:
+                # Waits out appends that opened the file before it was renamed
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            rows = list(self._read_spill(handle, path))
+            written = 0
+            try:
+                while written < len(rows):
+                    batch = rows[written : written + self.batch_size]
+                    self.write_batch(batch)
+                    written += len(batch)
+            except Exception as e:
+                logger.error("Replaying %s failed, will retry: %s", path, e)
+                self._append_spill(rows[written:])
+            os.remove(path)
+        return written
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, throughput counters and spill state."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        depth = self._queue.qsize()
+        capacity = self._queue.maxsize
+        stats.update(
+            running=self._running,
+            queue_depth=depth,
+            queue_capacity=capacity,
+            queue_utilization=depth / capacity if capacity else 0.0,
+            spill_pending=os.path.exists(self.spill_path)
+            or bool(glob.glob(glob.escape(self.spill_path) + ".replay*")),
+        )
+        return stats
+
+
+def flush_audit_writers(timeout: Optional[float] = 5.0) -> None:
+    """Wait for every running writer to commit what it has queued."""
+    for writer in list(_writers):
+        writer.flush(timeout)
+
+
+def shutdown_audit_writers(timeout: Optional[float] = 10.0) -> None:
+    """Stop every writer, committing queued and spilled rows."""
+    for writer in list(_writers):
+        try:
+            writer.stop(timeout)
+        except Exception as e:
+            logger.error("Audit writer %s failed to stop cleanly: %s", writer.name, e)
+
+
+atexit.register(shutdown_audit_writers)
@@ -1,14 +1,33 @@
 """
 Data Encryption and Secure Storage Utilities with Proper Cryptographic Practices
+
+Ciphertexts use a versioned envelope::
+
+    v1.<key id>.<base64url(nonce || AES-256-GCM ciphertext and tag)>
+
+The data-encryption key for a (master key, key id) pair is derived once with
+PBKDF2 and an HKDF subkey, then kept in a small process-wide LRU, so each
+message only costs a random 96-bit nonce and one AES-GCM operation. The
+version and key id are authenticated as associated data.
+
+Older ciphertexts (``base64(salt || Fernet token)``, one PBKDF2 derivation per
+message) still decrypt; ``reencrypt`` and ``scripts/migrate_encryption.py``
+move them to the envelope format.
 """
 
 import os
 import base64
+import hashlib
+import hmac
 import logging
 import secrets
+import threading
+from collections import OrderedDict
 from typing import Optional, Dict, Any, Union, Tuple
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import json
 import re
@@ -18,13 +37,85 @@ from .pii_protection import get_structured_logger
 # Use structured logger with PII protection
 logger = get_structured_logger().get_logger(__name__)
 
+PBKDF2_ITERATIONS = 100000  # OWASP recommended minimum
+ENVELOPE_VERSION = "v1"
+KEY_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,32}")
+NONCE_SIZE = 12
+DERIVED_KEY_CACHE_SIZE = 64
+# Legacy ciphertexts each have their own salt; re-reading a page of them
+# should not evict the envelope keys
+SALTED_KEY_CACHE_SIZE = 256
+
+
+class DerivedKeyCache:
+    """Bounded LRU of derived keys, indexed by non-secret fingerprints.
+
+    Evicted and cleared keys are overwritten in memory (best effort: the
+    cipher objects built from them keep their own copy until collected).
+    """
+
+    def __init__(self, max_entries: int = DERIVED_KEY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, ...], Tuple[Any, bytearray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, ...]) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Tuple[str, ...], value: Any, secret: bytearray) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._wipe(previous[1])
+            self._entries[key] = (value, secret)
+            while len(self._entries) > self.max_entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._wipe(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, secret in self._entries.values():
+                self._wipe(secret)
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _wipe(secret: bytearray) -> None:
+        for i in range(len(secret)):
+            secret[i] = 0
+
+
+_derived_keys = DerivedKeyCache()
+_salted_keys = DerivedKeyCache(SALTED_KEY_CACHE_SIZE)
+
+
+def clear_derived_keys() -> None:
+    """Drop (and overwrite) every cached key, e.g. after a key rotation."""
+    _derived_keys.clear()
+    _salted_keys.clear()
+
 
 class DataEncryption:
     """Data encryption utilities for sensitive information with proper cryptographic practices"""
 
-    def __init__(self, master_key: Optional[str] = None):
+    def __init__(self, master_key: Optional[str] = None, key_id: Optional[str] = None):
         self.master_key = master_key or self._get_or_create_master_key()
         self._validate_master_key()
+        # Identifies the master key without revealing it; cache entries and
+        # envelopes are keyed by it.
+        self._fingerprint = hmac.new(
+            self._master_key_bytes(), b"cashflow/key-fingerprint", hashlib.sha256
+        ).hexdigest()
+        self.key_id = key_id or os.getenv("ENCRYPTION_KEY_ID") or self._fingerprint[:8]
+        if not KEY_ID_RE.fullmatch(self.key_id):
+            raise ValueError("Key id must be 1-32 characters of [A-Za-z0-9_-]")
 
     def _get_or_create_master_key(self) -> str:
         """Get master encryption key with proper validation"""
@@ -61,37 +152,77 @@ class DataEncryption:
                 "Master key must be provided via ENCRYPTION_MASTER_KEY in production"
             )
 
-    def _derive_key_with_salt(self, salt: bytes) -> bytes:
-        """Derive encryption key using PBKDF2 with provided salt"""
+    def _master_key_bytes(self) -> bytes:
         if isinstance(self.master_key, str):
-            key_bytes = self.master_key.encode("utf-8")
-        else:
-            key_bytes = self.master_key
+            return self.master_key.encode("utf-8")
+        return self.master_key
 
+    def _derive_key_with_salt(self, salt: bytes) -> bytes:
+        """Derive encryption key using PBKDF2 with provided salt"""
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=32,
             salt=salt,
-            iterations=100000,  # OWASP recommended minimum
+            iterations=PBKDF2_ITERATIONS,
         )
-        return base64.urlsafe_b64encode(kdf.derive(key_bytes))
+        return base64.urlsafe_b64encode(kdf.derive(self._master_key_bytes()))
 
     def _create_cipher_suite(self, salt: bytes) -> Fernet:
-        """Create cipher suite with derived key"""
-        derived_key = self._derive_key_with_salt(salt)
-        return Fernet(derived_key)
+        """Create cipher suite with derived key (legacy salted format)"""
+        cache_key = (self._fingerprint, salt.hex())
+        cipher_suite = _salted_keys.get(cache_key)
+        if cipher_suite is None:
+            derived_key = bytearray(self._derive_key_with_salt(salt))
+            cipher_suite = Fernet(bytes(derived_key))
+            _salted_keys.put(cache_key, cipher_suite, derived_key)
+        return cipher_suite
+
+    def _data_key(self, key_id: str) -> AESGCM:
+        """AES-GCM cipher for ``key_id``, derived once and then cached.
+
+        Any well-formed key id is accepted: the key is derived from the master
+        key and the id, so envelopes written under an earlier
+        ``ENCRYPTION_KEY_ID`` stay readable. ``self.key_id`` only picks the
+        key new envelopes are written with.
+        """
+        if not KEY_ID_RE.fullmatch(key_id):
+            raise ValueError("Malformed encryption key id in envelope")
+        cache_key = (ENVELOPE_VERSION, self._fingerprint, key_id)
+        cipher = _derived_keys.get(cache_key)
+        if cipher is None:
+            root = PBKDF2HMAC(
+                algorithm=hashes.SHA256(),
+                length=32,
+                salt=b"cashflow/dek/" + key_id.encode("ascii"),
+                iterations=PBKDF2_ITERATIONS,
+            ).derive(self._master_key_bytes())
+            data_key = bytearray(
+                HKDF(
+                    algorithm=hashes.SHA256(),
+                    length=32,
+                    salt=None,
+                    info=b"cashflow/aes-256-gcm/" + key_id.encode("ascii"),
+                ).derive(root)
+            )
+            cipher = AESGCM(bytes(data_key))
+            _derived_keys.put(cache_key, cipher, data_key)
+        return cipher
+
+    @staticmethod
+    def is_envelope(encrypted_text: str) -> bool:
+        """True for ciphertexts in the current envelope format."""
+        return encrypted_text.startswith(f"{ENVELOPE_VERSION}.")
 
     def encrypt_string(self, plaintext: str) -> str:
-        """Encrypt a string with random salt"""
+        """Encrypt a string into a v1 envelope with a random nonce"""
         try:
-            # Generate random salt for each encryption
-            salt = os.urandom(16)
-            cipher_suite = self._create_cipher_suite(salt)
-            encrypted_bytes = cipher_suite.encrypt(plaintext.encode("utf-8"))
-
-            # Combine salt + encrypted data
-            combined = salt + encrypted_bytes
-            return base64.urlsafe_b64encode(combined).decode("utf-8")
+            nonce = os.urandom(NONCE_SIZE)
+            header = f"{ENVELOPE_VERSION}.{self.key_id}"
+            sealed = self._data_key(self.key_id).encrypt(
+                nonce, plaintext.encode("utf-8"), header.encode("ascii")
+            )
+            body = base64.urlsafe_b64encode(nonce + sealed).decode("ascii").rstrip("=")
+            return f"{header}.{body}"
         except Exception as e:
             logger.error(
                 "Encryption failed",
@@ -101,16 +232,20 @@ class DataEncryption:
             raise
 
     def decrypt_string(self, encrypted_text: str) -> str:
-        """Decrypt a string, extracting salt from encrypted data"""
+        """Decrypt a v1 envelope or a legacy salted ciphertext"""
         try:
-            # Decode the combined data
-            combined = base64.urlsafe_b64decode(encrypted_text.encode("utf-8"))
+            if self.is_envelope(encrypted_text):
+                version, key_id, body = encrypted_text.split(".", 2)
+                raw = base64.urlsafe_b64decode(body + "=" * (-len(body) % 4))
+                plaintext = self._data_key(key_id).decrypt(
+                    raw[:NONCE_SIZE], raw[NONCE_SIZE:], f"{version}.{key_id}".encode("ascii")
+                )
+                return plaintext.decode("utf-8")
 
-            # Extract salt (first 16 bytes) and encrypted data
+            # Legacy format: salt (first 16 bytes) + Fernet token
+            combined = base64.urlsafe_b64decode(encrypted_text.encode("utf-8"))
             salt = combined[:16]
             encrypted_bytes = combined[16:]
-
-            # Create cipher suite with extracted salt
             cipher_suite = self._create_cipher_suite(salt)
             decrypted_bytes = cipher_suite.decrypt(encrypted_bytes)
             return decrypted_bytes.decode("utf-8")
@@ -148,11 +283,38 @@ class DataEncryption:
         metadata = self.decrypt_dict(encrypted_key)
         return metadata["key"]
 
+    def is_current_envelope(self, encrypted_text: str) -> bool:
+        """True for envelopes written under the current key id."""
+        return encrypted_text.startswith(self.envelope_prefix)
+
+    @property
+    def envelope_prefix(self) -> str:
+        """Prefix of envelopes written under the current key id."""
+        return f"{ENVELOPE_VERSION}.{self.key_id}."
+
+    def reencrypt(self, encrypted_text: str) -> str:
+        """Re-encrypt any supported ciphertext into the current envelope.
+
+        Envelopes under the current key id are returned unchanged; envelopes
+        under an earlier key id are re-encrypted under the current one.
+        """
+        if self.is_current_envelope(encrypted_text):
+            return encrypted_text
+        return self.encrypt_string(self.decrypt_string(encrypted_text))
+
     def migrate_legacy_encrypted_data(self, legacy_encrypted: str) -> str:
         """
-        Migrate data encrypted with the old static salt method.
-        This is a one-time migration utility.
+        Migrate data encrypted with an older method to the envelope format.
+
+        Handles salted ciphertexts and, failing that, data encrypted with the
+        old static salt. This is a one-time migration utility.
         """
+        if self.is_current_envelope(legacy_encrypted):
+            return legacy_encrypted
+        try:
+            return self.reencrypt(legacy_encrypted)
+        except Exception:
+            pass
         try:
             # Try to decrypt with old method first
             legacy_salt = b"cash_flow_salt"
@@ -164,7 +326,7 @@ class DataEncryption:
             decrypted_bytes = legacy_cipher.decrypt(encrypted_bytes)
             plaintext = decrypted_bytes.decode("utf-8")
 
-            # Re-encrypt with new method (random salt)
+            # Re-encrypt into the envelope format
             return self.encrypt_string(plaintext)
 
         except Exception as e:
@@ -5,12 +5,90 @@ Comprehensive PII detection and redaction using Microsoft Presidio with custom p
 
 import os
 import re
+import sys
 import logging
+from functools import lru_cache
 import structlog
-from typing import Dict, List, Optional, Set, Any, Union
+from typing import Dict, List, Optional, Set, Any, Tuple, Union
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from enum import Enum
 
+from ..utils.log_pipeline import BatchStreamHandler, LogPipeline
+
+# Event dict keys set by structlog processors, never masked
+_STRUCTLOG_FIELDS = ("event", "level", "logger", "timestamp", "exc_info", "stack", "exception")
+
+# Masked results are memoized for strings up to this length
+MASK_CACHE_SIZE = 4096
+MASK_CACHE_MAX_CHARS = 1024
+
+# ASCII digits become "0" and whitespace (all that ``\s`` matches) a space
+_SHAPE_TABLE = str.maketrans(
+    {
+        **{c: "0" for c in "0123456789"},
+        **{c: " " for c in "\t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"},
+    }
+)
+
+
+def text_shape(text: str) -> Optional[str]:
+    """Lowercased ``text`` with digits as "0" and whitespace as " ".
+
+    Prefilter literals are looked up in this form, so "000-00" stands for any
+    three digits, a dash and two digits. Non-ASCII text has no shape (None):
+    case-insensitive patterns and ``\\d`` match more there than the shape shows.
+    """
+    if not text.isascii():
+        return None
+    return text.lower().translate(_SHAPE_TABLE)
+
+
+SENSITIVE_FIELD_NAMES = frozenset(
+    {
+        "password",
+        "passwd",
+        "pwd",
+        "secret",
+        "token",
+        "key",
+        "api_key",
+        "access_token",
+        "refresh_token",
+        "bearer_token",
+        "auth_token",
+        "session_id",
+        "csrf_token",
+        "encryption_key",
+        "private_key",
+        "credit_card",
+        "ccn",
+        "card_number",
+        "ssn",
+        "social_security",
+        "phone",
+        "telephone",
+        "mobile",
+        "email",
+        "address",
+        "location",
+        "ip_address",
+        "mac_address",
+        "iban",
+        "account_number",
+        "routing_number",
+    }
+)
+_SENSITIVE_FIELD_RE = re.compile(
+    "|".join(re.escape(name) for name in sorted(SENSITIVE_FIELD_NAMES, key=len))
+)
+
+
+@lru_cache(maxsize=2048)
+def _is_sensitive_field_name(field_name: str) -> bool:
+    return _SENSITIVE_FIELD_RE.search(field_name.lower()) is not None
+
+
 # Temporarily disable Presidio to fix infinite recursion issue
 PRESIDIO_AVAILABLE = False
 
@@ -43,6 +121,9 @@ class PIIPattern:
     replacement: str
     sensitivity: SensitivityLevel
     description: str
+    # Literals, one of which is in the shape of any text ``pattern`` matches
+    # (see ``text_shape``); text with none of them skips the pattern
+    prefilter: Tuple[str, ...] = ()
 
 
 class EnhancedPIIDetector:
@@ -72,7 +153,11 @@ class EnhancedPIIDetector:
         # Compiled regex patterns for performance
         self._compiled_patterns = {}
         self._compile_patterns()
-        
+        self._active_patterns = [
+            p for p in self.custom_patterns if p.name in self._compiled_patterns
+        ]
+        self._mask_cached = lru_cache(maxsize=MASK_CACHE_SIZE)(self._mask_custom)
+
         self._initialized = True
 
     def _initialize_custom_patterns(self) -> List[PIIPattern]:
@@ -85,6 +170,7 @@ class EnhancedPIIDetector:
                 replacement="{{PHONE}}",
                 sensitivity=SensitivityLevel.MEDIUM,
                 description="International phone numbers including US format",
+                prefilter=("0000000", "000-0000", "000.0000", "000 0000", "+00"),
             ),
             # Credit card patterns (with and without delimiters)
             PIIPattern(
@@ -93,6 +179,7 @@ class EnhancedPIIDetector:
                 replacement="{{CREDIT_CARD}}",
                 sensitivity=SensitivityLevel.HIGH,
                 description="Credit card numbers without delimiters",
+                prefilter=("0000000000000",),
             ),
             PIIPattern(
                 name="CREDIT_CARD_WITH_DELIM",
@@ -100,6 +187,7 @@ class EnhancedPIIDetector:
                 replacement="{{CREDIT_CARD}}",
                 sensitivity=SensitivityLevel.HIGH,
                 description="Credit card numbers with delimiters",
+                prefilter=("00000000", "0000-0000", "0000 0000"),
             ),
             # Enhanced email patterns
             PIIPattern(
@@ -108,6 +196,7 @@ class EnhancedPIIDetector:
                 replacement="{{EMAIL}}",
                 sensitivity=SensitivityLevel.MEDIUM,
                 description="Email addresses",
+                prefilter=("@",),
             ),
             # SSN patterns (various formats)
             PIIPattern(
@@ -116,6 +205,7 @@ class EnhancedPIIDetector:
                 replacement="{{SSN}}",
                 sensitivity=SensitivityLevel.HIGH,
                 description="Social Security Numbers (flexible format)",
+                prefilter=("00000", "000-00", "000.00", "000 00"),
             ),
             # API Keys and tokens
             PIIPattern(
@@ -124,6 +214,7 @@ class EnhancedPIIDetector:
                 replacement="{{API_KEY}}",
                 sensitivity=SensitivityLevel.CRITICAL,
                 description="Generic API keys and tokens",
+                prefilter=("api", "access", "secret", "bearer"),
             ),
             # Stripe keys
             PIIPattern(
@@ -132,6 +223,7 @@ class EnhancedPIIDetector:
                 replacement="{{STRIPE_KEY}}",
                 sensitivity=SensitivityLevel.CRITICAL,
                 description="Stripe API keys",
+                prefilter=("k_test_", "k_live_"),
             ),
             # AWS keys
             PIIPattern(
@@ -140,6 +232,7 @@ class EnhancedPIIDetector:
                 replacement="{{AWS_KEY}}",
                 sensitivity=SensitivityLevel.CRITICAL,
                 description="AWS Access Keys",
+                prefilter=("akia",),
             ),
             # JWT tokens
             PIIPattern(
@@ -148,6 +241,7 @@ class EnhancedPIIDetector:
                 replacement="{{JWT_TOKEN}}",
                 sensitivity=SensitivityLevel.CRITICAL,
                 description="JWT tokens",
+                prefilter=("eyj",),
             ),
             # Password patterns in logs
             PIIPattern(
@@ -156,6 +250,7 @@ class EnhancedPIIDetector:
                 replacement="{{PASSWORD}}",
                 sensitivity=SensitivityLevel.CRITICAL,
                 description="Password fields",
+                prefilter=("passw", "pwd"),
             ),
             # Encryption keys
             PIIPattern(
@@ -172,6 +267,7 @@ class EnhancedPIIDetector:
                 replacement="{{IP_ADDRESS}}",
                 sensitivity=SensitivityLevel.MEDIUM,
                 description="IPv4 addresses",
+                prefilter=("0.0.0", "0.00.0", "0.000.0"),
             ),
             # MAC Addresses
             PIIPattern(
@@ -180,6 +276,7 @@ class EnhancedPIIDetector:
                 replacement="{{MAC_ADDRESS}}",
                 sensitivity=SensitivityLevel.MEDIUM,
                 description="MAC addresses",
+                prefilter=(":", "-"),
             ),
             # IBAN (International Bank Account Number)
             PIIPattern(
@@ -188,6 +285,7 @@ class EnhancedPIIDetector:
                 replacement="{{IBAN}}",
                 sensitivity=SensitivityLevel.HIGH,
                 description="International Bank Account Numbers",
+                prefilter=("0000000",),
             ),
             # Driver's License (US format)
             PIIPattern(
@@ -196,6 +294,7 @@ class EnhancedPIIDetector:
                 replacement="{{DRIVERS_LICENSE}}",
                 sensitivity=SensitivityLevel.HIGH,
                 description="US Driver's License numbers",
+                prefilter=("000000",),
             ),
         ]
 
@@ -209,6 +308,24 @@ class EnhancedPIIDetector:
             except re.error as e:
                 logging.warning(f"Failed to compile pattern {pattern.name}: {e}")
 
+    def _candidate_patterns(self, text: str) -> List[PIIPattern]:
+        """Patterns, in order, that may match ``text`` going by their prefilters"""
+        if not text:
+            return []
+        shape = text_shape(text)
+        if shape is None:
+            return self._active_patterns
+        candidates = []
+        for pattern in self._active_patterns:
+            if not pattern.prefilter:
+                candidates.append(pattern)
+                continue
+            for literal in pattern.prefilter:
+                if literal in shape:
+                    candidates.append(pattern)
+                    break
+        return candidates
+
     def detect_pii(self, text: str, language: str = "en") -> List[Dict[str, Any]]:
         """Detect PII in text using Presidio and custom patterns"""
         results = []
@@ -234,20 +351,19 @@ class EnhancedPIIDetector:
                 logging.warning(f"Presidio analysis failed: {e}")
 
         # Add custom pattern detection
-        for pattern in self.custom_patterns:
-            if pattern.name in self._compiled_patterns:
-                regex = self._compiled_patterns[pattern.name]
-                for match in regex.finditer(text):
-                    results.append(
-                        {
-                            "entity_type": pattern.name,
-                            "start": match.start(),
-                            "end": match.end(),
-                            "score": 1.0,
-                            "source": "custom",
-                            "sensitivity": pattern.sensitivity.value,
-                        }
-                    )
+        for pattern in self._candidate_patterns(text):
+            regex = self._compiled_patterns[pattern.name]
+            for match in regex.finditer(text):
+                results.append(
+                    {
+                        "entity_type": pattern.name,
+                        "start": match.start(),
+                        "end": match.end(),
+                        "score": 1.0,
+                        "source": "custom",
+                        "sensitivity": pattern.sensitivity.value,
+                    }
+                )
 
         return results
 
@@ -272,51 +388,26 @@ class EnhancedPIIDetector:
                 logging.warning(f"Presidio anonymization failed: {e}")
 
         # Apply custom pattern masking
-        for pattern in self.custom_patterns:
-            if pattern.name in self._compiled_patterns:
-                regex = self._compiled_patterns[pattern.name]
-                masked_text = regex.sub(pattern.replacement, masked_text)
-
-        return masked_text
+        if len(masked_text) <= MASK_CACHE_MAX_CHARS:
+            return self._mask_cached(masked_text)
+        return self._mask_custom(masked_text)
+
+    def _mask_custom(self, text: str) -> str:
+        """Apply the custom patterns in order, skipping those that cannot match.
+
+        Patterns still run one after another because their order decides the
+        result where matches overlap. Prefilters only ever look for text a
+        pattern's matches contain, and replacements never introduce any, so
+        checking them once against the original text is safe.
+        """
+        for pattern in self._candidate_patterns(text):
+            regex = self._compiled_patterns[pattern.name]
+            text = regex.sub(pattern.replacement, text)
+        return text
 
     def is_sensitive_field(self, field_name: str) -> bool:
         """Check if a field name indicates sensitive data"""
-        sensitive_fields = {
-            "password",
-            "passwd",
-            "pwd",
-            "secret",
-            "token",
-            "key",
-            "api_key",
-            "access_token",
-            "refresh_token",
-            "bearer_token",
-            "auth_token",
-            "session_id",
-            "csrf_token",
-            "encryption_key",
-            "private_key",
-            "credit_card",
-            "ccn",
-            "card_number",
-            "ssn",
-            "social_security",
-            "phone",
-            "telephone",
-            "mobile",
-            "email",
-            "address",
-            "location",
-            "ip_address",
-            "mac_address",
-            "iban",
-            "account_number",
-            "routing_number",
-        }
-
-        field_lower = field_name.lower()
-        return any(sensitive in field_lower for sensitive in sensitive_fields)
+        return _is_sensitive_field_name(str(field_name))
 
 
 class SecureLoggingFilter(logging.Filter):
@@ -365,8 +456,10 @@ class SecureLoggingFilter(logging.Filter):
             return True
             
         try:
-            # Redact the main message
-            if hasattr(record, "msg") and record.msg:
+            # Redact the main message; structlog events arrive as a dict
+            if isinstance(getattr(record, "msg", None), dict):
+                record.msg = self._clean_event(record.msg)
+            elif hasattr(record, "msg") and record.msg:
                 record.msg = self._safe_mask(str(record.msg))
 
             # Redact arguments if they exist
@@ -405,6 +498,17 @@ class SecureLoggingFilter(logging.Filter):
 
         return True
 
+    def _clean_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        """Clean a structlog event dict, leaving the fields structlog adds itself"""
+        fields = {k: v for k, v in event.items() if k not in _STRUCTLOG_FIELDS}
+        cleaned = self._clean_dict(fields)
+        for key in _STRUCTLOG_FIELDS:
+            if key in event:
+                cleaned[key] = event[key]
+        if isinstance(event.get("event"), str):
+            cleaned["event"] = self._safe_mask(event["event"])
+        return cleaned
+
     def _clean_dict(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Clean sensitive data from dictionary"""
         if not isinstance(data, dict) or not self._initialized:
@@ -464,8 +568,12 @@ class StructuredLogger:
         self._initialized = True
 
     def _setup_logging(self):
-        """Setup structured logging without PII protection to prevent recursion"""
-        # Configure structlog without PII filtering to prevent recursion
+        """Setup structured logging on the off-thread pipeline.
+
+        structlog only builds the event dict on the calling thread; the root
+        logger's pipeline masks and renders it to JSON on its listener thread.
+        Masking there cannot recurse into the logger that is being masked.
+        """
         structlog.configure(
             processors=[
                 structlog.stdlib.filter_by_level,
@@ -474,9 +582,8 @@ class StructuredLogger:
                 structlog.stdlib.PositionalArgumentsFormatter(),
                 structlog.processors.TimeStamper(fmt="iso"),
                 structlog.processors.StackInfoRenderer(),
-                structlog.processors.format_exc_info,
-                structlog.processors.UnicodeDecoder(),
-                structlog.processors.JSONRenderer(),
+                _capture_exc_info,
+                structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
             ],
             context_class=dict,
             logger_factory=structlog.stdlib.LoggerFactory(),
@@ -484,11 +591,31 @@ class StructuredLogger:
             cache_logger_on_first_use=True,
         )
 
-        # Setup standard logging without PII filter to prevent recursion
-        logging.basicConfig(
-            level=logging.INFO if self.environment == "production" else logging.DEBUG,
-            format="%(asctime)s - %(levelname)s - %(message)s",
+        # Like logging.basicConfig, leave an already configured root logger alone
+        root = logging.getLogger()
+        self.pipeline = None
+        if root.handlers:
+            return
+        root.setLevel(logging.INFO if self.environment == "production" else logging.DEBUG)
+
+        handler = BatchStreamHandler()
+        handler.setFormatter(
+            structlog.stdlib.ProcessorFormatter(
+                processors=[
+                    structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                    structlog.processors.format_exc_info,
+                    structlog.processors.UnicodeDecoder(),
+                    structlog.processors.JSONRenderer(),
+                ],
+                foreign_pre_chain=[
+                    structlog.stdlib.add_logger_name,
+                    structlog.stdlib.add_log_level,
+                    _record_timestamp,
+                ],
+            )
         )
+        self.pipeline = LogPipeline([handler], name="structured", mask=mask_log_record)
+        self.pipeline.start().attach(root)
 
     def get_logger(self, name: str = None) -> structlog.stdlib.BoundLogger:
         """Get a structured logger instance"""
@@ -498,16 +625,15 @@ class StructuredLogger:
     def log_security_event(
         self, event_type: str, details: Dict[str, Any], severity: str = "INFO"
     ) -> None:
-        """Log security events with proper structure (PII filtering temporarily disabled)"""
+        """Log security events with proper structure (details are masked by the pipeline)"""
         logger = self.get_logger("security")
 
-        # Skip PII cleaning to prevent recursion
         log_data = {
             "event_type": event_type,
             "severity": severity,
             "environment": self.environment,
             "service": self.service_name,
-            "details": details,  # No PII cleaning to prevent recursion
+            "details": details,
         }
 
         if severity.upper() == "ERROR":
@@ -518,9 +644,34 @@ class StructuredLogger:
             logger.info("Security event", **log_data)
 
 
+def _capture_exc_info(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve ``exc_info=True`` while still on the thread handling the exception."""
+    if event_dict.get("exc_info") is True:
+        event_dict["exc_info"] = sys.exc_info()
+    return event_dict
+
+
+def _record_timestamp(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """TimeStamper for stdlib records: the time they were logged, not rendered."""
+    record = event_dict.get("_record")
+    if record is not None:
+        created = datetime.fromtimestamp(record.created, tz=timezone.utc)
+        event_dict["timestamp"] = created.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    return event_dict
+
+
 # Global instances
 _pii_detector = None
 _structured_logger = None
+_log_masking_filter = None
+
+
+def mask_log_record(record: logging.LogRecord) -> None:
+    """Pipeline mask hook: redact PII in a record, including structlog event dicts."""
+    global _log_masking_filter
+    if _log_masking_filter is None:
+        _log_masking_filter = SecureLoggingFilter(get_pii_detector())
+    _log_masking_filter.filter(record)
 
 
 def get_pii_detector() -> EnhancedPIIDetector:
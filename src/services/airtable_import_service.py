@@ -1,7 +1,9 @@
 import os
 import csv
 import io
-from typing import List, Dict, Tuple, Optional
+import itertools
+from contextlib import contextmanager
+from typing import Any, List, Dict, Iterator, TextIO, Tuple, Optional
 from datetime import datetime, date
 
 from pydantic import BaseModel
@@ -105,25 +107,11 @@ def _parse_date_flexible(value) -> Optional[date]:
     if not s:
         return None
     try:
-        return date_parser.parse(s).date()
+        return _parse_datetime(s).date()
     except Exception:
         return None
 
 
-def _get_ci(row: Dict[str, str], *names: str) -> Optional[str]:
-    """Case-insensitive getter supporting aliases; returns the first match."""
-    if not row:
-        return None
-    lower = {k.lower(): v for k, v in row.items()}
-    for name in names:
-        if name is None:
-            continue
-        key = name.lower()
-        if key in lower:
-            return lower[key]
-    return None
-
-
 def to_bool(v) -> bool:
     """Strict CSV boolean parsing: only explicit true values evaluate True."""
     try:
@@ -133,6 +121,360 @@ def to_bool(v) -> bool:
     return s in {"true", "t", "yes", "y", "1", "✓", "✅"}
 
 
+# ---------------------------------------------------------------------------
+# Streaming CSV ingest
+#
+# Uploads are read through a text stream: the delimiter is sniffed from the
+# first chunk, header aliases are resolved once to column indexes, and rows
+# are parsed from plain ``csv.reader`` lists and yielded in batches. Memory is
+# bounded by the batch size plus one small entry per distinct lead/booking
+# key, which in-file dedupe needs.
+# ---------------------------------------------------------------------------
+
+CSV_DELIMITERS = [",", ";", "\t", "|"]
+CSV_CHUNK_SIZE = 64 * 1024
+CSV_SNIFF_SAMPLE = 4096
+DEFAULT_CSV_BATCH_SIZE = 5000
+
+LEAD_CSV_ALIASES: Dict[str, List[str]] = {
+    "email": ["email", "e-mail", "guest email", "customer email"],
+    "created_at": [
+        "created_at",
+        "created date",
+        "date",
+        "date added",
+        "submission date",
+        "submitted at",
+        "added at",
+    ],
+    "mql": ["mql_yes", "mql", "is_mql", "marketing qualified lead"],
+    "sql": ["sql_yes", "sql", "is_sql", "sales qualified lead"],
+    "utm_source": ["utm_source", "utm source", "source"],
+    "utm_medium": ["utm_medium", "utm medium", "medium"],
+    "utm_campaign": ["utm_campaign", "utm campaign", "campaign"],
+}
+# Any of these set to true forces MQL and SQL to false
+LEAD_CSV_NEGATIVE_FLAGS = ["false_mql", "mql_false", "not_mql"]
+
+BOOKING_CSV_ALIASES: Dict[str, List[str]] = {
+    "booking_id": ["booking_id"],
+    "booking_date": ["booking_date", "date", "created_at"],
+    "arrival_date": ["arrival_date", "arrival"],
+    "departure_date": ["departure_date", "departure"],
+    "guests": ["guests"],
+    "amount": ["amount"],
+    "email": ["email"],
+}
+
+
+def _parse_datetime(value: str) -> datetime:
+    """Parse a date/time string, trying ISO 8601 before dateutil.
+
+    Raises like ``date_parser.parse`` when the value cannot be parsed.
+    """
+    s = value.strip()
+    if len(s) >= 10 and s[4] == "-" and s[7] == "-":
+        try:
+            return datetime.fromisoformat(s)
+        except ValueError:
+            pass
+    return date_parser.parse(value)
+
+
+def _detect_delimiter(sample: str, first_line: str) -> str:
+    """Sniff the delimiter from a sample; fall back to the most frequent one in the first line."""
+    try:
+        sniff = csv.Sniffer().sniff(sample, delimiters="".join(CSV_DELIMITERS))
+        if sniff and sniff.delimiter in CSV_DELIMITERS:
+            return sniff.delimiter
+        return ","
+    except Exception:
+        counts = {d: first_line.count(d) for d in CSV_DELIMITERS}
+        return max(counts, key=counts.get) if counts else ","
+
+
+@contextmanager
+def _csv_text_stream(file_obj) -> Iterator[TextIO]:
+    """Open an upload, open file or path as a text stream without reading it all.
+
+    Bytes are decoded as UTF-8 with BOM handling. Caller-owned file objects
+    are rewound if possible and left open.
+    """
+    if isinstance(file_obj, (str, os.PathLike)):
+        with open(file_obj, "r", encoding="utf-8-sig", newline="") as fh:
+            yield fh
+        return
+
+    if hasattr(file_obj, "getvalue") and hasattr(file_obj, "seek"):
+        # Uploads (BytesIO/UploadedFile) were read via getvalue(): start from the top
+        file_obj.seek(0)
+    if isinstance(file_obj.read(0), str):
+        yield file_obj
+        return
+
+    wrapper = io.TextIOWrapper(file_obj, encoding="utf-8-sig", newline="")
+    try:
+        yield wrapper
+    finally:
+        wrapper.detach()
+
+
+@contextmanager
+def _open_csv_reader(file_obj) -> Iterator[Tuple[str, List[str], Iterator[List[str]]]]:
+    """Yield ``(delimiter, headers, rows)`` for a CSV upload, streaming the rows."""
+    with _csv_text_stream(file_obj) as stream:
+        head = stream.read(CSV_CHUNK_SIZE)
+        if head and not head.endswith(("\n", "\r")):
+            # Finish the current line so the sample ends on a record boundary
+            head += stream.readline()
+        lines = head.splitlines()
+        delimiter = _detect_delimiter(head[:CSV_SNIFF_SAMPLE], lines[0] if lines else "")
+
+        reader = csv.reader(
+            itertools.chain(io.StringIO(head, newline=""), stream), delimiter=delimiter
+        )
+        headers = next(reader, [])
+        yield delimiter, headers, reader
+
+
+def _resolve_columns(headers: List[str], aliases: Dict[str, List[str]]) -> Dict[str, List[int]]:
+    """Map each field to the indexes of its alias columns, in alias order.
+
+    Header names match case-insensitively; with duplicate headers the last
+    column wins (as with ``csv.DictReader``).
+    """
+    index = {h.lower(): i for i, h in enumerate(headers)}
+    return {
+        field: [index[a.lower()] for a in names if a.lower() in index]
+        for field, names in aliases.items()
+    }
+
+
+def _first_value(row: List[str], indexes: List[int]) -> Optional[str]:
+    """Value of the first alias column present in this row (short rows lack trailing columns)."""
+    for i in indexes:
+        if i < len(row):
+            return row[i]
+    return None
+
+
+def _first_column(row: List[str], indexes: List[int]) -> Optional[str]:
+    """Value of the first alias column in the header, None if the row is too short."""
+    if indexes and indexes[0] < len(row):
+        return row[indexes[0]]
+    return None
+
+
+def _lead_diagnostics(delimiter: str, headers: List[str]) -> Dict[str, Any]:
+    return {
+        "total_rows": 0,
+        "delimiter": delimiter,
+        "headers": headers,
+        "dropped": {"missing_email": 0, "invalid_date": 0, "header_not_found": 0},
+        "groups_after_dedupe": 0,
+        "mql_true_after_dedupe": 0,
+        "sql_true_after_dedupe": 0,
+    }
+
+
+def iter_csv_leads(
+    file_obj,
+    batch_size: int = DEFAULT_CSV_BATCH_SIZE,
+    diagnostics: Optional[Dict[str, Any]] = None,
+) -> Iterator[List["LeadModel"]]:
+    """Stream leads from a CSV in batches of ``batch_size``.
+
+    Rows are deduped on ``email|created date`` as they stream: a row is
+    yielded unless an earlier row with the same key has a later timestamp.
+    A yielded row may therefore supersede one from an earlier batch, so
+    batches must be applied in order with an upsert (latest wins).
+
+    ``diagnostics`` (if given) is filled in as described in
+    ``parse_csv_leads_with_diagnostics``.
+    """
+    diag = diagnostics if diagnostics is not None else {}
+    with _open_csv_reader(file_obj) as (delimiter, headers, reader):
+        diag.update(_lead_diagnostics(delimiter, headers))
+        stripped = [h.lower().strip() for h in headers]
+        critical_missing = [
+            field
+            for field in ("email", "created_at")
+            if not any(a.lower() in stripped for a in LEAD_CSV_ALIASES[field])
+        ]
+        if critical_missing:
+            # Count data rows for diagnostics
+            diag["total_rows"] = sum(1 for row in reader if row)
+            diag["dropped"]["header_not_found"] = diag["total_rows"]
+            diag["missing_headers"] = critical_missing
+            return
+
+        cols = _resolve_columns(headers, LEAD_CSV_ALIASES)
+        negative_cols = _resolve_columns(headers, {"negative": LEAD_CSV_NEGATIVE_FLAGS})["negative"]
+        email_cols, created_cols = cols["email"], cols["created_at"]
+        mql_cols, sql_cols = cols["mql"], cols["sql"]
+        source_cols, medium_cols, campaign_cols = cols["utm_source"], cols["utm_medium"], cols["utm_campaign"]
+        dropped = diag["dropped"]
+
+        # key -> (created datetime, row index, is_mql, is_sql) of the current winner
+        best: Dict[str, Tuple[datetime, int, bool, bool]] = {}
+        batch: List[LeadModel] = []
+        row_index = 0
+        for row in reader:
+            if not row:
+                continue
+            row_index += 1
+            diag["total_rows"] += 1
+            try:
+                email_val = _first_value(row, email_cols)
+                email = str(email_val).strip().lower() if email_val is not None else ""
+                if not email:
+                    dropped["missing_email"] += 1
+                    continue
+
+                created_raw = _first_value(row, created_cols)
+                try:
+                    created_dt = _parse_datetime(str(created_raw)) if created_raw is not None else None
+                except Exception:
+                    created_dt = None
+                if not created_dt:
+                    dropped["invalid_date"] += 1
+                    continue
+                created_date = created_dt.date()
+
+                is_mql = to_bool(_first_value(row, mql_cols))
+                is_sql = to_bool(_first_value(row, sql_cols))
+                # Negative flags force false
+                if to_bool(_first_column(row, negative_cols)):
+                    is_mql = False
+                    is_sql = False
+
+                key = f"{email}|{created_date.isoformat()}"
+                prev = best.get(key)
+                # Latest wins by datetime; if tie, later row index wins
+                if prev is not None and not (
+                    created_dt > prev[0] or (created_dt == prev[0] and row_index > prev[1])
+                ):
+                    continue
+                best[key] = (created_dt, row_index, is_mql, is_sql)
+
+                # Every field is already of its declared type: skip re-validation
+                batch.append(
+                    LeadModel.model_construct(
+                        email=email,
+                        created_date=created_date,
+                        utm_source=(_first_value(row, source_cols) or "").strip().lower(),
+                        utm_medium=(_first_value(row, medium_cols) or "").strip().lower(),
+                        utm_campaign=(_first_value(row, campaign_cols) or "").strip().lower(),
+                        is_mql=is_mql,
+                        is_sql=is_sql,
+                    )
+                )
+            except Exception:
+                # Skip malformed rows silently but counted only in total_rows
+                continue
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+        diag["groups_after_dedupe"] = len(best)
+        diag["mql_true_after_dedupe"] = sum(1 for v in best.values() if v[2])
+        diag["sql_true_after_dedupe"] = sum(1 for v in best.values() if v[3])
+
+
+def iter_csv_bookings(
+    file_obj,
+    batch_size: int = DEFAULT_CSV_BATCH_SIZE,
+    diagnostics: Optional[Dict[str, Any]] = None,
+) -> Iterator[List["BookingModel"]]:
+    """Stream bookings from a CSV in batches of ``batch_size``, in file order.
+
+    Duplicate booking_ids are all yielded; applying the batches in order with
+    an upsert keeps the last one, as ``parse_csv_bookings_with_diagnostics`` does.
+    """
+    diag = diagnostics if diagnostics is not None else {}
+    with _open_csv_reader(file_obj) as (delimiter, headers, reader):
+        diag.update(
+            {
+                "total_rows": 0,
+                "delimiter": delimiter,
+                "headers": headers,
+                "dropped": {"missing_id": 0, "invalid_booking_date": 0},
+                "duplicates_in_file": 0,
+            }
+        )
+        cols = _resolve_columns(headers, BOOKING_CSV_ALIASES)
+        id_cols, booking_date_cols = cols["booking_id"], cols["booking_date"]
+        arrival_cols, departure_cols = cols["arrival_date"], cols["departure_date"]
+        guests_cols, amount_cols, email_cols = cols["guests"], cols["amount"], cols["email"]
+        dropped = diag["dropped"]
+
+        seen_ids: set = set()
+        duplicate_ids: set = set()
+        batch: List[BookingModel] = []
+        for row in reader:
+            if not row:
+                continue
+            diag["total_rows"] += 1
+            try:
+                booking_id_raw = _first_column(row, id_cols)
+                booking_id = str(booking_id_raw).strip() if booking_id_raw is not None else ""
+                if not booking_id:
+                    dropped["missing_id"] += 1
+                    continue
+                if booking_id in seen_ids:
+                    duplicate_ids.add(booking_id)
+                else:
+                    seen_ids.add(booking_id)
+
+                booking_date_val = _first_column(row, booking_date_cols)
+                booking_date = _parse_date_flexible(booking_date_val)
+                # Drop only if original value is non-empty but unparseable
+                if (booking_date is None) and (str(booking_date_val or "").strip() != ""):
+                    dropped["invalid_booking_date"] += 1
+                    continue
+
+                arrival_date = _parse_date_flexible(_first_column(row, arrival_cols))
+                departure_date = _parse_date_flexible(_first_column(row, departure_cols))
+
+                guests_raw = _first_column(row, guests_cols)
+                try:
+                    guests = int(float(guests_raw)) if guests_raw not in (None, "") else 0
+                except Exception:
+                    guests = 0
+
+                amount_raw = _first_column(row, amount_cols)
+                try:
+                    amount = float(amount_raw) if amount_raw not in (None, "") else 0.0
+                except Exception:
+                    amount = 0.0
+
+                email_raw = _first_column(row, email_cols)
+                email = (str(email_raw).strip().lower() or None) if email_raw is not None else None
+
+                batch.append(
+                    BookingModel.model_construct(
+                        booking_id=booking_id,
+                        booking_date=booking_date,
+                        arrival_date=arrival_date,
+                        departure_date=departure_date,
+                        guests=guests,
+                        amount=amount,
+                        email=email,
+                    )
+                )
+            except Exception:
+                continue
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+        diag["duplicates_in_file"] = len(duplicate_ids)
+
+
 def parse_csv_leads(file_obj) -> List["LeadModel"]:
     """Backward-compatible wrapper: returns only records.
     See parse_csv_leads_with_diagnostics for full diagnostics.
@@ -144,6 +486,8 @@ def parse_csv_leads(file_obj) -> List["LeadModel"]:
 def _read_csv_text_and_detect_delimiter(file_obj) -> Tuple[str, str, List[str]]:
     """Read uploaded file as UTF-8 with BOM handling and detect delimiter.
     Returns (text, delimiter, headers_from_first_line)
+
+    Reads the whole upload; the CSV parsers stream via ``_open_csv_reader``.
     """
     if hasattr(file_obj, "getvalue"):
         raw = file_obj.getvalue()
@@ -154,26 +498,16 @@ def _read_csv_text_and_detect_delimiter(file_obj) -> Tuple[str, str, List[str]]:
     else:
         text = str(raw)
 
-    first_line = text.splitlines()[0] if text.splitlines() else ""
+    lines = text.splitlines()
+    first_line = lines[0] if lines else ""
     headers_guess: List[str] = []
     if first_line:
-        for d in [",", ";", "\t", "|"]:
+        for d in CSV_DELIMITERS:
             if d in first_line:
                 headers_guess = [h.strip() for h in first_line.split(d)]
                 break
 
-    # Try csv.Sniffer
-    delimiter = ","
-    try:
-        sample = text[:4096]
-        sniff = csv.Sniffer().sniff(sample, delimiters=",;\t|")
-        if sniff and sniff.delimiter in {",", ";", "\t", "|"}:
-            delimiter = sniff.delimiter
-    except Exception:
-        # Fallback: choose the delimiter with most separators in first line
-        counts = {d: first_line.count(d) for d in [",", ";", "\t", "|"]}
-        delimiter = max(counts, key=counts.get) if counts else ","
-
+    delimiter = _detect_delimiter(text[:CSV_SNIFF_SAMPLE], first_line)
     return text, delimiter, headers_guess
 
 
@@ -186,144 +520,16 @@ def parse_csv_leads_with_diagnostics(file_obj) -> Tuple[List["LeadModel"], Dict]
       - headers (as read)
       - dropped: missing_email, invalid_date, header_not_found
       - groups_after_dedupe, mql_true_after_dedupe, sql_true_after_dedupe
-    """
-    text, delimiter, _headers_guess = _read_csv_text_and_detect_delimiter(file_obj)
-    reader = csv.DictReader(io.StringIO(text), delimiter=delimiter)
-    headers = reader.fieldnames or []
-
-    # Critical headers presence (by alias)
-    def has_any(names: List[str]) -> bool:
-        lower = [h.lower().strip() for h in headers]
-        return any(n.lower() in lower for n in names)
 
-    email_aliases = ["email", "e-mail", "guest email", "customer email"]
-    created_aliases = [
-        "created_at",
-        "created date",
-        "date",
-        "date added",
-        "submission date",
-        "submitted at",
-        "added at",
-    ]
-    mql_aliases = ["mql_yes", "mql", "is_mql", "marketing qualified lead"]
-    sql_aliases = ["sql_yes", "sql", "is_sql", "sales qualified lead"]
-    utm_source_aliases = ["utm_source", "utm source", "source"]
-    utm_medium_aliases = ["utm_medium", "utm medium", "medium"]
-    utm_campaign_aliases = ["utm_campaign", "utm campaign", "campaign"]
-
-    diagnostics: Dict[str, any] = {
-        "total_rows": 0,
-        "delimiter": delimiter,
-        "headers": headers,
-        "dropped": {"missing_email": 0, "invalid_date": 0, "header_not_found": 0},
-        "groups_after_dedupe": 0,
-        "mql_true_after_dedupe": 0,
-        "sql_true_after_dedupe": 0,
-    }
-
-    # If critical headers missing, count rows and abort parsing
-    critical_missing = []
-    if not has_any(email_aliases):
-        critical_missing.append("email")
-    if not has_any(created_aliases):
-        critical_missing.append("created_at")
-    if critical_missing:
-        # Count data rows for diagnostics
-        for _ in reader:
-            diagnostics["total_rows"] += 1
-        diagnostics["dropped"]["header_not_found"] = diagnostics["total_rows"]
-        diagnostics["missing_headers"] = critical_missing
-        return [], diagnostics
-
-    # Parse rows
-    by_key: Dict[str, Tuple[int, datetime, LeadModel]] = {}
-    row_index = 0
-    for row in reader:
-        row_index += 1
-        diagnostics["total_rows"] += 1
-        try:
-            email_val = None
-            for a in email_aliases:
-                email_val = _get_ci(row, a)
-                if email_val is not None:
-                    break
-            email = (str(email_val).strip().lower() if email_val is not None else "")
-            if not email:
-                diagnostics["dropped"]["missing_email"] += 1
-                continue
-
-            created_raw = None
-            for a in created_aliases:
-                v = _get_ci(row, a)
-                if v is not None:
-                    created_raw = v
-                    break
-            created_dt_full: Optional[datetime]
-            try:
-                created_dt_full = date_parser.parse(str(created_raw)) if created_raw is not None else None
-            except Exception:
-                created_dt_full = None
-            if not created_dt_full:
-                diagnostics["dropped"]["invalid_date"] += 1
-                continue
-            created_date = created_dt_full.date()
-
-            # Booleans
-            mql_raw = None
-            for a in mql_aliases:
-                v = _get_ci(row, a)
-                if v is not None:
-                    mql_raw = v
-                    break
-            sql_raw = None
-            for a in sql_aliases:
-                v = _get_ci(row, a)
-                if v is not None:
-                    sql_raw = v
-                    break
-            is_mql = to_bool(mql_raw)
-            is_sql = to_bool(sql_raw)
-
-            # Negative flags force false
-            neg_flag = _get_ci(row, "false_mql", "mql_false", "not_mql")
-            if to_bool(neg_flag):
-                is_mql = False
-                is_sql = False
-
-            utm_source = (next(((_get_ci(row, a) or "") for a in utm_source_aliases if _get_ci(row, a) is not None), "").strip().lower())
-            utm_medium = (next(((_get_ci(row, a) or "") for a in utm_medium_aliases if _get_ci(row, a) is not None), "").strip().lower())
-            utm_campaign = (next(((_get_ci(row, a) or "") for a in utm_campaign_aliases if _get_ci(row, a) is not None), "").strip().lower())
-
-            key = f"{email}|{created_date.isoformat()}"
-            lead = LeadModel(
-                email=email,
-                created_date=created_date,
-                utm_source=utm_source,
-                utm_medium=utm_medium,
-                utm_campaign=utm_campaign,
-                is_mql=is_mql,
-                is_sql=is_sql,
-            )
-            if key not in by_key:
-                by_key[key] = (row_index, created_dt_full, lead)
-            else:
-                prev_idx, prev_dt, _prev_lead = by_key[key]
-                # Latest wins by datetime; if tie, later row index wins
-                if created_dt_full > prev_dt or (
-                    created_dt_full == prev_dt and row_index > prev_idx
-                ):
-                    by_key[key] = (row_index, created_dt_full, lead)
-        except Exception:
-            # Skip malformed rows silently but counted only in total_rows
-            continue
-
-    records = [t[2] for t in by_key.values()]
-    diagnostics["groups_after_dedupe"] = len(records)
-    diagnostics["mql_true_after_dedupe"] = sum(1 for r in records if r.is_mql)
-    diagnostics["sql_true_after_dedupe"] = sum(1 for r in records if r.is_sql)
-
-    return records, diagnostics
+    Collects ``iter_csv_leads``; use that directly to stream large files.
+    """
+    diagnostics: Dict[str, Any] = {}
+    by_key: Dict[str, LeadModel] = {}
+    for batch in iter_csv_leads(file_obj, diagnostics=diagnostics):
+        for lead in batch:
+            # Later yields supersede earlier ones for the same key
+            by_key[f"{lead.email}|{lead.created_date.isoformat()}"] = lead
+    return list(by_key.values()), diagnostics
 
 
 def parse_csv_bookings(file_obj) -> List["BookingModel"]:
@@ -339,70 +545,48 @@ def parse_csv_bookings_with_diagnostics(file_obj) -> Tuple[List["BookingModel"],
 
     Drops rows with invalid non-empty booking_date. Warns on duplicate booking_id within file.
     """
-    text, delimiter, _headers_guess = _read_csv_text_and_detect_delimiter(file_obj)
-    reader = csv.DictReader(io.StringIO(text), delimiter=delimiter)
-    headers = reader.fieldnames or []
+    diagnostics: Dict[str, Any] = {}
+    by_id: Dict[str, BookingModel] = {}
+    for batch in iter_csv_bookings(file_obj, diagnostics=diagnostics):
+        for booking in batch:
+            by_id[booking.booking_id] = booking
+    return list(by_id.values()), diagnostics
 
-    diagnostics: Dict[str, any] = {
-        "total_rows": 0,
-        "delimiter": delimiter,
-        "headers": headers,
-        "dropped": {"missing_id": 0, "invalid_booking_date": 0},
-        "duplicates_in_file": 0,
-    }
 
-    by_id: Dict[str, BookingModel] = {}
-    seen_ids_count: Dict[str, int] = {}
-    for row in reader:
-        diagnostics["total_rows"] += 1
-        try:
-            booking_id_raw = _get_ci(row, "booking_id")
-            booking_id = str(booking_id_raw).strip() if booking_id_raw is not None else ""
-            if not booking_id:
-                diagnostics["dropped"]["missing_id"] += 1
-                continue
-            seen_ids_count[booking_id] = seen_ids_count.get(booking_id, 0) + 1
+def ingest_csv_leads(file_obj, repo=None, batch_size: int = DEFAULT_CSV_BATCH_SIZE) -> Dict:
+    """Stream a leads CSV straight into the ingest repository's bulk upsert.
 
-            booking_date_val = _get_ci(row, "booking_date", "date", "created_at")
-            booking_date = _parse_date_flexible(booking_date_val)
-            # Drop only if original value is non-empty but unparseable
-            if (booking_date is None) and (str(booking_date_val or "").strip() != ""):
-                diagnostics["dropped"]["invalid_booking_date"] += 1
-                continue
+    Returns inserted/updated counts and the parse diagnostics. A row that
+    supersedes an earlier one in the same file counts as an update.
+    """
+    from src.repositories.ingest_repository import get_ingest_repository
 
-            arrival_date = _parse_date_flexible(_get_ci(row, "arrival_date", "arrival"))
-            departure_date = _parse_date_flexible(_get_ci(row, "departure_date", "departure"))
+    repo = repo or get_ingest_repository()
+    diagnostics: Dict[str, Any] = {}
+    totals = {"inserted": 0, "updated": 0}
+    for batch in iter_csv_leads(file_obj, batch_size=batch_size, diagnostics=diagnostics):
+        result = repo.upsert_leads(batch, batch_size=batch_size)
+        totals["inserted"] += result["inserted"]
+        totals["updated"] += result["updated"]
+    return {**totals, "diagnostics": diagnostics}
 
-            guests_raw = _get_ci(row, "guests")
-            try:
-                guests = int(float(guests_raw)) if guests_raw not in (None, "") else 0
-            except Exception:
-                guests = 0
 
-            amount_raw = _get_ci(row, "amount")
-            try:
-                amount = float(amount_raw) if amount_raw not in (None, "") else 0.0
-            except Exception:
-                amount = 0.0
-
-            email_raw = _get_ci(row, "email")
-            email = (str(email_raw).strip().lower() or None) if email_raw is not None else None
-
-            booking = BookingModel(
-                booking_id=booking_id,
-                booking_date=booking_date,
-                arrival_date=arrival_date,
-                departure_date=departure_date,
-                guests=guests,
-                amount=amount,
-                email=email,
-            )
-            by_id[booking_id] = booking
-        except Exception:
-            continue
+def ingest_csv_bookings(file_obj, repo=None, batch_size: int = DEFAULT_CSV_BATCH_SIZE) -> Dict:
+    """Stream a bookings CSV straight into the ingest repository's bulk upsert.
 
-    diagnostics["duplicates_in_file"] = sum(1 for cnt in seen_ids_count.values() if cnt > 1)
-    return list(by_id.values()), diagnostics
+    Returns inserted/updated counts and the parse diagnostics. Repeated
+    booking_ids in the file count as updates.
+    """
+    from src.repositories.ingest_repository import get_ingest_repository
+
+    repo = repo or get_ingest_repository()
+    diagnostics: Dict[str, Any] = {}
+    totals = {"inserted": 0, "updated": 0}
+    for batch in iter_csv_bookings(file_obj, batch_size=batch_size, diagnostics=diagnostics):
+        result = repo.upsert_bookings(batch, batch_size=batch_size)
+        totals["inserted"] += result["inserted"]
+        totals["updated"] += result["updated"]
+    return {**totals, "diagnostics": diagnostics}
 
 
 def summarize_leads(records: List[LeadModel]) -> Dict:
@@ -416,6 +600,87 @@ def summarize_leads(records: List[LeadModel]) -> Dict:
     }
 
 
+def lead_from_airtable_record(rec: Dict, idx: int = 0) -> Optional[Tuple[Tuple[str, date], LeadModel]]:
+    """Map an Airtable 'Main' record to ``(dedupe_key, LeadModel)``.
+
+    Returns None for records filtered out (mql_false, or neither MQL nor SQL).
+    Raises on malformed records.
+    """
+    fields = rec.get("fields", {})
+    # Normalize booleans
+    mql_yes = _to_bool(_get_field_ci(fields, "mql_yes") if _get_field_ci(fields, "mql_yes") is not None else _get_field_ci(fields, "mql"))
+    sql_yes = _to_bool(_get_field_ci(fields, "sql_yes") if _get_field_ci(fields, "sql_yes") is not None else _get_field_ci(fields, "sql"))
+    mql_false = _to_bool(_get_field_ci(fields, "mql_false"))
+
+    # Filter rules
+    if mql_false:
+        return None
+    if not (mql_yes or sql_yes):
+        return None
+
+    created = _parse_date(_get_field_ci(fields, "created_date"))
+    # Normalize text fields
+    utm_source = _norm_lower_strip(_get_field_ci(fields, "utm_source"))
+    utm_medium = _norm_lower_strip(_get_field_ci(fields, "utm_medium"))
+    utm_campaign = _norm_lower_strip(_get_field_ci(fields, "utm_campaign"))
+
+    # Email normalization for dedupe key
+    email_raw = _get_field_ci(fields, "email")
+    email_norm = _norm_lower_strip(email_raw, default="")
+    if not email_norm:
+        row_id = rec.get("id") or f"row-{idx}"
+        email_norm = f"unknown-{row_id}"
+
+    lead = LeadModel(
+        email=email_norm,
+        created_date=created,
+        utm_source=utm_source,
+        utm_medium=utm_medium,
+        utm_campaign=utm_campaign,
+        is_mql=mql_yes,
+        is_sql=sql_yes,
+    )
+    return (email_norm, created), lead
+
+
+def booking_from_airtable_record(rec: Dict) -> Optional[BookingModel]:
+    """Map an Airtable 'Bookings<>Able' record to a BookingModel.
+
+    Returns None when no booking_id can be determined. Raises on malformed records.
+    """
+    fields = rec.get("fields", {})
+    booking_id_raw = _get_field_ci(fields, "booking_id")
+    booking_id = str(booking_id_raw).strip() if booking_id_raw is not None else (rec.get("id") or "")
+    if not booking_id:
+        # If still empty, skip as we cannot dedupe reliably
+        return None
+
+    booking_date = _parse_date(_get_field_ci(fields, "booking_date"))
+    arrival_date = _parse_date(_get_field_ci(fields, "arrival_date"))
+    departure_date = _parse_date(_get_field_ci(fields, "departure_date"))
+
+    guests_raw = _get_field_ci(fields, "guests")
+    amount_raw = _get_field_ci(fields, "amount")
+
+    # Normalize email if present
+    email_raw = _get_field_ci(fields, "email")
+    email_norm = _norm_lower_strip(email_raw, default="")
+    email_val: Optional[str] = email_norm if email_norm else None
+
+    guests = int(guests_raw) if guests_raw is not None else 0
+    amount = float(amount_raw) if amount_raw is not None else 0.0
+
+    return BookingModel(
+        booking_id=booking_id,
+        booking_date=booking_date,
+        arrival_date=arrival_date,
+        departure_date=departure_date,
+        guests=guests,
+        amount=amount,
+        email=email_val,
+    )
+
+
 def import_leads() -> Tuple[List[LeadModel], Dict]:
     """Import leads from Airtable table 'Main'.
 
@@ -434,49 +699,18 @@ def import_leads() -> Tuple[List[LeadModel], Dict]:
     after_filter_before_dedupe = 0
 
     for idx, rec in enumerate(records_raw):
-        fields = rec.get("fields", {})
         try:
-            # Normalize booleans
-            mql_yes = _to_bool(_get_field_ci(fields, "mql_yes") if _get_field_ci(fields, "mql_yes") is not None else _get_field_ci(fields, "mql"))
-            sql_yes = _to_bool(_get_field_ci(fields, "sql_yes") if _get_field_ci(fields, "sql_yes") is not None else _get_field_ci(fields, "sql"))
-            mql_false = _to_bool(_get_field_ci(fields, "mql_false"))
-
-            # Filter rules
-            if mql_false:
+            mapped = lead_from_airtable_record(rec, idx)
+            if mapped is None:
                 continue
-            if not (mql_yes or sql_yes):
-                continue
-
-            created = _parse_date(_get_field_ci(fields, "created_date"))
-            # Normalize text fields
-            utm_source = _norm_lower_strip(_get_field_ci(fields, "utm_source"))
-            utm_medium = _norm_lower_strip(_get_field_ci(fields, "utm_medium"))
-            utm_campaign = _norm_lower_strip(_get_field_ci(fields, "utm_campaign"))
-
-            # Email normalization for dedupe key
-            email_raw = _get_field_ci(fields, "email")
-            email_norm = _norm_lower_strip(email_raw, default="")
-            if not email_norm:
-                row_id = rec.get("id") or f"row-{idx}"
-                email_norm = f"unknown-{row_id}"
 
             # Count after filters but before dedupe
             after_filter_before_dedupe += 1
 
-            dedupe_key = (email_norm, created)
+            dedupe_key, lead = mapped
             if dedupe_key in seen_keys:
                 continue
             seen_keys.add(dedupe_key)
-
-            lead = LeadModel(
-                email=email_norm,
-                created_date=created,
-                utm_source=utm_source,
-                utm_medium=utm_medium,
-                utm_campaign=utm_campaign,
-                is_mql=mql_yes,
-                is_sql=sql_yes,
-            )
             leads_filtered.append(lead)
         except Exception:
             # Skip malformed records silently per minimal implementation
@@ -514,9 +748,8 @@ def import_bookings() -> Tuple[List[BookingModel], Dict]:
     seen_ids = set()
 
     for rec in records_raw:
-        fields = rec.get("fields", {})
         try:
-            booking_id_raw = _get_field_ci(fields, "booking_id")
+            booking_id_raw = _get_field_ci(rec.get("fields", {}), "booking_id")
             booking_id = str(booking_id_raw).strip() if booking_id_raw is not None else (rec.get("id") or "")
             if not booking_id:
                 # If still empty, skip as we cannot dedupe reliably
@@ -525,31 +758,9 @@ def import_bookings() -> Tuple[List[BookingModel], Dict]:
                 continue
             seen_ids.add(booking_id)
 
-            booking_date = _parse_date(_get_field_ci(fields, "booking_date"))
-            arrival_date = _parse_date(_get_field_ci(fields, "arrival_date"))
-            departure_date = _parse_date(_get_field_ci(fields, "departure_date"))
-
-            guests_raw = _get_field_ci(fields, "guests")
-            amount_raw = _get_field_ci(fields, "amount")
-
-            # Normalize email if present
-            email_raw = _get_field_ci(fields, "email")
-            email_norm = _norm_lower_strip(email_raw, default="")
-            email_val: Optional[str] = email_norm if email_norm else None
-
-            guests = int(guests_raw) if guests_raw is not None else 0
-            amount = float(amount_raw) if amount_raw is not None else 0.0
-
-            booking = BookingModel(
-                booking_id=booking_id,
-                booking_date=booking_date,
-                arrival_date=arrival_date,
-                departure_date=departure_date,
-                guests=guests,
-                amount=amount,
-                email=email_val,
-            )
-            bookings.append(booking)
+            booking = booking_from_airtable_record(rec)
+            if booking is not None:
+                bookings.append(booking)
         except Exception:
             # Skip malformed records silently per minimal implementation
             continue
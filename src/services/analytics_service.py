@@ -2,24 +2,141 @@
 Analytics service for business metrics and data analysis.
 """
 
+import math
 from datetime import date, datetime
 from decimal import Decimal
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Callable, List, Dict, Any, Optional, Tuple
+import numpy as np
 import pandas as pd
 from ..models.analytics import CashFlowMetrics, BusinessMetrics, FXRateData
 from ..repositories.base import DatabaseConnection
 from ..utils.date_utils import DateUtils
 from ..utils.currency_utils import CurrencyUtils
 from .error_handler import get_error_handler
+from .ledger_checkpoints import LedgerCheckpoints
+from .rollup_service import RollupService
 from ..analytics.compare_utils import make_daily_index
 
 
+# Bookings scanned by lead_to_booking_lag (shared by both matching engines so
+# row order, and therefore tie-breaking in the lag table, is identical).
+_LAG_BOOKINGS_QUERY = """
+    SELECT booking_id, booking_date, amount, guests, email
+      FROM bookings
+     WHERE COALESCE(email, '') <> ''
+       AND booking_date BETWEEN ? AND ?
+  ORDER BY booking_date DESC
+"""
+
+
+def _parse_date_scalar(v: Any) -> Optional[pd.Timestamp]:
+    """Parse a single date-like value; None when empty or unparseable."""
+    try:
+        if v is None or v == "":
+            return None
+        ts = pd.to_datetime(v, errors="coerce")
+        return ts if pd.notnull(ts) else None
+    except Exception:
+        return None
+
+
+def _parse_timestamps(values: pd.Series) -> pd.Series:
+    """Parse a column of date-like values, once per distinct value.
+
+    ISO-8601 strings go through a single vectorized parse; anything it rejects
+    falls back to the scalar parser so results match ``_parse_date_scalar``.
+    """
+    uniques = pd.unique(values.to_numpy(dtype=object))
+    parsed: Dict[Any, Any] = {}
+    text = [u for u in uniques if isinstance(u, str) and u]
+    if text:
+        try:
+            fast = pd.to_datetime(pd.Index(text), errors="coerce", format="ISO8601")
+            if fast.tz is None:
+                parsed.update((k, ts) for k, ts in zip(text, fast) if ts is not pd.NaT)
+        except (ValueError, TypeError):
+            pass
+    for u in uniques:
+        if u not in parsed:
+            parsed[u] = _parse_date_scalar(u)
+    return values.map(parsed)
+
+
+def _is_naive_datetime(values: pd.Series) -> bool:
+    """True when a parsed column is a tz-naive datetime64 column."""
+    return pd.api.types.is_datetime64_dtype(values.dtype) and getattr(values.dt, "tz", None) is None
+
+
+def _coerce_numeric(values: pd.Series, conv: Callable[[Any], Any]) -> pd.Series:
+    """Apply ``conv(v or 0)`` to a column; malformed values become NaN."""
+    if values.dtype != object:
+        return values.fillna(0)
+
+    def _one(v: Any) -> Any:
+        try:
+            return conv(v or 0)
+        except Exception:
+            return np.nan
+
+    return values.map(_one)
+
+
+def _sorted_median(sorted_values: np.ndarray) -> float:
+    """Median of an already sorted integer array (0.0 when empty)."""
+    n = len(sorted_values)
+    if n == 0:
+        return 0.0
+    mid = n // 2
+    if n % 2 == 1:
+        return float(sorted_values[mid])
+    return float((sorted_values[mid - 1] + sorted_values[mid]) / 2.0)
+
+
+def _grouped_lag_stats(
+    keys: List[Any], lags: np.ndarray, sort_keys: bool = False
+) -> List[Tuple[Any, Dict[str, Any]]]:
+    """Count, mean and median of ``lags`` per key.
+
+    Groups are returned by descending count (ties in first-seen order), or by
+    key when ``sort_keys`` is set.
+    """
+    if not keys:
+        return []
+    codes, uniques = pd.factorize(
+        pd.Series(keys, dtype=object), sort=sort_keys, use_na_sentinel=False
+    )
+    counts = np.bincount(codes)
+    sorted_lags = lags[np.lexsort((lags, codes))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    sums = np.add.reduceat(sorted_lags, starts)
+    mid = starts + counts // 2
+    medians = np.where(
+        counts % 2 == 1,
+        sorted_lags[mid],
+        (sorted_lags[mid - 1] + sorted_lags[mid]) / 2.0,
+    )
+    order = np.arange(len(counts)) if sort_keys else np.argsort(-counts, kind="stable")
+    return [
+        (
+            uniques[g],
+            {
+                "count": int(counts[g]),
+                "avg_days": float(sums[g] / counts[g]),
+                "median_days": float(medians[g]),
+            },
+        )
+        for g in order
+    ]
+
+
 class AnalyticsService:
     """Service for analytics and business intelligence operations."""
 
     def __init__(self, db_connection: DatabaseConnection):
         self.db = db_connection
         self.error_handler = get_error_handler()
+        self.rollups = RollupService(db_connection)
+        self.checkpoints = LedgerCheckpoints(db_connection)
 
     # --- Development fallback for cost analytics ---
     def get_cost_analytics(self, start_date=None, end_date=None, category=None, currency=None):
@@ -71,7 +188,7 @@ class AnalyticsService:
         self, start_date: date, end_date: date
     ) -> CashFlowMetrics:
         """Calculate cash flow metrics for date range."""
-        with self.db.get_connection() as conn:
+        with self.db.get_connection(readonly=True) as conn:
             # Get sales data
             sales_query = """
                 SELECT SUM(amount_usd) as total_sales, COUNT(*) as transaction_count
@@ -142,7 +259,7 @@ class AnalyticsService:
 
     def get_business_metrics(self, start_date: date, end_date: date) -> BusinessMetrics:
         """Calculate business performance metrics."""
-        with self.db.get_connection() as conn:
+        with self.db.get_connection(readonly=True) as conn:
             # This would integrate with Airtable or other CRM data
             # For now, return mock data structure
             return BusinessMetrics(
@@ -188,7 +305,7 @@ class AnalyticsService:
         self, start_date: date, end_date: date
     ) -> Dict[str, Decimal]:
         """Get cost breakdown by category."""
-        with self.db.get_connection() as conn:
+        with self.db.get_connection(readonly=True) as conn:
             query = """
                 SELECT category, SUM(amount_usd) as total
                 FROM costs 
@@ -211,7 +328,19 @@ class AnalyticsService:
         self, start_date: date, end_date: date
     ) -> Dict[str, List[Dict[str, Any]]]:
         """Get daily sales and cost trends."""
-        with self.db.get_connection() as conn:
+        if all(
+            self.rollups.covers(t, start_date, end_date, date_column="date", measures=("amount_usd",))
+            for t in ("sales_orders", "costs")
+        ):
+            return {
+                key: [
+                    {"date": row["day"], "amount": float(row["amount_usd"])}
+                    for row in self.rollups.daily(t, start_date, end_date, ("amount_usd",))
+                ]
+                for key, t in (("sales", "sales_orders"), ("costs", "costs"))
+            }
+
+        with self.db.get_connection(readonly=True) as conn:
             # Daily sales
             sales_query = """
                 SELECT date, SUM(amount_usd) as amount
@@ -249,9 +378,25 @@ class AnalyticsService:
 
             return {"sales": sales_trends, "costs": costs_trends}
 
+    def daily_trends(self, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        """Daily sales and costs merged into one row per date.
+
+        Returns a list of {date, sales, costs, net} ordered by date.
+        """
+        trends = self._get_daily_trends(start_date, end_date)
+        by_date: Dict[str, Dict[str, Any]] = {}
+        for key in ("sales", "costs"):
+            for row in trends[key]:
+                day = str(row["date"])
+                entry = by_date.setdefault(day, {"date": day, "sales": 0.0, "costs": 0.0})
+                entry[key] += row["amount"]
+        for entry in by_date.values():
+            entry["net"] = entry["sales"] - entry["costs"]
+        return [by_date[day] for day in sorted(by_date)]
+
     def get_fx_rates(self, month: str) -> Optional[FXRateData]:
         """Get FX rates for a specific month."""
-        with self.db.get_connection() as conn:
+        with self.db.get_connection(readonly=True) as conn:
             query = """
                 SELECT month, low_crc_usd, base_crc_usd, high_crc_usd
                 FROM fx_rates 
@@ -310,7 +455,22 @@ class AnalyticsService:
         Returns a DataFrame with columns: date, total_amount, total_guests, bookings_count
         """
         try:
-            with self.db.get_connection() as conn:
+            if self.rollups.covers("bookings", start_date, end_date, measures=("quantity",)):
+                rows = self.rollups.daily(
+                    "bookings", start_date, end_date, ("amount", "quantity", "row_count")
+                )
+                return pd.DataFrame(
+                    [
+                        {
+                            "date": r["day"],
+                            "total_amount": float(r["amount"] or 0.0),
+                            "total_guests": int(r["quantity"] or 0),
+                            "bookings_count": int(r["row_count"] or 0),
+                        }
+                        for r in rows
+                    ]
+                )
+            with self.db.get_connection(readonly=True) as conn:
                 query = (
                     """
                     SELECT booking_date AS date,
@@ -371,7 +531,7 @@ class AnalyticsService:
         Sums are based on the `bookings` table and filtered by `booking_date`.
         """
         try:
-            with self.db.get_connection() as conn:
+            with self.db.get_connection(readonly=True) as conn:
                 row = conn.execute(
                     """
                     SELECT SUM(amount)   AS total_amount,
@@ -403,7 +563,22 @@ class AnalyticsService:
         Columns: month (YYYY-MM), total_amount, total_guests, bookings_count
         """
         try:
-            with self.db.get_connection() as conn:
+            if self.rollups.covers("bookings", start_date, end_date, measures=("quantity",)):
+                rows = self.rollups.by_month(
+                    "bookings", start_date, end_date, ("amount", "quantity", "row_count")
+                )
+                return pd.DataFrame(
+                    [
+                        {
+                            "month": r["month"],
+                            "total_amount": float(r["amount"] or 0.0),
+                            "total_guests": int(r["quantity"] or 0),
+                            "bookings_count": int(r["row_count"] or 0),
+                        }
+                        for r in rows
+                    ]
+                )
+            with self.db.get_connection(readonly=True) as conn:
                 rows = conn.execute(
                     """
                     SELECT SUBSTR(booking_date, 1, 7) AS month,
@@ -440,7 +615,19 @@ class AnalyticsService:
         Returns a DataFrame with columns: date, inflow, outflow (outflow is positive values of absolute outflows).
         """
         try:
-            with self.db.get_connection() as conn:
+            if self.rollups.covers("cash_ledger", start_date, end_date):
+                rows = self.rollups.daily("cash_ledger", start_date, end_date, ("inflow", "outflow"))
+                return pd.DataFrame(
+                    [
+                        {
+                            "date": r["day"],
+                            "inflow": float(r["inflow"] or 0.0),
+                            "outflow": float(r["outflow"] or 0.0),
+                        }
+                        for r in rows
+                    ]
+                )
+            with self.db.get_connection(readonly=True) as conn:
                 rows = conn.execute(
                     """
                     SELECT entry_date AS date,
@@ -470,9 +657,21 @@ class AnalyticsService:
             return pd.DataFrame(columns=["date", "inflow", "outflow"])
 
     def cash_ledger_summary(self, start_date: date, end_date: date) -> Dict[str, Any]:
-        """Summary of cash ledger within range: inflow, outflow, net, entries."""
+        """Summary of cash ledger within range: inflow, outflow, net, entries.
+
+        With ledger checkpoints installed this is the difference of the
+        running totals at both ends of the range.
+        """
         try:
-            with self.db.get_connection() as conn:
+            if self.checkpoints.ready():
+                totals = self.checkpoints.range_totals(start_date, end_date)
+                return {
+                    "inflow": totals.inflow,
+                    "outflow": totals.outflow,
+                    "net": totals.net,
+                    "entries": totals.entries,
+                }
+            with self.db.get_connection(readonly=True) as conn:
                 row = conn.execute(
                     """
                     SELECT SUM(CASE WHEN amount >= 0 THEN amount ELSE 0 END)  AS inflow,
@@ -499,7 +698,7 @@ class AnalyticsService:
     def leads_summary(self, start_date: date, end_date: date) -> Dict[str, int]:
         """Return total leads, MQL count, SQL count in date range (created_at)."""
         try:
-            with self.db.get_connection() as conn:
+            with self.db.get_connection(readonly=True) as conn:
                 total_q = "SELECT COUNT(*) AS c FROM leads WHERE created_at BETWEEN ? AND ?"
                 mql_q = (
                     "SELECT COUNT(*) AS c FROM leads WHERE created_at BETWEEN ? AND ? AND COALESCE(mql_yes, 0) = 1"
@@ -525,7 +724,7 @@ class AnalyticsService:
     def leads_by_utm(self, start_date: date, end_date: date) -> Dict[str, List[Dict[str, Any]]]:
         """Return counts split by utm_source and utm_campaign for leads in date range."""
         try:
-            with self.db.get_connection() as conn:
+            with self.db.get_connection(readonly=True) as conn:
                 params = (start_date.isoformat(), end_date.isoformat())
                 by_source_rows = conn.execute(
                     """
@@ -566,7 +765,9 @@ class AnalyticsService:
             )
             return {"by_source": [], "by_campaign": []}
 
-    def lead_to_booking_lag(self, start_date: str, end_date: str) -> Dict[str, Any]:
+    def lead_to_booking_lag(
+        self, start_date: str, end_date: str, method: str = "asof"
+    ) -> Dict[str, Any]:
         """
         Compute lead→booking lag in days for bookings within [start_date, end_date] (inclusive).
 
@@ -576,15 +777,50 @@ class AnalyticsService:
         - For each booking, match most recent qualifying lead for same email
         - If multiple same-day leads exist, pick latest created_at (ORDER BY created_at DESC LIMIT 1)
         - Bookings without a match are excluded from lag stats but counted as unmatched
+
+        ``method`` selects the matching engine:
+        - "asof" (default): set-based sort-merge as-of join over (email, created_at)
+        - "per_row": legacy path issuing one lead lookup per booking
+        Both engines return identical results.
         """
-        def _parse_date_safe(v: Any) -> Optional[pd.Timestamp]:
-            try:
-                if v is None or v == "":
-                    return None
-                ts = pd.to_datetime(v, errors="coerce")
-                return ts if pd.notnull(ts) else None
-            except Exception:
-                return None
+        if method not in ("asof", "per_row"):
+            raise ValueError(f"Unknown lag matching method: {method}")
+
+        try:
+            with self.db.get_connection() as conn:
+                # Indices to keep things snappy (portable IF NOT EXISTS)
+                try:
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_email_created ON leads(email, created_at)")
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_bookings_booking_date ON bookings(booking_date)")
+                except Exception:
+                    # Non-fatal; continue without indices
+                    pass
+
+                if method == "per_row":
+                    return self._lead_to_booking_lag_per_row(conn, start_date, end_date)
+                return self._lead_to_booking_lag_asof(conn, start_date, end_date)
+        except Exception as e:
+            self.error_handler.handle_database_error(
+                e, operation="lead_to_booking_lag", affected_table="bookings/leads"
+            )
+            return {
+                "summary": {
+                    "matched_bookings": 0,
+                    "unmatched_bookings": 0,
+                    "avg_days": 0.0,
+                    "median_days": 0.0,
+                    "p90_days": 0.0,
+                },
+                "lag_table": [],
+                "utm_breakdown": {"by_source": [], "by_campaign": []},
+                "monthly_cohorts": [],
+            }
+
+    def _lead_to_booking_lag_per_row(
+        self, conn, start_date: str, end_date: str
+    ) -> Dict[str, Any]:
+        """Legacy matcher: one indexed lead lookup per booking."""
+        _parse_date_safe = _parse_date_scalar
 
         def _median(values: List[int]) -> float:
             if not values:
@@ -601,175 +837,314 @@ class AnalyticsService:
                 return 0.0
             s = sorted(values)
             # Nearest-rank method
-            import math
             k = max(1, math.ceil(0.9 * len(s))) - 1
             return float(s[k])
 
-        try:
-            with self.db.get_connection() as conn:
-                # Indices to keep things snappy (portable IF NOT EXISTS)
-                try:
-                    conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_email_created ON leads(email, created_at)")
-                    conn.execute("CREATE INDEX IF NOT EXISTS idx_bookings_booking_date ON bookings(booking_date)")
-                except Exception:
-                    # Non-fatal; continue without indices
-                    pass
+        # Step 1: bookings in range with email
+        bookings_rows = conn.execute(
+            _LAG_BOOKINGS_QUERY, (start_date, end_date)
+        ).fetchall()
 
-                # Step 1: bookings in range with email
-                bookings_rows = conn.execute(
-                    """
-                    SELECT booking_id, booking_date, amount, guests, email
-                      FROM bookings
-                     WHERE COALESCE(email, '') <> ''
-                       AND booking_date BETWEEN ? AND ?
-                  ORDER BY booking_date DESC
-                    """,
-                    (start_date, end_date),
-                ).fetchall()
+        total_in_range = len(bookings_rows)
+        lag_records: List[Dict[str, Any]] = []
 
-                total_in_range = len(bookings_rows)
-                lag_records: List[Dict[str, Any]] = []
+        # Step 2: find most recent lead per booking
+        lead_query = (
+            """
+            SELECT created_at, utm_source, utm_medium, utm_campaign
+              FROM leads
+             WHERE email = ?
+               AND COALESCE(created_at, '') <> ''
+               AND created_at <= ?
+          ORDER BY created_at DESC
+             LIMIT 1
+            """
+        )
 
-                # Step 2: find most recent lead per booking
-                lead_query = (
-                    """
-                    SELECT created_at, utm_source, utm_medium, utm_campaign
-                      FROM leads
-                     WHERE email = ?
-                       AND COALESCE(created_at, '') <> ''
-                       AND created_at <= ?
-                  ORDER BY created_at DESC
-                     LIMIT 1
-                    """
+        for b in bookings_rows:
+            try:
+                email = b["email"]
+                b_date = _parse_date_safe(b["booking_date"])
+                if not email or b_date is None:
+                    continue
+
+                lead_row = conn.execute(lead_query, (email, b_date.date().isoformat())).fetchone()
+                if not lead_row:
+                    continue
+
+                lead_dt = _parse_date_safe(lead_row["created_at"])
+                if lead_dt is None:
+                    continue
+
+                # Step 3: compute lag in days (booking_date - lead_created_at)
+                lag_days = int((b_date.normalize() - lead_dt.normalize()).days)
+                if lag_days < 0:
+                    # Safety guard; skip inconsistent data
+                    continue
+
+                lag_records.append(
+                    {
+                        "booking_id": b["booking_id"],
+                        "booking_date": b_date.date().isoformat(),
+                        "amount": float(b["amount"] or 0.0),
+                        "guests": int(b["guests"] or 0),
+                        "email": email,
+                        "lead_created_at": lead_dt.to_pydatetime().isoformat(timespec="seconds"),
+                        "utm_source": lead_row["utm_source"],
+                        "utm_medium": lead_row["utm_medium"],
+                        "utm_campaign": lead_row["utm_campaign"],
+                        "lag_days": lag_days,
+                    }
                 )
+            except Exception:
+                # Skip malformed rows, continue
+                continue
+
+        # Step 4: aggregates
+        lags = [r["lag_days"] for r in lag_records]
+        matched = len(lag_records)
+        unmatched = max(0, total_in_range - matched)
+
+        avg_days = float(sum(lags) / matched) if matched else 0.0
+        median_days = _median(lags)
+        p90_days = _p90(lags)
+
+        # UTM breakdowns (matched only)
+        from collections import defaultdict
+
+        src_map: Dict[str, List[int]] = defaultdict(list)
+        camp_map: Dict[str, List[int]] = defaultdict(list)
+        for r in lag_records:
+            src = r.get("utm_source") or "Unknown"
+            camp = r.get("utm_campaign") or "Unknown"
+            src_map[src].append(r["lag_days"])
+            camp_map[camp].append(r["lag_days"])
+
+        by_source = [
+            {
+                "utm_source": k,
+                "count": len(v),
+                "avg_days": float(sum(v) / len(v)) if v else 0.0,
+                "median_days": _median(v),
+            }
+            for k, v in sorted(src_map.items(), key=lambda kv: -len(kv[1]))
+        ]
+        by_campaign = [
+            {
+                "utm_campaign": k,
+                "count": len(v),
+                "avg_days": float(sum(v) / len(v)) if v else 0.0,
+                "median_days": _median(v),
+            }
+            for k, v in sorted(camp_map.items(), key=lambda kv: -len(kv[1]))
+        ]
+
+        # Monthly cohorts by booking month
+        cohort_map: Dict[str, List[int]] = defaultdict(list)
+        for r in lag_records:
+            m = (r["booking_date"])[:7]
+            cohort_map[m].append(r["lag_days"])
+        monthly_cohorts = [
+            {
+                "month": m,
+                "count": len(vals),
+                "avg_days": float(sum(vals) / len(vals)) if vals else 0.0,
+                "median_days": _median(vals),
+            }
+            for m, vals in sorted(cohort_map.items())
+        ]
 
-                for b in bookings_rows:
-                    try:
-                        email = b["email"]
-                        b_date = _parse_date_safe(b["booking_date"])
-                        if not email or b_date is None:
-                            continue
-
-                        lead_row = conn.execute(lead_query, (email, b_date.date().isoformat())).fetchone()
-                        if not lead_row:
-                            continue
-
-                        lead_dt = _parse_date_safe(lead_row["created_at"])
-                        if lead_dt is None:
-                            continue
-
-                        # Step 3: compute lag in days (booking_date - lead_created_at)
-                        lag_days = int((b_date.normalize() - lead_dt.normalize()).days)
-                        if lag_days < 0:
-                            # Safety guard; skip inconsistent data
-                            continue
-
-                        lag_records.append(
-                            {
-                                "booking_id": b["booking_id"],
-                                "booking_date": b_date.date().isoformat(),
-                                "amount": float(b["amount"] or 0.0),
-                                "guests": int(b["guests"] or 0),
-                                "email": email,
-                                "lead_created_at": lead_dt.to_pydatetime().isoformat(timespec="seconds"),
-                                "utm_source": lead_row["utm_source"],
-                                "utm_medium": lead_row["utm_medium"],
-                                "utm_campaign": lead_row["utm_campaign"],
-                                "lag_days": lag_days,
-                            }
-                        )
-                    except Exception:
-                        # Skip malformed rows, continue
-                        continue
-
-                # Step 4: aggregates
-                lags = [r["lag_days"] for r in lag_records]
-                matched = len(lag_records)
-                unmatched = max(0, total_in_range - matched)
-
-                avg_days = float(sum(lags) / matched) if matched else 0.0
-                median_days = _median(lags)
-                p90_days = _p90(lags)
-
-                # UTM breakdowns (matched only)
-                from collections import defaultdict
-
-                src_map: Dict[str, List[int]] = defaultdict(list)
-                camp_map: Dict[str, List[int]] = defaultdict(list)
-                for r in lag_records:
-                    src = r.get("utm_source") or "Unknown"
-                    camp = r.get("utm_campaign") or "Unknown"
-                    src_map[src].append(r["lag_days"])
-                    camp_map[camp].append(r["lag_days"])
+        # Step 5: assemble response
+        lag_table_sorted = sorted(
+            lag_records, key=lambda r: r.get("booking_date", ""), reverse=True
+        )
+        top50 = lag_table_sorted[:50]
 
-                by_source = [
-                    {
-                        "utm_source": k,
-                        "count": len(v),
-                        "avg_days": float(sum(v) / len(v)) if v else 0.0,
-                        "median_days": _median(v),
-                    }
-                    for k, v in sorted(src_map.items(), key=lambda kv: -len(kv[1]))
-                ]
-                by_campaign = [
-                    {
-                        "utm_campaign": k,
-                        "count": len(v),
-                        "avg_days": float(sum(v) / len(v)) if v else 0.0,
-                        "median_days": _median(v),
-                    }
-                    for k, v in sorted(camp_map.items(), key=lambda kv: -len(kv[1]))
-                ]
+        return {
+            "summary": {
+                "matched_bookings": matched,
+                "unmatched_bookings": unmatched,
+                "avg_days": avg_days,
+                "median_days": median_days,
+                "p90_days": p90_days,
+            },
+            "lag_table": top50,
+            "utm_breakdown": {"by_source": by_source, "by_campaign": by_campaign},
+            "monthly_cohorts": monthly_cohorts,
+        }
 
-                # Monthly cohorts by booking month
-                cohort_map: Dict[str, List[int]] = defaultdict(list)
-                for r in lag_records:
-                    m = (r["booking_date"])[:7]
-                    cohort_map[m].append(r["lag_days"])
-                monthly_cohorts = [
-                    {
-                        "month": m,
-                        "count": len(vals),
-                        "avg_days": float(sum(vals) / len(vals)) if vals else 0.0,
-                        "median_days": _median(vals),
-                    }
-                    for m, vals in sorted(cohort_map.items())
-                ]
+    def _lead_to_booking_lag_asof(
+        self, conn, start_date: str, end_date: str
+    ) -> Dict[str, Any]:
+        """Set-based matcher: one bookings scan, one leads scan and an as-of join.
 
-                # Step 5: assemble response
-                lag_table_sorted = sorted(
-                    lag_records, key=lambda r: r.get("booking_date", ""), reverse=True
-                )
-                top50 = lag_table_sorted[:50]
+        Leads are read once in SQLite's own ``ORDER BY created_at`` order so the
+        ``created_at <= booking_date`` comparison keeps SQLite's collation (numbers
+        before text, binary text order). Each booking's cut-off then becomes a
+        position in that sequence and ``pd.merge_asof`` picks the latest qualifying
+        lead per email in a single pass.
+        """
+        cur = conn.cursor()
+        cur.row_factory = None  # plain tuples; avoids per-row dict construction
 
-                return {
-                    "summary": {
-                        "matched_bookings": matched,
-                        "unmatched_bookings": unmatched,
-                        "avg_days": avg_days,
-                        "median_days": median_days,
-                        "p90_days": p90_days,
-                    },
-                    "lag_table": top50,
-                    "utm_breakdown": {"by_source": by_source, "by_campaign": by_campaign},
-                    "monthly_cohorts": monthly_cohorts,
-                }
-        except Exception as e:
-            self.error_handler.handle_database_error(
-                e, operation="lead_to_booking_lag", affected_table="bookings/leads"
+        bookings = pd.DataFrame.from_records(
+            cur.execute(_LAG_BOOKINGS_QUERY, (start_date, end_date)).fetchall(),
+            columns=["booking_id", "booking_date", "amount", "guests", "email"],
+        )
+        total_in_range = len(bookings)
+
+        leads = pd.DataFrame.from_records(
+            cur.execute(
+                """
+                SELECT email, created_at, utm_source, utm_medium, utm_campaign
+                  FROM leads
+                 WHERE COALESCE(created_at, '') <> ''
+                   AND email IN (
+                        SELECT email
+                          FROM bookings
+                         WHERE COALESCE(email, '') <> ''
+                           AND booking_date BETWEEN ? AND ?
+                   )
+              ORDER BY created_at, rowid
+                """,
+                (start_date, end_date),
+            ).fetchall(),
+            columns=["email", "created_at", "utm_source", "utm_medium", "utm_campaign"],
+        )
+
+        bookings["pos"] = np.arange(total_in_range)
+        bookings = bookings[bookings["email"].astype(bool)]
+
+        # Parse each distinct booking date once (same parser as the per-row path)
+        b_parsed = _parse_timestamps(bookings["booking_date"])
+        bookings = bookings.assign(b_ts=b_parsed)[b_parsed.notna()].copy()
+        b_codes, b_uniques = pd.factorize(bookings["b_ts"])
+        bookings["b_key"] = np.array(
+            [ts.date().isoformat() for ts in b_uniques], dtype=object
+        )[b_codes] if len(b_uniques) else np.array([], dtype=object)
+
+        # Cut-off position = number of ordered leads with created_at <= b_key, minus one
+        lead_values = leads["created_at"].to_numpy(dtype=object)
+        is_text = np.fromiter((isinstance(v, str) for v in lead_values), bool, len(lead_values))
+        n_before_text = int(np.argmax(is_text)) if is_text.any() else len(lead_values)
+        text_values = lead_values[n_before_text:n_before_text + int(is_text.sum())]
+        bookings["cutoff"] = (
+            n_before_text
+            + np.searchsorted(text_values, bookings["b_key"].to_numpy(dtype=object), side="right")
+            - 1
+        ).astype(np.int64)
+
+        matched = pd.merge_asof(
+            bookings.sort_values("cutoff", kind="stable"),
+            pd.DataFrame(
+                {"email": leads["email"], "cutoff": np.arange(len(leads), dtype=np.int64)}
+            ).assign(lead_idx=lambda df: df["cutoff"]),
+            on="cutoff",
+            by="email",
+            direction="backward",
+        )
+        matched = matched[matched["lead_idx"].notna()].sort_values("pos")
+        lead_idx = matched["lead_idx"].to_numpy(dtype=np.int64)
+
+        lead_parsed = _parse_timestamps(leads["created_at"].iloc[lead_idx])
+        lead_parsed.index = matched.index
+        lag_days = np.full(len(matched), -1, dtype=np.int64)
+        if _is_naive_datetime(matched["b_ts"]) and _is_naive_datetime(lead_parsed):
+            lag = (matched["b_ts"].dt.normalize() - lead_parsed.dt.normalize()).dt.days
+            lag_days = lag.fillna(-1).to_numpy(dtype=np.int64)
+        else:
+            # Mixed or tz-aware values: compare element-wise and skip pairs that
+            # cannot be subtracted, exactly like the per-row path
+            for i, (b, lead) in enumerate(zip(matched["b_ts"], lead_parsed)):
+                if pd.isna(lead):
+                    continue
+                try:
+                    lag_days[i] = int((b.normalize() - lead.normalize()).days)
+                except Exception:
+                    continue
+        lead_ts = lead_parsed.to_numpy()
+
+        amounts = _coerce_numeric(matched["amount"], float)
+        guests = _coerce_numeric(matched["guests"], int)
+        keep = (lag_days >= 0) & amounts.notna().to_numpy() & guests.notna().to_numpy()
+
+        records = pd.DataFrame(
+            {
+                "pos": matched["pos"].to_numpy()[keep],
+                "booking_id": matched["booking_id"].to_numpy(dtype=object)[keep],
+                "booking_date": matched["b_key"].to_numpy(dtype=object)[keep],
+                "amount": amounts.to_numpy(dtype=np.float64)[keep],
+                "guests": guests.to_numpy(dtype=np.float64)[keep].astype(np.int64),
+                "email": matched["email"].to_numpy(dtype=object)[keep],
+                "lead_ts": lead_ts[keep],
+                "utm_source": leads["utm_source"].to_numpy(dtype=object)[lead_idx][keep],
+                "utm_medium": leads["utm_medium"].to_numpy(dtype=object)[lead_idx][keep],
+                "utm_campaign": leads["utm_campaign"].to_numpy(dtype=object)[lead_idx][keep],
+                "lag_days": lag_days[keep],
+            }
+        )
+
+        lags = records["lag_days"].to_numpy()
+        n_matched = len(records)
+        unmatched = max(0, total_in_range - n_matched)
+
+        sorted_lags = np.sort(lags)
+        if n_matched:
+            avg_days = float(lags.sum() / n_matched)
+            median_days = _sorted_median(sorted_lags)
+            p90_days = float(sorted_lags[max(1, math.ceil(0.9 * n_matched)) - 1])
+        else:
+            avg_days = median_days = p90_days = 0.0
+
+        def _utm_keys(col: str) -> List[Any]:
+            return [v or "Unknown" for v in records[col].tolist()]
+
+        by_source = [
+            {"utm_source": k, **stats}
+            for k, stats in _grouped_lag_stats(_utm_keys("utm_source"), lags)
+        ]
+        by_campaign = [
+            {"utm_campaign": k, **stats}
+            for k, stats in _grouped_lag_stats(_utm_keys("utm_campaign"), lags)
+        ]
+        monthly_cohorts = [
+            {"month": k, **stats}
+            for k, stats in _grouped_lag_stats(
+                [d[:7] for d in records["booking_date"].tolist()], lags, sort_keys=True
             )
-            return {
-                "summary": {
-                    "matched_bookings": 0,
-                    "unmatched_bookings": 0,
-                    "avg_days": 0.0,
-                    "median_days": 0.0,
-                    "p90_days": 0.0,
-                },
-                "lag_table": [],
-                "utm_breakdown": {"by_source": [], "by_campaign": []},
-                "monthly_cohorts": [],
+        ]
+
+        # Latest bookings first; ties keep scan order (stable, like sorted(reverse=True))
+        date_codes, _ = pd.factorize(records["booking_date"], sort=True)
+        top = records.iloc[np.lexsort((records["pos"].to_numpy(), -date_codes))[:50]]
+        lag_table = [
+            {
+                "booking_id": r.booking_id,
+                "booking_date": r.booking_date,
+                "amount": float(r.amount),
+                "guests": int(r.guests),
+                "email": r.email,
+                "lead_created_at": r.lead_ts.to_pydatetime().isoformat(timespec="seconds"),
+                "utm_source": r.utm_source,
+                "utm_medium": r.utm_medium,
+                "utm_campaign": r.utm_campaign,
+                "lag_days": int(r.lag_days),
             }
+            for r in top.itertuples(index=False)
+        ]
+
+        return {
+            "summary": {
+                "matched_bookings": n_matched,
+                "unmatched_bookings": unmatched,
+                "avg_days": avg_days,
+                "median_days": median_days,
+                "p90_days": p90_days,
+            },
+            "lag_table": lag_table,
+            "utm_breakdown": {"by_source": by_source, "by_campaign": by_campaign},
+            "monthly_cohorts": monthly_cohorts,
+        }
 
     def get_daily_trends(self, start_date, end_date):
         """
@@ -6,15 +6,14 @@ analytics, and other long-running operations.
 """
 
 import asyncio
-import threading
 import time
 import json
-import aiohttp
+import uuid
 from typing import Dict, Any, Optional, Callable, List
-from datetime import datetime, timedelta
-from concurrent.futures import ThreadPoolExecutor
-import queue
-from queue import Queue, Empty
+from datetime import datetime
+
+from .http_client import get_shared_session
+from .job_queue import TERMINAL_STATUSES, JobError, JobQueue, get_job_queue
 
 try:
     from ..security.pii_protection import get_structured_logger
@@ -25,140 +24,119 @@ except ImportError:
 
     logger = logging.getLogger(__name__)
 
-# Task queue for background processing
-task_queue = Queue()
-worker_threads = []
-is_running = False
-
 
 class AsyncTaskProcessor:
-    """Async task processor for background operations"""
+    """Async facade over the persistent job queue for background operations"""
 
-    def __init__(self, max_workers: int = 4):
+    def __init__(self, max_workers: int = 4, job_queue: Optional[JobQueue] = None):
         self.max_workers = max_workers
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
-        self.tasks = {}
-        self.task_results = {}
-        self.task_stats = {"completed": 0, "failed": 0, "pending": 0, "running": 0}
-
-    async def submit_task(self, task_id: str, func: Callable, *args, **kwargs) -> str:
-        """Submit async task for background processing"""
-        task_info = {
-            "id": task_id,
-            "function": func.__name__,
-            "args": args,
-            "kwargs": kwargs,
-            "status": "pending",
-            "created_at": datetime.now(),
-            "started_at": None,
-            "completed_at": None,
-            "result": None,
-            "error": None,
-        }
-
-        self.tasks[task_id] = task_info
-        self.task_stats["pending"] += 1
-
-        # Submit to thread pool
-        future = self.executor.submit(
-            self._execute_task, task_id, func, *args, **kwargs
-        )
-
-        return task_id
+        self._job_queue = job_queue
 
-    def _execute_task(self, task_id: str, func: Callable, *args, **kwargs) -> Any:
-        """Execute task in background thread"""
-        task_info = self.tasks[task_id]
+    @property
+    def job_queue(self) -> JobQueue:
+        """Underlying job queue (the process-wide queue unless one was injected)"""
+        if self._job_queue is None:
+            self._job_queue = get_job_queue()
+        return self._job_queue
 
-        try:
-            task_info["status"] = "running"
-            task_info["started_at"] = datetime.now()
-            self.task_stats["pending"] -= 1
-            self.task_stats["running"] += 1
+    def start(self, mode: str = "thread") -> None:
+        """Start workers; use mode="process" for CPU-heavy jobs"""
+        self.job_queue.start(workers=self.max_workers, mode=mode)
 
-            # Execute the task
-            result = func(*args, **kwargs)
+    def stop(self, wait: bool = True) -> None:
+        """Stop workers"""
+        self.job_queue.stop(wait=wait)
 
-            task_info["status"] = "completed"
-            task_info["completed_at"] = datetime.now()
-            task_info["result"] = result
-
-            self.task_stats["running"] -= 1
-            self.task_stats["completed"] += 1
-
-            return result
-
-        except Exception as e:
-            task_info["status"] = "failed"
-            task_info["completed_at"] = datetime.now()
-            task_info["error"] = str(e)
-
-            self.task_stats["running"] -= 1
-            self.task_stats["failed"] += 1
+    async def submit_task(self, task_id: str, func: Callable, *args, **kwargs) -> str:
+        """Submit task for background processing.
 
-            logger.error(
-                "Task failed",
-                task_id=task_id,
-                error_type=type(e).__name__,
-                operation="execute_task",
-            )
-            raise
+        ``priority``, ``timeout``, ``max_retries`` and ``delay`` keyword
+        arguments are job options; other arguments are passed to ``func``.
+        """
+        return await asyncio.to_thread(
+            self.job_queue.submit, func, *args, job_id=task_id, **kwargs
+        )
 
     def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Get task status and result"""
-        return self.tasks.get(task_id)
+        return self.job_queue.get_status(task_id)
+
+    def _require_workers(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Task status; raises JobError if it is unfinished and no worker runs here"""
+        status = self.job_queue.get_status(task_id)
+        if (
+            status is not None
+            and status["status"] not in TERMINAL_STATUSES
+            and not self.job_queue.is_running
+        ):
+            raise JobError(
+                f"Task {task_id} is {status['status']} but no background workers are "
+                "running; call start_background_workers() first",
+                task_id,
+                status["status"],
+            )
+        return status
 
-    def get_task_result(self, task_id: str) -> Any:
+    def get_task_result(self, task_id: str, timeout: Optional[float] = None) -> Any:
         """Get task result (blocking until complete)"""
-        task_info = self.tasks.get(task_id)
-        if not task_info:
+        if self._require_workers(task_id) is None:
             return None
+        return self.job_queue.result(task_id, timeout=timeout)
 
-        # Wait for completion
-        while task_info["status"] in ["pending", "running"]:
-            time.sleep(0.1)
-
-        if task_info["status"] == "completed":
-            return task_info["result"]
-        else:
-            raise Exception(task_info["error"])
+    async def wait_for_result(self, task_id: str, timeout: Optional[float] = None) -> Any:
+        """Await task result without blocking the event loop"""
+        await asyncio.to_thread(self._require_workers, task_id)
+        return await self.job_queue.wait(task_id, timeout=timeout)
 
     def get_stats(self) -> Dict[str, Any]:
         """Get task processing statistics"""
-        return self.task_stats.copy()
+        metrics = self.job_queue.metrics()
+        depth = metrics["depth"]
+        return {
+            "completed": depth["completed"],
+            "failed": depth["failed"],
+            "pending": depth["queued"],
+            "running": depth["running"],
+            "metrics": metrics,
+        }
+
+
+def _task_id(prefix: str) -> str:
+    return f"{prefix}_{int(time.time())}_{uuid.uuid4().hex[:8]}"
 
 
-# Global task processor
+# Global task processor (workers start via start_background_workers, called
+# from the API lifespan)
 task_processor = AsyncTaskProcessor()
 
 
 async def async_api_call(
     url: str, method: str = "GET", data: Dict = None, headers: Dict = None
 ) -> Dict[str, Any]:
-    """Make async API call"""
-    async with aiohttp.ClientSession() as session:
-        try:
-            if method.upper() == "GET":
-                async with session.get(url, headers=headers) as response:
-                    return {
-                        "status": response.status,
-                        "data": await response.json(),
-                        "headers": dict(response.headers),
-                    }
-            elif method.upper() == "POST":
-                async with session.post(url, json=data, headers=headers) as response:
-                    return {
-                        "status": response.status,
-                        "data": await response.json(),
-                        "headers": dict(response.headers),
-                    }
-        except Exception as e:
-            logger.error(
-                "Async API call failed",
-                error_type=type(e).__name__,
-                operation="fetch_data_async",
-            )
-            return {"status": 500, "error": str(e)}
+    """Make async API call over the event loop's shared connection pool"""
+    session = get_shared_session()
+    try:
+        if method.upper() == "GET":
+            async with session.get(url, headers=headers) as response:
+                return {
+                    "status": response.status,
+                    "data": await response.json(),
+                    "headers": dict(response.headers),
+                }
+        elif method.upper() == "POST":
+            async with session.post(url, json=data, headers=headers) as response:
+                return {
+                    "status": response.status,
+                    "data": await response.json(),
+                    "headers": dict(response.headers),
+                }
+    except Exception as e:
+        logger.error(
+            "Async API call failed",
+            error_type=type(e).__name__,
+            operation="fetch_data_async",
+        )
+        return {"status": 500, "error": str(e)}
 
 
 async def fetch_stripe_data_async(api_key: str, endpoint: str) -> Dict[str, Any]:
@@ -276,7 +254,7 @@ def calculate_complex_analytics_background(
 
 async def submit_report_generation(report_type: str, filters: Dict[str, Any]) -> str:
     """Submit report generation task"""
-    task_id = f"report_{report_type}_{int(time.time())}"
+    task_id = _task_id(f"report_{report_type}")
     await task_processor.submit_task(
         task_id, generate_report_background, report_type, filters
     )
@@ -285,7 +263,7 @@ async def submit_report_generation(report_type: str, filters: Dict[str, Any]) ->
 
 async def submit_data_sync(service: str, config: Dict[str, Any]) -> str:
     """Submit data sync task"""
-    task_id = f"sync_{service}_{int(time.time())}"
+    task_id = _task_id(f"sync_{service}")
     await task_processor.submit_task(
         task_id, sync_external_data_background, service, config
     )
@@ -294,7 +272,7 @@ async def submit_data_sync(service: str, config: Dict[str, Any]) -> str:
 
 async def submit_analytics_calculation(data_params: Dict[str, Any]) -> str:
     """Submit analytics calculation task"""
-    task_id = f"analytics_{int(time.time())}"
+    task_id = _task_id("analytics")
     await task_processor.submit_task(
         task_id, calculate_complex_analytics_background, data_params
     )
@@ -369,64 +347,16 @@ class WebSocketManager:
 websocket_manager = WebSocketManager()
 
 
-def start_background_workers():
-    """Start background worker threads"""
-    global is_running
-
-    if is_running:
-        return
-
-    is_running = True
+def start_background_workers(workers: int = 4, mode: str = "thread"):
+    """Start background workers (nothing starts at import time)"""
+    task_processor.job_queue.start(workers=workers, mode=mode)
 
-    def worker():
-        """Background worker function"""
-        while is_running:
-            try:
-                task = task_queue.get(timeout=1)
-                if task:
-                    # Process task
-                    task_func = task.get("function")
-                    task_args = task.get("args", [])
-                    task_kwargs = task.get("kwargs", {})
 
-                    try:
-                        result = task_func(*task_args, **task_kwargs)
-                        logger.info(f"Background task completed: {task_func.__name__}")
-                    except Exception as e:
-                        logger.error(f"Background task failed: {e}")
+def stop_background_workers(wait: bool = True):
+    """Stop background workers"""
+    task_processor.job_queue.stop(wait=wait)
 
-                    task_queue.task_done()
-            except Empty:
-                continue
-            except Exception as e:
-                logger.error(f"Worker error: {e}")
 
-    # Start worker threads
-    for i in range(4):  # 4 worker threads
-        thread = threading.Thread(target=worker, daemon=True)
-        thread.start()
-        worker_threads.append(thread)
-
-    logger.info("Background workers started")
-
-
-def stop_background_workers():
-    """Stop background worker threads"""
-    global is_running
-    is_running = False
-    logger.info("Background workers stopped")
-
-
-def queue_background_task(func: Callable, *args, **kwargs):
+def queue_background_task(func: Callable, *args, **kwargs) -> str:
     """Queue task for background processing"""
-    task = {
-        "function": func,
-        "args": args,
-        "kwargs": kwargs,
-        "queued_at": datetime.now(),
-    }
-    task_queue.put(task)
-
-
-# Auto-start workers
-start_background_workers()
+    return task_processor.job_queue.submit(func, *args, **kwargs)
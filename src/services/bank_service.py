@@ -2,6 +2,8 @@ from __future__ import annotations
 from typing import Optional, Dict, Any, List
 from datetime import date
 
+import pandas as pd
+
 from src.repositories.base import DatabaseConnection
 from src.repositories.bank_repository import BankRepository
 from src.services.error_handler import get_error_handler
@@ -44,3 +46,12 @@ class BankService:
     # Balances
     def balance_for_all_accounts(self, as_of_date: Optional[date | str] = None) -> List[Dict[str, Any]]:
         return self.repo.get_account_balances(as_of_date)
+
+    def daily_balances(
+        self,
+        start_date: date | str,
+        end_date: date | str,
+        account_ids: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """Daily closing balance per account over a range, for balance charts."""
+        return self.repo.get_daily_balances(start_date, end_date, account_ids)
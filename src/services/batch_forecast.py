@@ -0,0 +1,196 @@
+"""
+Batch forecasting across many series at once.
+
+Each fit operates on an (n_series x n_periods) matrix, so a nightly run over
+every cost category, bank account and UTM source costs a handful of numpy
+operations instead of one DataFrame + polyfit per series. Every method
+reproduces its single-series counterpart:
+
+* ``linear`` - ``ForecastService._linear_forecast`` / ``FinancialCalculator._linear_forecast``
+  (closed-form least squares instead of ``polyfit``)
+* ``exponential`` - Holt's method, ``ForecastService._exponential_smoothing``
+* ``seasonal`` - seasonal indices + linear trend, ``ForecastService._seasonal_forecast``
+* ``simple_exponential`` - ``FinancialCalculator._exponential_forecast``
+* ``moving_average`` - ``FinancialCalculator._moving_average_forecast``
+
+Series of different lengths are grouped by length and each group is fitted
+as one matrix.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+Z_SCORE_95 = 1.96
+RESULT_COLUMNS = ["series_id", "method", "step", "forecast", "lower", "upper"]
+
+
+def linear_batch(values: np.ndarray, periods: int) -> np.ndarray:
+    """Least-squares linear trend per row, extrapolated ``periods`` steps."""
+    n = values.shape[1]
+    if n == 1:
+        return np.repeat(values, periods, axis=1)
+    x = np.arange(n, dtype=float)
+    xc = x - x.mean()
+    slope = (values - values.mean(axis=1, keepdims=True)) @ xc / (xc @ xc)
+    intercept = values.mean(axis=1) - slope * x.mean()
+    future_x = np.arange(n, n + periods, dtype=float)
+    return intercept[:, None] + slope[:, None] * future_x[None, :]
+
+
+def holt_batch(
+    values: np.ndarray, periods: int, alpha: float = 0.3, beta: float = 0.1
+) -> np.ndarray:
+    """Holt's linear-trend exponential smoothing per row."""
+    if values.shape[1] < 2:
+        return np.repeat(values[:, -1:], periods, axis=1)
+    level = values[:, 0].copy()
+    trend = values[:, 1] - values[:, 0]
+    for t in range(1, values.shape[1]):
+        prev_level = level
+        level = alpha * values[:, t] + (1 - alpha) * (level + trend)
+        trend = beta * (level - prev_level) + (1 - beta) * trend
+    h = np.arange(1, periods + 1, dtype=float)
+    return level[:, None] + trend[:, None] * h[None, :]
+
+
+def seasonal_batch(values: np.ndarray, periods: int) -> np.ndarray:
+    """Seasonal indices (mean per phase) with a linear trend on the deseasonalized rows."""
+    n = values.shape[1]
+    if n < 12:
+        return linear_batch(values, periods)
+    season = min(12, n // 2)
+    phase = np.arange(n) % season
+    indices = np.stack([values[:, phase == j].mean(axis=1) for j in range(season)], axis=1)
+
+    divisor = indices[:, phase]
+    deseasonalized = np.where(divisor != 0, values / np.where(divisor != 0, divisor, 1), values)
+    trend = linear_batch(deseasonalized, periods)
+    future_phase = (n + np.arange(periods)) % season
+    return trend * indices[:, future_phase]
+
+
+def simple_exponential_batch(values: np.ndarray, periods: int, alpha: float = 0.3) -> np.ndarray:
+    """Flat forecast at the simple exponentially smoothed level per row."""
+    level = values[:, 0].copy()
+    for t in range(1, values.shape[1]):
+        level = alpha * values[:, t] + (1 - alpha) * level
+    return np.repeat(level[:, None], periods, axis=1)
+
+
+def moving_average_batch(values: np.ndarray, periods: int, window: int = 3) -> np.ndarray:
+    """Flat forecast at the mean of the last ``window`` values per row."""
+    window = min(window, values.shape[1])
+    return np.repeat(values[:, -window:].mean(axis=1, keepdims=True), periods, axis=1)
+
+
+BATCH_METHODS: Dict[str, Callable[[np.ndarray, int], np.ndarray]] = {
+    "linear": linear_batch,
+    "exponential": holt_batch,
+    "seasonal": seasonal_batch,
+    "simple_exponential": simple_exponential_batch,
+    "moving_average": moving_average_batch,
+}
+
+
+def interval_half_width(values: np.ndarray, periods: int) -> np.ndarray:
+    """95% half-width growing with sqrt(horizon), from the std of period-over-period changes."""
+    if values.shape[1] > 1:
+        std_error = np.diff(values, axis=1).std(axis=1)
+    else:
+        std_error = values.std(axis=1)
+    return Z_SCORE_95 * std_error[:, None] * np.sqrt(np.arange(1, periods + 1))[None, :]
+
+
+def _method_name(method) -> str:
+    name = getattr(method, "value", method)
+    if name not in BATCH_METHODS:
+        raise ValueError(f"Unsupported batch forecasting method: {name}")
+    return name
+
+
+def long_to_matrices(
+    frame: pd.DataFrame,
+    id_col: str = "series_id",
+    date_col: str = "date",
+    value_col: str = "value",
+) -> List[tuple]:
+    """Split a long-format frame into ``(series_ids, matrix)`` groups of equal length.
+
+    Rows are ordered by date within each series and missing values are filled
+    with the series mean, as ``ForecastService._prepare_data`` does.
+    """
+    df = frame[[id_col, date_col, value_col]].copy()
+    df[date_col] = pd.to_datetime(df[date_col])
+    df[value_col] = pd.to_numeric(df[value_col], errors="coerce")
+    df[value_col] = df[value_col].fillna(df.groupby(id_col)[value_col].transform("mean"))
+    df = df.sort_values([id_col, date_col], kind="stable")
+
+    ids, starts, counts = np.unique(df[id_col].to_numpy(), return_index=True, return_counts=True)
+    values = df[value_col].to_numpy(dtype=float)
+    groups = []
+    for length in np.unique(counts):
+        members = np.flatnonzero(counts == length)
+        rows = starts[members][:, None] + np.arange(length)[None, :]
+        groups.append((ids[members], values[rows]))
+    return groups
+
+
+def forecast_batch(
+    data: Union[np.ndarray, pd.DataFrame],
+    periods: int,
+    methods: Iterable = ("linear",),
+    series_ids: Optional[Sequence] = None,
+    id_col: str = "series_id",
+    date_col: str = "date",
+    value_col: str = "value",
+) -> pd.DataFrame:
+    """Forecast many series at once and return a tidy frame.
+
+    Args:
+        data: 2-D array (one row per series, oldest value first) or a
+            long-format DataFrame with ``id_col``/``date_col``/``value_col``.
+        periods: Number of periods to forecast.
+        methods: Names in ``BATCH_METHODS`` or ``ForecastMethod`` members.
+        series_ids: Row labels for array input (defaults to 0..n-1).
+
+    Returns:
+        DataFrame with columns series_id, method, step (1-based), forecast,
+        lower and upper (95% interval).
+    """
+    if periods <= 0:
+        raise ValueError("Periods must be positive")
+    names = [_method_name(m) for m in methods]
+
+    if isinstance(data, pd.DataFrame):
+        groups = long_to_matrices(data, id_col, date_col, value_col)
+    else:
+        matrix = np.asarray(data, dtype=float)
+        if matrix.ndim != 2 or matrix.shape[1] == 0:
+            raise ValueError("Batch input must be a non-empty 2-D array")
+        ids = np.asarray(series_ids if series_ids is not None else np.arange(matrix.shape[0]))
+        if len(ids) != matrix.shape[0]:
+            raise ValueError("series_ids must have one label per row")
+        groups = [(ids, matrix)]
+
+    frames = []
+    for ids, matrix in groups:
+        half_width = interval_half_width(matrix, periods)
+        for name in names:
+            forecast = BATCH_METHODS[name](matrix, periods)
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "series_id": np.repeat(ids, periods),
+                        "method": name,
+                        "step": np.tile(np.arange(1, periods + 1), len(ids)),
+                        "forecast": forecast.ravel(),
+                        "lower": (forecast - half_width).ravel(),
+                        "upper": (forecast + half_width).ravel(),
+                    }
+                )
+            )
+    if not frames:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
@@ -4,34 +4,84 @@ Caching service with Redis integration and Streamlit cache optimization
 
 import redis
 import json
-import pickle
 import hashlib
-from typing import Any, Optional, Dict, List, Callable
-from datetime import datetime, timedelta
+import threading
+import uuid
+from fnmatch import fnmatchcase
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional, Dict, Iterable, List, Callable, Set, Tuple, Union
+from datetime import datetime
 import streamlit as st
 from functools import wraps
 import pandas as pd
-from decimal import Decimal
 import logging
+from .cache_codecs import CacheSerializer, CodecError
+from .cache_memory import DEFAULT_MAX_BYTES, MemoryCache
+from .cache_invalidation import register_invalidation_handler, table_tags, write_tags
 
 logger = logging.getLogger(__name__)
 
 
-class CacheService:
-    """Centralized caching service with Redis backend and fallback to memory"""
+# Longest time an L1 copy of a Redis-backed entry is served before Redis is
+# consulted again (bounds staleness across replicas)
+DEFAULT_L1_MAX_TTL = 60
+
+# Redis names used for tag sets and cross-replica invalidation broadcasts
+TAG_KEY_PREFIX = "cache:tag:"
+INVALIDATION_CHANNEL = "cache:invalidate"
+SCAN_BATCH_SIZE = 500
+# Tag sets are kept at least this long so they outlive their members
+TAG_SET_MIN_TTL = 24 * 3600
+TAG_INDEX_PRUNE_EVERY = 1000
 
-    def __init__(self, redis_url: str = "redis://localhost:6379/0"):
+
+class CacheService:
+    """Centralized caching service: in-process L1 tier in front of Redis.
+
+    The L1 tier is a byte-bounded LRU (see ``MemoryCache``) and is the only
+    tier when Redis is unavailable.
+    """
+
+    def __init__(
+        self,
+        redis_url: str = "redis://localhost:6379/0",
+        serializer: Optional[CacheSerializer] = None,
+        memory_max_bytes: int = DEFAULT_MAX_BYTES,
+        l1_max_ttl: int = DEFAULT_L1_MAX_TTL,
+    ):
         """Initialize cache service with Redis connection"""
         self.redis_client = None
-        self.memory_cache = {}
+        self.memory_cache = MemoryCache(max_bytes=memory_max_bytes)
+        self.l1_max_ttl = l1_max_ttl
         self.cache_stats = {"hits": 0, "misses": 0}
+        self.redis_stats = {"hits": 0, "misses": 0, "errors": 0}
+        self.flight_stats = {"loads": 0, "coalesced": 0, "background_refreshes": 0}
+        self.serializer = serializer or CacheSerializer()
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None
+        # tag -> L1 keys carrying it (Redis keeps the same index in tag sets)
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._tag_lock = threading.Lock()
+        self._invalidation_epoch = 0
+        self._tagged_stores = 0
+        self.instance_id = uuid.uuid4().hex
+        self.invalidation_stats = {"tags": 0, "keys": 0, "broadcasts": 0, "remote": 0}
+        self._pubsub_thread = None
+        # Called with the tag set whenever entries are invalidated in this process
+        self.local_invalidation_hooks: List[Callable[[Set[str]], None]] = []
 
         try:
-            self.redis_client = redis.from_url(redis_url, decode_responses=True)
-            self.redis_client.ping()
+            # Values are binary codec frames, so the client must not decode responses
+            client = redis.from_url(redis_url)
+            client.ping()
+            self.redis_client = client
             logger.info("Redis connection established")
         except (redis.ConnectionError, redis.TimeoutError) as e:
             logger.warning(f"Redis connection failed, using memory cache: {e}")
+        else:
+            # L1 copies of shared entries must hear other replicas' invalidations
+            self._ensure_invalidation_listener()
 
     def _serialize_key(self, key: str, params: Dict[str, Any] = None) -> str:
         """Create a serialized cache key from parameters"""
@@ -48,101 +98,210 @@ class CacheService:
             return f"hash:{hashlib.md5(key_data.encode()).hexdigest()}"
         return key_data
 
-    def _serialize_value(self, value: Any) -> str:
+    def _serialize_value(self, value: Any) -> bytes:
         """Serialize value for storage"""
-        if isinstance(value, pd.DataFrame):
-            return json.dumps(
-                {
-                    "type": "dataframe",
-                    "data": value.to_json(orient="records", date_format="iso"),
-                    "columns": list(value.columns),
-                    "index": list(value.index),
-                }
-            )
-        elif isinstance(value, Decimal):
-            return json.dumps({"type": "decimal", "value": str(value)})
-        elif isinstance(value, (datetime, pd.Timestamp)):
-            return json.dumps({"type": "datetime", "value": value.isoformat()})
-        else:
-            try:
-                return json.dumps({"type": "json", "value": value})
-            except (TypeError, ValueError):
-                # Fallback to pickle for complex objects
-                return json.dumps(
-                    {"type": "pickle", "value": pickle.dumps(value).hex()}
-                )
+        return self.serializer.dumps(value)
 
-    def _deserialize_value(self, serialized: str) -> Any:
-        """Deserialize value from storage"""
-        try:
-            data = json.loads(serialized)
-            value_type = data.get("type")
-
-            if value_type == "dataframe":
-                df_data = json.loads(data["data"])
-                return pd.DataFrame(df_data)
-            elif value_type == "decimal":
-                return Decimal(data["value"])
-            elif value_type == "datetime":
-                return datetime.fromisoformat(data["value"])
-            elif value_type == "json":
-                return data["value"]
-            elif value_type == "pickle":
-                return pickle.loads(bytes.fromhex(data["value"]))
-            else:
-                return data["value"]
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
-            logger.error(f"Failed to deserialize cache value: {e}")
-            return None
+    def _deserialize_value(self, serialized: Union[bytes, str]) -> Any:
+        """Deserialize value from storage (current binary or legacy JSON format).
 
-    def get(self, key: str, params: Dict[str, Any] = None) -> Optional[Any]:
-        """Get value from cache"""
-        cache_key = self._serialize_key(key, params)
+        Raises ``CodecError`` if the payload cannot be decoded.
+        """
+        return self.serializer.loads(serialized)
+
+    def _l1_ttl(self, ttl: int) -> int:
+        return min(ttl, self.l1_max_ttl) if self.redis_client else ttl
+
+    def _lookup(self, cache_key: str) -> Tuple[bool, Any, bool]:
+        """Find ``cache_key`` in L1 then Redis: ``(found, value, is_stale)``."""
+        found, value, stale = self.memory_cache.lookup(cache_key)
+        if found:
+            return True, value, stale
 
-        # Try Redis first
         if self.redis_client:
             try:
                 serialized = self.redis_client.get(cache_key)
-                if serialized:
-                    self.cache_stats["hits"] += 1
-                    return self._deserialize_value(serialized)
             except redis.RedisError as e:
+                self.redis_stats["errors"] += 1
                 logger.warning(f"Redis get failed: {e}")
-
-        # Fallback to memory cache
-        if cache_key in self.memory_cache:
-            entry = self.memory_cache[cache_key]
-            if entry["expires_at"] > datetime.now():
-                self.cache_stats["hits"] += 1
-                return entry["value"]
             else:
-                del self.memory_cache[cache_key]
+                if serialized:
+                    try:
+                        value = self._deserialize_value(serialized)
+                    except CodecError as e:
+                        # A corrupt or unreadable entry is a miss; drop it so the
+                        # next set replaces it
+                        logger.error(f"Failed to deserialize cache value: {e}")
+                        self.redis_stats["errors"] += 1
+                        self._delete_corrupt(cache_key)
+                        return False, None, False
+                    self.redis_stats["hits"] += 1
+                    try:
+                        remaining = self.redis_client.ttl(cache_key)
+                    except redis.RedisError:
+                        remaining = -1
+                    if remaining and remaining > 0:
+                        self._ensure_invalidation_listener()
+                        self.memory_cache.set(cache_key, value, self._l1_ttl(remaining))
+                    return True, value, False
+                self.redis_stats["misses"] += 1
+        return False, None, False
+
+    def _delete_corrupt(self, cache_key: str) -> None:
+        try:
+            self.redis_client.delete(cache_key)
+        except redis.RedisError:
+            pass
 
-        self.cache_stats["misses"] += 1
-        return None
+    def get(self, key: str, params: Dict[str, Any] = None) -> Optional[Any]:
+        """Get value from cache"""
+        found, value, _ = self._lookup(self._serialize_key(key, params))
+        self.cache_stats["hits" if found else "misses"] += 1
+        return value if found else None
 
     def set(
-        self, key: str, value: Any, ttl: int = 3600, params: Dict[str, Any] = None
+        self,
+        key: str,
+        value: Any,
+        ttl: int = 3600,
+        params: Dict[str, Any] = None,
+        stale_ttl: int = 0,
+        tags: Optional[Iterable[str]] = None,
     ) -> bool:
-        """Set value in cache with TTL in seconds"""
-        cache_key = self._serialize_key(key, params)
-        serialized = self._serialize_value(value)
-
-        # Try Redis first
+        """Set value in cache with TTL in seconds.
+
+        ``stale_ttl`` keeps the L1 copy servable for that much longer while
+        ``get_or_set`` refreshes it in the background. ``tags`` (see
+        ``table_tags``) name the data the value depends on, for
+        ``invalidate_tags``.
+        """
+        return self._store(self._serialize_key(key, params), value, ttl, stale_ttl, tags)
+
+    def _store(
+        self,
+        cache_key: str,
+        value: Any,
+        ttl: int,
+        stale_ttl: int = 0,
+        tags: Optional[Iterable[str]] = None,
+    ) -> bool:
+        tags = set(tags or ())
         if self.redis_client:
             try:
-                self.redis_client.setex(cache_key, ttl, serialized)
-                return True
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.setex(cache_key, ttl, self._serialize_value(value))
+                for tag in tags:
+                    tag_key = f"{TAG_KEY_PREFIX}{tag}"
+                    pipe.sadd(tag_key, cache_key)
+                    pipe.expire(tag_key, max(ttl + stale_ttl, TAG_SET_MIN_TTL))
+                pipe.execute()
             except redis.RedisError as e:
+                self.redis_stats["errors"] += 1
                 logger.warning(f"Redis set failed: {e}")
-
-        # Fallback to memory cache
-        self.memory_cache[cache_key] = {
-            "value": value,
-            "expires_at": datetime.now() + timedelta(seconds=ttl),
-        }
+            if tags:
+                self._ensure_invalidation_listener()
+
+        self.memory_cache.set(cache_key, value, self._l1_ttl(ttl), stale_ttl)
+        if tags:
+            with self._tag_lock:
+                for tag in tags:
+                    self._tag_index.setdefault(tag, set()).add(cache_key)
+                self._tagged_stores += 1
+                if self._tagged_stores % TAG_INDEX_PRUNE_EVERY == 0:
+                    self._prune_tag_index()
         return True
 
+    def _prune_tag_index(self) -> None:
+        """Forget L1 keys that were evicted or expired (caller holds _tag_lock)."""
+        live = set(self.memory_cache.keys())
+        for tag in list(self._tag_index):
+            keys = self._tag_index[tag] & live
+            if keys:
+                self._tag_index[tag] = keys
+            else:
+                del self._tag_index[tag]
+
+    def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: int = 3600,
+        params: Dict[str, Any] = None,
+        stale_ttl: int = 0,
+        tags: Optional[Iterable[str]] = None,
+    ) -> Any:
+        """Return the cached value for ``key`` or compute it with ``loader``.
+
+        Concurrent callers missing the same key share one ``loader`` call
+        (single-flight). A stale L1 entry is returned immediately and
+        refreshed on a background thread.
+        """
+        cache_key = self._serialize_key(key, params)
+        found, value, stale = self._lookup(cache_key)
+        self.cache_stats["hits" if found else "misses"] += 1
+        if found:
+            if stale:
+                self._refresh_in_background(cache_key, loader, ttl, stale_ttl, tags)
+            return value
+        return self._load_once(cache_key, loader, ttl, stale_ttl, tags).result()
+
+    def _load_once(
+        self,
+        cache_key: str,
+        loader: Callable[[], Any],
+        ttl: int,
+        stale_ttl: int,
+        tags: Optional[Iterable[str]] = None,
+    ) -> Future:
+        """Run ``loader`` for ``cache_key`` unless a load is already in flight."""
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            if future is not None:
+                self.flight_stats["coalesced"] += 1
+                return future
+            future = Future()
+            self._inflight[cache_key] = future
+
+        self.flight_stats["loads"] += 1
+        epoch = self._invalidation_epoch
+        try:
+            value = loader()
+            # Skip caching a result computed from data invalidated meanwhile
+            if epoch == self._invalidation_epoch:
+                self._store(cache_key, value, ttl, stale_ttl, tags)
+            future.set_result(value)
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
+        return future
+
+    def _refresh_in_background(
+        self,
+        cache_key: str,
+        loader: Callable[[], Any],
+        ttl: int,
+        stale_ttl: int,
+        tags: Optional[Iterable[str]] = None,
+    ) -> None:
+        with self._inflight_lock:
+            if cache_key in self._inflight:
+                return
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="cache-refresh"
+                )
+        self.flight_stats["background_refreshes"] += 1
+
+        def refresh():
+            try:
+                self._load_once(cache_key, loader, ttl, stale_ttl, tags).result()
+            except Exception as e:
+                logger.warning(f"Background cache refresh failed for {cache_key}: {e}")
+
+        self._refresh_executor.submit(refresh)
+
     def delete(self, key: str, params: Dict[str, Any] = None) -> bool:
         """Delete value from cache"""
         cache_key = self._serialize_key(key, params)
@@ -154,36 +313,135 @@ class CacheService:
             try:
                 deleted = bool(self.redis_client.delete(cache_key))
             except redis.RedisError as e:
+                self.redis_stats["errors"] += 1
                 logger.warning(f"Redis delete failed: {e}")
 
         # Delete from memory cache
-        if cache_key in self.memory_cache:
-            del self.memory_cache[cache_key]
+        if self.memory_cache.delete(cache_key):
             deleted = True
 
         return deleted
 
     def clear_pattern(self, pattern: str) -> int:
-        """Clear all keys matching pattern"""
+        """Clear all keys matching a glob pattern.
+
+        Uses incremental SCAN + UNLINK so Redis is never blocked walking the
+        whole keyspace. Prefer ``invalidate_tags`` for data-driven invalidation.
+        """
         deleted_count = 0
 
         # Clear from Redis
         if self.redis_client:
             try:
-                keys = self.redis_client.keys(pattern)
-                if keys:
-                    deleted_count += self.redis_client.delete(*keys)
+                batch = []
+                for key in self.redis_client.scan_iter(match=pattern, count=SCAN_BATCH_SIZE):
+                    batch.append(key)
+                    if len(batch) >= SCAN_BATCH_SIZE:
+                        deleted_count += self.redis_client.unlink(*batch)
+                        batch = []
+                if batch:
+                    deleted_count += self.redis_client.unlink(*batch)
             except redis.RedisError as e:
+                self.redis_stats["errors"] += 1
                 logger.warning(f"Redis pattern clear failed: {e}")
 
         # Clear from memory cache
-        keys_to_delete = [k for k in self.memory_cache.keys() if pattern in k]
+        keys_to_delete = [k for k in self.memory_cache.keys() if fnmatchcase(k, pattern)]
         for key in keys_to_delete:
-            del self.memory_cache[key]
-            deleted_count += 1
+            if self.memory_cache.delete(key):
+                deleted_count += 1
 
         return deleted_count
 
+    def invalidate_tags(self, tags: Iterable[str], broadcast: bool = True) -> int:
+        """Drop every entry carrying any of ``tags``, here and (via pub/sub)
+        in the L1 tier of other replicas. Returns the number of keys removed."""
+        tags = set(tags)
+        if not tags:
+            return 0
+        self._invalidation_epoch += 1
+        deleted = self._invalidate_local(tags)
+
+        if self.redis_client:
+            try:
+                tag_keys = [f"{TAG_KEY_PREFIX}{tag}" for tag in tags]
+                keys: Set[bytes] = set()
+                for tag_key in tag_keys:
+                    keys.update(self.redis_client.sscan_iter(tag_key, count=SCAN_BATCH_SIZE))
+                key_list = list(keys)
+                for i in range(0, len(key_list), SCAN_BATCH_SIZE):
+                    deleted += self.redis_client.unlink(*key_list[i : i + SCAN_BATCH_SIZE])
+                self.redis_client.unlink(*tag_keys)
+                if broadcast:
+                    # Keys are included because other replicas may hold L1 copies
+                    # read back from Redis, which carry no local tag index entry
+                    self.redis_client.publish(
+                        INVALIDATION_CHANNEL,
+                        json.dumps(
+                            {
+                                "origin": self.instance_id,
+                                "tags": sorted(tags),
+                                "keys": [k.decode("utf-8", "replace") for k in key_list],
+                            }
+                        ),
+                    )
+                    self.invalidation_stats["broadcasts"] += 1
+            except redis.RedisError as e:
+                self.redis_stats["errors"] += 1
+                logger.warning(f"Redis tag invalidation failed: {e}")
+
+        self.invalidation_stats["tags"] += len(tags)
+        self.invalidation_stats["keys"] += deleted
+        return deleted
+
+    def invalidate_table(self, table: str, dates: Optional[Iterable[Any]] = None) -> int:
+        """Invalidate entries depending on ``table`` rows dated ``dates``
+        (all rows when ``dates`` is None)."""
+        return self.invalidate_tags(write_tags(table, dates))
+
+    def _invalidate_local(self, tags: Set[str]) -> int:
+        with self._tag_lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tag_index.pop(tag, set())
+        for hook in self.local_invalidation_hooks:
+            try:
+                hook(tags)
+            except Exception as e:
+                logger.warning(f"Cache invalidation hook failed: {e}")
+        return sum(1 for key in keys if self.memory_cache.delete(key))
+
+    def _ensure_invalidation_listener(self) -> None:
+        """Subscribe to invalidations from other replicas.
+
+        Started once Redis is connected; L1 fills from Redis and tagged writes
+        retry if that failed.
+        """
+        if self._pubsub_thread is not None or not self.redis_client:
+            return
+        with self._tag_lock:
+            if self._pubsub_thread is not None:
+                return
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{INVALIDATION_CHANNEL: self._on_invalidation_message})
+                self._pubsub_thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+            except redis.RedisError as e:
+                logger.warning(f"Cache invalidation listener not started: {e}")
+
+    def _on_invalidation_message(self, message: Dict[str, Any]) -> None:
+        try:
+            payload = json.loads(message["data"])
+        except (TypeError, ValueError, KeyError):
+            return
+        if payload.get("origin") == self.instance_id:
+            return
+        self._invalidation_epoch += 1
+        self._invalidate_local(set(payload.get("tags", ())))
+        for key in payload.get("keys", ()):
+            self.memory_cache.delete(key)
+        self.invalidation_stats["remote"] += 1
+
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         stats = self.cache_stats.copy()
@@ -193,6 +451,12 @@ class CacheService:
             else 0
         )
         stats["memory_cache_size"] = len(self.memory_cache)
+        stats["tiers"] = {
+            "memory": self.memory_cache.get_stats(),
+            "redis": dict(self.redis_stats),
+        }
+        stats["single_flight"] = dict(self.flight_stats)
+        stats["invalidation"] = dict(self.invalidation_stats)
 
         if self.redis_client:
             try:
@@ -211,8 +475,19 @@ class CacheService:
 cache_service = CacheService()
 
 
-def cached_data(ttl: int = 3600, key_prefix: str = ""):
-    """Decorator for caching function results with Streamlit integration"""
+def cached_data(
+    ttl: int = 3600,
+    key_prefix: str = "",
+    stale_ttl: int = 0,
+    tables: Iterable[str] = (),
+):
+    """Decorator for caching function results with Streamlit integration
+
+    Concurrent calls with the same arguments share one computation; with
+    ``stale_ttl`` an expired result is served while it is recomputed in the
+    background. Results are invalidated by writes to any of ``tables``.
+    """
+    tags = set().union(*(table_tags(t) for t in tables)) if tables else None
 
     def decorator(func: Callable) -> Callable:
         @wraps(func)
@@ -226,16 +501,14 @@ def cached_data(ttl: int = 3600, key_prefix: str = ""):
                 "kwargs": {k: str(v) for k, v in kwargs.items()},
             }
 
-            # Try to get from cache first
-            cached_result = cache_service.get(func_name, cache_params)
-            if cached_result is not None:
-                return cached_result
-
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache_service.set(func_name, result, ttl, cache_params)
-
-            return result
+            return cache_service.get_or_set(
+                func_name,
+                lambda: func(*args, **kwargs),
+                ttl=ttl,
+                params=cache_params,
+                stale_ttl=stale_ttl,
+                tags=tags,
+            )
 
         return wrapper
 
@@ -266,7 +539,9 @@ def get_cached_fx_rates() -> pd.DataFrame:
     return get_fx_rates()
 
 
-@cached_data(ttl=1800, key_prefix="metrics_")  # 30 minutes TTL
+@cached_data(
+    ttl=1800, key_prefix="metrics_", stale_ttl=300, tables=("costs", "sales_orders")
+)  # 30 minutes TTL
 def calculate_cached_metrics(
     costs_df: pd.DataFrame, sales_df: pd.DataFrame
 ) -> Dict[str, Any]:
@@ -276,7 +551,9 @@ def calculate_cached_metrics(
     return calculate_metrics(costs_df, sales_df)
 
 
-@cached_data(ttl=3600, key_prefix="reports_")  # 1 hour TTL
+@cached_data(
+    ttl=3600, key_prefix="reports_", tables=("costs", "sales_orders", "cash_ledger")
+)  # 1 hour TTL
 def generate_cached_report(
     report_type: str, date_range: tuple, filters: Dict[str, Any]
 ) -> Dict[str, Any]:
@@ -312,22 +589,36 @@ def warm_cache():
         logger.error(f"Cache warming failed: {e}")
 
 
-def invalidate_financial_cache():
-    """Invalidate all financial data caches"""
-    patterns = [
-        "get_cached_costs*",
-        "get_cached_sales_orders*",
-        "metrics_*",
-        "reports_*",
-    ]
+# Streamlit-cached loaders that read a whole table, cleared when it changes
+_STREAMLIT_TABLE_CACHES = {
+    "costs": (get_cached_costs,),
+    "sales_orders": (get_cached_sales_orders,),
+    "fx_rates": (get_cached_fx_rates,),
+}
+
+FINANCIAL_TABLES = ("costs", "sales_orders", "cash_ledger")
 
-    total_deleted = 0
-    for pattern in patterns:
-        deleted = cache_service.clear_pattern(pattern)
-        total_deleted += deleted
 
-    # Also clear Streamlit cache
-    st.cache_data.clear()
+def _clear_streamlit_caches(tags: Set[str]) -> None:
+    tables = {tag.split("@", 1)[0] for tag in tags}
+    for table in tables:
+        for cached_fn in _STREAMLIT_TABLE_CACHES.get(table, ()):
+            cached_fn.clear()
+
+
+def _invalidate_for_write(tags: Set[str]) -> int:
+    return cache_service.invalidate_tags(tags)
+
+
+cache_service.local_invalidation_hooks.append(_clear_streamlit_caches)
+register_invalidation_handler(_invalidate_for_write)
+
+
+def invalidate_financial_cache(tables: Iterable[str] = FINANCIAL_TABLES):
+    """Invalidate caches depending on the financial tables (all rows)"""
+    total_deleted = 0
+    for table in tables:
+        total_deleted += cache_service.invalidate_table(table)
 
     logger.info(f"Invalidated {total_deleted} cache entries")
     return total_deleted
@@ -343,6 +634,9 @@ def get_cache_health() -> Dict[str, Any]:
         "total_requests": stats["hits"] + stats["misses"],
         "memory_cache_size": stats["memory_cache_size"],
         "redis_status": stats.get("redis_status", "unknown"),
+        "tiers": stats["tiers"],
+        "single_flight": stats["single_flight"],
+        "invalidation": stats["invalidation"],
     }
 
     return health
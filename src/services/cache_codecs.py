@@ -0,0 +1,369 @@
+"""
+Binary codecs for CacheService values.
+
+Every encoded value starts with a small header so the format can evolve
+without breaking entries already sitting in Redis::
+
+    b"CFC" | version (1 byte) | codec id (1 byte) | compression id (1 byte) | payload
+
+Payloads that do not start with the magic bytes are treated as the legacy
+JSON envelope written by earlier releases and decoded as before.
+
+Optional dependencies are used when installed and skipped otherwise:
+``pyarrow`` (DataFrames), ``msgpack`` (dicts, lists, Decimals, datetimes),
+``zstandard``/``lz4`` (compression; zlib is the stdlib fallback).
+"""
+
+import json
+import pickle
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple, Union
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+MAGIC = b"CFC"
+FORMAT_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 3
+
+# Values whose encoded payload is at least this large get compressed
+DEFAULT_COMPRESSION_THRESHOLD = 16 * 1024
+
+
+class CodecError(ValueError):
+    """Raised when a cached payload cannot be encoded or decoded."""
+
+
+# ----------------------------------------------------------------------
+# Value codecs
+# ----------------------------------------------------------------------
+class Codec:
+    """Turns one family of Python values into bytes and back."""
+
+    name = "base"
+    codec_id = 0
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def encode(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, payload: bytes) -> Any:
+        raise NotImplementedError
+
+
+class PickleCodec(Codec):
+    """Last-resort codec for arbitrary objects (raw bytes, no hex)."""
+
+    name = "pickle"
+    codec_id = 1
+
+    def encode(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, payload: bytes) -> Any:
+        return pickle.loads(payload)
+
+
+def _tag_json(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _untag_json(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if "__decimal__" in obj:
+            return Decimal(obj["__decimal__"])
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return date.fromisoformat(obj["__date__"])
+    return obj
+
+
+class JsonCodec(Codec):
+    """Plain-data codec used when msgpack is not installed."""
+
+    name = "json"
+    codec_id = 2
+
+    def encode(self, value: Any) -> bytes:
+        try:
+            return json.dumps(value, default=_tag_json, separators=(",", ":")).encode()
+        except (TypeError, ValueError) as e:
+            raise CodecError(str(e)) from e
+
+    def decode(self, payload: bytes) -> Any:
+        return json.loads(payload, object_hook=_untag_json)
+
+
+_EXT_DECIMAL = 1
+_EXT_DATETIME = 2
+_EXT_DATE = 3
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return msgpack.ExtType(_EXT_DECIMAL, str(value).encode())
+    if isinstance(value, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, value.isoformat().encode())
+    if isinstance(value, date):
+        return msgpack.ExtType(_EXT_DATE, value.isoformat().encode())
+    raise TypeError(f"Object of type {type(value).__name__} is not msgpack serializable")
+
+
+def _msgpack_ext_hook(code: int, data: bytes) -> Any:
+    if code == _EXT_DECIMAL:
+        return Decimal(data.decode())
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == _EXT_DATE:
+        return date.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+
+class MsgpackCodec(Codec):
+    """Compact codec for dicts, lists, scalars, Decimals and datetimes."""
+
+    name = "msgpack"
+    codec_id = 3
+
+    @property
+    def available(self) -> bool:
+        return msgpack is not None
+
+    def encode(self, value: Any) -> bytes:
+        try:
+            return msgpack.packb(value, default=_msgpack_default, use_bin_type=True)
+        except (TypeError, ValueError, OverflowError) as e:
+            raise CodecError(str(e)) from e
+
+    def decode(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+
+
+class ArrowCodec(Codec):
+    """DataFrames as an Arrow IPC stream; dtypes and index round-trip."""
+
+    name = "arrow"
+    codec_id = 4
+
+    @property
+    def available(self) -> bool:
+        return pa is not None
+
+    def encode(self, value: pd.DataFrame) -> bytes:
+        try:
+            table = pa.Table.from_pandas(value, preserve_index=True)
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            raise CodecError(str(e)) from e
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    def decode(self, payload: bytes) -> pd.DataFrame:
+        return pa.ipc.open_stream(pa.py_buffer(payload)).read_all().to_pandas()
+
+
+class ParquetCodec(ArrowCodec):
+    """DataFrames as Parquet; smaller than IPC for wide/repetitive frames, slower."""
+
+    name = "parquet"
+    codec_id = 5
+
+    def encode(self, value: pd.DataFrame) -> bytes:
+        try:
+            table = pa.Table.from_pandas(value, preserve_index=True)
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            raise CodecError(str(e)) from e
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, compression="NONE")
+        return sink.getvalue().to_pybytes()
+
+    def decode(self, payload: bytes) -> pd.DataFrame:
+        return pq.read_table(pa.py_buffer(payload)).to_pandas()
+
+
+CODECS: Dict[str, Codec] = {
+    codec.name: codec
+    for codec in (PickleCodec(), JsonCodec(), MsgpackCodec(), ArrowCodec(), ParquetCodec())
+}
+_CODECS_BY_ID: Dict[int, Codec] = {codec.codec_id: codec for codec in CODECS.values()}
+
+
+# ----------------------------------------------------------------------
+# Compression
+# ----------------------------------------------------------------------
+@dataclass(frozen=True)
+class Compressor:
+    name: str
+    compression_id: int
+
+    @property
+    def available(self) -> bool:
+        return {"zstd": zstandard, "lz4": lz4_frame}.get(self.name, zlib) is not None
+
+    def compress(self, data: bytes) -> bytes:
+        if self.name == "zstd":
+            return zstandard.ZstdCompressor(level=3).compress(data)
+        if self.name == "lz4":
+            return lz4_frame.compress(data)
+        return zlib.compress(data, 6)
+
+    def decompress(self, data: bytes) -> bytes:
+        if self.name == "zstd":
+            return zstandard.ZstdDecompressor().decompress(data)
+        if self.name == "lz4":
+            return lz4_frame.decompress(data)
+        return zlib.decompress(data)
+
+
+COMPRESSORS: Dict[str, Compressor] = {
+    c.name: c for c in (Compressor("zlib", 1), Compressor("zstd", 2), Compressor("lz4", 3))
+}
+_COMPRESSORS_BY_ID: Dict[int, Compressor] = {c.compression_id: c for c in COMPRESSORS.values()}
+_NO_COMPRESSION = 0
+
+
+def default_compressor() -> str:
+    for name in ("zstd", "lz4", "zlib"):
+        if COMPRESSORS[name].available:
+            return name
+    return "zlib"
+
+
+# ----------------------------------------------------------------------
+# Serializer
+# ----------------------------------------------------------------------
+class CacheSerializer:
+    """Chooses a codec per value, frames it with the versioned header and
+    compresses large payloads.
+
+    ``dataframe_codec`` / ``object_codec`` / ``compression`` may name any
+    entry of ``CODECS`` / ``COMPRESSORS``; unavailable choices fall back to
+    the best installed alternative. ``compression=None`` disables it.
+    """
+
+    def __init__(
+        self,
+        dataframe_codec: str = "arrow",
+        object_codec: str = "msgpack",
+        compression: Optional[str] = "auto",
+        compression_threshold: int = DEFAULT_COMPRESSION_THRESHOLD,
+    ):
+        self.dataframe_codec = self._pick(dataframe_codec, fallback="pickle")
+        self.object_codec = self._pick(object_codec, fallback="json")
+        if compression == "auto":
+            compression = default_compressor()
+        if compression is not None and not COMPRESSORS[compression].available:
+            compression = "zlib"
+        self.compressor = COMPRESSORS[compression] if compression else None
+        self.compression_threshold = compression_threshold
+
+    @staticmethod
+    def _pick(name: str, fallback: str) -> Codec:
+        codec = CODECS[name]
+        return codec if codec.available else CODECS[fallback]
+
+    def dumps(self, value: Any) -> bytes:
+        codec, payload = self._encode(value)
+        compression_id = _NO_COMPRESSION
+        if self.compressor and len(payload) >= self.compression_threshold:
+            compressed = self.compressor.compress(payload)
+            if len(compressed) < len(payload):
+                payload = compressed
+                compression_id = self.compressor.compression_id
+        return MAGIC + bytes((FORMAT_VERSION, codec.codec_id, compression_id)) + payload
+
+    def _encode(self, value: Any) -> Tuple[Codec, bytes]:
+        preferred = self.dataframe_codec if isinstance(value, pd.DataFrame) else self.object_codec
+        for codec in (preferred, CODECS["pickle"]):
+            try:
+                return codec, codec.encode(value)
+            except CodecError:
+                continue
+        raise CodecError(f"Cannot encode value of type {type(value).__name__}")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """Decode a cached payload; any failure is raised as ``CodecError``."""
+        try:
+            return self._decode(data)
+        except CodecError:
+            raise
+        except Exception as e:
+            # zstd/zlib/lz4, pickle, msgpack and pyarrow each raise their own errors
+            raise CodecError(f"Corrupt cache payload: {type(e).__name__}: {e}") from e
+
+    def _decode(self, data: Union[bytes, str]) -> Any:
+        if isinstance(data, str):
+            return decode_legacy(data)
+        if not data.startswith(MAGIC):
+            return decode_legacy(data.decode("utf-8"))
+        if len(data) < HEADER_SIZE:
+            raise CodecError("Truncated cache payload")
+
+        version, codec_id, compression_id = data[len(MAGIC) : HEADER_SIZE]
+        if version > FORMAT_VERSION:
+            raise CodecError(f"Unsupported cache format version {version}")
+        codec = _CODECS_BY_ID.get(codec_id)
+        if codec is None or not codec.available:
+            raise CodecError(f"Unknown or unavailable cache codec id {codec_id}")
+
+        payload = memoryview(data)[HEADER_SIZE:]
+        if compression_id != _NO_COMPRESSION:
+            compressor = _COMPRESSORS_BY_ID.get(compression_id)
+            if compressor is None or not compressor.available:
+                raise CodecError(f"Unknown or unavailable compression id {compression_id}")
+            payload = compressor.decompress(bytes(payload))
+        return codec.decode(bytes(payload))
+
+
+def decode_legacy(serialized: str) -> Any:
+    """Decode the pre-versioned JSON envelope (``{"type": ..., "value": ...}``)."""
+    data = json.loads(serialized)
+    value_type = data.get("type")
+
+    if value_type == "dataframe":
+        return pd.DataFrame(json.loads(data["data"]))
+    elif value_type == "decimal":
+        return Decimal(data["value"])
+    elif value_type == "datetime":
+        return datetime.fromisoformat(data["value"])
+    elif value_type == "json":
+        return data["value"]
+    elif value_type == "pickle":
+        return pickle.loads(bytes.fromhex(data["value"]))
+    else:
+        return data["value"]
@@ -0,0 +1,107 @@
+"""
+Write-side hooks for tag-based cache invalidation.
+
+Services that write to fact tables call ``notify_table_write`` after the
+write. Cache backends register a handler with ``register_invalidation_handler``
+(``src.services.cache`` does so on import), so writers do not need to import
+Redis or Streamlit themselves.
+
+Tags describe what a cached value depends on:
+
+* ``"<table>"`` - any row of the table (every dependent entry carries it)
+* ``"<table>@*"`` - the table without a narrower date range
+* ``"<table>@YYYY-MM"`` - rows dated in that month
+"""
+
+import logging
+import threading
+from datetime import date, datetime
+from typing import Callable, Iterable, List, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+DateLike = Union[date, datetime, str]
+
+# Ranges longer than this are tagged as depending on the whole table
+MAX_MONTH_TAGS = 36
+
+_handlers: List[Callable[[Set[str]], int]] = []
+_handlers_lock = threading.Lock()
+
+
+def _month_of(value: DateLike) -> Optional[str]:
+    if isinstance(value, (date, datetime)):
+        return f"{value.year:04d}-{value.month:02d}"
+    text = str(value or "").strip()
+    if len(text) >= 7 and text[4] == "-" and text[:4].isdigit() and text[5:7].isdigit():
+        return text[:7]
+    return None
+
+
+def _months_between(start: DateLike, end: DateLike) -> Optional[List[str]]:
+    first, last = _month_of(start), _month_of(end)
+    if not first or not last or first > last:
+        return None
+    year, month = int(first[:4]), int(first[5:7])
+    months = []
+    while f"{year:04d}-{month:02d}" <= last:
+        months.append(f"{year:04d}-{month:02d}")
+        if len(months) > MAX_MONTH_TAGS:
+            return None
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def table_tags(
+    table: str, start: Optional[DateLike] = None, end: Optional[DateLike] = None
+) -> Set[str]:
+    """Tags for a cached value that reads ``table`` over [start, end]."""
+    months = _months_between(start, end) if start is not None and end is not None else None
+    if months is None:
+        return {table, f"{table}@*"}
+    return {table} | {f"{table}@{m}" for m in months}
+
+
+def write_tags(table: str, dates: Optional[Iterable[DateLike]] = None) -> Set[str]:
+    """Tags invalidated by a write to ``table`` touching rows on ``dates``.
+
+    Without dates (or with any unparseable date) the whole table is invalidated.
+    """
+    if dates is None:
+        return {table}
+    months = set()
+    for d in set(dates):
+        month = _month_of(d)
+        if month is None:
+            return {table}
+        months.add(month)
+    return {f"{table}@*"} | {f"{table}@{m}" for m in months}
+
+
+def register_invalidation_handler(handler: Callable[[Set[str]], int]) -> None:
+    with _handlers_lock:
+        if handler not in _handlers:
+            _handlers.append(handler)
+
+
+def unregister_invalidation_handler(handler: Callable[[Set[str]], int]) -> None:
+    with _handlers_lock:
+        if handler in _handlers:
+            _handlers.remove(handler)
+
+
+def notify_table_write(table: str, dates: Optional[Iterable[DateLike]] = None) -> int:
+    """Invalidate cached values depending on rows just written to ``table``.
+
+    Never raises: a cache problem must not fail the write that triggered it.
+    """
+    tags = write_tags(table, dates)
+    with _handlers_lock:
+        handlers = list(_handlers)
+    invalidated = 0
+    for handler in handlers:
+        try:
+            invalidated += handler(tags) or 0
+        except Exception as e:
+            logger.warning(f"Cache invalidation for {table} failed: {e}")
+    return invalidated
@@ -0,0 +1,217 @@
+"""
+In-process L1 tier for CacheService.
+
+``MemoryCache`` is an LRU cache bounded by an estimated byte size. Entries
+carry a fresh-until deadline and an optional stale window (for
+stale-while-revalidate). A daemon janitor thread drops entries whose stale
+window has passed, so expired data does not pile up waiting to be read.
+"""
+
+import heapq
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_SWEEP_INTERVAL = 30.0
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate in-memory footprint of a cached value in bytes."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8", "ignore"))
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    fresh_until: float
+    stale_until: float
+
+
+class MemoryCache:
+    """Thread-safe, byte-bounded LRU cache with proactive expiry."""
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_entries: Optional[int] = None,
+        sweep_interval: float = DEFAULT_SWEEP_INTERVAL,
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._deadlines: List[Tuple[float, str]] = []
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self._janitor: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "rejected": 0,
+        }
+
+    def __reduce__(self):
+        # The cache is process-local: a pickled copy starts empty
+        return MemoryCache, (self.max_bytes, self.max_entries, self.sweep_interval)
+
+    # ------------------------------------------------------------------
+    # Core operations
+    # ------------------------------------------------------------------
+    def lookup(self, key: str) -> Tuple[bool, Any, bool]:
+        """Return ``(found, value, is_stale)`` and count the access."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.stale_until <= now:
+                if entry is not None:
+                    self._remove(key)
+                    self.stats["expirations"] += 1
+                self.stats["misses"] += 1
+                return False, None, False
+            self._entries.move_to_end(key)
+            if entry.fresh_until > now:
+                self.stats["hits"] += 1
+                return True, entry.value, False
+            self.stats["stale_hits"] += 1
+            return True, entry.value, True
+
+    def get(self, key: str, default: Any = None) -> Any:
+        found, value, _ = self.lookup(key)
+        return value if found else default
+
+    def set(self, key: str, value: Any, ttl: float, stale_ttl: float = 0.0) -> bool:
+        """Store ``value``; it is fresh for ``ttl`` seconds and may be served
+        stale for a further ``stale_ttl`` seconds while it is refreshed."""
+        size = estimate_size(value)
+        with self._lock:
+            if size > self.max_bytes:
+                self.stats["rejected"] += 1
+                self._remove(key)
+                return False
+            now = time.monotonic()
+            entry = _Entry(value, size, now + ttl, now + ttl + max(stale_ttl, 0.0))
+            self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            heapq.heappush(self._deadlines, (entry.stale_until, key))
+            self.stats["sets"] += 1
+            self._evict_for_space()
+        self._ensure_janitor()
+        return True
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._deadlines.clear()
+            self._bytes = 0
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry.stale_until > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    # ------------------------------------------------------------------
+    # Expiry and eviction
+    # ------------------------------------------------------------------
+    def _remove(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry.size
+        return True
+
+    def _evict_for_space(self) -> None:
+        while self._entries and (
+            self._bytes > self.max_bytes
+            or (self.max_entries is not None and len(self._entries) > self.max_entries)
+        ):
+            key, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.stats["evictions"] += 1
+
+    def purge_expired(self) -> int:
+        """Drop every entry whose stale window has passed; returns the count."""
+        now = time.monotonic()
+        purged = 0
+        with self._lock:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                deadline, key = heapq.heappop(self._deadlines)
+                entry = self._entries.get(key)
+                # Heap items for overwritten/deleted entries are skipped lazily
+                if entry is not None and entry.stale_until == deadline:
+                    self._remove(key)
+                    purged += 1
+            # Keep the heap from growing without bound under churn
+            if len(self._deadlines) > 2 * len(self._entries) + 64:
+                self._deadlines = [(e.stale_until, k) for k, e in self._entries.items()]
+                heapq.heapify(self._deadlines)
+            self.stats["expirations"] += purged
+        return purged
+
+    def _ensure_janitor(self) -> None:
+        if self._janitor is not None or self.sweep_interval <= 0:
+            return
+        with self._lock:
+            if self._janitor is None:
+                self._janitor = threading.Thread(
+                    target=self._run_janitor, name="cache-l1-janitor", daemon=True
+                )
+                self._janitor.start()
+
+    def _run_janitor(self) -> None:
+        while not self._stop.wait(self.sweep_interval):
+            self.purge_expired()
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["max_bytes"] = self.max_bytes
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0
+        return stats
@@ -1,7 +1,11 @@
+from typing import List
+
 from src.models.cash_ledger import CashLedgerEntry
 from src.models.cash_ledger import Account
 from src.repositories.base import DatabaseConnection
 from src.config.settings import Settings
+from src.services.cache_invalidation import notify_table_write
+from src.services.ledger_checkpoints import LedgerCheckpoints
 
 class CashLedgerService:
     def __init__(self, db_connection: DatabaseConnection | None = None):
@@ -26,7 +30,7 @@ class CashLedgerService:
             )
             # Ensure optional columns exist (SQLite-safe migrations)
             cur = conn.execute("PRAGMA table_info(cash_ledger)")
-            cols = {row[1] for row in cur.fetchall()}
+            cols = {row["name"] if isinstance(row, dict) else row[1] for row in cur.fetchall()}
             if "source" not in cols:
                 conn.execute("ALTER TABLE cash_ledger ADD COLUMN source TEXT")
             if "external_id" not in cols:
@@ -59,6 +63,44 @@ class CashLedgerService:
                 for row in rows
             ]
 
+    @staticmethod
+    def _entry_params(entry: CashLedgerEntry) -> tuple:
+        return (
+            entry.entry_date,
+            entry.description,
+            entry.amount,
+            entry.currency,
+            entry.account.value if entry.account else None,
+            entry.category,
+            entry.source,
+            entry.external_id,
+            entry.bank_account_id,
+        )
+
+    def create_entries(self, entries: List[CashLedgerEntry]) -> int:
+        """Insert entries in one executemany; rows whose external_id exists are skipped.
+
+        Returns the number of rows inserted.
+        """
+        if not entries:
+            return 0
+        with self.db.get_connection() as conn:
+            cur = conn.executemany(
+                """
+                INSERT OR IGNORE INTO cash_ledger (
+                    entry_date, description, amount, currency, account, category,
+                    source, external_id, bank_account_id
+                ) VALUES (?,?,?,?,?,?,?,?,?)
+                """,
+                [self._entry_params(e) for e in entries],
+            )
+            inserted = max(cur.rowcount, 0)
+        if inserted:
+            notify_table_write("cash_ledger", [e.entry_date for e in entries])
+            # Imports are often backdated; rebuild the checkpoints they invalidated
+            LedgerCheckpoints(self.db).refresh()
+        return inserted
+
     def create_entry(self, entry: CashLedgerEntry):
         with self.db.get_connection() as conn:
             conn.execute(
@@ -68,15 +110,6 @@ class CashLedgerService:
                     source, external_id, bank_account_id
                 ) VALUES (?,?,?,?,?,?,?,?,?)
                 """,
-                (
-                    entry.entry_date,
-                    entry.description,
-                    entry.amount,
-                    entry.currency,
-                    entry.account.value if entry.account else None,
-                    entry.category,
-                    entry.source,
-                    entry.external_id,
-                    entry.bank_account_id,
-                ),
+                self._entry_params(entry),
             )
+        notify_table_write("cash_ledger", [entry.entry_date])
@@ -0,0 +1,355 @@
+"""
+Process-pool execution for CPU-bound service work.
+
+Report generation and forecasting are numpy/pandas heavy and hold the GIL,
+so running them on threads serializes them. ``ComputePool`` sends them to a
+``ProcessPoolExecutor`` instead:
+
+* Workers are warm: each one imports ``PRELOAD_MODULES`` when it starts, and
+  ``ComputePool.warm`` starts them all ahead of the first job.
+* Large numpy arrays and DataFrames passed as arguments go through
+  ``multiprocessing.shared_memory`` rather than being pickled. The caller's
+  process owns each segment and unlinks it once the job is done.
+* ``@offloadable`` marks a service method or function. Calling it runs
+  inline as before; ``.submit(...)`` runs it on the pool and returns a
+  ``Future``, and ``.offload(...)`` does the same and waits for the result.
+  Offloaded methods pickle their instance, so services that hold connections
+  or locks rebuild them in the worker through ``__reduce__``/``__getstate__``.
+
+Results come back pickled; only arguments are shared.
+"""
+
+import atexit
+import functools
+import importlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PRELOAD_MODULES: Tuple[str, ...] = ("numpy", "pandas")
+# Arrays and frames smaller than this are cheaper to pickle than to share
+SHARE_MIN_BYTES = 1024 * 1024
+_ALIGNMENT = 64
+
+
+def warm_worker(modules: Sequence[str] = PRELOAD_MODULES) -> None:
+    """Process-pool initializer importing heavy modules once per worker."""
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            logger.debug("Compute worker could not preload %s", name)
+
+
+def _ping() -> int:
+    # Hold the worker briefly so each ping lands on a different process
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to a segment owned by another process."""
+    try:
+        # Python 3.13+: keep the worker's resource tracker out of the owner's segment
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _shareable_dtype(dtype: Any) -> bool:
+    return isinstance(dtype, np.dtype) and dtype.kind in "biufcmM"
+
+
+class SharedArray:
+    """Picklable handle to a numpy array copied into shared memory."""
+
+    def __init__(self, shm_name: str, shape: Tuple[int, ...], dtype: str):
+        self.shm_name = shm_name
+        self.shape = shape
+        self.dtype = dtype
+
+    @classmethod
+    def create(cls, array: np.ndarray) -> Tuple["SharedArray", shared_memory.SharedMemory]:
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+        return cls(shm.name, array.shape, array.dtype.str), shm
+
+    def attach(self, segments: List[shared_memory.SharedMemory]) -> np.ndarray:
+        shm = _attach(self.shm_name)
+        segments.append(shm)
+        return np.ndarray(self.shape, np.dtype(self.dtype), buffer=shm.buf)
+
+
+class SharedFrame:
+    """Picklable handle to a DataFrame whose numeric columns live in shared memory.
+
+    Numeric and datetime columns are packed into one segment; other columns
+    (strings, categoricals, tz-aware timestamps) and the index are pickled.
+    """
+
+    def __init__(
+        self,
+        shm_name: str,
+        layout: List[Tuple[int, Any, str, int, int]],
+        columns: Any,
+        other: Any,
+        index: Any,
+        nrows: int,
+    ):
+        self.shm_name = shm_name
+        self.layout = layout  # (position, label, dtype, offset, nbytes)
+        self.columns = columns
+        self.other = other
+        self.index = index
+        self.nrows = nrows
+
+    @classmethod
+    def create(cls, frame) -> Tuple["SharedFrame", shared_memory.SharedMemory]:
+        positions = [
+            i for i, dtype in enumerate(frame.dtypes) if _shareable_dtype(dtype)
+        ]
+        layout = []
+        offset = 0
+        for i in positions:
+            dtype = frame.dtypes.iloc[i]
+            nbytes = dtype.itemsize * len(frame)
+            layout.append((i, frame.columns[i], dtype.str, offset, nbytes))
+            offset += -(-nbytes // _ALIGNMENT) * _ALIGNMENT
+        shm = shared_memory.SharedMemory(create=True, size=max(1, offset))
+        for i, _, dtype, start, nbytes in layout:
+            target = np.ndarray((len(frame),), np.dtype(dtype), buffer=shm.buf, offset=start)
+            target[...] = frame.iloc[:, i].to_numpy()
+        other_positions = [i for i in range(frame.shape[1]) if i not in set(positions)]
+        other = frame.iloc[:, other_positions] if other_positions else None
+        handle = cls(shm.name, layout, frame.columns, other, frame.index, len(frame))
+        return handle, shm
+
+    def attach(self, segments: List[shared_memory.SharedMemory]):
+        import pandas as pd
+
+        shm = _attach(self.shm_name)
+        segments.append(shm)
+        data: Dict[int, Any] = {}
+        for i, _, dtype, start, _ in self.layout:
+            data[i] = np.ndarray((self.nrows,), np.dtype(dtype), buffer=shm.buf, offset=start)
+        if self.other is not None:
+            other_positions = [
+                i for i in range(len(self.columns)) if i not in data
+            ]
+            for j, i in enumerate(other_positions):
+                data[i] = self.other.iloc[:, j]
+        # Keyed by position so duplicate column labels survive; copy=False
+        # keeps the shared columns as views of the segment
+        frame = pd.DataFrame(
+            {i: data[i] for i in range(len(self.columns))}, index=self.index, copy=False
+        )
+        frame.columns = self.columns
+        return frame
+
+
+def _share(value: Any, owned: List[shared_memory.SharedMemory], min_bytes: int) -> Any:
+    """Swap a large array/frame for a shared-memory handle (caller side)."""
+    if isinstance(value, np.ndarray):
+        if value.nbytes >= min_bytes and _shareable_dtype(value.dtype):
+            handle, shm = SharedArray.create(value)
+            owned.append(shm)
+            return handle
+        return value
+    if type(value).__name__ == "DataFrame" and hasattr(value, "dtypes"):
+        nbytes = int(value.memory_usage(index=False, deep=False).sum())
+        if nbytes >= min_bytes:
+            handle, shm = SharedFrame.create(value)
+            owned.append(shm)
+            return handle
+    return value
+
+
+def _unshare(value: Any, segments: List[shared_memory.SharedMemory]) -> Any:
+    """Turn a shared-memory handle back into an array/frame (worker side)."""
+    if isinstance(value, (SharedArray, SharedFrame)):
+        return value.attach(segments)
+    return value
+
+
+def _release(segments: List[shared_memory.SharedMemory], unlink: bool) -> None:
+    for shm in segments:
+        try:
+            shm.close()
+        except BufferError:
+            # A view is still alive; the segment closes when it is collected
+            pass
+        if unlink:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _invoke(func: Callable[..., Any], args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+    """Worker entry point: attach shared arguments, call, detach."""
+    segments: List[shared_memory.SharedMemory] = []
+    try:
+        args = tuple(_unshare(a, segments) for a in args)
+        kwargs = {k: _unshare(v, segments) for k, v in kwargs.items()}
+        return func(*args, **kwargs)
+    finally:
+        del args, kwargs
+        _release(segments, unlink=False)
+
+
+def _call_method(instance: Any, name: str, *args: Any, **kwargs: Any) -> Any:
+    return getattr(instance, name)(*args, **kwargs)
+
+
+class ComputePool:
+    """Warm process pool for CPU-bound jobs with shared-memory arguments."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        preload: Sequence[str] = PRELOAD_MODULES,
+        share_min_bytes: int = SHARE_MIN_BYTES,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.preload = tuple(preload)
+        self.share_min_bytes = share_min_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # Workers must share this process's resource tracker; one
+                    # of their own would unlink our segments when they exit
+                    resource_tracker.ensure_running()
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        initializer=warm_worker,
+                        initargs=(self.preload,),
+                    )
+        return self._executor
+
+    def warm(self) -> List[int]:
+        """Start every worker now; returns their pids."""
+        futures = [self.executor.submit(_ping) for _ in range(self.max_workers)]
+        return sorted({f.result() for f in futures})
+
+    def submit(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Run ``func`` in a worker process; large array/frame args are shared."""
+        owned: List[shared_memory.SharedMemory] = []
+        try:
+            shared_args = tuple(_share(a, owned, self.share_min_bytes) for a in args)
+            shared_kwargs = {
+                k: _share(v, owned, self.share_min_bytes) for k, v in kwargs.items()
+            }
+            future = self.executor.submit(_invoke, func, shared_args, shared_kwargs)
+        except BaseException:
+            _release(owned, unlink=True)
+            raise
+        if owned:
+            future.add_done_callback(lambda _: _release(owned, unlink=True))
+        return future
+
+    def map(self, func: Callable[..., Any], *iterables: Iterable[Any]) -> Iterable[Any]:
+        """``Executor.map`` over the warm workers (arguments are pickled)."""
+        return self.executor.map(func, *iterables)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_default_pool: Optional[ComputePool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_compute_pool() -> ComputePool:
+    """Process-wide compute pool (``COMPUTE_POOL_WORKERS`` sets its size)."""
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                workers = os.getenv("COMPUTE_POOL_WORKERS")
+                _default_pool = ComputePool(max_workers=int(workers) if workers else None)
+    return _default_pool
+
+
+def shutdown_compute_pool(wait: bool = True) -> None:
+    """Stop the process-wide pool's workers (it restarts on next use)."""
+    if _default_pool is not None:
+        _default_pool.shutdown(wait=wait)
+
+
+atexit.register(shutdown_compute_pool)
+
+
+class _BoundOffloadable:
+    """An ``@offloadable`` method bound to an instance."""
+
+    def __init__(self, func: Callable[..., Any], instance: Any, name: str):
+        self._func = func
+        self._instance = instance
+        self._name = name
+        functools.update_wrapper(self, func)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._func(self._instance, *args, **kwargs)
+
+    def submit(self, *args: Any, pool: Optional[ComputePool] = None, **kwargs: Any) -> Future:
+        """Run on the compute pool and return a ``Future``."""
+        pool = pool or get_compute_pool()
+        return pool.submit(_call_method, self._instance, self._name, *args, **kwargs)
+
+    def offload(self, *args: Any, pool: Optional[ComputePool] = None, **kwargs: Any) -> Any:
+        """Run on the compute pool and wait for the result."""
+        return self.submit(*args, pool=pool, **kwargs).result()
+
+
+class offloadable:
+    """Mark a CPU-bound function or method as runnable on the compute pool.
+
+    ``obj.method(...)`` still runs inline; ``obj.method.submit(...)`` returns
+    a ``Future`` and ``obj.method.offload(...)`` blocks on it. Decorated
+    functions must be module-level so workers can import them.
+    """
+
+    def __init__(self, func: Callable[..., Any]):
+        self._func = func
+        self._name = func.__name__
+        functools.update_wrapper(self, func)
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self._name = name
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        return _BoundOffloadable(self._func, instance, self._name)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._func(*args, **kwargs)
+
+    def submit(self, *args: Any, pool: Optional[ComputePool] = None, **kwargs: Any) -> Future:
+        """Run on the compute pool and return a ``Future``."""
+        return (pool or get_compute_pool()).submit(self, *args, **kwargs)
+
+    def offload(self, *args: Any, pool: Optional[ComputePool] = None, **kwargs: Any) -> Any:
+        """Run on the compute pool and wait for the result."""
+        return self.submit(*args, pool=pool, **kwargs).result()
+
+    def __reduce__(self):
+        # Pickle by reference, like the plain function it wraps
+        return self._func.__qualname__
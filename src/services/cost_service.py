@@ -11,6 +11,12 @@ from ..repositories.cost_repository import CostRepository, RecurringCostReposito
 from ..repositories.base import DatabaseConnection
 from ..utils.date_utils import DateUtils
 from ..utils.currency_utils import CurrencyUtils
+from .cache_invalidation import notify_table_write
+
+
+def _notify_costs_written(*costs: Cost) -> None:
+    """Invalidate cached data depending on the months of the written costs."""
+    notify_table_write("costs", [getattr(c, "cost_date", None) for c in costs])
 
 
 class CostService:
@@ -38,7 +44,9 @@ class CostService:
             description=description,
             is_paid=is_paid,
         )
-        return self.cost_repository.save(cost)
+        saved = self.cost_repository.save(cost)
+        _notify_costs_written(saved)
+        return saved
 
     def get_costs_by_date_range(self, start_date: date, end_date: date):
         """Get costs within date range - returns dictionaries for development compatibility."""
@@ -186,6 +194,7 @@ class CostService:
         if cost:
             cost.mark_as_paid()
             self.cost_repository.save(cost)
+            _notify_costs_written(cost)
             return True
         return False
 
@@ -238,7 +247,9 @@ class CostService:
             cost.category = category
 
         cost.updated_at = datetime.now()
-        return self.cost_repository.save(cost)
+        saved = self.cost_repository.save(cost)
+        _notify_costs_written(saved)
+        return saved
 
 
 class RecurringCostService:
@@ -315,6 +326,8 @@ class RecurringCostService:
             recurring_cost.update_next_due_date(next_due)
             self.recurring_cost_repository.save(recurring_cost)
 
+        if created_costs:
+            _notify_costs_written(*created_costs)
         return created_costs
 
     def deactivate_recurring_cost(self, recurring_cost_id: str) -> bool:
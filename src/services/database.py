@@ -3,121 +3,44 @@ Optimized database service with connection pooling and query optimization
 """
 
 import sqlite3
-import threading
-from contextlib import contextmanager
 from typing import Optional, Dict, Any, List, Tuple
 import pandas as pd
-from queue import Queue, Empty
 import time
 import logging
 from datetime import datetime
 
+from ..repositories.base import ConnectionPool
+
 logger = logging.getLogger(__name__)
 
 
-class DatabasePool:
-    """SQLite connection pool for improved performance"""
+class DatabasePool(ConnectionPool):
+    """SQLite connection pool for improved performance.
+
+    Thin wrapper over the shared ``ConnectionPool`` (same PRAGMAs, bounds and
+    metrics as ``DatabaseConnection``) that hands out ``sqlite3.Row`` rows.
+    """
 
     def __init__(self, database_path: str, pool_size: int = 10, timeout: float = 30.0):
+        super().__init__(
+            database_path,
+            max_size=pool_size,
+            timeout=timeout,
+            row_factory=sqlite3.Row,
+        )
         self.database_path = database_path
         self.pool_size = pool_size
-        self.timeout = timeout
-        self.pool = Queue(maxsize=pool_size)
-        self.lock = threading.Lock()
-        self.stats = {
-            "connections_created": 0,
-            "connections_reused": 0,
-            "active_connections": 0,
-            "pool_hits": 0,
-            "pool_misses": 0,
-        }
-
-        # Pre-populate pool
-        self._initialize_pool()
-
-    def _initialize_pool(self):
-        """Initialize the connection pool"""
-        for _ in range(self.pool_size):
-            conn = self._create_connection()
-            if conn:
-                self.pool.put(conn)
-
-    def _create_connection(self) -> Optional[sqlite3.Connection]:
-        """Create a new database connection with optimizations"""
-        try:
-            conn = sqlite3.connect(
-                self.database_path, timeout=self.timeout, check_same_thread=False
-            )
-
-            # Enable optimizations
-            conn.execute("PRAGMA journal_mode=WAL")  # Write-Ahead Logging
-            conn.execute("PRAGMA synchronous=NORMAL")  # Balance safety/performance
-            conn.execute("PRAGMA cache_size=10000")  # 10MB cache
-            conn.execute("PRAGMA temp_store=MEMORY")  # Use memory for temp tables
-            conn.execute("PRAGMA mmap_size=268435456")  # 256MB memory map
-            conn.execute("PRAGMA foreign_keys=ON")  # Enable foreign keys
 
-            # Set row factory for better data access
-            conn.row_factory = sqlite3.Row
-
-            with self.lock:
-                self.stats["connections_created"] += 1
-
-            return conn
-        except sqlite3.Error as e:
-            logger.error(f"Failed to create database connection: {e}")
-            return None
-
-    @contextmanager
-    def get_connection(self):
+    def get_connection(self, readonly: bool = False):
         """Get a connection from the pool"""
-        conn = None
-        try:
-            # Try to get from pool
-            try:
-                conn = self.pool.get_nowait()
-                with self.lock:
-                    self.stats["pool_hits"] += 1
-                    self.stats["connections_reused"] += 1
-            except Empty:
-                # Pool empty, create new connection
-                conn = self._create_connection()
-                with self.lock:
-                    self.stats["pool_misses"] += 1
-
-            if conn is None:
-                raise sqlite3.Error("Could not obtain database connection")
-
-            with self.lock:
-                self.stats["active_connections"] += 1
-
-            yield conn
-
-        finally:
-            if conn:
-                with self.lock:
-                    self.stats["active_connections"] -= 1
-
-                # Return to pool if space available
-                try:
-                    self.pool.put_nowait(conn)
-                except:
-                    # Pool full, close connection
-                    conn.close()
-
-    def close_all(self):
-        """Close all connections in the pool"""
-        while not self.pool.empty():
-            try:
-                conn = self.pool.get_nowait()
-                conn.close()
-            except Empty:
-                break
+        return self.connection(readonly=readonly)
 
     def get_stats(self) -> Dict[str, Any]:
         """Get pool statistics"""
-        with self.lock:
-            return self.stats.copy()
+        stats = super().get_stats()
+        stats["connections_reused"] = stats["pool_hits"]
+        stats["active_connections"] = stats["in_use"]
+        return stats
 
 
 class OptimizedDatabase:
@@ -0,0 +1,271 @@
+"""
+Rolling-origin backtesting for the forecasting methods.
+
+For every origin ``t`` from ``min_train`` to ``n - 1`` the methods are fitted
+on ``values[:t]`` (an expanding window) and their next ``horizon`` forecasts
+are compared with what actually happened. Origins are evaluated for all
+series at once with the vectorized fits in ``batch_forecast``, so a backtest
+of every category is one loop over origins rather than one per series.
+
+Metrics, accumulated over every (origin, step) with a known actual:
+
+* ``mape`` - mean absolute percentage error in percent, over non-zero actuals
+* ``smape`` - symmetric MAPE in percent (0-200); 0 when actual and forecast are 0
+* ``mase`` - mean absolute error scaled by the in-sample naive error of each
+  training window; origins whose window is constant are skipped
+* ``coverage`` - share of actuals inside the 95% interval
+
+Scores are cached by a hash of the data and the backtest parameters.
+"""
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .batch_forecast import BATCH_METHODS, _method_name, interval_half_width, long_to_matrices
+from .cache_memory import MemoryCache
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("mape", "smape", "mase", "coverage")
+# Metrics where lower is better, in order of preference for picking a method
+SELECTION_METRICS = ("mase", "smape", "mape")
+DEFAULT_METHODS = ("linear", "exponential", "seasonal")
+DEFAULT_CACHE_TTL = 24 * 3600
+SCORE_COLUMNS = ["series_id", "method", "n_forecasts", *METRICS]
+DEFAULT_CACHE_BYTES = 8 * 1024 * 1024
+
+
+_default_cache: Optional[MemoryCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_backtest_cache() -> MemoryCache:
+    """Process-wide score cache (one janitor thread, however many backtesters)."""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = MemoryCache(max_bytes=DEFAULT_CACHE_BYTES)
+    return _default_cache
+
+
+@dataclass
+class BacktestScores:
+    """Backtest metrics of each method for one series."""
+
+    scores: Dict[str, Dict[str, float]]
+    horizon: int
+    min_train: int
+    origins: int
+    data_hash: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def best_method(self, metric: Optional[str] = None) -> Optional[str]:
+        """Method with the lowest error, or ``None`` when nothing could be scored.
+
+        Without ``metric`` the first of MASE, sMAPE and MAPE that is defined
+        for some method is used.
+        """
+        candidates = [metric] if metric else list(SELECTION_METRICS)
+        for name in candidates:
+            defined = {
+                method: values[name]
+                for method, values in self.scores.items()
+                if np.isfinite(values.get(name, np.nan))
+            }
+            if defined:
+                return min(defined, key=defined.get)
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "scores": self.scores,
+            "horizon": self.horizon,
+            "min_train": self.min_train,
+            "origins": self.origins,
+            "data_hash": self.data_hash,
+            **self.metadata,
+        }
+
+
+def data_hash(values: np.ndarray, **params: Any) -> str:
+    """Stable hash of the series values and the parameters scoring depends on."""
+    digest = hashlib.sha256(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    digest.update(repr(values.shape).encode())
+    digest.update(repr(sorted(params.items())).encode())
+    return digest.hexdigest()
+
+
+def effective_min_train(n_periods: int, min_train: int) -> int:
+    """Clamp ``min_train`` so short series still get at least one origin."""
+    return max(2, min(min_train, n_periods - 1))
+
+
+def backtest_matrix(
+    values: np.ndarray,
+    horizon: int,
+    methods: Iterable = DEFAULT_METHODS,
+    min_train: int = 6,
+    step: int = 1,
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """Rolling-origin backtest of every row of an (n_series x n_periods) matrix.
+
+    Returns ``{method: {metric: array of n_series}}`` plus an ``n_forecasts``
+    entry per method. Metrics are NaN where nothing could be scored.
+    """
+    if horizon <= 0:
+        raise ValueError("Horizon must be positive")
+    names = [_method_name(m) for m in methods]
+    values = np.asarray(values, dtype=float)
+    n_series, n_periods = values.shape
+    start = effective_min_train(n_periods, min_train)
+
+    sums = {
+        name: {key: np.zeros(n_series) for key in ("ape", "ape_n", "sape", "se", "se_n", "covered", "n")}
+        for name in names
+    }
+    for origin in range(start, n_periods, step):
+        train = values[:, :origin]
+        actual = values[:, origin : origin + horizon]
+        steps = actual.shape[1]
+        half_width = interval_half_width(train, steps)
+        naive_scale = np.abs(np.diff(train, axis=1)).mean(axis=1)
+        nonzero = actual != 0
+        scaled = naive_scale > 0
+
+        for name in names:
+            forecast = BATCH_METHODS[name](train, steps)
+            error = np.abs(actual - forecast)
+            acc = sums[name]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                acc["ape"] += np.where(nonzero, error / np.abs(actual), 0.0).sum(axis=1)
+                denominator = np.abs(actual) + np.abs(forecast)
+                acc["sape"] += np.where(denominator > 0, 2 * error / denominator, 0.0).sum(axis=1)
+                acc["se"] += np.where(scaled, error.mean(axis=1) / naive_scale, 0.0) * steps
+            acc["ape_n"] += nonzero.sum(axis=1)
+            acc["se_n"] += np.where(scaled, steps, 0)
+            acc["covered"] += (error <= half_width).sum(axis=1)
+            acc["n"] += steps
+
+    results = {}
+    for name, acc in sums.items():
+        n = acc["n"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            results[name] = {
+                "mape": np.where(acc["ape_n"] > 0, 100 * acc["ape"] / acc["ape_n"], np.nan),
+                "smape": np.where(n > 0, 100 * acc["sape"] / n, np.nan),
+                "mase": np.where(acc["se_n"] > 0, acc["se"] / acc["se_n"], np.nan),
+                "coverage": np.where(n > 0, acc["covered"] / n, np.nan),
+                "n_forecasts": n.astype(int),
+            }
+    return results
+
+
+class ForecastBacktester:
+    """Rolling-origin backtests with scores cached by data hash.
+
+    ``cache`` is any object with ``get(key)`` and ``set(key, value, ttl)``,
+    such as ``CacheService``; by default scores live in a ``MemoryCache``
+    shared by every backtester in the process.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[Any] = None,
+        ttl: int = DEFAULT_CACHE_TTL,
+        min_train: int = 6,
+        step: int = 1,
+    ):
+        self.cache = cache if cache is not None else get_backtest_cache()
+        self.ttl = ttl
+        self.min_train = min_train
+        self.step = step
+
+    def backtest(
+        self,
+        values: Union[Sequence[float], np.ndarray],
+        horizon: int,
+        methods: Iterable = DEFAULT_METHODS,
+        min_train: Optional[int] = None,
+        step: Optional[int] = None,
+    ) -> BacktestScores:
+        """Backtest one series, reusing cached scores for identical input."""
+        values = np.asarray(values, dtype=float).reshape(1, -1)
+        names = [_method_name(m) for m in methods]
+        min_train = self.min_train if min_train is None else min_train
+        step = self.step if step is None else step
+        key = "forecast_backtest:" + data_hash(
+            values, horizon=horizon, methods=names, min_train=min_train, step=step
+        )
+
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        raw = backtest_matrix(values, horizon, names, min_train, step)
+        start = effective_min_train(values.shape[1], min_train)
+        origins = len(range(start, values.shape[1], step))
+
+        scores = BacktestScores(
+            scores={
+                name: {metric: float(raw[name][metric][0]) for metric in METRICS}
+                for name in names
+            },
+            horizon=horizon,
+            min_train=start,
+            origins=origins,
+            data_hash=key.split(":", 1)[1],
+        )
+        self._cache_set(key, scores)
+        return scores
+
+    def backtest_many(
+        self,
+        frame: pd.DataFrame,
+        horizon: int,
+        methods: Iterable = DEFAULT_METHODS,
+        id_col: str = "series_id",
+        date_col: str = "date",
+        value_col: str = "value",
+    ) -> pd.DataFrame:
+        """Backtest every series of a long-format frame (e.g. all cost categories).
+
+        Series are grouped by length and each group is scored as one matrix.
+        Returns one row per (series_id, method).
+        """
+        names = [_method_name(m) for m in methods]
+        frames = []
+        for ids, matrix in long_to_matrices(frame, id_col, date_col, value_col):
+            raw = backtest_matrix(matrix, horizon, names, self.min_train, self.step)
+            for name in names:
+                frames.append(
+                    pd.DataFrame({"series_id": ids, "method": name, **raw[name]})[SCORE_COLUMNS]
+                )
+        if not frames:
+            return pd.DataFrame(columns=SCORE_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def best_methods(scores: pd.DataFrame, metric: str = "mase") -> pd.Series:
+        """Best method per series from a ``backtest_many`` frame (NaN scores lose)."""
+        ranked = scores.dropna(subset=[metric]).sort_values(["series_id", metric], kind="stable")
+        return ranked.groupby("series_id")["method"].first()
+
+    def _cache_get(self, key: str) -> Optional[BacktestScores]:
+        try:
+            return self.cache.get(key)
+        except Exception as e:
+            logger.warning(f"Backtest cache read failed: {e}")
+            return None
+
+    def _cache_set(self, key: str, scores: BacktestScores) -> None:
+        try:
+            self.cache.set(key, scores, ttl=self.ttl)
+        except Exception as e:
+            logger.warning(f"Backtest cache write failed: {e}")
@@ -8,9 +8,13 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Any, Union
 from enum import Enum
 from dataclasses import dataclass
+from .batch_forecast import forecast_batch
+from .compute_pool import offloadable
+from .forecast_backtest import BacktestScores, ForecastBacktester
+from .monte_carlo import DEFAULT_CHUNK_SIZE, DEFAULT_PERCENTILES, MonteCarloResult, run_simulation
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +26,11 @@ class ForecastMethod(Enum):
     EXPONENTIAL = "exponential"
     SEASONAL = "seasonal"
     MONTE_CARLO = "monte_carlo"
+    AUTO = "auto"
+
+
+# Methods with their own point forecast (MONTE_CARLO forecasts with the linear trend)
+BACKTEST_METHODS = (ForecastMethod.LINEAR, ForecastMethod.EXPONENTIAL, ForecastMethod.SEASONAL)
 
 
 class ScenarioType(Enum):
@@ -30,6 +39,7 @@ class ScenarioType(Enum):
     BEST_CASE = "best_case"
     WORST_CASE = "worst_case"
     MOST_LIKELY = "most_likely"
+    MONTE_CARLO = "monte_carlo"
 
 
 @dataclass
@@ -50,7 +60,12 @@ class ForecastService:
     def __init__(self):
         self.confidence_level = 0.95
         self.monte_carlo_iterations = 10000
+        self.monte_carlo_seed: Optional[int] = None
+        self.monte_carlo_chunk_size = DEFAULT_CHUNK_SIZE
+        self.monte_carlo_workers: Optional[int] = None
+        self.backtester = ForecastBacktester()
 
+    @offloadable
     def generate_forecast(
         self,
         historical_data: List[Dict[str, Any]],
@@ -65,7 +80,8 @@ class ForecastService:
         Args:
             historical_data: Historical data points with 'date' and 'value' keys
             periods: Number of periods to forecast
-            method: Primary forecasting method
+            method: Primary forecasting method; ``AUTO`` picks the method with
+                the best backtest score for this data
             include_scenarios: Whether to include scenario analysis
             include_monte_carlo: Whether to include Monte Carlo simulation
 
@@ -80,6 +96,12 @@ class ForecastService:
             df = self._prepare_data(historical_data)
             values = df["value"].values
 
+            backtest = None
+            if method == ForecastMethod.AUTO:
+                backtest = self.backtest(values)
+                best = backtest.best_method()
+                method = ForecastMethod(best) if best else ForecastMethod.LINEAR
+
             # Generate primary forecast
             if method == ForecastMethod.LINEAR:
                 forecast = self._linear_forecast(values, periods)
@@ -101,9 +123,10 @@ class ForecastService:
                 scenarios = self._generate_scenarios(values, forecast, periods)
 
             # Monte Carlo simulation
+            monte_carlo = None
             if include_monte_carlo:
-                monte_carlo_results = self._monte_carlo_simulation(values, periods)
-                scenarios[ScenarioType.MONTE_CARLO] = monte_carlo_results
+                monte_carlo = self.run_monte_carlo(values, periods)
+                scenarios[ScenarioType.MONTE_CARLO] = monte_carlo.median
 
             # Metadata
             metadata = {
@@ -111,9 +134,13 @@ class ForecastService:
                 "historical_std": float(np.std(values)),
                 "trend_slope": self._calculate_trend_slope(values),
                 "seasonality_detected": self._detect_seasonality(values),
-                "forecast_accuracy_score": self._calculate_accuracy_score(values),
+                "forecast_accuracy_score": self._calculate_accuracy_score(values, method),
                 "calculation_timestamp": datetime.now().isoformat(),
             }
+            if backtest is not None:
+                metadata["backtest"] = backtest.to_dict()
+            if monte_carlo is not None:
+                metadata["monte_carlo"] = monte_carlo.to_dict()
 
             return ForecastResult(
                 method=method,
@@ -128,6 +155,44 @@ class ForecastService:
             logger.error(f"Error generating forecast: {str(e)}")
             raise
 
+    @offloadable
+    def generate_batch_forecast(
+        self,
+        data: Union[np.ndarray, pd.DataFrame],
+        periods: int,
+        methods: Iterable[Union[ForecastMethod, str]] = (ForecastMethod.LINEAR,),
+        series_ids: Optional[Sequence[Any]] = None,
+        id_col: str = "series_id",
+        date_col: str = "date",
+        value_col: str = "value",
+    ) -> pd.DataFrame:
+        """
+        Forecast many series in one vectorized pass.
+
+        Args:
+            data: 2-D array (one row per series) or long-format DataFrame
+                with series id, date and value columns
+            periods: Number of periods to forecast
+            methods: Forecasting methods to run for every series
+            series_ids: Row labels when ``data`` is an array
+
+        Returns:
+            Tidy DataFrame: series_id, method, step, forecast, lower, upper
+        """
+        try:
+            return forecast_batch(
+                data,
+                periods,
+                methods=methods,
+                series_ids=series_ids,
+                id_col=id_col,
+                date_col=date_col,
+                value_col=value_col,
+            )
+        except Exception as e:
+            logger.error(f"Error generating batch forecast: {str(e)}")
+            raise
+
     def _prepare_data(self, historical_data: List[Dict[str, Any]]) -> pd.DataFrame:
         """Prepare and validate historical data."""
         df = pd.DataFrame(historical_data)
@@ -287,45 +352,56 @@ class ForecastService:
 
         return scenarios
 
-    def _monte_carlo_simulation(
-        self, historical: np.ndarray, periods: int
-    ) -> List[float]:
-        """Monte Carlo simulation for risk analysis."""
+    @offloadable
+    def run_monte_carlo(
+        self,
+        historical: np.ndarray,
+        periods: int,
+        iterations: Optional[int] = None,
+        seed: Optional[int] = None,
+        percentiles: Tuple[int, ...] = DEFAULT_PERCENTILES,
+        chunk_size: Optional[int] = None,
+        workers: Optional[int] = None,
+    ) -> MonteCarloResult:
+        """Monte Carlo simulation returning P5/P25/P50/P75/P95 bands per period.
+
+        Defaults come from the service (``monte_carlo_iterations``,
+        ``monte_carlo_seed``, ``monte_carlo_chunk_size``, ``monte_carlo_workers``).
+        """
+        historical = np.asarray(historical, dtype=float)
+        iterations = iterations or self.monte_carlo_iterations
+        seed = self.monte_carlo_seed if seed is None else seed
+
         if len(historical) < 2:
-            return (
-                [float(historical[0])] * periods
-                if len(historical) > 0
-                else [0] * periods
+            value = float(historical[0]) if len(historical) > 0 else 0.0
+            return MonteCarloResult(
+                {p: [value] * periods for p in percentiles}, iterations, periods, seed
             )
 
-        # Calculate historical statistics
-        returns = np.diff(historical) / historical[:-1]
-        mean_return = np.mean(returns)
-        std_return = np.std(returns)
-
-        # Run Monte Carlo simulation
-        simulations = []
-        for _ in range(self.monte_carlo_iterations):
-            simulation = [historical[-1]]
-
-            for _ in range(periods):
-                # Generate random return
-                random_return = np.random.normal(mean_return, std_return)
-                next_value = simulation[-1] * (1 + random_return)
-                simulation.append(max(0, next_value))  # Prevent negative values
-
-            simulations.append(simulation[1:])  # Exclude initial value
-
-        # Calculate percentiles for each period
-        simulations = np.array(simulations)
-        percentiles = []
-
-        for period in range(periods):
-            period_values = simulations[:, period]
-            percentile_50 = np.percentile(period_values, 50)
-            percentiles.append(float(percentile_50))
+        # Calculate historical statistics (periods starting at zero have no return)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.diff(historical) / historical[:-1]
+        returns = returns[np.isfinite(returns)]
+        mean_return = float(np.mean(returns)) if len(returns) else 0.0
+        std_return = float(np.std(returns)) if len(returns) else 0.0
+
+        return run_simulation(
+            last_value=float(historical[-1]),
+            mean_return=mean_return,
+            std_return=std_return,
+            periods=periods,
+            iterations=iterations,
+            seed=seed,
+            percentiles=percentiles,
+            chunk_size=chunk_size or self.monte_carlo_chunk_size,
+            workers=self.monte_carlo_workers if workers is None else workers,
+        )
 
-        return percentiles
+    def _monte_carlo_simulation(
+        self, historical: np.ndarray, periods: int
+    ) -> List[float]:
+        """Median path of the Monte Carlo simulation (see ``run_monte_carlo``)."""
+        return self.run_monte_carlo(historical, periods).median
 
     def _calculate_trend_slope(self, values: np.ndarray) -> float:
         """Calculate trend slope using linear regression."""
@@ -352,22 +428,45 @@ class ForecastService:
 
         return False
 
-    def _calculate_accuracy_score(self, values: np.ndarray) -> float:
-        """Calculate forecast accuracy score based on historical data."""
+    @offloadable
+    def backtest(
+        self,
+        values: np.ndarray,
+        horizon: Optional[int] = None,
+        methods: Iterable[ForecastMethod] = BACKTEST_METHODS,
+    ) -> BacktestScores:
+        """
+        Rolling-origin backtest of the forecasting methods on one series.
+
+        By default the origins start at 75% of the history and forecast the
+        remaining 25%, the split the accuracy score has always used. Scores
+        are cached by data hash, so repeated calls on the same data are free.
+        """
+        values = np.asarray(values, dtype=float)
+        split_point = max(2, int(len(values) * 0.75))
+        if horizon is None:
+            horizon = max(1, len(values) - split_point)
+        return self.backtester.backtest(values, horizon, methods=methods, min_train=split_point)
+
+    def _calculate_accuracy_score(
+        self, values: np.ndarray, method: ForecastMethod = ForecastMethod.LINEAR
+    ) -> float:
+        """Calculate forecast accuracy score (1 - MAPE) from the cached backtest."""
         if len(values) < 4:
             return 0.5  # Default moderate accuracy
 
-        # Use last 25% of data for validation
-        split_point = int(len(values) * 0.75)
-        train_data = values[:split_point]
-        test_data = values[split_point:]
+        if method not in BACKTEST_METHODS:
+            method = ForecastMethod.LINEAR
+        scores = self.backtest(values).scores[method.value]
 
-        # Generate forecast for test period
-        test_forecast = self._linear_forecast(train_data, len(test_data))
-
-        # Calculate MAPE (Mean Absolute Percentage Error)
-        mape = np.mean(np.abs((test_data - test_forecast) / test_data)) * 100
+        # MAPE skips zero actuals; an all-zero test period falls back to sMAPE
+        if np.isfinite(scores["mape"]):
+            error = scores["mape"] / 100
+        elif np.isfinite(scores["smape"]):
+            error = scores["smape"] / 200
+        else:
+            return 0.5
 
         # Convert to accuracy score (0-1)
-        accuracy = max(0, 1 - mape / 100)
+        accuracy = max(0, 1 - error)
         return float(accuracy)
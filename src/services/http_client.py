@@ -0,0 +1,140 @@
+"""
+Shared async HTTP plumbing for external API fetchers.
+
+``get_shared_session`` hands out one pooled ``aiohttp.ClientSession`` per
+event loop instead of a session per call. ``ThrottledClient`` wraps JSON GETs
+with a bound on in-flight requests and retries 429/5xx responses: it honours
+``Retry-After``, otherwise it backs off exponentially with jitter. A 429
+pauses every request of the client, not only the one that was throttled.
+"""
+
+import asyncio
+import logging
+import random
+import time
+import weakref
+from typing import Any, Dict, Mapping, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_CONNECTION_LIMIT = 20
+DEFAULT_MAX_RETRIES = 5
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class HttpFetchError(Exception):
+    """A request failed with a non-retryable status or ran out of retries."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def get_shared_session(limit: int = DEFAULT_CONNECTION_LIMIT) -> aiohttp.ClientSession:
+    """Pooled session for the running event loop, created on first use."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=limit, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=60),
+        )
+        _sessions[loop] = session
+    return session
+
+
+async def close_shared_session() -> None:
+    """Close the running loop's shared session (call before the loop ends)."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+class ThrottledClient:
+    """JSON GETs with bounded concurrency and 429-aware retries."""
+
+    def __init__(
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+    ):
+        self._session = session
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._paused_until = 0.0
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0, "errors": 0}
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        return self._session if self._session is not None else get_shared_session()
+
+    def _retry_delay(self, attempt: int, headers: Mapping[str, str]) -> float:
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), self.backoff_max)
+            except ValueError:
+                pass
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    async def _wait_if_paused(self) -> None:
+        remaining = self._paused_until - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+    async def get_json(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Any:
+        """GET ``url`` and decode the JSON body, retrying throttled and failed requests."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        last_error = ""
+        for attempt in range(self.max_retries + 1):
+            await self._wait_if_paused()
+            async with self._semaphore:
+                self.stats["requests"] += 1
+                try:
+                    async with self.session.get(url, params=params, headers=headers) as response:
+                        if response.status < 400:
+                            return await response.json(content_type=None)
+                        if response.status not in RETRY_STATUSES:
+                            self.stats["errors"] += 1
+                            body = await response.text()
+                            raise HttpFetchError(
+                                f"GET {url} failed with HTTP {response.status}: {body[:200]}",
+                                status=response.status,
+                            )
+                        delay = self._retry_delay(attempt, response.headers)
+                        last_error = f"HTTP {response.status}"
+                        if response.status == 429:
+                            self.stats["throttled"] += 1
+                            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    delay = self._retry_delay(attempt, {})
+                    last_error = f"{type(e).__name__}: {e}"
+
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+                logger.warning(f"Retrying GET {url} in {delay:.2f}s after {last_error}")
+                await asyncio.sleep(delay)
+
+        self.stats["errors"] += 1
+        raise HttpFetchError(f"GET {url} failed after {self.max_retries + 1} attempts: {last_error}")
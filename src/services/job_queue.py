@@ -0,0 +1,740 @@
+"""
+Persistent background job queue.
+
+Jobs live in the SQLite ``job_queue`` table, so queued work survives a
+restart and several processes can share one queue:
+
+* Jobs are claimed highest ``priority`` first, then oldest first. A claim is a
+  single ``UPDATE ... RETURNING`` statement, so two workers never run the
+  same job.
+* Each job has a ``timeout`` and ``max_retries``. A failed or timed-out
+  attempt is re-queued with exponential backoff until the retries run out.
+  A claimed job holds a lease; if its worker dies the lease expires and the
+  job is queued again, or failed if that was its last attempt.
+* Finished jobs keep their result for ``result_ttl`` seconds and are purged
+  afterwards.
+
+Job functions are stored by name (``module:qualname`` or a name given to
+``register_job``), and arguments and results must be JSON-serializable.
+Callers wait on a ``concurrent.futures.Future`` (``JobQueue.future``) or
+``await JobQueue.wait(...)``; both are resolved by the worker of this queue
+that finishes the job, with no polling.
+
+Workers are started explicitly with ``JobQueue.start``. They run jobs on a
+thread pool, or with ``mode="process"`` on a process pool for CPU-bound work.
+A timed-out attempt is abandoned, not interrupted: its thread or process
+keeps running until the function returns.
+"""
+
+import asyncio
+import importlib
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from src.config.settings import Settings
+from src.repositories.base import DatabaseConnection
+from src.services.compute_pool import warm_worker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRIORITY = 0
+DEFAULT_TIMEOUT = 300.0
+DEFAULT_MAX_RETRIES = 0
+DEFAULT_RESULT_TTL = 3600.0
+DEFAULT_RETRY_BACKOFF = 1.0
+# How long an idle worker sleeps before re-checking the table for jobs
+# submitted by other processes or whose retry delay has passed
+DEFAULT_IDLE_INTERVAL = 1.0
+PURGE_INTERVAL = 60.0
+# Lease granted to a claimed job on top of its timeout
+LEASE_GRACE = 30.0
+METRICS_WINDOW = 1024
+THROUGHPUT_WINDOW = 60.0
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+TERMINAL_STATUSES = frozenset({"completed", "failed", "cancelled"})
+WORKER_MODES = ("thread", "process")
+
+_JOB_REGISTRY: Dict[str, Callable[..., Any]] = {}
+
+
+class JobError(Exception):
+    """A job failed, was cancelled, or its result has expired."""
+
+    def __init__(self, message: str, job_id: Optional[str] = None, status: Optional[str] = None):
+        super().__init__(message)
+        self.job_id = job_id
+        self.status = status
+
+
+class JobTimeoutError(JobError):
+    """A job attempt ran longer than its timeout."""
+
+
+@dataclass
+class JobRecord:
+    """One row of the ``job_queue`` table."""
+
+    id: str
+    name: str
+    args: List[Any]
+    kwargs: Dict[str, Any]
+    priority: int
+    status: str
+    attempts: int
+    max_retries: int
+    timeout: float
+    created_at: float
+    available_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    expires_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "JobRecord":
+        payload = json.loads(row["payload"])
+        return cls(
+            id=row["id"],
+            name=row["name"],
+            args=payload.get("args", []),
+            kwargs=payload.get("kwargs", {}),
+            priority=row["priority"],
+            status=row["status"],
+            attempts=row["attempts"],
+            max_retries=row["max_retries"],
+            timeout=row["timeout"],
+            created_at=row["created_at"],
+            available_at=row["available_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+            expires_at=row["expires_at"],
+            result=json.loads(row["result"]) if row["result"] is not None else None,
+            error=row["error"],
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "function": self.name,
+            "priority": self.priority,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_retries": self.max_retries,
+            "timeout": self.timeout,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "completed_at": self.finished_at,
+            "expires_at": self.expires_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def job_name(func: Callable[..., Any]) -> str:
+    """Name a job function is stored under."""
+    for name, registered in _JOB_REGISTRY.items():
+        if registered is func:
+            return name
+    qualname = getattr(func, "__qualname__", "")
+    if not qualname or "<" in qualname:
+        raise ValueError(
+            f"{func!r} cannot be stored by name; use a module-level function "
+            "or register it with register_job"
+        )
+    return f"{func.__module__}:{qualname}"
+
+
+def register_job(name: Optional[str] = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator registering a job function under a stable name.
+
+    Process-pool workers resolve custom names through the same registry, so
+    the registering module must be imported before the workers start.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        _JOB_REGISTRY[name or f"{func.__module__}:{func.__qualname__}"] = func
+        return func
+
+    return decorator
+
+
+def resolve_job(name: str) -> Callable[..., Any]:
+    """Look up a job function by its stored name."""
+    func = _JOB_REGISTRY.get(name)
+    if func is not None:
+        return func
+    module_name, _, qualname = name.partition(":")
+    if not qualname:
+        raise JobError(f"Unknown job function: {name}")
+    target: Any = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    return target
+
+
+def _run_job(name: str, args: List[Any], kwargs: Dict[str, Any]) -> Any:
+    """Executor entry point; module-level so process pools can pickle it."""
+    return resolve_job(name)(*args, **kwargs)
+
+
+def _percentile(samples: List[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+class SQLiteJobStore:
+    """Jobs persisted in the ``job_queue`` table."""
+
+    def __init__(self, db_connection):
+        self.db = db_connection
+        self._create_table()
+
+    def _create_table(self) -> None:
+        with self.db.get_connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_queue (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_retries INTEGER NOT NULL DEFAULT 0,
+                    timeout REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    available_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    lease_expires_at REAL,
+                    expires_at REAL,
+                    result TEXT,
+                    error TEXT
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_job_queue_claim
+                ON job_queue (status, priority DESC, created_at)
+                """
+            )
+
+    @staticmethod
+    def _fetch_dict(cursor) -> Optional[Dict[str, Any]]:
+        row = cursor.fetchone()
+        if row is None or isinstance(row, dict):
+            return row
+        return {col[0]: row[idx] for idx, col in enumerate(cursor.description)}
+
+    def add(self, job: JobRecord) -> None:
+        payload = json.dumps({"args": list(job.args), "kwargs": job.kwargs})
+        with self.db.get_connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO job_queue (
+                    id, name, payload, priority, status, attempts, max_retries,
+                    timeout, created_at, available_at
+                ) VALUES (?, ?, ?, ?, 'queued', 0, ?, ?, ?, ?)
+                """,
+                (
+                    job.id,
+                    job.name,
+                    payload,
+                    job.priority,
+                    job.max_retries,
+                    job.timeout,
+                    job.created_at,
+                    job.available_at,
+                ),
+            )
+
+    def get(self, job_id: str, now: Optional[float] = None) -> Optional[JobRecord]:
+        """Job by id, or None if it does not exist or its result has expired."""
+        now = time.time() if now is None else now
+        with self.db.get_connection(readonly=True) as conn:
+            row = self._fetch_dict(
+                conn.execute(
+                    """
+                    SELECT * FROM job_queue
+                    WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)
+                    """,
+                    (job_id, now),
+                )
+            )
+        return JobRecord.from_row(row) if row else None
+
+    def claim(self, now: Optional[float] = None) -> Optional[JobRecord]:
+        """Atomically mark the next runnable job as running and return it."""
+        now = time.time() if now is None else now
+        with self.db.get_connection() as conn:
+            row = self._fetch_dict(
+                conn.execute(
+                    """
+                    UPDATE job_queue
+                    SET status = 'running',
+                        attempts = attempts + 1,
+                        started_at = ?,
+                        lease_expires_at = ? + timeout + ?
+                    WHERE id = (
+                        SELECT id FROM job_queue
+                        WHERE status = 'queued' AND available_at <= ?
+                        ORDER BY priority DESC, created_at
+                        LIMIT 1
+                    ) AND status = 'queued'
+                    RETURNING *
+                    """,
+                    (now, now, LEASE_GRACE, now),
+                )
+            )
+        return JobRecord.from_row(row) if row else None
+
+    def next_available_at(self) -> Optional[float]:
+        """Earliest ``available_at`` among queued jobs."""
+        with self.db.get_connection(readonly=True) as conn:
+            row = self._fetch_dict(
+                conn.execute(
+                    "SELECT MIN(available_at) AS next_at FROM job_queue WHERE status = 'queued'"
+                )
+            )
+        return row["next_at"] if row else None
+
+    def complete(self, job_id: str, result: Any, result_ttl: float) -> None:
+        now = time.time()
+        with self.db.get_connection() as conn:
+            conn.execute(
+                """
+                UPDATE job_queue
+                SET status = 'completed', finished_at = ?, expires_at = ?,
+                    lease_expires_at = NULL, result = ?, error = NULL
+                WHERE id = ?
+                """,
+                (now, now + result_ttl, json.dumps(result, default=str), job_id),
+            )
+
+    def fail(self, job_id: str, error: str, result_ttl: float) -> None:
+        now = time.time()
+        with self.db.get_connection() as conn:
+            conn.execute(
+                """
+                UPDATE job_queue
+                SET status = 'failed', finished_at = ?, expires_at = ?,
+                    lease_expires_at = NULL, error = ?
+                WHERE id = ?
+                """,
+                (now, now + result_ttl, error, job_id),
+            )
+
+    def retry(self, job_id: str, error: str, available_at: float) -> None:
+        with self.db.get_connection() as conn:
+            conn.execute(
+                """
+                UPDATE job_queue
+                SET status = 'queued', available_at = ?, lease_expires_at = NULL, error = ?
+                WHERE id = ?
+                """,
+                (available_at, error, job_id),
+            )
+
+    def cancel(self, job_id: str, result_ttl: float) -> bool:
+        """Cancel a job that has not started yet."""
+        now = time.time()
+        with self.db.get_connection() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE job_queue
+                SET status = 'cancelled', finished_at = ?, expires_at = ?
+                WHERE id = ? AND status = 'queued'
+                """,
+                (now, now + result_ttl, job_id),
+            )
+            return cursor.rowcount > 0
+
+    def fail_expired_leases(
+        self, now: Optional[float] = None, result_ttl: float = DEFAULT_RESULT_TTL
+    ) -> List[str]:
+        """Fail running jobs whose worker went away on their last attempt.
+
+        Returns the ids of the failed jobs.
+        """
+        now = time.time() if now is None else now
+        with self.db.get_connection() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE job_queue
+                SET status = 'failed', finished_at = ?, expires_at = ?,
+                    lease_expires_at = NULL,
+                    error = 'Worker lease expired after ' || attempts || ' attempt(s)'
+                WHERE status = 'running' AND lease_expires_at < ?
+                    AND attempts > max_retries
+                RETURNING id
+                """,
+                (now, now + result_ttl, now),
+            )
+            rows = cursor.fetchall()
+        return [row["id"] if isinstance(row, dict) else row[0] for row in rows]
+
+    def requeue_expired_leases(self, now: Optional[float] = None) -> int:
+        """Put running jobs whose worker went away back in the queue.
+
+        Only jobs with retries left are re-queued; the lost attempt counts
+        against ``max_retries`` (see ``fail_expired_leases``), so a job that
+        keeps killing its worker is not re-run forever.
+        """
+        now = time.time() if now is None else now
+        with self.db.get_connection() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE job_queue
+                SET status = 'queued', lease_expires_at = NULL,
+                    error = 'Worker lease expired'
+                WHERE status = 'running' AND lease_expires_at < ?
+                    AND attempts <= max_retries
+                """,
+                (now,),
+            )
+            return cursor.rowcount
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Delete finished jobs whose result TTL has passed."""
+        now = time.time() if now is None else now
+        with self.db.get_connection() as conn:
+            cursor = conn.execute(
+                "DELETE FROM job_queue WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (now,),
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Number of stored jobs per status."""
+        with self.db.get_connection(readonly=True) as conn:
+            cursor = conn.execute(
+                "SELECT status, COUNT(*) AS n FROM job_queue GROUP BY status"
+            )
+            rows = cursor.fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        for row in rows:
+            status, n = (row["status"], row["n"]) if isinstance(row, dict) else row
+            counts[status] = n
+        return counts
+
+
+class JobQueue:
+    """Priority job queue with retries, timeouts and awaitable results."""
+
+    def __init__(
+        self,
+        store: Optional[SQLiteJobStore] = None,
+        result_ttl: float = DEFAULT_RESULT_TTL,
+        retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+        idle_interval: float = DEFAULT_IDLE_INTERVAL,
+    ):
+        self.store = store or SQLiteJobStore(DatabaseConnection(Settings().database.path))
+        self.result_ttl = result_ttl
+        self.retry_backoff = retry_backoff
+        self.idle_interval = idle_interval
+
+        self._wakeup = threading.Condition()
+        self._waiters: Dict[str, List[Future]] = {}
+        self._waiters_lock = threading.Lock()
+        self._executor = None
+        self._workers: List[threading.Thread] = []
+        self._running = False
+        self._mode: Optional[str] = None
+        self._last_purge = 0.0
+
+        self._stats_lock = threading.Lock()
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "retried": 0,
+            "timed_out": 0,
+            "cancelled": 0,
+        }
+        self._wait_times: Deque[float] = deque(maxlen=METRICS_WINDOW)
+        self._run_times: Deque[float] = deque(maxlen=METRICS_WINDOW)
+        self._finished_at: Deque[float] = deque(maxlen=METRICS_WINDOW)
+
+    # Submission -----------------------------------------------------------
+
+    def submit(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        job_id: Optional[str] = None,
+        priority: int = DEFAULT_PRIORITY,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        delay: float = 0.0,
+        **kwargs: Any,
+    ) -> str:
+        """Persist a job and wake a worker. Returns the job id."""
+        now = time.time()
+        job = JobRecord(
+            id=job_id or uuid.uuid4().hex,
+            name=job_name(func),
+            args=list(args),
+            kwargs=kwargs,
+            priority=priority,
+            status="queued",
+            attempts=0,
+            max_retries=max_retries,
+            timeout=timeout,
+            created_at=now,
+            available_at=now + delay,
+        )
+        self.store.add(job)
+        with self._stats_lock:
+            self._counters["submitted"] += 1
+        with self._wakeup:
+            self._wakeup.notify()
+        return job.id
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job. Running jobs cannot be cancelled."""
+        if not self.store.cancel(job_id, self.result_ttl):
+            return False
+        with self._stats_lock:
+            self._counters["cancelled"] += 1
+        self._resolve(job_id)
+        return True
+
+    # Results --------------------------------------------------------------
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status, result and timings, or None if unknown or expired."""
+        job = self.store.get(job_id)
+        return job.to_dict() if job else None
+
+    def future(self, job_id: str) -> Future:
+        """Future resolved with the job's result once it finishes."""
+        future: Future = Future()
+        with self._waiters_lock:
+            job = self.store.get(job_id)
+            if job is None:
+                future.set_exception(JobError(f"Unknown or expired job: {job_id}", job_id))
+            elif job.status in TERMINAL_STATUSES:
+                self._settle(future, job)
+            else:
+                self._waiters.setdefault(job_id, []).append(future)
+        return future
+
+    def result(self, job_id: str, timeout: Optional[float] = None) -> Any:
+        """Block until the job finishes and return its result."""
+        return self.future(job_id).result(timeout=timeout)
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Any:
+        """Await the job's result from an event loop."""
+        return await asyncio.wait_for(asyncio.wrap_future(self.future(job_id)), timeout)
+
+    @staticmethod
+    def _settle(future: Future, job: JobRecord) -> None:
+        if job.status == "completed":
+            future.set_result(job.result)
+        else:
+            future.set_exception(
+                JobError(job.error or f"Job {job.status}", job.id, job.status)
+            )
+
+    def _resolve(self, job_id: str, job: Optional[JobRecord] = None) -> None:
+        """Settle the job's waiters, from ``job`` if given, else from the store."""
+        with self._waiters_lock:
+            waiters = self._waiters.pop(job_id, [])
+            if not waiters:
+                return
+            if job is None:
+                job = self.store.get(job_id)
+        for future in waiters:
+            if future.done():
+                continue
+            if job is None:
+                future.set_exception(JobError(f"Unknown or expired job: {job_id}", job_id))
+            else:
+                self._settle(future, job)
+
+    # Workers --------------------------------------------------------------
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def start(self, workers: int = 4, mode: str = "thread") -> None:
+        """Start ``workers`` worker threads running jobs on a thread or process pool."""
+        if mode not in WORKER_MODES:
+            raise ValueError(f"mode must be one of {WORKER_MODES}, got {mode!r}")
+        if self._running:
+            return
+        workers = max(1, workers)
+        self._executor = (
+            ProcessPoolExecutor(max_workers=workers, initializer=warm_worker)
+            if mode == "process"
+            else ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        )
+        self._mode = mode
+        self._running = True
+        self._recover_leases(time.time())
+        for i in range(workers):
+            thread = threading.Thread(
+                target=self._worker_loop, name=f"job-worker-{i}", daemon=True
+            )
+            thread.start()
+            self._workers.append(thread)
+        logger.info("Job workers started: %d %s worker(s)", workers, mode)
+
+    def stop(self, wait: bool = True, timeout: Optional[float] = None) -> None:
+        """Stop claiming jobs; with ``wait`` let running attempts finish first."""
+        if not self._running:
+            return
+        self._running = False
+        with self._wakeup:
+            self._wakeup.notify_all()
+        if wait:
+            for thread in self._workers:
+                thread.join(timeout)
+        self._workers = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        logger.info("Job workers stopped")
+
+    def _worker_loop(self) -> None:
+        while self._running:
+            try:
+                self._maintain()
+                job = self.store.claim()
+                if job is None:
+                    self._idle()
+                    continue
+                self._execute(job)
+            except Exception:
+                logger.exception("Job worker error")
+                self._idle()
+
+    def _idle(self) -> None:
+        wait = self.idle_interval
+        next_at = self.store.next_available_at()
+        if next_at is not None:
+            wait = max(0.0, min(wait, next_at - time.time()))
+        with self._wakeup:
+            if self._running:
+                self._wakeup.wait(wait)
+
+    def _maintain(self) -> None:
+        now = time.time()
+        if now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        self._recover_leases(now)
+        self.store.purge_expired(now)
+
+    def _recover_leases(self, now: float) -> None:
+        """Fail or re-queue jobs whose worker went away, settling their waiters."""
+        for job_id in self.store.fail_expired_leases(now, self.result_ttl):
+            self._record("failed", None, None)
+            logger.error("Job %s failed: worker lease expired on its last attempt", job_id)
+            self._resolve(job_id)
+        self.store.requeue_expired_leases(now)
+
+    def _execute(self, job: JobRecord) -> None:
+        wait_time = job.started_at - job.available_at
+        started = time.perf_counter()
+        try:
+            future = self._executor.submit(_run_job, job.name, job.args, job.kwargs)
+            try:
+                result = future.result(timeout=job.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                raise JobTimeoutError(
+                    f"Job timed out after {job.timeout}s", job.id, "failed"
+                )
+        except Exception as e:
+            self._handle_failure(job, e)
+        else:
+            self.store.complete(job.id, result, self.result_ttl)
+            self._record("completed", wait_time, time.perf_counter() - started)
+            job.status = "completed"
+            # Waiters see the result exactly as it was stored
+            job.result = json.loads(json.dumps(result, default=str))
+            self._resolve(job.id, job)
+
+    def _handle_failure(self, job: JobRecord, error: Exception) -> None:
+        message = f"{type(error).__name__}: {error}"
+        if isinstance(error, JobTimeoutError):
+            with self._stats_lock:
+                self._counters["timed_out"] += 1
+        if job.attempts <= job.max_retries:
+            delay = self.retry_backoff * (2 ** (job.attempts - 1))
+            self.store.retry(job.id, message, time.time() + delay)
+            with self._stats_lock:
+                self._counters["retried"] += 1
+            logger.warning(
+                "Job %s attempt %d failed, retrying in %.1fs: %s",
+                job.id, job.attempts, delay, message,
+            )
+            return
+        self.store.fail(job.id, message, self.result_ttl)
+        self._record("failed", None, None)
+        logger.error("Job %s failed after %d attempt(s): %s", job.id, job.attempts, message)
+        job.status = "failed"
+        job.error = message
+        self._resolve(job.id, job)
+
+    def _record(self, outcome: str, wait_time: Optional[float], run_time: Optional[float]) -> None:
+        with self._stats_lock:
+            self._counters[outcome] += 1
+            self._finished_at.append(time.time())
+            if wait_time is not None:
+                self._wait_times.append(max(0.0, wait_time))
+            if run_time is not None:
+                self._run_times.append(run_time)
+
+    # Metrics --------------------------------------------------------------
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, latency percentiles and throughput."""
+        depth = self.store.counts()
+        now = time.time()
+        with self._stats_lock:
+            counters = dict(self._counters)
+            wait_times = list(self._wait_times)
+            run_times = list(self._run_times)
+            recent = sum(1 for t in self._finished_at if now - t <= THROUGHPUT_WINDOW)
+        return {
+            "depth": depth,
+            **counters,
+            "workers": len(self._workers),
+            "mode": self._mode,
+            "running": self._running,
+            "wait_seconds_p50": _percentile(wait_times, 50),
+            "wait_seconds_p95": _percentile(wait_times, 95),
+            "run_seconds_p50": _percentile(run_times, 50),
+            "run_seconds_p95": _percentile(run_times, 95),
+            "throughput_per_second": recent / THROUGHPUT_WINDOW,
+        }
+
+
+_default_queue: Optional[JobQueue] = None
+_default_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide job queue on the application database (workers not started)."""
+    global _default_queue
+    if _default_queue is None:
+        with _default_queue_lock:
+            if _default_queue is None:
+                _default_queue = JobQueue()
+    return _default_queue
@@ -9,13 +9,62 @@ from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple, List, Any
 from contextlib import contextmanager
 from dataclasses import dataclass
+from functools import partial
 import logging
 
 from src.security.api_key_encryption import APIKeyEncryption
+from src.security.audit_writer import AuditWriter
 from src.services.api_key_test_service import APIKeyTestService
 
 logger = logging.getLogger(__name__)
 
+_AUDIT_INSERT = """
+    INSERT INTO audit_logs
+    (operation, key_name, user_id, timestamp, success, error_message, ip_address, user_agent)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_audit_writers: Dict[str, AuditWriter] = {}
+_audit_writers_lock = threading.Lock()
+
+
+def _write_audit_rows(db_path: str, rows: List[Tuple]) -> None:
+    """Insert a batch of key vault audit rows in one transaction."""
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS audit_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    operation TEXT NOT NULL,
+                    key_name TEXT,
+                    user_id INTEGER,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    success BOOLEAN,
+                    error_message TEXT,
+                    ip_address TEXT,
+                    user_agent TEXT
+                )
+                """
+            )
+            conn.executemany(_AUDIT_INSERT, rows)
+    finally:
+        conn.close()
+
+
+def get_audit_writer(db_path: str) -> AuditWriter:
+    """Background audit writer shared by every vault session on ``db_path``."""
+    with _audit_writers_lock:
+        writer = _audit_writers.get(db_path)
+        if writer is None:
+            writer = AuditWriter(
+                partial(_write_audit_rows, db_path), name="key_vault", db_path=db_path
+            )
+            writer.start()
+            _audit_writers[db_path] = writer
+        return writer
+
 
 @dataclass
 class APIKeyInfo:
@@ -98,6 +147,7 @@ class KeyVaultService:
         self.db_path = os.getenv("DATABASE_URL", "cash_flow_app.db").replace(
             "sqlite:///", ""
         )
+        self._audit_writer = get_audit_writer(self.db_path)
 
         logger.info(
             f"KeyVaultService initialized for session {session_id[:8]}... user {user_id}"
@@ -128,27 +178,20 @@ class KeyVaultService:
             user_agent=user_agent,
         )
 
+        # Queued for the shared writer; batches commit in the background
         try:
-            with self._get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    INSERT INTO audit_logs 
-                    (operation, key_name, user_id, timestamp, success, error_message, ip_address, user_agent)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                    (
-                        audit_entry.operation,
-                        audit_entry.key_name,
-                        audit_entry.user_id,
-                        audit_entry.timestamp.isoformat(),
-                        audit_entry.success,
-                        audit_entry.error_message,
-                        audit_entry.ip_address,
-                        audit_entry.user_agent,
-                    ),
+            self._audit_writer.submit(
+                (
+                    audit_entry.operation,
+                    audit_entry.key_name,
+                    audit_entry.user_id,
+                    audit_entry.timestamp.isoformat(),
+                    audit_entry.success,
+                    audit_entry.error_message,
+                    audit_entry.ip_address,
+                    audit_entry.user_agent,
                 )
-                conn.commit()
+            )
         except Exception as e:
             logger.error(f"Failed to log audit event: {e}")
 
@@ -623,6 +666,7 @@ class KeyVaultService:
     def get_audit_logs(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get audit logs for this session/user"""
         try:
+            self._audit_writer.flush()
             with self._get_db_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
@@ -0,0 +1,453 @@
+"""
+Month-end running-balance checkpoints for ``cash_ledger``.
+
+``ledger_checkpoints`` stores, per bank account and month, the ledger totals
+from the first entry up to the end of that month (net balance, inflows,
+outflows and entry count). A balance as of any date is the account's last
+checkpoint before that date's month plus the entries after it, so reads sum
+at most a month or so of rows instead of the account's whole history.
+
+Checkpoints only exist for complete months (up to ``horizon``). Triggers on
+``cash_ledger`` delete an account's checkpoints from the month of any
+inserted, updated or deleted row onwards and mark the account dirty when
+that month is already checkpointed, which keeps every remaining checkpoint
+exact. ``refresh`` recomputes dirty accounts from their last surviving
+checkpoint and adds checkpoints for newly completed months; ``rebuild``
+starts from scratch and ``check`` compares the stored checkpoints against
+sums recomputed from the raw rows.
+
+Entries without a ``bank_account_id`` are tracked under the account ``''``.
+Rows with a NULL ``entry_date`` are never checkpointed and are only counted
+in balances without an as-of date.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..repositories.base import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+CHECK_TOLERANCE = 1e-6
+
+_TRIGGERS = (
+    "trg_ledger_checkpoint_insert",
+    "trg_ledger_checkpoint_update",
+    "trg_ledger_checkpoint_delete",
+)
+
+# Aggregates over ledger rows aliased ``l``
+_TOTALS = """
+    TOTAL(l.amount) AS net,
+    TOTAL(l.amount) FILTER (WHERE l.amount >= 0) AS inflow,
+    TOTAL(-l.amount) FILTER (WHERE l.amount < 0) AS outflow,
+    COUNT(*) AS entries
+"""
+
+
+@dataclass(frozen=True)
+class LedgerTotals:
+    """Ledger totals of one account up to some date."""
+
+    net: float = 0.0
+    inflow: float = 0.0
+    outflow: float = 0.0
+    entries: int = 0
+
+    def __add__(self, other: "LedgerTotals") -> "LedgerTotals":
+        return LedgerTotals(
+            self.net + other.net,
+            self.inflow + other.inflow,
+            self.outflow + other.outflow,
+            self.entries + other.entries,
+        )
+
+    def __sub__(self, other: "LedgerTotals") -> "LedgerTotals":
+        return LedgerTotals(
+            self.net - other.net,
+            self.inflow - other.inflow,
+            self.outflow - other.outflow,
+            self.entries - other.entries,
+        )
+
+
+def _account_key(ref: str) -> str:
+    return f"COALESCE({ref}.bank_account_id, '')"
+
+
+def _month(d: date) -> str:
+    return d.isoformat()[:7]
+
+
+def _next_month_start(month: str) -> str:
+    first = date.fromisoformat(f"{month}-01")
+    return (first.replace(day=28) + timedelta(days=4)).replace(day=1).isoformat()
+
+
+def default_horizon(today: Optional[date] = None) -> str:
+    """The last complete month, the latest month that gets a checkpoint."""
+    today = today or date.today()
+    return _month(today.replace(day=1) - timedelta(days=1))
+
+
+class LedgerCheckpoints:
+    """Installs, refreshes, reads and verifies the ledger checkpoints."""
+
+    def __init__(self, db_connection: DatabaseConnection):
+        self.db = db_connection
+
+    # ------------------------------------------------------------------
+    # Schema and triggers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _invalidate_sql(ref: str) -> str:
+        """Trigger statements for one changed row (``ref`` = NEW/OLD)."""
+        account = _account_key(ref)
+        month = f"SUBSTR({ref}.entry_date, 1, 7)"
+        return f"""
+            INSERT INTO ledger_checkpoint_accounts (account, dirty)
+            VALUES (
+                {account},
+                COALESCE({month} <= (SELECT horizon FROM ledger_checkpoint_state WHERE id = 1), 0)
+            )
+            ON CONFLICT(account) DO UPDATE SET dirty = dirty OR excluded.dirty;
+            DELETE FROM ledger_checkpoints WHERE account = {account} AND month >= {month};
+        """
+
+    def install(self) -> bool:
+        """Create the checkpoint tables and (re)create the triggers.
+
+        Returns False (and installs nothing) when ``cash_ledger`` has no
+        ``bank_account_id`` column. Checkpoints are built by ``refresh``.
+        """
+        with self.db.get_connection() as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            columns = {row[1] for row in cur.execute("PRAGMA table_info(cash_ledger)").fetchall()}
+            had_triggers = cur.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (?, ?, ?)",
+                _TRIGGERS,
+            ).fetchone()[0] == len(_TRIGGERS)
+            for trigger in _TRIGGERS:
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            if not {"bank_account_id", "entry_date", "amount"} <= columns:
+                return False
+
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ledger_checkpoints (
+                    account TEXT NOT NULL,
+                    month TEXT NOT NULL,
+                    balance REAL NOT NULL,
+                    inflow REAL NOT NULL,
+                    outflow REAL NOT NULL,
+                    entries INTEGER NOT NULL,
+                    PRIMARY KEY (account, month)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ledger_checkpoint_accounts (
+                    account TEXT PRIMARY KEY,
+                    dirty INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ledger_checkpoint_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    horizon TEXT,
+                    refreshed_at TEXT
+                )
+                """
+            )
+            conn.execute("INSERT OR IGNORE INTO ledger_checkpoint_state (id) VALUES (1)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cash_ledger_account_date "
+                "ON cash_ledger(bank_account_id, entry_date, amount)"
+            )
+
+            insert_trg, update_trg, delete_trg = _TRIGGERS
+            conn.execute(
+                f"CREATE TRIGGER {insert_trg} AFTER INSERT ON cash_ledger BEGIN "
+                f"{self._invalidate_sql('NEW')} END"
+            )
+            conn.execute(
+                f"CREATE TRIGGER {update_trg} "
+                "AFTER UPDATE OF entry_date, amount, bank_account_id ON cash_ledger BEGIN "
+                f"{self._invalidate_sql('OLD')}{self._invalidate_sql('NEW')} END"
+            )
+            conn.execute(
+                f"CREATE TRIGGER {delete_trg} AFTER DELETE ON cash_ledger BEGIN "
+                f"{self._invalidate_sql('OLD')} END"
+            )
+            if not had_triggers:
+                # Writes made while the triggers were missing are not reflected
+                # in existing checkpoints; have the next refresh redo everything.
+                conn.execute(
+                    f"""
+                    INSERT INTO ledger_checkpoint_accounts (account, dirty)
+                    SELECT DISTINCT {_account_key('l')}, 1 FROM cash_ledger l WHERE 1
+                    ON CONFLICT(account) DO UPDATE SET dirty = 1
+                    """
+                )
+                conn.execute("DELETE FROM ledger_checkpoints")
+        return True
+
+    def ready(self) -> bool:
+        """True when the triggers are in place and checkpoints can be trusted."""
+        try:
+            with self.db.get_connection(readonly=True) as conn:
+                row = conn.execute(
+                    "SELECT COUNT(*) AS c FROM sqlite_master WHERE type = 'trigger' AND name IN (?, ?, ?)",
+                    _TRIGGERS,
+                ).fetchone()
+        except Exception:
+            return False
+        count = row["c"] if isinstance(row, dict) else row[0]
+        return count == len(_TRIGGERS)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def refresh(self, horizon: Optional[str] = None) -> Dict[str, int]:
+        """Bring checkpoints up to ``horizon`` (default: the last complete month).
+
+        Only dirty accounts are recomputed, from their last valid
+        checkpoint, unless the horizon moved, in which case every account
+        gets its new months. Returns the checkpoints written per account.
+        """
+        if not self.ready():
+            return {}
+        horizon = horizon or default_horizon()
+        horizon_end = _next_month_start(horizon)
+        written: Dict[str, int] = {}
+        with self.db.get_connection() as conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            state = conn.execute(
+                "SELECT horizon FROM ledger_checkpoint_state WHERE id = 1"
+            ).fetchone()
+            if state["horizon"] != horizon:
+                # Checkpoints past a lowered horizon would never be invalidated
+                conn.execute("DELETE FROM ledger_checkpoints WHERE month > ?", (horizon,))
+                accounts = conn.execute("SELECT account FROM ledger_checkpoint_accounts").fetchall()
+            else:
+                accounts = conn.execute(
+                    "SELECT account FROM ledger_checkpoint_accounts WHERE dirty"
+                ).fetchall()
+
+            for row in accounts:
+                account = row["account"]
+                written[account] = self._extend(conn, account, horizon_end)
+            conn.execute("UPDATE ledger_checkpoint_accounts SET dirty = 0 WHERE dirty")
+            conn.execute(
+                "UPDATE ledger_checkpoint_state SET horizon = ?, refreshed_at = ? WHERE id = 1",
+                (horizon, datetime.now().isoformat()),
+            )
+        if any(written.values()):
+            logger.info(f"Refreshed ledger checkpoints: {written}")
+        return written
+
+    @staticmethod
+    def _extend(conn, account: str, horizon_end: str) -> int:
+        """Append checkpoints for ``account`` after its last one, up to ``horizon_end``."""
+        last = conn.execute(
+            """
+            SELECT month, balance, inflow, outflow, entries
+              FROM ledger_checkpoints
+             WHERE account = ?
+          ORDER BY month DESC
+             LIMIT 1
+            """,
+            (account,),
+        ).fetchone()
+        start = _next_month_start(last["month"]) if last else ""
+        running = (
+            LedgerTotals(last["balance"], last["inflow"], last["outflow"], last["entries"])
+            if last
+            else LedgerTotals()
+        )
+        cur = conn.cursor()
+        cur.row_factory = None
+        months = cur.execute(
+            f"""
+            SELECT SUBSTR(l.entry_date, 1, 7) AS month, {_TOTALS}
+              FROM cash_ledger l
+             WHERE l.bank_account_id IS NULLIF(?, '')
+               AND l.entry_date >= ? AND l.entry_date < ?
+          GROUP BY 1
+          ORDER BY 1
+            """,
+            (account, start, horizon_end),
+        ).fetchall()
+        rows: List[Tuple[Any, ...]] = []
+        for month, net, inflow, outflow, entries in months:
+            running = running + LedgerTotals(net, inflow or 0.0, outflow or 0.0, entries)
+            rows.append(
+                (account, month, running.net, running.inflow, running.outflow, running.entries)
+            )
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO ledger_checkpoints
+                (account, month, balance, inflow, outflow, entries)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+        return len(rows)
+
+    def rebuild(self, horizon: Optional[str] = None) -> Dict[str, int]:
+        """Drop every checkpoint and recompute them from the raw ledger."""
+        if not self.install():
+            return {}
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM ledger_checkpoints")
+            conn.execute("UPDATE ledger_checkpoint_state SET horizon = NULL WHERE id = 1")
+        return self.refresh(horizon)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def totals_as_of(self, as_of_date: Optional[date] = None) -> Dict[str, LedgerTotals]:
+        """Ledger totals per account for entries dated on or before ``as_of_date``.
+
+        Without a date every entry counts. Falls back to summing the raw
+        ledger when the checkpoints are not installed.
+        """
+        as_of = as_of_date.isoformat() if as_of_date else None
+        if self.ready():
+            query, params = self._checkpoint_query(as_of)
+        else:
+            query = f"""
+                SELECT {_account_key('l')} AS account, {_TOTALS}
+                  FROM cash_ledger l
+                 {"WHERE l.entry_date <= ?" if as_of else ""}
+              GROUP BY 1
+            """
+            params = [as_of] if as_of else []
+
+        with self.db.get_connection(readonly=True) as conn:
+            cur = conn.cursor()
+            cur.row_factory = None
+            rows = cur.execute(query, params).fetchall()
+        return {
+            account: LedgerTotals(
+                float(net or 0.0), float(inflow or 0.0), float(outflow or 0.0), int(entries or 0)
+            )
+            for account, net, inflow, outflow, entries in rows
+        }
+
+    @staticmethod
+    def _checkpoint_query(as_of: Optional[str]) -> Tuple[str, List[Any]]:
+        """Last checkpoint before ``as_of``'s month plus the rows after it."""
+        params: List[Any] = [as_of[:7] if as_of else "9999-12"]
+        upper = ""
+        if as_of:
+            upper = "AND l.entry_date <= ?"
+            params.append(as_of)
+        undated = ""
+        if not as_of:
+            undated = f"""
+                UNION ALL
+                SELECT cp.account, {_TOTALS}
+                  FROM cp JOIN cash_ledger l
+                    ON l.bank_account_id IS NULLIF(cp.account, '') AND l.entry_date IS NULL
+              GROUP BY cp.account
+            """
+        query = f"""
+            WITH cp AS (
+                SELECT a.account,
+                       (SELECT MAX(c.month) FROM ledger_checkpoints c
+                         WHERE c.account = a.account AND c.month < ?) AS month
+                  FROM ledger_checkpoint_accounts a
+            )
+            SELECT account, TOTAL(net), TOTAL(inflow), TOTAL(outflow), SUM(entries)
+              FROM (
+                SELECT c.account, c.balance AS net, c.inflow, c.outflow, c.entries
+                  FROM cp JOIN ledger_checkpoints c
+                    ON c.account = cp.account AND c.month = cp.month
+                UNION ALL
+                SELECT cp.account, {_TOTALS}
+                  FROM cp JOIN cash_ledger l
+                    ON l.bank_account_id IS NULLIF(cp.account, '')
+                   AND l.entry_date >= COALESCE(DATE(cp.month || '-01', '+1 month'), '')
+                   {upper}
+              GROUP BY cp.account
+                {undated}
+              )
+          GROUP BY account
+        """
+        return query, params
+
+    def balance_as_of(self, as_of_date: Optional[date] = None) -> float:
+        """Net ledger balance across all accounts."""
+        return sum(t.net for t in self.totals_as_of(as_of_date).values())
+
+    def range_totals(self, start_date: date, end_date: date) -> LedgerTotals:
+        """Totals across all accounts for entries in [start_date, end_date]."""
+        before = self.totals_as_of(start_date - timedelta(days=1))
+        through = self.totals_as_of(end_date)
+        total = LedgerTotals()
+        for totals in through.values():
+            total = total + totals
+        for totals in before.values():
+            total = total - totals
+        return total
+
+    # ------------------------------------------------------------------
+    # Verification
+    # ------------------------------------------------------------------
+    def check(self, tolerance: float = CHECK_TOLERANCE) -> Dict[str, Any]:
+        """Compare every stored checkpoint with totals recomputed from the raw rows."""
+        with self.db.get_connection(readonly=True) as conn:
+            stored = conn.execute(
+                "SELECT account, month, balance, inflow, outflow, entries FROM ledger_checkpoints"
+            ).fetchall()
+            cur = conn.cursor()
+            cur.row_factory = None
+            monthly = cur.execute(
+                f"""
+                SELECT {_account_key('l')} AS account, SUBSTR(l.entry_date, 1, 7) AS month, {_TOTALS}
+                  FROM cash_ledger l
+                 WHERE l.entry_date IS NOT NULL
+              GROUP BY 1, 2
+              ORDER BY 1, 2
+                """
+            ).fetchall()
+
+        by_account: Dict[str, List[Tuple[str, LedgerTotals]]] = {}
+        for account, month, net, inflow, outflow, entries in monthly:
+            by_account.setdefault(account, []).append(
+                (month, LedgerTotals(net, inflow or 0.0, outflow or 0.0, entries))
+            )
+
+        def expected(account: str, month: str) -> LedgerTotals:
+            running = LedgerTotals()
+            for m, totals in by_account.get(account, ()):
+                if m > month:
+                    break
+                running = running + totals
+            return running
+
+        mismatches: List[Dict[str, Any]] = []
+        for row in stored:
+            want = expected(row["account"], row["month"])
+            got = LedgerTotals(row["balance"], row["inflow"], row["outflow"], row["entries"])
+            for measure in ("net", "inflow", "outflow", "entries"):
+                e, a = getattr(want, measure), getattr(got, measure)
+                if abs(e - a) > tolerance * max(1.0, abs(e)):
+                    mismatches.append(
+                        {
+                            "account": row["account"],
+                            "month": row["month"],
+                            "measure": measure,
+                            "expected": e,
+                            "actual": a,
+                        }
+                    )
+        return {"ok": not mismatches, "checked": len(stored), "mismatches": mismatches}
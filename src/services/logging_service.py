@@ -3,11 +3,16 @@ Logging service for application-wide logging.
 """
 
 import logging
-import logging.handlers
 import os
 from datetime import datetime
 from typing import Optional
 from ..config.environment import EnvironmentManager
+from ..utils.log_pipeline import (
+    BatchRotatingFileHandler,
+    BatchStreamHandler,
+    LogPipeline,
+    PipelineHandler,
+)
 
 
 class LoggingService:
@@ -20,7 +25,11 @@ class LoggingService:
         self._setup_logging()
 
     def _setup_logging(self) -> None:
-        """Setup logging configuration."""
+        """Setup logging configuration.
+
+        Records go through a LogPipeline: callers only queue them, and the
+        pipeline's listener thread formats and writes them in batches.
+        """
         # Create logs directory if it doesn't exist
         log_dir = os.path.dirname(self.log_file)
         if log_dir and not os.path.exists(log_dir):
@@ -30,7 +39,10 @@ class LoggingService:
         self.logger = logging.getLogger("cashflow_app")
         self.logger.setLevel(getattr(logging, self.log_level))
 
-        # Clear existing handlers
+        # Clear existing handlers, stopping the pipeline of an earlier setup
+        for handler in self.logger.handlers:
+            if isinstance(handler, PipelineHandler):
+                handler.pipeline.close()
         self.logger.handlers.clear()
 
         # Create formatters
@@ -42,21 +54,26 @@ class LoggingService:
             "%(asctime)s - %(levelname)s - %(message)s"
         )
 
+        handlers = []
+
         # File handler with rotation
         if self.log_file:
-            file_handler = logging.handlers.RotatingFileHandler(
+            file_handler = BatchRotatingFileHandler(
                 self.log_file, maxBytes=10 * 1024 * 1024, backupCount=5  # 10MB
             )
             file_handler.setLevel(logging.DEBUG)
             file_handler.setFormatter(detailed_formatter)
-            self.logger.addHandler(file_handler)
+            handlers.append(file_handler)
 
         # Console handler
         if self.env_manager.is_development():
-            console_handler = logging.StreamHandler()
+            console_handler = BatchStreamHandler()
             console_handler.setLevel(getattr(logging, self.log_level))
             console_handler.setFormatter(simple_formatter)
-            self.logger.addHandler(console_handler)
+            handlers.append(console_handler)
+
+        self.pipeline = LogPipeline(handlers, name="cashflow_app").start()
+        self.pipeline.attach(self.logger)
 
     def debug(self, message: str, **kwargs) -> None:
         """Log debug message."""
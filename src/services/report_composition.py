@@ -0,0 +1,158 @@
+"""
+Shared data for financial reports over one date range.
+
+P&L, cash flow, balance sheet and the executive summary all read
+``sales_orders`` and ``costs`` for the same period. ``load_report_frames``
+runs one consolidated query for a range and returns ``ReportFrames``, which
+every report can be built from:
+
+* per-day revenue by currency, and per-day costs by category and currency,
+  inside the range;
+* optionally, revenue and cost totals before the range, so the closing cash
+  balance for the balance sheet needs no further query.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Optional, Sequence
+
+import pandas as pd
+
+REVENUE_COLUMNS = ["date", "revenue", "currency", "transaction_count"]
+COST_COLUMNS = ["date", "costs", "category", "currency"]
+
+_REPORT_FRAMES_QUERY = """
+    SELECT 'revenue' AS kind, DATE(order_date) AS date, currency,
+           NULL AS category, SUM(amount) AS amount, COUNT(*) AS n
+    FROM sales_orders
+    WHERE order_date BETWEEN ? AND ?
+    GROUP BY DATE(order_date), currency
+
+    UNION ALL
+
+    SELECT 'cost' AS kind, DATE(cost_date) AS date, currency,
+           category, SUM(amount) AS amount, COUNT(*) AS n
+    FROM costs
+    WHERE cost_date BETWEEN ? AND ?
+    GROUP BY DATE(cost_date), category, currency
+"""
+
+# Appended when the closing balance is needed
+_PRIOR_TOTALS_QUERY = """
+    UNION ALL
+
+    SELECT 'prior_revenue', NULL, NULL, NULL, COALESCE(SUM(amount), 0), COUNT(*)
+    FROM sales_orders
+    WHERE order_date < ?
+
+    UNION ALL
+
+    SELECT 'prior_costs', NULL, NULL, NULL, COALESCE(SUM(amount), 0), COUNT(*)
+    FROM costs
+    WHERE cost_date < ?
+"""
+
+
+@dataclass
+class ReportFrames:
+    """Revenue and cost frames for one date range, shared across reports."""
+
+    start_date: date
+    end_date: date
+    revenue: pd.DataFrame
+    costs: pd.DataFrame
+    prior_revenue: Optional[float] = None
+    prior_costs: Optional[float] = None
+
+    @property
+    def total_revenue(self) -> float:
+        return float(self.revenue["revenue"].sum()) if not self.revenue.empty else 0.0
+
+    @property
+    def total_costs(self) -> float:
+        return float(self.costs["costs"].sum()) if not self.costs.empty else 0.0
+
+    @property
+    def has_prior_totals(self) -> bool:
+        return self.prior_revenue is not None and self.prior_costs is not None
+
+    @property
+    def closing_cash_balance(self) -> float:
+        """Revenue minus costs up to and including ``end_date``."""
+        if not self.has_prior_totals:
+            raise ValueError("Frames were loaded without prior totals")
+        return (self.prior_revenue + self.total_revenue) - (
+            self.prior_costs + self.total_costs
+        )
+
+    def daily_cash_flow(self) -> pd.DataFrame:
+        """Net operating cash flow per day with a running total."""
+        flows = pd.concat(
+            [
+                self.revenue[["date", "revenue"]].rename(columns={"revenue": "amount"}),
+                self.costs[["date", "costs"]]
+                .rename(columns={"costs": "amount"})
+                .assign(amount=lambda f: -f["amount"]),
+            ],
+            ignore_index=True,
+        )
+        daily = flows.groupby("date")["amount"].sum().reset_index()
+        daily["cumulative"] = daily["amount"].cumsum()
+        return daily
+
+
+def read_frame(conn, query: str, params: Sequence[Any] = ()) -> pd.DataFrame:
+    """Run a query into a DataFrame on a plain-tuple cursor.
+
+    ``pd.read_sql_query`` cannot read the dict rows of pooled connections.
+    """
+    cur = conn.cursor()
+    cur.row_factory = None
+    cur.execute(query, list(params))
+    columns = [col[0] for col in cur.description]
+    return pd.DataFrame.from_records(cur.fetchall(), columns=columns)
+
+
+def load_report_frames(
+    conn, start_date: date, end_date: date, with_prior_totals: bool = False
+) -> ReportFrames:
+    """Load everything the range's reports need in a single query.
+
+    ``with_prior_totals`` also sums all revenue and costs before the range,
+    which the balance sheet needs.
+    """
+    start, end = start_date.isoformat(), end_date.isoformat()
+    query, params = _REPORT_FRAMES_QUERY, [start, end, start, end]
+    if with_prior_totals:
+        query += _PRIOR_TOTALS_QUERY
+        params += [start, start]
+    rows = read_frame(conn, query + "ORDER BY kind, date", params)
+
+    revenue = rows[rows["kind"] == "revenue"]
+    revenue = pd.DataFrame(
+        {
+            "date": revenue["date"],
+            "revenue": revenue["amount"],
+            "currency": revenue["currency"],
+            "transaction_count": revenue["n"],
+        },
+        columns=REVENUE_COLUMNS,
+    ).reset_index(drop=True)
+
+    costs = rows[rows["kind"] == "cost"]
+    costs = pd.DataFrame(
+        {
+            "date": costs["date"],
+            "costs": costs["amount"],
+            "category": costs["category"],
+            "currency": costs["currency"],
+        },
+        columns=COST_COLUMNS,
+    ).reset_index(drop=True)
+
+    frames = ReportFrames(start_date, end_date, revenue, costs)
+    if with_prior_totals:
+        prior = dict(zip(rows["kind"], rows["amount"]))
+        frames.prior_revenue = float(prior.get("prior_revenue") or 0.0)
+        frames.prior_costs = float(prior.get("prior_costs") or 0.0)
+    return frames
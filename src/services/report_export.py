@@ -0,0 +1,355 @@
+"""
+Streaming export of report data to CSV, Excel and Parquet.
+
+Exports never hold the whole result in memory. Rows are read from SQLite in
+``fetchmany`` chunks and handed to a writer one chunk at a time:
+
+* CSV is encoded chunk by chunk and yielded as bytes.
+* Excel goes through xlsxwriter's ``constant_memory`` mode into a temporary
+  file, which is then streamed back in blocks.
+* Parquet writes one row group per chunk with ``pyarrow`` (optional
+  dependency) into a temporary file, streamed back the same way.
+
+``ReportExporter`` knows the exportable tables and their date columns;
+``export_bytes`` and ``frame_chunks`` serve DataFrames the UI already holds.
+"""
+
+import csv
+import io
+import logging
+import queue
+import tempfile
+import threading
+from datetime import date
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+from .reporting_service import ReportFormat
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 10_000
+READ_BLOCK_SIZE = 1024 * 1024
+# write_export keeps files up to this size in memory, larger ones on disk
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+EXCEL_MAX_ROWS = 1_048_576
+
+MEDIA_TYPES = {
+    ReportFormat.CSV: "text/csv",
+    ReportFormat.EXCEL: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ReportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+FILE_EXTENSIONS = {
+    ReportFormat.CSV: "csv",
+    ReportFormat.EXCEL: "xlsx",
+    ReportFormat.PARQUET: "parquet",
+}
+
+# (table, date column, ordering) for each exportable dataset
+EXPORT_DATASETS: Dict[str, Tuple[str, str, str]] = {
+    "cash_ledger": ("cash_ledger", "entry_date", "entry_date, id"),
+    "sales_orders": ("sales_orders", "order_date", "order_date, id"),
+    "costs": ("costs", "cost_date", "cost_date, id"),
+}
+
+Chunk = Tuple[List[str], List[Tuple[Any, ...]]]
+
+# Blocks an export thread may run ahead of its consumer
+THREAD_MAX_PENDING = 4
+# Longest an export thread blocks on a full hand-off queue before
+# re-checking whether the consumer went away
+_HANDOFF_POLL_INTERVAL = 0.1
+_DONE = object()
+
+
+class ExportError(Exception):
+    """An export was requested in an unsupported format or for an unknown dataset."""
+
+
+def query_chunks(
+    db_connection, query: str, params: Sequence[Any] = (), chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Chunk]:
+    """Yield ``(columns, rows)`` chunks of a query without loading it all.
+
+    The pooled connection is held until the iterator is exhausted or closed,
+    so the iterator must be consumed on a single thread: the pool tracks
+    checkouts per thread. Use ``iterate_in_thread`` to hand it to consumers
+    that may call ``next()`` from different threads.
+    """
+    with db_connection.get_connection(readonly=True) as conn:
+        cur = conn.cursor()
+        cur.row_factory = None  # plain tuples; no per-row dicts
+        cur.execute(query, list(params))
+        columns = [col[0] for col in cur.description]
+        first = True
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows and not first:
+                break
+            first = False
+            yield columns, rows
+            if len(rows) < chunk_size:
+                break
+
+
+def frame_chunks(frame, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Chunk]:
+    """Yield ``(columns, rows)`` chunks of a DataFrame."""
+    columns = [str(c) for c in frame.columns]
+    if frame.empty:
+        yield columns, []
+        return
+    for start in range(0, len(frame), chunk_size):
+        part = frame.iloc[start : start + chunk_size]
+        yield columns, list(part.itertuples(index=False, name=None))
+
+
+def stream_csv(chunks: Iterable[Chunk]) -> Iterator[bytes]:
+    """Encode chunks as CSV, one bytes block per chunk."""
+    header_written = False
+    for columns, rows in chunks:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def write_excel(chunks: Iterable[Chunk], target: IO[bytes], sheet_name: str = "Data") -> None:
+    """Write chunks to an .xlsx file using xlsxwriter's constant-memory mode.
+
+    Rows past Excel's sheet limit continue on further sheets.
+    """
+    if xlsxwriter is None:
+        raise ExportError("Excel export requires xlsxwriter")
+    workbook = xlsxwriter.Workbook(target, {"constant_memory": True, "in_memory": False})
+    sheet, sheet_count, row_index, columns = None, 0, 0, None
+    try:
+        for chunk_columns, rows in chunks:
+            columns = chunk_columns
+            if sheet is None:
+                sheet, sheet_count = workbook.add_worksheet(sheet_name), 1
+                sheet.write_row(0, 0, columns)
+                row_index = 1
+            for row in rows:
+                if row_index >= EXCEL_MAX_ROWS:
+                    sheet_count += 1
+                    sheet = workbook.add_worksheet(f"{sheet_name} {sheet_count}")
+                    sheet.write_row(0, 0, columns)
+                    row_index = 1
+                sheet.write_row(row_index, 0, row)
+                row_index += 1
+        if sheet is None:
+            workbook.add_worksheet(sheet_name)
+    finally:
+        workbook.close()
+
+
+def _arrow_type(values: Iterable[Any]):
+    kinds = {type(v) for v in values if v is not None}
+    if not kinds:
+        return pa.string()
+    if kinds <= {bool}:
+        return pa.bool_()
+    if kinds <= {int}:
+        return pa.int64()
+    if kinds <= {int, float}:
+        return pa.float64()
+    if kinds <= {bytes}:
+        return pa.binary()
+    return pa.string()
+
+
+def _arrow_column(values: Sequence[Any], arrow_type):
+    try:
+        return pa.array(values, type=arrow_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        if arrow_type == pa.float64():
+            return pa.array([None if v is None else float(v) for v in values], type=arrow_type)
+        # SQLite columns are loosely typed; fall back to text
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+
+def write_parquet(chunks: Iterable[Chunk], target: IO[bytes]) -> None:
+    """Write chunks to Parquet, one row group per chunk.
+
+    Column types are inferred from the first chunk; columns that hold only
+    NULLs there are written as strings.
+    """
+    if pq is None:
+        raise ExportError("Parquet export requires pyarrow")
+    writer = None
+    schema = None
+    try:
+        for columns, rows in chunks:
+            values = list(zip(*rows)) if rows else [() for _ in columns]
+            if schema is None:
+                schema = pa.schema(
+                    [pa.field(name, _arrow_type(col)) for name, col in zip(columns, values)]
+                )
+                writer = pq.ParquetWriter(target, schema, compression="snappy")
+            if not rows:
+                continue
+            arrays = [
+                _arrow_column(list(col), field.type) for col, field in zip(values, schema)
+            ]
+            table = pa.Table.from_arrays(arrays, names=columns)
+            writer.write_table(table.cast(schema))
+        if writer is None:
+            writer = pq.ParquetWriter(target, pa.schema([]), compression="snappy")
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _stream_file(write, chunks: Iterable[Chunk]) -> Iterator[bytes]:
+    """Run a file writer into a temporary file, then yield it in blocks."""
+    with tempfile.TemporaryFile() as spool:
+        write(chunks, spool)
+        spool.seek(0)
+        while True:
+            block = spool.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            yield block
+
+
+def stream_export(chunks: Iterable[Chunk], format_type: str) -> Iterator[bytes]:
+    """Encode chunks in ``format_type`` as an iterator of bytes blocks."""
+    if format_type == ReportFormat.CSV:
+        return stream_csv(chunks)
+    if format_type == ReportFormat.EXCEL:
+        return _stream_file(write_excel, chunks)
+    if format_type == ReportFormat.PARQUET:
+        return _stream_file(write_parquet, chunks)
+    raise ExportError(f"Unsupported export format: {format_type}")
+
+
+def write_export(chunks: Iterable[Chunk], format_type: str) -> IO[bytes]:
+    """Write chunks to a spooled temporary file (rewound); ``export_bytes`` reads it back."""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    for block in stream_export(chunks, format_type):
+        spool.write(block)
+    spool.seek(0)
+    return spool
+
+
+def iterate_in_thread(
+    source: Iterator[Any], max_pending: int = THREAD_MAX_PENDING, name: str = "report-export"
+) -> Iterator[Any]:
+    """Run ``source`` to completion on one dedicated thread.
+
+    Items are handed over through a bounded queue, so the consumer may call
+    ``next()`` from any thread (as ``StreamingResponse`` does through the
+    threadpool) while pooled connections held by ``source`` are acquired and
+    released on the same thread. Closing the returned iterator stops and
+    closes ``source`` on its own thread.
+    """
+    handoff: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                handoff.put(item, timeout=_HANDOFF_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run() -> None:
+        try:
+            for item in source:
+                if not put((item, None)):
+                    break
+        except BaseException as e:
+            put((_DONE, e))
+        else:
+            put((_DONE, None))
+        finally:
+            close = getattr(source, "close", None)
+            if close is not None:
+                close()
+
+    worker = threading.Thread(target=run, name=name, daemon=True)
+    worker.start()
+    try:
+        while True:
+            item, error = handoff.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+
+
+def export_bytes(chunks: Iterable[Chunk], format_type: str) -> bytes:
+    """Encode chunks in ``format_type`` as one bytes object.
+
+    For widgets such as ``st.download_button``, which only accept str, bytes
+    or a few io types, not temporary files.
+    """
+    with write_export(chunks, format_type) as spool:
+        return spool.read()
+
+
+class ReportExporter:
+    """Chunked exports of the ledger, sales and cost tables."""
+
+    def __init__(self, db_connection, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.db = db_connection
+        self.chunk_size = chunk_size
+
+    def chunks(
+        self,
+        dataset: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> Iterator[Chunk]:
+        if dataset not in EXPORT_DATASETS:
+            raise ExportError(f"Unknown export dataset: {dataset}")
+        table, date_column, order_by = EXPORT_DATASETS[dataset]
+        clauses, params = [], []
+        if start_date is not None:
+            clauses.append(f"{date_column} >= ?")
+            params.append(start_date.isoformat())
+        if end_date is not None:
+            clauses.append(f"{date_column} <= ?")
+            params.append(end_date.isoformat())
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT * FROM {table}{where} ORDER BY {order_by}"
+        return query_chunks(self.db, query, params, self.chunk_size)
+
+    def export(
+        self,
+        dataset: str,
+        format_type: str = ReportFormat.CSV,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+    ) -> Iterator[bytes]:
+        """Bytes blocks of ``dataset`` encoded as ``format_type``."""
+        if format_type not in MEDIA_TYPES:
+            raise ExportError(f"Unsupported export format: {format_type}")
+        return stream_export(self.chunks(dataset, start_date, end_date), format_type)
+
+    @staticmethod
+    def filename(dataset: str, format_type: str) -> str:
+        return f"{dataset}.{FILE_EXTENSIONS[format_type]}"
+
+    @staticmethod
+    def media_type(format_type: str) -> str:
+        return MEDIA_TYPES[format_type]
@@ -9,11 +9,14 @@ import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, date
 from decimal import Decimal
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Sequence, Union
 from io import BytesIO
 import json
 from ..repositories.base import DatabaseConnection
 from ..models.analytics import BusinessMetrics, CashFlowMetrics
+from .compute_pool import offloadable
+from .report_composition import ReportFrames, load_report_frames, read_frame
+from .rollup_service import RollupService
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +28,7 @@ class ReportFormat:
     EXCEL = "excel"
     CSV = "csv"
     JSON = "json"
+    PARQUET = "parquet"
 
 
 class ReportType:
@@ -41,9 +45,71 @@ class ReportingService:
 
     def __init__(self, db_connection: DatabaseConnection):
         self.db = db_connection
+        self.rollups = RollupService(db_connection)
+
+    def load_report_frames(
+        self, start_date: date, end_date: date, with_prior_totals: bool = False
+    ) -> ReportFrames:
+        """Revenue/cost frames for a range, loaded in one query and shareable
+        across reports (``with_prior_totals`` for the balance sheet)."""
+        with self.db.get_connection(readonly=True) as conn:
+            return load_report_frames(conn, start_date, end_date, with_prior_totals)
+
+    @offloadable
+    def generate_reports(
+        self,
+        start_date: date,
+        end_date: date,
+        report_types: Sequence[str] = (
+            ReportType.PROFIT_LOSS,
+            ReportType.CASH_FLOW,
+            ReportType.BALANCE_SHEET,
+            ReportType.EXECUTIVE_SUMMARY,
+        ),
+        format_type: str = ReportFormat.JSON,
+        include_details: bool = True,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Generate several reports for one range from a single query.
+
+        The balance sheet is as of ``end_date``. With ``include_details=False``
+        reports carry totals only, without per-day lists.
 
+        Returns:
+            Dict mapping each requested report type to its report
+        """
+        frames = self.load_report_frames(
+            start_date,
+            end_date,
+            with_prior_totals=ReportType.BALANCE_SHEET in report_types,
+        )
+        builders = {
+            ReportType.PROFIT_LOSS: lambda: self.generate_profit_loss_report(
+                start_date, end_date, format_type, frames, include_details
+            ),
+            ReportType.CASH_FLOW: lambda: self.generate_cash_flow_report(
+                start_date, end_date, format_type, frames, include_details
+            ),
+            ReportType.BALANCE_SHEET: lambda: self.generate_balance_sheet(
+                end_date, format_type, frames
+            ),
+            ReportType.EXECUTIVE_SUMMARY: lambda: self.generate_executive_summary(
+                start_date, end_date, format_type, frames
+            ),
+        }
+        unknown = [t for t in report_types if t not in builders]
+        if unknown:
+            raise ValueError(f"Unknown report types: {unknown}")
+        return {report_type: builders[report_type]() for report_type in report_types}
+
+    @offloadable
     def generate_profit_loss_report(
-        self, start_date: date, end_date: date, format_type: str = ReportFormat.JSON
+        self,
+        start_date: date,
+        end_date: date,
+        format_type: str = ReportFormat.JSON,
+        frames: Optional[ReportFrames] = None,
+        include_details: bool = True,
     ) -> Dict[str, Any]:
         """
         Generate Profit & Loss statement.
@@ -52,47 +118,16 @@ class ReportingService:
             start_date: Report start date
             end_date: Report end date
             format_type: Output format (json, csv, excel, pdf)
+            frames: Frames preloaded for the same range
+            include_details: Include the per-day ``by_date`` lists
 
         Returns:
             Dict containing P&L data and metadata
         """
         try:
-            with self.db.get_connection() as conn:
-                # Revenue data
-                revenue_query = """
-                    SELECT 
-                        DATE(order_date) as date,
-                        SUM(amount) as revenue,
-                        currency,
-                        COUNT(*) as transaction_count
-                    FROM sales_orders 
-                    WHERE order_date BETWEEN ? AND ?
-                    GROUP BY DATE(order_date), currency
-                    ORDER BY date
-                """
-                revenue_data = pd.read_sql_query(
-                    revenue_query,
-                    conn,
-                    params=[start_date.isoformat(), end_date.isoformat()],
-                )
-
-                # Cost data
-                cost_query = """
-                    SELECT 
-                        DATE(cost_date) as date,
-                        SUM(amount) as costs,
-                        category,
-                        currency
-                    FROM costs 
-                    WHERE cost_date BETWEEN ? AND ?
-                    GROUP BY DATE(cost_date), category, currency
-                    ORDER BY date
-                """
-                cost_data = pd.read_sql_query(
-                    cost_query,
-                    conn,
-                    params=[start_date.isoformat(), end_date.isoformat()],
-                )
+            if frames is None:
+                frames = self.load_report_frames(start_date, end_date)
+            revenue_data, cost_data = frames.revenue, frames.costs
 
             # Calculate totals
             total_revenue = (
@@ -113,11 +148,6 @@ class ReportingService:
                 },
                 "revenue": {
                     "total_revenue": float(total_revenue),
-                    "by_date": (
-                        revenue_data.to_dict("records")
-                        if not revenue_data.empty
-                        else []
-                    ),
                 },
                 "costs": {
                     "total_costs": float(total_costs),
@@ -126,9 +156,6 @@ class ReportingService:
                         if not cost_data.empty
                         else {}
                     ),
-                    "by_date": (
-                        cost_data.to_dict("records") if not cost_data.empty else []
-                    ),
                 },
                 "profitability": {
                     "gross_profit": float(gross_profit),
@@ -142,6 +169,13 @@ class ReportingService:
                     "format": format_type,
                 },
             }
+            if include_details:
+                pl_report["revenue"]["by_date"] = (
+                    revenue_data.to_dict("records") if not revenue_data.empty else []
+                )
+                pl_report["costs"]["by_date"] = (
+                    cost_data.to_dict("records") if not cost_data.empty else []
+                )
 
             return self._format_report(pl_report, format_type)
 
@@ -149,53 +183,34 @@ class ReportingService:
             logger.error(f"Error generating P&L report: {str(e)}")
             raise
 
+    @offloadable
     def generate_cash_flow_report(
-        self, start_date: date, end_date: date, format_type: str = ReportFormat.JSON
+        self,
+        start_date: date,
+        end_date: date,
+        format_type: str = ReportFormat.JSON,
+        frames: Optional[ReportFrames] = None,
+        include_details: bool = True,
     ) -> Dict[str, Any]:
-        """Generate Cash Flow Statement."""
+        """Generate Cash Flow Statement.
+
+        Uses ``frames`` when given, otherwise the daily rollups or raw tables.
+        ``include_details=False`` leaves out the ``daily_cash_flow`` list.
+        """
         try:
-            with self.db.get_connection() as conn:
-                # Operating cash flow
-                operating_query = """
-                    SELECT 
-                        'revenue' as type,
-                        DATE(order_date) as date,
-                        SUM(amount) as amount
-                    FROM sales_orders 
-                    WHERE order_date BETWEEN ? AND ?
-                    GROUP BY DATE(order_date)
-                    
-                    UNION ALL
-                    
-                    SELECT 
-                        'expense' as type,
-                        DATE(cost_date) as date,
-                        -SUM(amount) as amount
-                    FROM costs 
-                    WHERE cost_date BETWEEN ? AND ?
-                    GROUP BY DATE(cost_date)
-                    
-                    ORDER BY date
-                """
-                cash_flow_data = pd.read_sql_query(
-                    operating_query,
-                    conn,
-                    params=[
-                        start_date.isoformat(),
-                        end_date.isoformat(),
-                        start_date.isoformat(),
-                        end_date.isoformat(),
-                    ],
-                )
+            if frames is not None:
+                daily_cf = frames.daily_cash_flow()
+            else:
+                if self._cash_flow_rollups_ready(start_date, end_date):
+                    cash_flow_data = self._cash_flow_from_rollups(start_date, end_date)
+                else:
+                    cash_flow_data = self._cash_flow_from_raw(start_date, end_date)
+                # Daily cash flow
+                daily_cf = cash_flow_data.groupby("date")["amount"].sum().reset_index()
+                daily_cf["cumulative"] = daily_cf["amount"].cumsum()
 
             # Calculate cash flow metrics
-            operating_cash_flow = (
-                cash_flow_data["amount"].sum() if not cash_flow_data.empty else 0
-            )
-
-            # Daily cash flow
-            daily_cf = cash_flow_data.groupby("date")["amount"].sum().reset_index()
-            daily_cf["cumulative"] = daily_cf["amount"].cumsum()
+            operating_cash_flow = daily_cf["amount"].sum() if not daily_cf.empty else 0
 
             cash_flow_report = {
                 "report_type": ReportType.CASH_FLOW,
@@ -205,9 +220,6 @@ class ReportingService:
                 },
                 "operating_activities": {
                     "net_operating_cash_flow": float(operating_cash_flow),
-                    "daily_cash_flow": (
-                        daily_cf.to_dict("records") if not daily_cf.empty else []
-                    ),
                 },
                 "investing_activities": {
                     "net_investing_cash_flow": 0.0,  # Placeholder
@@ -228,6 +240,10 @@ class ReportingService:
                     "format": format_type,
                 },
             }
+            if include_details:
+                cash_flow_report["operating_activities"]["daily_cash_flow"] = (
+                    daily_cf.to_dict("records") if not daily_cf.empty else []
+                )
 
             return self._format_report(cash_flow_report, format_type)
 
@@ -235,40 +251,81 @@ class ReportingService:
             logger.error(f"Error generating cash flow report: {str(e)}")
             raise
 
+    def _cash_flow_rollups_ready(self, start_date: date, end_date: date) -> bool:
+        return self.rollups.covers(
+            "sales_orders", start_date, end_date, date_column="order_date"
+        ) and self.rollups.covers("costs", start_date, end_date, date_column="cost_date")
+
+    def _cash_flow_from_rollups(self, start_date: date, end_date: date) -> pd.DataFrame:
+        """Operating cash flow per day read from the materialized daily rollups."""
+        rows = [
+            {"type": "revenue", "date": r["day"], "amount": r["amount"]}
+            for r in self.rollups.daily("sales_orders", start_date, end_date, ("amount",))
+        ] + [
+            {"type": "expense", "date": r["day"], "amount": -r["amount"]}
+            for r in self.rollups.daily("costs", start_date, end_date, ("amount",))
+        ]
+        frame = pd.DataFrame(rows, columns=["type", "date", "amount"])
+        return frame.sort_values("date", kind="stable").reset_index(drop=True)
+
+    def _cash_flow_from_raw(self, start_date: date, end_date: date) -> pd.DataFrame:
+        """Operating cash flow per day aggregated from sales_orders and costs."""
+        with self.db.get_connection(readonly=True) as conn:
+            # Operating cash flow
+            operating_query = """
+                SELECT 
+                    'revenue' as type,
+                    DATE(order_date) as date,
+                    SUM(amount) as amount
+                FROM sales_orders 
+                WHERE order_date BETWEEN ? AND ?
+                GROUP BY DATE(order_date)
+                
+                UNION ALL
+                
+                SELECT 
+                    'expense' as type,
+                    DATE(cost_date) as date,
+                    -SUM(amount) as amount
+                FROM costs 
+                WHERE cost_date BETWEEN ? AND ?
+                GROUP BY DATE(cost_date)
+                
+                ORDER BY date
+            """
+            cash_flow_data = read_frame(
+                conn,
+                operating_query,
+                [
+                    start_date.isoformat(),
+                    end_date.isoformat(),
+                    start_date.isoformat(),
+                    end_date.isoformat(),
+                ],
+            )
+        return cash_flow_data
+
+    @offloadable
     def generate_balance_sheet(
-        self, as_of_date: date, format_type: str = ReportFormat.JSON
+        self,
+        as_of_date: date,
+        format_type: str = ReportFormat.JSON,
+        frames: Optional[ReportFrames] = None,
     ) -> Dict[str, Any]:
-        """Generate Balance Sheet (simplified version)."""
-        try:
-            with self.db.get_connection() as conn:
-                # Assets (simplified - cash and receivables)
-                cash_query = """
-                    SELECT SUM(
-                        CASE 
-                            WHEN order_date <= ? THEN amount 
-                            ELSE 0 
-                        END
-                    ) - SUM(
-                        CASE 
-                            WHEN cost_date <= ? THEN amount 
-                            ELSE 0 
-                        END
-                    ) as cash_balance
-                    FROM sales_orders, costs
-                """
-
-                # This is a simplified calculation - in reality you'd need proper cash tracking
-                assets_data = pd.read_sql_query(
-                    cash_query,
-                    conn,
-                    params=[as_of_date.isoformat(), as_of_date.isoformat()],
-                )
+        """Generate Balance Sheet (simplified version).
 
-            cash_balance = (
-                float(assets_data["cash_balance"].iloc[0])
-                if not assets_data.empty
-                else 0
-            )
+        ``frames`` ending on ``as_of_date`` and loaded with prior totals
+        supply the cash balance without another query.
+        """
+        try:
+            if (
+                frames is not None
+                and frames.end_date == as_of_date
+                and frames.has_prior_totals
+            ):
+                cash_balance = frames.closing_cash_balance
+            else:
+                cash_balance = self._cash_balance(as_of_date)
 
             balance_sheet = {
                 "report_type": ReportType.BALANCE_SHEET,
@@ -316,17 +373,38 @@ class ReportingService:
             logger.error(f"Error generating balance sheet: {str(e)}")
             raise
 
+    def _cash_balance(self, as_of_date: date) -> float:
+        """Revenue minus costs up to ``as_of_date`` (simplified cash tracking)."""
+        with self.db.get_connection(readonly=True) as conn:
+            row = conn.execute(
+                """
+                SELECT
+                    (SELECT COALESCE(SUM(amount), 0) FROM sales_orders WHERE order_date <= ?)
+                    - (SELECT COALESCE(SUM(amount), 0) FROM costs WHERE cost_date <= ?)
+                    AS cash_balance
+                """,
+                (as_of_date.isoformat(), as_of_date.isoformat()),
+            ).fetchone()
+        value = row["cash_balance"] if isinstance(row, dict) else row[0]
+        return float(value or 0.0)
+
+    @offloadable
     def generate_executive_summary(
-        self, start_date: date, end_date: date, format_type: str = ReportFormat.JSON
+        self,
+        start_date: date,
+        end_date: date,
+        format_type: str = ReportFormat.JSON,
+        frames: Optional[ReportFrames] = None,
     ) -> Dict[str, Any]:
-        """Generate executive summary report."""
+        """Generate executive summary report from one shared set of frames."""
         try:
-            # Get data from other reports
+            if frames is None:
+                frames = self.load_report_frames(start_date, end_date)
             pl_report = self.generate_profit_loss_report(
-                start_date, end_date, ReportFormat.JSON
+                start_date, end_date, ReportFormat.JSON, frames, include_details=False
             )
             cf_report = self.generate_cash_flow_report(
-                start_date, end_date, ReportFormat.JSON
+                start_date, end_date, ReportFormat.JSON, frames, include_details=False
             )
 
             # Extract key metrics
@@ -467,12 +545,12 @@ class ReportingService:
         if format_type == ReportFormat.JSON:
             return report_data
 
-        elif format_type == ReportFormat.CSV:
-            # Convert to CSV-friendly format
+        elif format_type in (ReportFormat.CSV, ReportFormat.PARQUET):
+            # Convert to flat rows; report_export encodes them
             csv_data = self._flatten_for_csv(report_data)
             return {
                 "data": csv_data,
-                "format": "csv",
+                "format": format_type,
                 "metadata": report_data.get("metadata", {}),
             }
 
@@ -0,0 +1,512 @@
+"""
+Materialized daily/monthly rollups for the dashboard's raw fact tables.
+
+``rollup_daily`` and ``rollup_monthly`` hold per-period sums keyed by
+(source, period, category, currency). SQLite triggers on each source table
+apply insert/update/delete deltas in the same transaction as the write, so
+readers see rollups that are always in step with the raw rows.
+
+Rollups key on ``DATE(<date column>)``; sources are expected to store ISO
+dates. Readers must call ``covers()`` first and fall back to the raw query
+when it returns False (rollups not installed/rebuilt, schema drift, or a
+measure the source does not provide).
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..repositories.base import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+# Measures stored per rollup row
+MEASURES: Tuple[str, ...] = (
+    "amount",
+    "amount_usd",
+    "inflow",
+    "outflow",
+    "quantity",
+    "row_count",
+)
+
+# Tolerance used by the consistency checker (floating point drift from deltas)
+CHECK_TOLERANCE = 1e-6
+
+
+@dataclass(frozen=True)
+class RollupSource:
+    """How one raw table maps onto rollup keys and measures.
+
+    Each ``*_columns`` tuple lists candidate column names; the first one that
+    exists on the table is used.
+    """
+
+    name: str
+    date_columns: Tuple[str, ...]
+    amount_columns: Tuple[str, ...] = ("amount",)
+    amount_usd_columns: Tuple[str, ...] = ("amount_usd",)
+    category_columns: Tuple[str, ...] = ("category",)
+    currency_columns: Tuple[str, ...] = ("currency",)
+    quantity_columns: Tuple[str, ...] = ()
+    # Measures that only make sense when the matching column exists
+    optional_measures: Dict[str, str] = field(
+        default_factory=lambda: {"amount_usd": "amount_usd", "quantity": "quantity"}
+    )
+
+
+ROLLUP_SOURCES: Dict[str, RollupSource] = {
+    "sales_orders": RollupSource("sales_orders", date_columns=("date", "order_date")),
+    "costs": RollupSource("costs", date_columns=("date", "cost_date")),
+    "cash_ledger": RollupSource("cash_ledger", date_columns=("entry_date",)),
+    "bookings": RollupSource(
+        "bookings",
+        date_columns=("booking_date",),
+        category_columns=(),
+        currency_columns=(),
+        quantity_columns=("guests",),
+    ),
+}
+
+_GRAINS = {
+    "daily": ("rollup_daily", "day", "DATE({col})"),
+    "monthly": ("rollup_monthly", "month", "strftime('%Y-%m', {col})"),
+}
+
+
+class RollupService:
+    """Installs, maintains, reads and verifies the aggregate rollup tables."""
+
+    def __init__(self, db_connection: DatabaseConnection):
+        self.db = db_connection
+
+    # ------------------------------------------------------------------
+    # Schema and triggers
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _create_rollup_tables(conn) -> None:
+        for table, period, _ in _GRAINS.values():
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    source TEXT NOT NULL,
+                    {period} TEXT NOT NULL,
+                    category TEXT NOT NULL DEFAULT '',
+                    currency TEXT NOT NULL DEFAULT '',
+                    amount REAL NOT NULL DEFAULT 0,
+                    amount_usd REAL NOT NULL DEFAULT 0,
+                    inflow REAL NOT NULL DEFAULT 0,
+                    outflow REAL NOT NULL DEFAULT 0,
+                    quantity REAL NOT NULL DEFAULT 0,
+                    row_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (source, {period}, category, currency)
+                )
+                """
+            )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                source TEXT PRIMARY KEY,
+                columns TEXT NOT NULL,
+                covered_from TEXT,
+                status TEXT NOT NULL DEFAULT 'installed',
+                installed_at TEXT,
+                rebuilt_at TEXT
+            )
+            """
+        )
+
+    @staticmethod
+    def _table_columns(conn, table: str) -> List[str]:
+        cur = conn.cursor()
+        cur.row_factory = None
+        return [row[1] for row in cur.execute(f"PRAGMA table_info({table})").fetchall()]
+
+    def _resolve_columns(self, conn, source: RollupSource) -> Optional[Dict[str, Optional[str]]]:
+        """Pick the concrete column for each role, or None if the table is unusable."""
+        existing = set(self._table_columns(conn, source.name))
+        if not existing:
+            return None
+
+        def first(candidates: Sequence[str]) -> Optional[str]:
+            return next((c for c in candidates if c in existing), None)
+
+        columns = {
+            "date": first(source.date_columns),
+            "amount": first(source.amount_columns),
+            "amount_usd": first(source.amount_usd_columns),
+            "category": first(source.category_columns),
+            "currency": first(source.currency_columns),
+            "quantity": first(source.quantity_columns),
+        }
+        if not columns["date"] or not columns["amount"]:
+            return None
+        return columns
+
+    @staticmethod
+    def _row_exprs(columns: Dict[str, Optional[str]], ref: str) -> Dict[str, str]:
+        """SQL expressions for keys and measures of a single row alias."""
+
+        def col(role: str) -> Optional[str]:
+            name = columns.get(role)
+            return f"{ref}.{name}" if name else None
+
+        amount = col("amount")
+        return {
+            "category": f"COALESCE({col('category')}, '')" if col("category") else "''",
+            "currency": f"COALESCE({col('currency')}, '')" if col("currency") else "''",
+            "amount": f"COALESCE({amount}, 0)",
+            "amount_usd": f"COALESCE({col('amount_usd')}, 0)" if col("amount_usd") else "0",
+            "inflow": f"CASE WHEN {amount} >= 0 THEN {amount} ELSE 0 END",
+            "outflow": f"CASE WHEN {amount} < 0 THEN -{amount} ELSE 0 END",
+            "quantity": f"COALESCE({col('quantity')}, 0)" if col("quantity") else "0",
+            "row_count": "1",
+        }
+
+    def _delta_sql(self, source: str, columns: Dict[str, Optional[str]], ref: str, sign: int) -> str:
+        """Trigger body statements applying one row (``ref`` = NEW/OLD) to both grains."""
+        exprs = self._row_exprs(columns, ref)
+        date_ref = f"{ref}.{columns['date']}"
+        statements = []
+        for table, period, period_sql in _GRAINS.values():
+            period_expr = period_sql.format(col=date_ref)
+            values = ", ".join(f"{sign} * ({exprs[m]})" for m in MEASURES)
+            updates = ", ".join(f"{m} = {m} + excluded.{m}" for m in MEASURES)
+            statements.append(
+                f"""
+                INSERT INTO {table} (source, {period}, category, currency, {", ".join(MEASURES)})
+                SELECT '{source}', {period_expr}, {exprs['category']}, {exprs['currency']}, {values}
+                 WHERE {period_expr} IS NOT NULL
+                ON CONFLICT(source, {period}, category, currency) DO UPDATE SET {updates};
+                """
+            )
+            if sign < 0:
+                statements.append(
+                    f"""
+                    DELETE FROM {table}
+                     WHERE source = '{source}' AND {period} = {period_expr}
+                       AND category = {exprs['category']} AND currency = {exprs['currency']}
+                       AND row_count <= 0;
+                    """
+                )
+        return "\n".join(statements)
+
+    @staticmethod
+    def _trigger_names(source: str) -> Tuple[str, str, str]:
+        return (
+            f"trg_rollup_{source}_insert",
+            f"trg_rollup_{source}_update",
+            f"trg_rollup_{source}_delete",
+        )
+
+    def install(self, sources: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """Create rollup tables and (re)create maintenance triggers.
+
+        Newly installed sources are not served to readers until ``rebuild``
+        has backfilled them.
+        """
+        installed: Dict[str, bool] = {}
+        with self.db.get_connection() as conn:
+            self._create_rollup_tables(conn)
+            for name in sources or ROLLUP_SOURCES:
+                source = ROLLUP_SOURCES[name]
+                columns = self._resolve_columns(conn, source)
+                insert_trg, update_trg, delete_trg = self._trigger_names(name)
+                for trg in (insert_trg, update_trg, delete_trg):
+                    conn.execute(f"DROP TRIGGER IF EXISTS {trg}")
+                if columns is None:
+                    conn.execute("DELETE FROM rollup_state WHERE source = ?", (name,))
+                    installed[name] = False
+                    continue
+
+                watched = ", ".join(sorted({c for c in columns.values() if c}))
+                conn.execute(
+                    f"CREATE TRIGGER {insert_trg} AFTER INSERT ON {name} BEGIN "
+                    f"{self._delta_sql(name, columns, 'NEW', 1)} END"
+                )
+                conn.execute(
+                    f"CREATE TRIGGER {update_trg} AFTER UPDATE OF {watched} ON {name} BEGIN "
+                    f"{self._delta_sql(name, columns, 'OLD', -1)}"
+                    f"{self._delta_sql(name, columns, 'NEW', 1)} END"
+                )
+                conn.execute(
+                    f"CREATE TRIGGER {delete_trg} AFTER DELETE ON {name} BEGIN "
+                    f"{self._delta_sql(name, columns, 'OLD', -1)} END"
+                )
+
+                previous = conn.execute(
+                    "SELECT columns FROM rollup_state WHERE source = ?", (name,)
+                ).fetchone()
+                same_columns = previous is not None and json.loads(previous["columns"]) == columns
+                conn.execute(
+                    """
+                    INSERT INTO rollup_state (source, columns, status, installed_at)
+                    VALUES (?, ?, 'installed', ?)
+                    ON CONFLICT(source) DO UPDATE SET
+                        columns = excluded.columns,
+                        installed_at = excluded.installed_at,
+                        status = CASE WHEN ? THEN rollup_state.status ELSE 'installed' END
+                    """,
+                    (name, json.dumps(columns), datetime.now().isoformat(), same_columns),
+                )
+                installed[name] = True
+        return installed
+
+    def rebuild(
+        self, sources: Optional[Iterable[str]] = None, since: Optional[date] = None
+    ) -> Dict[str, int]:
+        """Recompute rollups from the raw tables (optionally only from ``since``).
+
+        Runs under BEGIN IMMEDIATE so concurrent writes (and their triggers)
+        cannot interleave with the backfill.
+        """
+        names = list(sources or ROLLUP_SOURCES)
+        installed = self.install(names)
+        rebuilt: Dict[str, int] = {}
+        since_day = since.isoformat() if since else None
+        since_month = since_day[:7] if since_day else None
+
+        with self.db.get_connection() as conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            for name in names:
+                if not installed.get(name):
+                    continue
+                state = conn.execute(
+                    "SELECT columns, covered_from, status FROM rollup_state WHERE source = ?",
+                    (name,),
+                ).fetchone()
+                columns = json.loads(state["columns"])
+                exprs = self._row_exprs(columns, "t")
+                date_ref = f"t.{columns['date']}"
+
+                for grain, (table, period, period_sql) in _GRAINS.items():
+                    period_expr = period_sql.format(col=date_ref)
+                    lower = since_day if grain == "daily" else since_month
+                    # Monthly rows are rebuilt from the start of since's month
+                    raw_lower = f"{since_month}-01" if since_month else None
+                    conn.execute(
+                        f"DELETE FROM {table} WHERE source = ?"
+                        + (f" AND {period} >= ?" if lower else ""),
+                        (name, lower) if lower else (name,),
+                    )
+                    sums = ", ".join(f"SUM({exprs[m]})" for m in MEASURES)
+                    conn.execute(
+                        f"""
+                        INSERT INTO {table} (source, {period}, category, currency, {", ".join(MEASURES)})
+                        SELECT ?, {period_expr}, {exprs['category']}, {exprs['currency']}, {sums}
+                          FROM {name} t
+                         WHERE {period_expr} IS NOT NULL
+                         {f"AND DATE({date_ref}) >= ?" if lower else ""}
+                      GROUP BY 2, 3, 4
+                        """,
+                        (name, raw_lower if grain == "monthly" else since_day)
+                        if lower
+                        else (name,),
+                    )
+
+                if since_day is None:
+                    covered_from = None
+                    status = "ready"
+                elif state["status"] == "ready":
+                    covered_from = state["covered_from"]
+                    status = "ready"
+                else:
+                    covered_from = f"{since_month}-01"
+                    status = "ready"
+                conn.execute(
+                    "UPDATE rollup_state SET covered_from = ?, status = ?, rebuilt_at = ? WHERE source = ?",
+                    (covered_from, status, datetime.now().isoformat(), name),
+                )
+                rebuilt[name] = conn.execute(
+                    "SELECT COUNT(*) AS c FROM rollup_daily WHERE source = ?", (name,)
+                ).fetchone()["c"]
+        logger.info(f"Rebuilt rollups: {rebuilt}")
+        return rebuilt
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def covers(
+        self,
+        source: str,
+        start_date: date,
+        end_date: date,
+        date_column: Optional[str] = None,
+        measures: Sequence[str] = (),
+    ) -> bool:
+        """True when rollups can answer a query over [start_date, end_date]."""
+        try:
+            with self.db.get_connection(readonly=True) as conn:
+                state = conn.execute(
+                    "SELECT columns, covered_from, status FROM rollup_state WHERE source = ?",
+                    (source,),
+                ).fetchone()
+                if not state or state["status"] != "ready":
+                    return False
+                triggers = conn.execute(
+                    "SELECT COUNT(*) AS c FROM sqlite_master WHERE type = 'trigger' AND name IN (?, ?, ?)",
+                    self._trigger_names(source),
+                ).fetchone()["c"]
+        except Exception:
+            # Rollup tables not installed in this database
+            return False
+
+        if triggers != 3:
+            return False
+        columns = json.loads(state["columns"])
+        if date_column and columns.get("date") != date_column:
+            return False
+        spec = ROLLUP_SOURCES[source]
+        for measure in measures:
+            required = spec.optional_measures.get(measure)
+            if required and not columns.get(required):
+                return False
+        covered_from = state["covered_from"]
+        return covered_from is None or covered_from <= start_date.isoformat()
+
+    def daily(
+        self,
+        source: str,
+        start_date: date,
+        end_date: date,
+        measures: Sequence[str],
+        group_by: Sequence[str] = (),
+    ) -> List[Dict[str, Any]]:
+        """Per-day sums over [start_date, end_date], ordered by day."""
+        keys = ", ".join(["day", *group_by])
+        sums = ", ".join(f"SUM({m}) AS {m}" for m in measures)
+        with self.db.get_connection(readonly=True) as conn:
+            return conn.execute(
+                f"""
+                SELECT {keys}, {sums}
+                  FROM rollup_daily
+                 WHERE source = ? AND day BETWEEN ? AND ?
+              GROUP BY {keys}
+                HAVING SUM(row_count) > 0
+              ORDER BY {keys}
+                """,
+                (source, start_date.isoformat(), end_date.isoformat()),
+            ).fetchall()
+
+    def by_month(
+        self, source: str, start_date: date, end_date: date, measures: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        """Per-month sums over [start_date, end_date].
+
+        Whole months come from ``rollup_monthly``; partial months at either
+        edge of the range are summed from ``rollup_daily``.
+        """
+        first_full = start_date if start_date.day == 1 else _next_month_start(start_date)
+        after_end = end_date + timedelta(days=1)
+        last_full_end = after_end if after_end.day == 1 else after_end.replace(day=1)
+        sums = ", ".join(f"SUM({m}) AS {m}" for m in measures)
+        params: List[Any] = [source, start_date.isoformat(), end_date.isoformat()]
+        full_months = ""
+        if first_full < last_full_end:
+            full_months = "AND NOT (day >= ? AND day < ?)"
+            params += [first_full.isoformat(), last_full_end.isoformat()]
+        with self.db.get_connection(readonly=True) as conn:
+            rows = conn.execute(
+                f"""
+                SELECT month, {sums}, SUM(row_count) AS _rows FROM (
+                    SELECT SUBSTR(day, 1, 7) AS month, {", ".join(MEASURES)}
+                      FROM rollup_daily
+                     WHERE source = ? AND day BETWEEN ? AND ? {full_months}
+                    UNION ALL
+                    SELECT month, {", ".join(MEASURES)}
+                      FROM rollup_monthly
+                     WHERE source = ? AND month >= ? AND month < ?
+                )
+              GROUP BY month
+                HAVING SUM(row_count) > 0
+              ORDER BY month
+                """,
+                params
+                + [source, first_full.isoformat()[:7], last_full_end.isoformat()[:7]],
+            ).fetchall()
+        for row in rows:
+            row.pop("_rows", None)
+        return rows
+
+    # ------------------------------------------------------------------
+    # Verification
+    # ------------------------------------------------------------------
+    def check_consistency(
+        self, sources: Optional[Iterable[str]] = None, tolerance: float = CHECK_TOLERANCE
+    ) -> Dict[str, Dict[str, Any]]:
+        """Compare rollups against sums recomputed from the raw tables."""
+        report: Dict[str, Dict[str, Any]] = {}
+        with self.db.get_connection(readonly=True) as conn:
+            for name in sources or ROLLUP_SOURCES:
+                state = conn.execute(
+                    "SELECT columns, covered_from FROM rollup_state WHERE source = ?", (name,)
+                ).fetchone()
+                if not state:
+                    report[name] = {"ok": False, "error": "not installed", "mismatches": []}
+                    continue
+                columns = json.loads(state["columns"])
+                exprs = self._row_exprs(columns, "t")
+                date_ref = f"t.{columns['date']}"
+                mismatches: List[Dict[str, Any]] = []
+                checked = 0
+                for grain, (table, period, period_sql) in _GRAINS.items():
+                    period_expr = period_sql.format(col=date_ref)
+                    lower = state["covered_from"]
+                    if lower and grain == "monthly":
+                        lower = lower[:7]
+                    raw_sums = ", ".join(f"SUM({exprs[m]}) AS {m}" for m in MEASURES)
+                    raw = {
+                        (r["period"], r["category"], r["currency"]): r
+                        for r in conn.execute(
+                            f"""
+                            SELECT {period_expr} AS period, {exprs['category']} AS category,
+                                   {exprs['currency']} AS currency, {raw_sums}
+                              FROM {name} t
+                             WHERE {period_expr} IS NOT NULL
+                          GROUP BY 1, 2, 3
+                            """
+                        ).fetchall()
+                        if not lower or r["period"] >= lower
+                    }
+                    rolled = {
+                        (r["period"], r["category"], r["currency"]): r
+                        for r in conn.execute(
+                            f"""
+                            SELECT {period} AS period, category, currency, {", ".join(MEASURES)}
+                              FROM {table} WHERE source = ?
+                            """,
+                            (name,),
+                        ).fetchall()
+                        if not lower or r["period"] >= lower
+                    }
+                    for key in raw.keys() | rolled.keys():
+                        checked += 1
+                        expected, actual = raw.get(key), rolled.get(key)
+                        for measure in MEASURES:
+                            e = float((expected or {}).get(measure) or 0)
+                            a = float((actual or {}).get(measure) or 0)
+                            if abs(e - a) > tolerance * max(1.0, abs(e)):
+                                mismatches.append(
+                                    {
+                                        "grain": grain,
+                                        "period": key[0],
+                                        "category": key[1],
+                                        "currency": key[2],
+                                        "measure": measure,
+                                        "expected": e,
+                                        "actual": a,
+                                    }
+                                )
+                report[name] = {
+                    "ok": not mismatches,
+                    "checked_keys": checked,
+                    "mismatches": mismatches,
+                }
+        return report
+
+
+def _next_month_start(d: date) -> date:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
@@ -12,6 +12,44 @@ from src.config.settings import Settings
 from src.services.cash_ledger_service import CashLedgerService
 from src.models.cash_ledger import CashLedgerEntry, Account
 
+# Stripe returns at most 100 objects per list page
+STRIPE_PAGE_SIZE = 100
+
+
+def payout_to_record(p: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a Stripe payout object to {payout_id, date, amount, currency, status, created}."""
+    # Stripe payout amount is in the smallest currency unit (e.g., cents)
+    amount = float(p.get("amount", 0) or 0) / 100.0
+    cur = (p.get("currency") or "").upper()
+    status = p.get("status") or "unknown"
+    # Prefer arrival_date if present, otherwise created
+    ts = p.get("arrival_date") or p.get("created")
+    d = date.fromtimestamp(ts) if isinstance(ts, int) and ts > 0 else date.today()
+    return {
+        "payout_id": p.get("id"),
+        "date": d,
+        "amount": amount,
+        "currency": cur,
+        "status": status,
+        "created": p.get("created"),
+    }
+
+
+def payout_ledger_entry(p: Dict[str, Any], bank_account_id: Optional[str] = None) -> CashLedgerEntry:
+    """Cash inflow ledger entry for a normalized payout record."""
+    return CashLedgerEntry(
+        entry_date=p["date"],
+        description=f"Stripe Payout {p['payout_id']}",
+        amount=p["amount"],  # positive inflow
+        currency=p["currency"],
+        # Account is optional for balance math; default to a placeholder
+        account=Account.OCBC_USD,
+        category="Stripe Payout",
+        source="stripe_payout",
+        external_id=p["payout_id"],
+        bank_account_id=bank_account_id,
+    )
+
 
 class StripeService:
     """
@@ -33,10 +71,16 @@ class StripeService:
         # Stripe v10+ uses global api_key configuration
         stripe.api_key = self._get_api_key()
 
-    def fetch_payouts(self, start_date: date, end_date: date, limit: int = 100) -> List[Dict[str, Any]]:
+    def fetch_payouts(
+        self, start_date: date, end_date: date, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Fetch payouts from Stripe within the date range.
-        Returns list of dicts: {payout_id, date, amount, currency, status}
+        Fetch payouts from Stripe within the date range, following pagination.
+        Returns list of dicts: {payout_id, date, amount, currency, status, created}
+
+        ``limit`` caps the total number of payouts (default: all of them).
+        For repeated imports prefer ``src.services.sync_engine``, which only
+        fetches payouts created since the previous run.
         """
         try:
             self._init_client()
@@ -44,26 +88,13 @@ class StripeService:
                 "gte": int(datetime.combine(start_date, datetime.min.time()).timestamp()),
                 "lte": int(datetime.combine(end_date, datetime.max.time()).timestamp()),
             }
-            payouts = stripe.Payout.list(created=created_filter, limit=min(limit, 100))
+            page_size = min(limit, STRIPE_PAGE_SIZE) if limit else STRIPE_PAGE_SIZE
+            payouts = stripe.Payout.list(created=created_filter, limit=page_size)
             results: List[Dict[str, Any]] = []
-            for p in getattr(payouts, "data", []) or []:
-                # Stripe payout amount is in the smallest currency unit (e.g., cents)
-                amount = float(p.get("amount", 0) or 0) / 100.0
-                cur = (p.get("currency") or "").upper()
-                status = p.get("status") or "unknown"
-                pid = p.get("id")
-                # Prefer arrival_date if present, otherwise created
-                ts = p.get("arrival_date") or p.get("created")
-                d = date.fromtimestamp(ts) if isinstance(ts, int) and ts > 0 else date.today()
-                results.append(
-                    {
-                        "payout_id": pid,
-                        "date": d,
-                        "amount": amount,
-                        "currency": cur,
-                        "status": status,
-                    }
-                )
+            for p in payouts.auto_paging_iter():
+                results.append(payout_to_record(p))
+                if limit and len(results) >= limit:
+                    break
             return results
         except Exception as e:
             self.error_handler.handle_error(e, user_message="Unable to fetch Stripe payouts")
@@ -83,35 +114,23 @@ class StripeService:
         start_date = start_date or (date.today() - timedelta(days=365))
         end_date = end_date or date.today()
 
-        payouts = self.fetch_payouts(start_date, end_date, limit=100)
+        payouts = self.fetch_payouts(start_date, end_date)
         created, skipped = 0, 0
+        entries: List[CashLedgerEntry] = []
         for p in payouts:
             try:
                 if only_status and p.get("status") != only_status:
                     skipped += 1
                     continue
-                # Build ledger entry
-                entry = CashLedgerEntry(
-                    entry_date=p["date"],
-                    description=f"Stripe Payout {p['payout_id']}",
-                    amount=p["amount"],  # positive inflow
-                    currency=p["currency"],
-                    # Account is optional for balance math; default to a placeholder
-                    account=Account.OCBC_USD,
-                    category="Stripe Payout",
-                    source="stripe_payout",
-                    external_id=p["payout_id"],
-                    bank_account_id=bank_account_id,
-                )
-                # Attempt insert; rely on unique index to prevent duplicates
-                self.ledger.create_entry(entry)
-                created += 1
+                entries.append(payout_ledger_entry(p, bank_account_id))
             except Exception as e:
-                # If unique constraint failure, treat as skipped; else report
-                msg = str(e).lower()
-                if "unique" in msg and "external_id" in msg:
-                    skipped += 1
-                    continue
                 self.error_handler.handle_error(e, user_message="Failed to import a Stripe payout")
                 skipped += 1
+        try:
+            # One batched insert; the unique index on external_id skips payouts already imported
+            created = self.ledger.create_entries(entries)
+            skipped += len(entries) - created
+        except Exception as e:
+            self.error_handler.handle_error(e, user_message="Failed to import Stripe payouts")
+            skipped += len(entries)
         return {"created": created, "skipped": skipped}
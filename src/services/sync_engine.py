@@ -0,0 +1,371 @@
+"""
+Incremental sync of Stripe payouts and Airtable tables into the local DB.
+
+Every source keeps a cursor in the ``sync_cursors`` table, so a run only
+fetches what changed since the previous successful run:
+
+* Stripe payouts - the ``created`` timestamp to resume from. While payouts
+  are still pending or in transit the cursor stays at the oldest of them, so
+  they are fetched again and land in the ledger once they are paid.
+* Airtable tables - the start time of the last run, matched against
+  ``LAST_MODIFIED_TIME()`` with a small overlap for clock skew.
+
+Requests share one pooled HTTP session and a ``ThrottledClient`` that bounds
+in-flight requests and backs off on 429s. Stripe lists are cursor-paginated
+(``starting_after``), so a single listing is sequential; the requested range
+is split into ``created`` windows that are paginated concurrently instead.
+Pages flow through a bounded queue into batched writes, and the cursor only
+advances once every batch has been written.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+from src.repositories.ingest_repository import IngestRepository
+from src.services.airtable_import_service import (
+    booking_from_airtable_record,
+    lead_from_airtable_record,
+)
+from src.services.cash_ledger_service import CashLedgerService
+from src.services.http_client import (
+    DEFAULT_CONCURRENCY,
+    ThrottledClient,
+    close_shared_session,
+)
+from src.services.stripe_service import STRIPE_PAGE_SIZE, payout_ledger_entry, payout_to_record
+
+logger = logging.getLogger(__name__)
+
+STRIPE_API_BASE = "https://api.stripe.com/v1"
+AIRTABLE_API_BASE = "https://api.airtable.com/v0"
+AIRTABLE_PAGE_SIZE = 100
+DEFAULT_SYNC_BATCH_SIZE = 500
+# Payouts in these states can still change, so the cursor must not pass them
+STRIPE_OPEN_PAYOUT_STATUSES = frozenset({"pending", "in_transit"})
+
+Emit = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+class SyncCursorStore:
+    """Per-source sync cursors persisted in the ``sync_cursors`` table."""
+
+    def __init__(self, db_connection):
+        self.db = db_connection
+        self._create_table()
+
+    def _create_table(self) -> None:
+        with self.db.get_connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sync_cursors (
+                    source TEXT PRIMARY KEY,
+                    cursor TEXT,
+                    updated_at TEXT NOT NULL,
+                    metadata TEXT
+                )
+                """
+            )
+
+    def get(self, source: str) -> Optional[str]:
+        with self.db.get_connection(readonly=True) as conn:
+            row = conn.execute(
+                "SELECT cursor FROM sync_cursors WHERE source = ?", (source,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row["cursor"] if isinstance(row, dict) else row[0]
+
+    def set(self, source: str, cursor: Optional[str], metadata: Optional[Dict[str, Any]] = None) -> None:
+        with self.db.get_connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO sync_cursors (source, cursor, updated_at, metadata)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(source) DO UPDATE SET
+                    cursor = excluded.cursor,
+                    updated_at = excluded.updated_at,
+                    metadata = excluded.metadata
+                """,
+                (
+                    source,
+                    cursor,
+                    datetime.now(timezone.utc).isoformat(),
+                    json.dumps(metadata or {}, default=str),
+                ),
+            )
+
+    def reset(self, source: str) -> None:
+        """Forget a cursor so the next run is a full sync."""
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM sync_cursors WHERE source = ?", (source,))
+
+
+class StripePayoutSource:
+    """Stripe payouts, written to the cash ledger once they are paid."""
+
+    def __init__(
+        self,
+        api_key: str,
+        ledger: CashLedgerService,
+        bank_account_id: Optional[str] = None,
+        base_url: str = STRIPE_API_BASE,
+        initial_lookback: timedelta = timedelta(days=365),
+        window: timedelta = timedelta(days=30),
+        name: str = "stripe:payouts",
+    ):
+        self.api_key = api_key
+        self.ledger = ledger
+        self.bank_account_id = bank_account_id
+        self.base_url = base_url.rstrip("/")
+        self.initial_lookback = initial_lookback
+        self.window = window
+        self.name = name
+
+    def partitions(self, cursor: Optional[str], started_at: datetime) -> List[Tuple[int, int]]:
+        """``[gte, lt)`` created-time windows covering cursor..now."""
+        end = int(started_at.timestamp()) + 1
+        start = int(cursor) if cursor else int((started_at - self.initial_lookback).timestamp())
+        step = max(1, int(self.window.total_seconds()))
+        return [(lo, min(lo + step, end)) for lo in range(start, end, step)] or [(start, end)]
+
+    async def fetch(self, client: ThrottledClient, partition: Tuple[int, int], emit: Emit) -> None:
+        gte, lt = partition
+        params: Dict[str, Any] = {
+            "limit": STRIPE_PAGE_SIZE,
+            "created[gte]": gte,
+            "created[lt]": lt,
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        while True:
+            page = await client.get_json(f"{self.base_url}/payouts", params=params, headers=headers)
+            data = page.get("data") or []
+            await emit(data)
+            if not page.get("has_more") or not data:
+                return
+            params["starting_after"] = data[-1]["id"]
+
+    def write(self, payouts: List[Dict[str, Any]], progress: Dict[str, Any]) -> Dict[str, int]:
+        entries = []
+        for payout in payouts:
+            created = payout.get("created")
+            if isinstance(created, int):
+                progress["max_created"] = max(progress.get("max_created", created), created)
+                if payout.get("status") in STRIPE_OPEN_PAYOUT_STATUSES:
+                    progress["min_open_created"] = min(progress.get("min_open_created", created), created)
+            if payout.get("status") == "paid":
+                entries.append(payout_ledger_entry(payout_to_record(payout), self.bank_account_id))
+        written = self.ledger.create_entries(entries)
+        return {"fetched": len(payouts), "written": written, "skipped": len(payouts) - written}
+
+    def next_cursor(self, cursor: Optional[str], started_at: datetime, progress: Dict[str, Any]) -> Optional[str]:
+        if "min_open_created" in progress:
+            return str(progress["min_open_created"])
+        if "max_created" in progress:
+            return str(progress["max_created"])
+        # Nothing created since the cursor; a first run resumes from now
+        return cursor or str(int(started_at.timestamp()))
+
+
+class AirtableTableSource:
+    """An Airtable table of leads or bookings, upserted into the ingest tables."""
+
+    KINDS = ("leads", "bookings")
+
+    def __init__(
+        self,
+        api_key: str,
+        base_id: str,
+        table: str,
+        kind: str,
+        repo: IngestRepository,
+        base_url: str = AIRTABLE_API_BASE,
+        overlap: timedelta = timedelta(minutes=5),
+        name: Optional[str] = None,
+    ):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unsupported Airtable source kind: {kind}")
+        self.api_key = api_key
+        self.base_id = base_id
+        self.table = table
+        self.kind = kind
+        self.repo = repo
+        self.base_url = base_url.rstrip("/")
+        self.overlap = overlap
+        self.name = name or f"airtable:{table}"
+
+    def partitions(self, cursor: Optional[str], started_at: datetime) -> List[Optional[str]]:
+        # Airtable offsets are opaque, so one table is one sequential listing
+        return [cursor]
+
+    def filter_formula(self, cursor: Optional[str]) -> Optional[str]:
+        if not cursor:
+            return None
+        since = datetime.fromisoformat(cursor) - self.overlap
+        return f"IS_AFTER(LAST_MODIFIED_TIME(), '{since.strftime('%Y-%m-%dT%H:%M:%S.000Z')}')"
+
+    async def fetch(self, client: ThrottledClient, partition: Optional[str], emit: Emit) -> None:
+        params: Dict[str, Any] = {"pageSize": AIRTABLE_PAGE_SIZE}
+        formula = self.filter_formula(partition)
+        if formula:
+            params["filterByFormula"] = formula
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        url = f"{self.base_url}/{self.base_id}/{quote(self.table, safe='')}"
+        while True:
+            page = await client.get_json(url, params=params, headers=headers)
+            await emit(page.get("records") or [])
+            offset = page.get("offset")
+            if not offset:
+                return
+            params["offset"] = offset
+
+    def write(self, records: List[Dict[str, Any]], progress: Dict[str, Any]) -> Dict[str, int]:
+        models = []
+        for idx, rec in enumerate(records):
+            try:
+                if self.kind == "leads":
+                    mapped = lead_from_airtable_record(rec, idx)
+                    model = mapped[1] if mapped is not None else None
+                else:
+                    model = booking_from_airtable_record(rec)
+            except Exception:
+                # Malformed records are skipped, as in the full import
+                continue
+            if model is not None:
+                models.append(model)
+
+        raw_source = f"airtable:{self.table}"
+        if self.kind == "leads":
+            result = self.repo.upsert_leads(models, raw_source=raw_source)
+        else:
+            result = self.repo.upsert_bookings(models, raw_source=raw_source)
+        written = result["inserted"] + result["updated"]
+        return {"fetched": len(records), "written": written, "skipped": len(records) - written}
+
+    def next_cursor(self, cursor: Optional[str], started_at: datetime, progress: Dict[str, Any]) -> Optional[str]:
+        return started_at.isoformat()
+
+
+class IncrementalSyncEngine:
+    """Runs sources concurrently, writing their records in batches.
+
+    ``client_factory`` builds the ``ThrottledClient`` shared by the sources
+    of one ``sync_all`` call (defaults to the shared pooled session).
+    """
+
+    def __init__(
+        self,
+        db_connection,
+        cursor_store: Optional[SyncCursorStore] = None,
+        batch_size: int = DEFAULT_SYNC_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        client_factory: Optional[Callable[[], ThrottledClient]] = None,
+    ):
+        self.db = db_connection
+        self.cursors = cursor_store or SyncCursorStore(db_connection)
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.client_factory = client_factory or (lambda: ThrottledClient(concurrency=self.concurrency))
+
+    async def sync(self, source, client: Optional[ThrottledClient] = None) -> Dict[str, Any]:
+        """Fetch one source's changes since its cursor and write them in batches."""
+        client = client or self.client_factory()
+        cursor = self.cursors.get(source.name)
+        started_at = datetime.now(timezone.utc)
+        # Bounded so fetching cannot run far ahead of the database writes
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        progress: Dict[str, Any] = {}
+        totals = {"fetched": 0, "written": 0, "skipped": 0, "batches": 0}
+
+        async def emit(records: List[Dict[str, Any]]) -> None:
+            if records:
+                await pages.put(records)
+
+        async def produce() -> None:
+            try:
+                await asyncio.gather(
+                    *(source.fetch(client, part, emit) for part in source.partitions(cursor, started_at))
+                )
+            finally:
+                await pages.put(None)
+
+        async def write(batch: List[Dict[str, Any]]) -> None:
+            result = await asyncio.to_thread(source.write, batch, progress)
+            for key in ("fetched", "written", "skipped"):
+                totals[key] += result.get(key, 0)
+            totals["batches"] += 1
+
+        producer = asyncio.create_task(produce())
+        try:
+            batch: List[Dict[str, Any]] = []
+            while True:
+                records = await pages.get()
+                if records is None:
+                    break
+                batch.extend(records)
+                while len(batch) >= self.batch_size:
+                    await write(batch[: self.batch_size])
+                    batch = batch[self.batch_size :]
+            if batch:
+                await write(batch)
+        except BaseException:
+            producer.cancel()
+            raise
+        # Re-raises fetch errors; the cursor then stays put and the next run refetches
+        await producer
+
+        new_cursor = source.next_cursor(cursor, started_at, progress)
+        if new_cursor is not None:
+            self.cursors.set(source.name, new_cursor, {**totals, "started_at": started_at})
+        logger.info(
+            f"Synced {source.name}: fetched {totals['fetched']}, wrote {totals['written']} "
+            f"in {totals['batches']} batches (cursor {cursor} -> {new_cursor})"
+        )
+        return {**totals, "cursor": new_cursor, "previous_cursor": cursor}
+
+    async def sync_all(self, sources: Iterable) -> Dict[str, Dict[str, Any]]:
+        """Sync sources concurrently; a failing source is reported, not raised."""
+        sources = list(sources)
+        client = self.client_factory()
+
+        async def run_one(source) -> Dict[str, Any]:
+            try:
+                return await self.sync(source, client)
+            except Exception as e:
+                logger.error(f"Sync of {source.name} failed: {e}")
+                return {"error": str(e)}
+
+        results = await asyncio.gather(*(run_one(s) for s in sources))
+        summary = dict(zip((s.name for s in sources), results))
+        summary["_http"] = dict(client.stats)
+        return summary
+
+    def run(self, sources: Iterable) -> Dict[str, Dict[str, Any]]:
+        """Blocking entry point for scripts and schedulers."""
+
+        async def main():
+            try:
+                return await self.sync_all(sources)
+            finally:
+                await close_shared_session()
+
+        return asyncio.run(main())
+
+
+def default_sources(db_connection) -> List:
+    """Sources configured from STRIPE_API_KEY, AIRTABLE_API_KEY and AIRTABLE_BASE_ID."""
+    sources: List = []
+    stripe_key = os.getenv("STRIPE_API_KEY", "").strip()
+    if stripe_key:
+        sources.append(StripePayoutSource(stripe_key, CashLedgerService(db_connection)))
+    airtable_key = os.getenv("AIRTABLE_API_KEY")
+    base_id = os.getenv("AIRTABLE_BASE_ID")
+    if airtable_key and base_id:
+        repo = IngestRepository(db_connection)
+        sources.append(AirtableTableSource(airtable_key, base_id, "Main", "leads", repo))
+        sources.append(AirtableTableSource(airtable_key, base_id, "Bookings<>Able", "bookings", repo))
+    return sources
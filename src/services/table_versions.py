@@ -0,0 +1,136 @@
+"""
+Per-table change counters for HTTP cache validators.
+
+``table_versions`` holds one row per tracked table with a ``version`` that
+SQLite triggers bump on every insert, update and delete, and the time of the
+last change. Readers combine the versions of the tables a response depends
+on into an ETag and use the latest change time as Last-Modified; as long as
+neither changes, a cached response is still current.
+
+Tables without an installed counter have no version, and callers must not
+treat responses built from them as cacheable.
+"""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from ..repositories.base import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+TRACKED_TABLES: Tuple[str, ...] = (
+    "sales_orders",
+    "costs",
+    "cash_ledger",
+    "bookings",
+    "leads",
+)
+
+_OPERATIONS = ("insert", "update", "delete")
+
+
+@dataclass(frozen=True)
+class VersionSnapshot:
+    """Versions and last change time of a set of tables."""
+
+    versions: Tuple[Tuple[str, int], ...]
+    last_modified: datetime
+
+    def etag(self, key: str = "") -> str:
+        """Strong ETag for a response identified by ``key`` over these versions."""
+        digest = hashlib.sha1(key.encode("utf-8"))
+        digest.update(self.last_modified.isoformat().encode("utf-8"))
+        for table, version in self.versions:
+            digest.update(f"|{table}:{version}".encode("utf-8"))
+        return f'"{digest.hexdigest()}"'
+
+
+class TableVersions:
+    """Installs and reads the per-table change counters."""
+
+    def __init__(self, db_connection: DatabaseConnection):
+        self.db = db_connection
+
+    @staticmethod
+    def _trigger_name(table: str, operation: str) -> str:
+        return f"trg_version_{table}_{operation}"
+
+    def install(self, tables: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """Create the counter table and (re)create the triggers.
+
+        Tables that do not exist are skipped and reported as False.
+        """
+        installed: Dict[str, bool] = {}
+        now = _utc_now()
+        with self.db.get_connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS table_versions (
+                    table_name TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    changed_at TEXT NOT NULL
+                )
+                """
+            )
+            for table in tables or TRACKED_TABLES:
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                    (table,),
+                ).fetchone()
+                for operation in _OPERATIONS:
+                    conn.execute(f"DROP TRIGGER IF EXISTS {self._trigger_name(table, operation)}")
+                if not exists:
+                    conn.execute("DELETE FROM table_versions WHERE table_name = ?", (table,))
+                    installed[table] = False
+                    continue
+
+                for operation in _OPERATIONS:
+                    conn.execute(
+                        f"CREATE TRIGGER {self._trigger_name(table, operation)} "
+                        f"AFTER {operation.upper()} ON {table} BEGIN "
+                        "UPDATE table_versions SET version = version + 1, "
+                        "changed_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now') "
+                        f"WHERE table_name = '{table}'; END"
+                    )
+                conn.execute(
+                    """
+                    INSERT INTO table_versions (table_name, version, changed_at)
+                    VALUES (?, 0, ?)
+                    ON CONFLICT(table_name) DO NOTHING
+                    """,
+                    (table, now),
+                )
+                installed[table] = True
+        return installed
+
+    def snapshot(self, tables: Sequence[str]) -> Optional[VersionSnapshot]:
+        """Current versions of ``tables``, or None if any of them is untracked."""
+        placeholders = ", ".join("?" for _ in tables)
+        try:
+            with self.db.get_connection(readonly=True) as conn:
+                rows = conn.execute(
+                    f"SELECT table_name, version, changed_at FROM table_versions "
+                    f"WHERE table_name IN ({placeholders})",
+                    list(tables),
+                ).fetchall()
+        except Exception as e:
+            logger.debug("Table versions unavailable: %s", e)
+            return None
+        if len(rows) != len(set(tables)):
+            return None
+        rows = sorted(rows, key=lambda r: r["table_name"])
+        return VersionSnapshot(
+            versions=tuple((r["table_name"], int(r["version"])) for r in rows),
+            last_modified=max(_parse_timestamp(r["changed_at"]) for r in rows),
+        )
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
@@ -0,0 +1,499 @@
+"""
+Batched, idempotent ingestion of payment webhooks (Zapier, Stripe, wires).
+
+Requests put events on a bounded in-memory queue. A single writer thread
+drains it and commits events in batches, one transaction per batch, once
+``batch_size`` events are waiting or ``flush_interval`` has passed since the
+first one. Each submit returns a future that resolves when its batch has
+committed. The HTTP endpoints await that future, so a 202 means the event is
+on disk, while concurrent deliveries still share one commit.
+
+Every event has an idempotency key. It is taken from the ``Idempotency-Key``
+header, or the payload's ``idempotency_key``/``event_id``/``id``. Keys are
+the primary key of ``webhook_events``; a retried delivery with the same key
+is recorded as a duplicate and writes no second cost row. Deliveries without
+an explicit key get a unique one and are never deduplicated: two wires with
+the same amount, date and description are two payments. The writer purges
+keys older than ``DEFAULT_KEY_RETENTION`` every ``PURGE_INTERVAL``.
+
+When the queue is full, ``submit`` raises ``QueueFullError`` rather than
+queueing without bound. ``metrics()`` reports queue depth and rejections so
+the back-pressure is visible.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from ..repositories.base import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 10_000
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 0.001
+# Longest the writer blocks on the queue before re-checking for shutdown
+_POLL_INTERVAL = 0.1
+# How long purge() keeps idempotency keys; Stripe retries for up to 3 days
+DEFAULT_KEY_RETENTION = timedelta(days=30)
+# Seconds between the writer's purges of expired idempotency keys
+PURGE_INTERVAL = 3600.0
+
+INCOMING_CATEGORIES = {
+    "incoming_stripe_payout": "Cash In – Stripe",
+    "incoming_wire": "Cash In – Wire",
+}
+SUPPORTED_EVENT_TYPES = frozenset(INCOMING_CATEGORIES) | {"outgoing_payment"}
+
+# Columns filled for a webhook cost row, when the costs table has them
+_COST_COLUMNS = (
+    "name",
+    "amount",
+    "currency",
+    "category",
+    "cost_date",
+    "description",
+    "is_recurring",
+)
+
+
+class WebhookError(Exception):
+    """A webhook payload cannot be ingested."""
+
+
+class QueueFullError(WebhookError):
+    """The ingestion queue is at capacity; the sender should retry later."""
+
+
+def parse_date(date_str: Optional[str]) -> str:
+    """Parse date string into YYYY-MM-DD format."""
+    if not date_str:
+        return datetime.now().strftime("%Y-%m-%d")
+    try:
+        # Try parsing ISO format
+        dt = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+        return dt.strftime("%Y-%m-%d")
+    except ValueError:
+        # Fallback to current date if parsing fails
+        return datetime.now().strftime("%Y-%m-%d")
+
+
+def get_category_for_recipient(recipient: str) -> str:
+    """Map recipient to cost category."""
+    recipient = str(recipient).lower()
+    if "google" in recipient:
+        return "Marketing"
+    elif "costa" in recipient:
+        return "Operations"
+    elif "agent" in recipient:
+        return "Admin"
+    elif "us" in recipient:
+        return "Operations"
+    elif "supplier" in recipient:
+        return "Inventory/COGS"
+    return "Other"
+
+
+def idempotency_key(payload: Dict[str, Any], header: Optional[str] = None) -> str:
+    """Key identifying one delivery: explicit key or event id, else a unique key.
+
+    Payloads are not hashed: identical keyless payloads can be separate
+    payments, so they must not be merged.
+    """
+    explicit = (
+        header
+        or payload.get("idempotency_key")
+        or payload.get("event_id")
+        or payload.get("id")
+    )
+    if explicit:
+        return str(explicit)
+    return "auto:" + uuid.uuid4().hex
+
+
+@dataclass
+class WebhookEvent:
+    """A validated webhook with its idempotency key and cost record."""
+
+    key: str
+    event_type: str
+    payload: Dict[str, Any]
+    cost_record: Dict[str, Any]
+    received_at: float = field(default_factory=time.time)
+    future: Future = field(default_factory=Future)
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any], key: Optional[str] = None) -> "WebhookEvent":
+        event_type = payload.get("type")
+        if not event_type:
+            raise WebhookError("Missing 'type' in payload")
+        if event_type not in SUPPORTED_EVENT_TYPES:
+            raise WebhookError(f"Unsupported event type: {event_type}")
+        if event_type == "outgoing_payment":
+            category = get_category_for_recipient(payload.get("to", ""))
+        else:
+            category = INCOMING_CATEGORIES[event_type]
+        try:
+            amount = abs(float(payload.get("amount", 0)))  # Ensure positive amount
+        except (TypeError, ValueError):
+            raise WebhookError(f"Invalid amount: {payload.get('amount')!r}")
+        return cls(
+            key=idempotency_key(payload, key),
+            event_type=event_type,
+            payload=payload,
+            cost_record={
+                "name": payload.get("description", "Webhook Event"),
+                "amount": amount,
+                "currency": payload.get("currency", "USD"),
+                "category": category,
+                "cost_date": parse_date(payload.get("date")),
+                "description": payload.get("description", ""),
+                "is_recurring": 0,
+            },
+        )
+
+
+class WebhookIngestor:
+    """Bounded queue plus a background writer committing events in batches."""
+
+    def __init__(
+        self,
+        db_connection: DatabaseConnection,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    ):
+        self.db = db_connection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[WebhookEvent]" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._stats_lock = threading.Lock()
+        self._cost_insert: Optional[str] = None
+        self._cost_columns: List[str] = []
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "duplicates": 0,
+            "rejected": 0,
+            "failed": 0,
+            "batches": 0,
+            "max_depth": 0,
+            "last_batch_size": 0,
+            "last_flush_ms": 0.0,
+            "max_wait_ms": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Schema
+    # ------------------------------------------------------------------
+    def ensure_schema(self) -> None:
+        """Create the event table (and a costs table if none exists yet)."""
+        with self.db.get_connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS webhook_events (
+                    idempotency_key TEXT PRIMARY KEY,
+                    event_type TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    received_at TEXT NOT NULL,
+                    processed_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_webhook_events_processed "
+                "ON webhook_events(processed_at)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS costs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    currency TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    cost_date TEXT NOT NULL,
+                    description TEXT,
+                    is_recurring INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            cur = conn.cursor()
+            cur.row_factory = None
+            columns = {
+                row[1]: (row[2] or "").upper()
+                for row in cur.execute("PRAGMA table_info(costs)").fetchall()
+            }
+
+        # Costs tables from the migrations use TEXT ids the writer must supply
+        names = [c for c in _COST_COLUMNS if c in columns]
+        if "TEXT" in columns.get("id", ""):
+            names.insert(0, "id")
+        self._cost_columns = names
+        self._cost_insert = (
+            f"INSERT INTO costs ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)})"
+        )
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> None:
+        if self._running:
+            return
+        if self._cost_insert is None:
+            self.ensure_schema()
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._writer_loop, name="webhook-writer", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            "Webhook writer started (batch %d, flush %.0fms)",
+            self.batch_size,
+            self.flush_interval * 1000,
+        )
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Stop accepting events and flush whatever is still queued."""
+        if not self._running:
+            return
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        # Events that raced with shutdown are failed so their senders retry
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            event.future.set_exception(WebhookError("Webhook ingestion stopped"))
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+    def submit(
+        self,
+        payload: Dict[str, Any],
+        key: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Future:
+        """Queue an event; the future resolves once its batch has committed.
+
+        Raises ``WebhookError`` for invalid payloads and ``QueueFullError``
+        when the queue stays full for ``timeout`` seconds (default: don't wait).
+        """
+        if not self._running:
+            raise WebhookError("Webhook ingestion is not running")
+        event = WebhookEvent.from_payload(payload, key)
+        try:
+            if timeout:
+                self._queue.put(event, timeout=timeout)
+            else:
+                self._queue.put_nowait(event)
+        except queue.Full:
+            with self._stats_lock:
+                self.stats["rejected"] += 1
+            raise QueueFullError("Webhook queue is full")
+        with self._stats_lock:
+            self.stats["enqueued"] += 1
+            self.stats["max_depth"] = max(self.stats["max_depth"], self._queue.qsize())
+        return event.future
+
+    def ingest(
+        self, payload: Dict[str, Any], key: Optional[str] = None, timeout: Optional[float] = 30.0
+    ) -> Dict[str, Any]:
+        """Submit and block until the event is committed."""
+        return self.submit(payload, key, timeout=timeout).result(timeout)
+
+    async def ingest_async(self, payload: Dict[str, Any], key: Optional[str] = None) -> Dict[str, Any]:
+        """Submit without blocking the event loop and await the commit."""
+        return await asyncio.wrap_future(self.submit(payload, key))
+
+    # ------------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------------
+    def _writer_loop(self) -> None:
+        last_purge = float("-inf")
+        while self._running or not self._queue.empty():
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            if time.monotonic() - last_purge >= PURGE_INTERVAL:
+                last_purge = time.monotonic()
+                self._safe_purge()
+
+    def _safe_purge(self) -> None:
+        try:
+            removed = self.purge()
+        except Exception as e:
+            logger.warning("Webhook key purge failed: %s", e)
+            return
+        if removed:
+            logger.info("Purged %d expired webhook idempotency keys", removed)
+
+    def _collect(self) -> List[WebhookEvent]:
+        """Block for the first event, then gather until size or time trigger."""
+        try:
+            first = self._queue.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._running:
+                # Take what is already queued without waiting
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+                continue
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, _POLL_INTERVAL)))
+            except queue.Empty:
+                continue
+        return batch
+
+    def _cost_params(self, event: WebhookEvent) -> tuple:
+        record = event.cost_record
+        values = []
+        for column in self._cost_columns:
+            if column == "id":
+                values.append("wh_" + hashlib.sha1(event.key.encode("utf-8")).hexdigest()[:24])
+            else:
+                values.append(record[column])
+        return tuple(values)
+
+    def _flush(self, batch: List[WebhookEvent]) -> None:
+        started = time.perf_counter()
+        processed_at = datetime.now(timezone.utc).isoformat()
+        outcomes: Dict[str, str] = {}
+        try:
+            with self.db.get_connection() as conn:
+                cur = conn.cursor()
+                new_costs = []
+                for event in batch:
+                    if event.key in outcomes:
+                        continue
+                    cur.execute(
+                        """
+                        INSERT OR IGNORE INTO webhook_events
+                            (idempotency_key, event_type, payload, received_at, processed_at)
+                        VALUES (?, ?, ?, ?, ?)
+                        """,
+                        (
+                            event.key,
+                            event.event_type,
+                            json.dumps(event.payload, default=str),
+                            datetime.fromtimestamp(event.received_at, timezone.utc).isoformat(),
+                            processed_at,
+                        ),
+                    )
+                    if cur.rowcount == 1:
+                        outcomes[event.key] = "accepted"
+                        new_costs.append(self._cost_params(event))
+                    else:
+                        outcomes[event.key] = "duplicate"
+                if new_costs:
+                    cur.executemany(self._cost_insert, new_costs)
+        except Exception as e:
+            logger.error("Webhook batch of %d failed: %s", len(batch), e)
+            with self._stats_lock:
+                self.stats["failed"] += len(batch)
+            for event in batch:
+                if not event.future.done():
+                    event.future.set_exception(e)
+            return
+
+        flush_ms = (time.perf_counter() - started) * 1000
+        now = time.time()
+        duplicates = 0
+        seen = set()
+        for event in batch:
+            status = outcomes[event.key]
+            if event.key in seen or status == "duplicate":
+                status = "duplicate"
+                duplicates += 1
+            seen.add(event.key)
+            event.future.set_result({"status": status, "idempotency_key": event.key})
+        with self._stats_lock:
+            self.stats["batches"] += 1
+            self.stats["written"] += len(batch) - duplicates
+            self.stats["duplicates"] += duplicates
+            self.stats["last_batch_size"] = len(batch)
+            self.stats["last_flush_ms"] = flush_ms
+            self.stats["max_wait_ms"] = max(
+                self.stats["max_wait_ms"], (now - batch[0].received_at) * 1000
+            )
+
+    # ------------------------------------------------------------------
+    # Maintenance and metrics
+    # ------------------------------------------------------------------
+    def purge(self, max_age: timedelta = DEFAULT_KEY_RETENTION) -> int:
+        """Forget idempotency keys older than ``max_age``; returns rows removed."""
+        cutoff = (datetime.now(timezone.utc) - max_age).isoformat()
+        with self.db.get_connection() as conn:
+            return conn.execute(
+                "DELETE FROM webhook_events WHERE processed_at < ?", (cutoff,)
+            ).rowcount
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, throughput counters and batch timings."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        depth = self._queue.qsize()
+        capacity = self._queue.maxsize
+        stats.update(
+            running=self._running,
+            queue_depth=depth,
+            queue_capacity=capacity,
+            queue_utilization=depth / capacity if capacity else 0.0,
+            avg_batch_size=(
+                (stats["written"] + stats["duplicates"]) / stats["batches"]
+                if stats["batches"]
+                else 0.0
+            ),
+        )
+        return stats
+
+
+_default_ingestor: Optional[WebhookIngestor] = None
+_default_ingestor_lock = threading.Lock()
+
+
+def get_webhook_ingestor() -> WebhookIngestor:
+    """Process-wide ingestor on the application database, started on first use."""
+    global _default_ingestor
+    with _default_ingestor_lock:
+        if _default_ingestor is None:
+            from ..container import get_container
+
+            _default_ingestor = WebhookIngestor(get_container().get_db_connection())
+        if not _default_ingestor.running:
+            _default_ingestor.start()
+        return _default_ingestor
+
+
+def shutdown_webhook_ingestor() -> None:
+    global _default_ingestor
+    with _default_ingestor_lock:
+        if _default_ingestor is not None:
+            _default_ingestor.stop()
+            _default_ingestor = None
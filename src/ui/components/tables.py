@@ -12,6 +12,15 @@ import numpy as np
 import io
 import base64
 
+from src.services.report_export import (
+    FILE_EXTENSIONS,
+    MEDIA_TYPES,
+    export_bytes,
+    frame_chunks,
+    pa,
+)
+from src.services.reporting_service import ReportFormat
+
 
 class BaseTable:
     """Base table component with common functionality"""
@@ -36,26 +45,31 @@ class BaseTable:
 
     @staticmethod
     def _add_export_functionality(df: pd.DataFrame, filename: str = "data"):
-        """Add export buttons for CSV and Excel"""
-        col1, col2, col3 = st.columns([1, 1, 2])
+        """Add download buttons for CSV, Excel and Parquet.
 
-        with col1:
-            # CSV Export
-            csv = df.to_csv(index=False)
-            b64 = base64.b64encode(csv.encode()).decode()
-            href = f'<a href="data:file/csv;base64,{b64}" download="{filename}.csv">📄 Download CSV</a>'
-            st.markdown(href, unsafe_allow_html=True)
+        Each file is exported chunk by chunk (see ``write_export``) and handed
+        to its button as in-memory bytes rather than built up as a base64
+        string in the page. Callable ``data`` would defer the export to the
+        click, but only recent Streamlit releases accept it.
+        """
+        col1, col2, col3 = st.columns([1, 1, 2])
 
-        with col2:
-            # Excel Export
-            buffer = io.BytesIO()
-            with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                df.to_excel(writer, sheet_name="Data", index=False)
-
-            excel_data = buffer.getvalue()
-            b64 = base64.b64encode(excel_data).decode()
-            href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename}.xlsx">📊 Download Excel</a>'
-            st.markdown(href, unsafe_allow_html=True)
+        exports = [
+            (col1, ReportFormat.CSV, "📄 Download CSV"),
+            (col2, ReportFormat.EXCEL, "📊 Download Excel"),
+        ]
+        if pa is not None:
+            exports.append((col3, ReportFormat.PARQUET, "🗄️ Download Parquet"))
+
+        for column, format_type, label in exports:
+            with column:
+                st.download_button(
+                    label,
+                    data=export_bytes(frame_chunks(df), format_type),
+                    file_name=f"{filename}.{FILE_EXTENSIONS[format_type]}",
+                    mime=MEDIA_TYPES[format_type],
+                    key=f"export_{filename}_{format_type}",
+                )
 
 
 class TransactionTable:
@@ -0,0 +1,472 @@
+"""
+Off-thread logging backend shared by the application loggers.
+
+Loggers get a ``QueueHandler`` whose only work on the calling thread is a
+cheap copy of the record and a put on a bounded queue. A ``QueueListener``
+thread takes records off the queue in batches, runs the optional ``mask``
+hook (PII redaction), formats them (JSON encoding) and hands each handler
+the whole batch, so file and stream handlers write and flush once per batch
+instead of once per record.
+
+High-volume debug records are thinned on the calling thread before they are
+queued: a per-logger token bucket caps them at ``debug_rate_limit`` records
+per second and ``debug_sample_rate`` keeps that share of each repeated
+message. When the queue is full, records below WARNING are dropped at once
+and WARNING and above wait up to ``put_timeout`` for room before being
+dropped. Every suppressed record is counted in ``metrics()``, and the
+listener writes a notice to its handlers when records were lost to a full
+queue. Pipelines are stopped from an ``atexit`` hook; the API lifespan stops
+them too.
+"""
+
+import atexit
+import bisect
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+DEFAULT_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_PUT_TIMEOUT = 0.005
+# Debug records per second each logger may emit; 0 disables the limit
+DEFAULT_DEBUG_RATE_LIMIT = float(os.getenv("LOG_DEBUG_RATE_LIMIT", "200"))
+# Share of repeated debug messages that are kept
+DEFAULT_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+# Minimum seconds between "records dropped" notices
+DROP_NOTICE_INTERVAL = 10.0
+# Sampling counters are reset once this many distinct messages were seen
+_MAX_SAMPLE_KEYS = 10_000
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_pipelines: "weakref.WeakSet[LogPipeline]" = weakref.WeakSet()
+
+
+class DebugThrottle(logging.Filter):
+    """Rate-limits and samples records at or below ``level``."""
+
+    def __init__(
+        self,
+        rate_limit: float = DEFAULT_DEBUG_RATE_LIMIT,
+        sample_rate: float = DEFAULT_DEBUG_SAMPLE_RATE,
+        level: int = logging.DEBUG,
+    ):
+        super().__init__()
+        self.rate_limit = rate_limit
+        # Keep one in every ``sample_every`` occurrences of a message
+        self.sample_every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+        self.level = level
+        self.rate_limited = 0
+        self.sampled_out = 0
+        self._buckets: Dict[str, List[float]] = {}
+        self._seen: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.level:
+            return True
+        with self._lock:
+            if self.sample_every != 1 and not self._sample(record):
+                self.sampled_out += 1
+                return False
+            if self.rate_limit > 0 and not self._take_token(record.name):
+                self.rate_limited += 1
+                return False
+        return True
+
+    def _sample(self, record: logging.LogRecord) -> bool:
+        if not self.sample_every:
+            return False
+        msg = record.msg
+        # structlog events carry their message in the event dict
+        template = msg.get("event") if isinstance(msg, dict) else msg
+        key = (record.name, str(template))
+        if len(self._seen) >= _MAX_SAMPLE_KEYS and key not in self._seen:
+            self._seen.clear()
+        count = self._seen.get(key, 0)
+        self._seen[key] = count + 1
+        return count % self.sample_every == 0
+
+    def _take_token(self, name: str) -> bool:
+        now = time.monotonic()
+        bucket = self._buckets.get(name)
+        if bucket is None:
+            bucket = self._buckets[name] = [self.rate_limit, now]
+        tokens = min(self.rate_limit, bucket[0] + (now - bucket[1]) * self.rate_limit)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return False
+        bucket[0] = tokens - 1
+        return True
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    """StreamHandler that writes a batch of records with one write and flush."""
+
+    def emit_batch(self, records: Sequence[logging.LogRecord]) -> None:
+        data = "".join(self.format(record) + self.terminator for record in records)
+        self.stream.write(data)
+        self.flush()
+
+
+class BatchRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that writes a batch of records with one write and flush."""
+
+    def emit_batch(self, records: Sequence[logging.LogRecord]) -> None:
+        data = "".join(self.format(record) + self.terminator for record in records)
+        if self.stream is None:
+            if self.mode != "w" or not self._closed:
+                self.stream = self._open()
+        if self.stream is None:
+            return
+        if self.maxBytes > 0:
+            position = self.stream.tell()
+            if position and position + len(data) >= self.maxBytes:
+                self.doRollover()
+        self.stream.write(data)
+        self.stream.flush()
+
+
+class PipelineHandler(QueueHandler):
+    """QueueHandler feeding a LogPipeline; writes inline when it is stopped."""
+
+    def __init__(self, pipeline: "LogPipeline"):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike QueueHandler.prepare, nothing is formatted here. The copy keeps
+        # masking on the listener away from handlers that share the record, and
+        # merging the arguments now pins mutable arguments to their current value.
+        clone = logging.LogRecord.__new__(logging.LogRecord)
+        clone.__dict__.update(record.__dict__)
+        record = clone
+        if record.args and isinstance(record.msg, str):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.pipeline.put(record)
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # The queue is thread-safe, so emit skips the handler lock
+        rv = self.filter(record)
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            prepared = self.prepare(record)
+            if self.pipeline.running:
+                self.enqueue(prepared)
+            else:
+                self.pipeline.handle_batch([prepared])
+        except Exception:
+            self.handleError(record)
+
+
+class _BatchingListener(QueueListener):
+    """QueueListener that drains the queue in batches."""
+
+    def __init__(self, pipeline: "LogPipeline"):
+        super().__init__(pipeline.queue, respect_handler_level=True)
+        self.pipeline = pipeline
+
+    def enqueue_sentinel(self) -> None:
+        # Blocks rather than failing when the queue is full; the thread drains it
+        self.queue.put(self._sentinel)
+
+    def _monitor(self) -> None:
+        q = self.queue
+        stopping = False
+        while not stopping:
+            batch = [q.get()]
+            while len(batch) < self.pipeline.batch_size:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            if self._sentinel in batch:
+                stopping = True
+                batch = [record for record in batch if record is not self._sentinel]
+            try:
+                if batch:
+                    self.pipeline.handle_batch(batch)
+            finally:
+                for _ in range(len(batch) + stopping):
+                    q.task_done()
+
+
+class LogPipeline:
+    """Bounded queue plus a listener thread that masks, formats and writes records."""
+
+    def __init__(
+        self,
+        handlers: Sequence[logging.Handler],
+        name: str = "app",
+        mask: Optional[Callable[[logging.LogRecord], None]] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        put_timeout: float = DEFAULT_PUT_TIMEOUT,
+        debug_rate_limit: float = DEFAULT_DEBUG_RATE_LIMIT,
+        debug_sample_rate: float = DEFAULT_DEBUG_SAMPLE_RATE,
+    ):
+        self.handlers = list(handlers)
+        self.name = name
+        self.mask = mask
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+        self.throttle = DebugThrottle(debug_rate_limit, debug_sample_rate)
+        self.handler = PipelineHandler(self)
+        self.handler.addFilter(self.throttle)
+        self._listener: Optional[_BatchingListener] = None
+        self._stats_lock = threading.Lock()
+        self._mask_failed = False
+        self._last_notice = 0.0
+        self._noticed_drops = 0
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "batches": 0,
+            "max_depth": 0,
+            "last_batch_ms": 0.0,
+        }
+        _pipelines.add(self)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    @property
+    def running(self) -> bool:
+        return self._listener is not None
+
+    def start(self) -> "LogPipeline":
+        if self._listener is None:
+            self._listener = _BatchingListener(self)
+            self._listener.start()
+            self._listener._thread.name = f"log-pipeline-{self.name}"
+        return self
+
+    def stop(self) -> None:
+        """Write everything queued so far, then stop the listener thread."""
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+
+    def close(self) -> None:
+        """Stop the pipeline and close its handlers."""
+        self.stop()
+        for handler in self.handlers:
+            handler.close()
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Block until every queued record has been written."""
+        if not self.running:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def attach(self, *loggers: logging.Logger) -> "LogPipeline":
+        """Route ``loggers`` through this pipeline."""
+        for target in loggers:
+            if self.handler not in target.handlers:
+                target.addHandler(self.handler)
+        return self
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    def put(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            try:
+                if record.levelno < logging.WARNING:
+                    raise
+                self.queue.put(record, timeout=self.put_timeout)
+            except queue.Full:
+                with self._stats_lock:
+                    self.stats["dropped"] += 1
+                return
+        # len() of the underlying deque avoids taking the queue's mutex again
+        depth = len(self.queue.queue)
+        with self._stats_lock:
+            self.stats["enqueued"] += 1
+            if depth > self.stats["max_depth"]:
+                self.stats["max_depth"] = depth
+
+    # ------------------------------------------------------------------
+    # Listener side
+    # ------------------------------------------------------------------
+    def handle_batch(self, records: Sequence[logging.LogRecord]) -> None:
+        """Mask, format and write ``records``; runs on the listener thread."""
+        started = time.perf_counter()
+        if self.mask is not None:
+            for record in records:
+                self._mask(record)
+        notice = self._drop_notice()
+        if notice is not None:
+            records = [*records, notice]
+
+        for handler in self.handlers:
+            selected = [
+                record
+                for record in records
+                if record.levelno >= handler.level and handler.filter(record)
+            ]
+            if not selected:
+                continue
+            emit_batch = getattr(handler, "emit_batch", None)
+            if emit_batch is None:
+                for record in selected:
+                    handler.handle(record)
+                continue
+            handler.acquire()
+            try:
+                emit_batch(selected)
+            except Exception:
+                handler.handleError(selected[-1])
+            finally:
+                handler.release()
+
+        with self._stats_lock:
+            self.stats["batches"] += 1
+            self.stats["written"] += len(records)
+            self.stats["last_batch_ms"] = (time.perf_counter() - started) * 1000
+
+    def _mask(self, record: logging.LogRecord) -> None:
+        try:
+            self.mask(record)
+        except Exception as e:
+            # Reported once; the record is written unmasked rather than lost
+            if not self._mask_failed:
+                self._mask_failed = True
+                print(f"Warning: log masking failed in pipeline {self.name}: {e}")
+
+    def _drop_notice(self) -> Optional[logging.LogRecord]:
+        now = time.monotonic()
+        if now - self._last_notice < DROP_NOTICE_INTERVAL:
+            return None
+        with self._stats_lock:
+            dropped = self.stats["dropped"]
+        if dropped == self._noticed_drops:
+            return None
+        lost = dropped - self._noticed_drops
+        self._noticed_drops = dropped
+        self._last_notice = now
+        return logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            f"Log pipeline {self.name} dropped {lost} records, queue was full",
+            None, None,
+        )
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, throughput and suppressed-record counters."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        depth = self.queue.qsize()
+        capacity = self.queue.maxsize
+        stats.update(
+            running=self.running,
+            rate_limited=self.throttle.rate_limited,
+            sampled_out=self.throttle.sampled_out,
+            queue_depth=depth,
+            queue_capacity=capacity,
+            queue_utilization=depth / capacity if capacity else 0.0,
+        )
+        return stats
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of call durations in seconds."""
+
+    __slots__ = ("counts", "count", "total", "min", "max", "failures")
+
+    def __init__(self):
+        # One slot per bucket plus the overflow bucket
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.failures = 0
+
+    def observe(self, duration: float, success: bool = True) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+        self.count += 1
+        self.total += duration
+        if duration < self.min:
+            self.min = duration
+        if duration > self.max:
+            self.max = duration
+        if not success:
+            self.failures += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile, capped at max."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                if index < len(LATENCY_BUCKETS):
+                    return min(LATENCY_BUCKETS[index], self.max)
+                break
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound:g}": count for bound, count in zip(LATENCY_BUCKETS, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.total, 6),
+            "min_seconds": round(self.min, 6) if self.count else 0.0,
+            "max_seconds": round(self.max, 6),
+            "p50_seconds": round(self.quantile(0.5), 6),
+            "p95_seconds": round(self.quantile(0.95), 6),
+            "p99_seconds": round(self.quantile(0.99), 6),
+            "failures": self.failures,
+            "buckets": buckets,
+        }
+
+
+def flush_log_pipelines(timeout: Optional[float] = 5.0) -> None:
+    """Wait for every running pipeline to write what it has queued."""
+    for pipeline in list(_pipelines):
+        pipeline.flush(timeout)
+
+
+def shutdown_log_pipelines() -> None:
+    """Stop every pipeline, writing queued records first."""
+    for pipeline in list(_pipelines):
+        try:
+            pipeline.stop()
+        except Exception as e:
+            print(f"Warning: log pipeline {pipeline.name} failed to stop cleanly: {e}")
+
+
+atexit.register(shutdown_log_pipelines)
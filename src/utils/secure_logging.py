@@ -13,6 +13,38 @@ from ..security.pii_protection import (
     get_pii_detector,
 )
 
+# Application loggers that get the PII filter when masking is not off-thread
+APP_LOGGERS = [
+    "cashflowapp",
+    "src",
+    "services",
+    "security",
+    "models",
+    "repositories",
+    "utils",
+    "api",
+    "ui",
+]
+COMPONENT_LOGGERS = [
+    "src.services",
+    "src.security",
+    "src.repositories",
+    "src.models",
+    "src.ui",
+    "streamlit",
+    "requests",
+    "urllib3",
+]
+
+
+def _attach_filter(pii_filter: logging.Filter, logger_names) -> None:
+    """Add ``pii_filter`` to the named loggers and their existing handlers"""
+    for logger_name in logger_names:
+        logger = logging.getLogger(logger_name)
+        logger.addFilter(pii_filter)
+        for handler in logger.handlers:
+            handler.addFilter(pii_filter)
+
 
 def setup_application_logging():
     """Setup secure logging for the entire application"""
@@ -31,61 +63,24 @@ def setup_application_logging():
         # Initialize structured logger (this sets up the global configuration)
         structured_logger = get_structured_logger()
 
-        # Create PII filter with error handling
-        pii_filter = None
-        try:
-            pii_filter = SecureLoggingFilter()
-        except Exception as e:
-            logging.warning(f"Failed to initialize PII filter: {e}")
-            pii_filter = logging.Filter()  # Fallback to no-op filter
-
-        # Only apply PII filter to our application loggers, not the root logger
-        app_loggers = [
-            'cashflowapp',
-            'src',
-            'services',
-            'security',
-            'models',
-            'repositories',
-            'utils',
-            'api',
-            'ui'
-        ]
-
-        # Apply filter to application loggers
-        for logger_name in app_loggers:
-            logger = logging.getLogger(logger_name)
-            logger.addFilter(pii_filter)
-            
-            # Also apply to any existing handlers of these loggers
-            for handler in logger.handlers:
-                handler.addFilter(pii_filter)
+        # The root pipeline masks records on its listener thread. Without it
+        # (root was configured elsewhere) mask on the calling thread instead.
+        if structured_logger.pipeline is None:
+            # Create PII filter with error handling
+            try:
+                pii_filter = SecureLoggingFilter()
+            except Exception as e:
+                logging.warning(f"Failed to initialize PII filter: {e}")
+                pii_filter = logging.Filter()  # Fallback to no-op filter
+            _attach_filter(pii_filter, APP_LOGGERS + COMPONENT_LOGGERS)
 
     except Exception as e:
         logging.error(f"Error setting up application logging: {e}", exc_info=True)
         raise
 
-    # Configure specific loggers for different components
-    component_loggers = [
-        "src.services",
-        "src.security",
-        "src.repositories",
-        "src.models",
-        "src.ui",
-        "streamlit",
-        "requests",
-        "urllib3",
-    ]
-
-    for logger_name in component_loggers:
-        logger = logging.getLogger(logger_name)
-        logger.addFilter(pii_filter)
-
-        # Set appropriate levels
-        if logger_name in ["requests", "urllib3"]:
-            logger.setLevel(logging.WARNING)  # Reduce noise from HTTP libraries
-        elif logger_name == "streamlit":
-            logger.setLevel(logging.WARNING)  # Reduce Streamlit noise
+    # Reduce noise from HTTP libraries and Streamlit
+    for logger_name in ("streamlit", "requests", "urllib3"):
+        logging.getLogger(logger_name).setLevel(logging.WARNING)
 
     return structured_logger.get_logger("application")
 
@@ -0,0 +1,166 @@
+"""
+Load test of the analytics API: cold queries, cached bodies and 304s.
+
+Concurrent clients hit /api/v1/analytics/daily-trends over an ASGI transport
+(no network). Three passes: distinct ranges that must be computed, repeats
+served from the ETag-keyed body cache, and revalidations answered with 304.
+The 200k row case runs by default; set CASHFLOW_FULL_BENCH=1 for 1M rows.
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import httpx
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi import FastAPI
+
+from src.api import analytics_endpoints
+from src.api.analytics_endpoints import AnalyticsAPI, get_analytics_api, router
+from src.services.table_versions import TableVersions
+
+FULL_BENCH = os.environ.get("CASHFLOW_FULL_BENCH") == "1"
+SIZES = [200_000] + ([1_000_000] if FULL_BENCH else [])
+CLIENTS = 16
+REQUESTS_PER_CLIENT = 4
+
+
+class _FileDB:
+    """DatabaseConnection stand-in with one connection per thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = lambda cur, row: {
+                col[0]: row[idx] for idx, col in enumerate(cur.description)
+            }
+            self.local.conn = conn
+        yield conn
+        conn.commit()
+
+
+def _build_db(path, n, seed=3):
+    rng = np.random.default_rng(seed)
+    days = (np.datetime64("2021-01-01") + rng.integers(0, 4 * 365, n)).astype(str)
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE sales_orders (id INTEGER PRIMARY KEY, date TEXT, amount_usd REAL);
+        CREATE TABLE costs (id INTEGER PRIMARY KEY, date TEXT, amount_usd REAL);
+        CREATE INDEX idx_sales_orders_date ON sales_orders(date);
+        CREATE INDEX idx_costs_date ON costs(date);
+        """
+    )
+    conn.executemany(
+        "INSERT INTO sales_orders (date, amount_usd) VALUES (?,?)",
+        zip(days, rng.uniform(10, 500, n).round(2)),
+    )
+    conn.executemany(
+        "INSERT INTO costs (date, amount_usd) VALUES (?,?)",
+        zip(days[::-1], rng.uniform(5, 300, n).round(2)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _ranges(count):
+    start = date(2021, 1, 1)
+    return [
+        {
+            "start_date": (start + timedelta(days=7 * i)).isoformat(),
+            "end_date": (start + timedelta(days=7 * i + 364)).isoformat(),
+            "limit": 366,
+        }
+        for i in range(count)
+    ]
+
+
+async def _run(client, requests):
+    latencies = []
+
+    async def worker(batch):
+        for params, headers in batch:
+            t0 = time.perf_counter()
+            response = await client.get(
+                "/api/v1/analytics/daily-trends", params=params, headers=headers
+            )
+            latencies.append(time.perf_counter() - t0)
+            assert response.status_code in (200, 304)
+
+    batches = [requests[i::CLIENTS] for i in range(CLIENTS)]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(batch) for batch in batches))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "rps": len(requests) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_analytics_api_load(tmp_path, n, monkeypatch):
+    path = str(tmp_path / "analytics.db")
+    _build_db(path, n)
+    db = _FileDB(path)
+    TableVersions(db).install()
+
+    monkeypatch.setenv("ANALYTICS_API_WORKERS", "4")
+    analytics_endpoints._response_cache.clear()
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_analytics_api] = lambda: AnalyticsAPI(db)
+
+    total = CLIENTS * REQUESTS_PER_CLIENT
+    ranges = _ranges(total)
+    gzip_headers = {"Accept-Encoding": "gzip"}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            cold = await _run(client, [(params, gzip_headers) for params in ranges])
+            cached = await _run(client, [(params, gzip_headers) for params in ranges])
+            etags = {}
+            for params in ranges[:CLIENTS]:
+                response = await client.get(
+                    "/api/v1/analytics/daily-trends", params=params, headers=gzip_headers
+                )
+                etags[params["start_date"]] = response.headers["etag"]
+            revalidate = await _run(
+                client,
+                [
+                    (params, dict(gzip_headers, **{"If-None-Match": etags[params["start_date"]]}))
+                    for params in ranges[:CLIENTS] * REQUESTS_PER_CLIENT
+                ],
+            )
+            return cold, cached, revalidate
+
+    try:
+        cold, cached, revalidate = asyncio.run(scenario())
+    finally:
+        analytics_endpoints.shutdown_executor()
+
+    for name, stats in (("cold", cold), ("cached", cached), ("304", revalidate)):
+        print(
+            f"\n{n} rows, {CLIENTS} clients, {name}: {stats['rps']:.0f} req/s, "
+            f"p50 {stats['p50_ms']:.1f}ms, p95 {stats['p95_ms']:.1f}ms"
+        )
+
+    assert cached["rps"] > cold["rps"]
+    assert revalidate["rps"] > cold["rps"]
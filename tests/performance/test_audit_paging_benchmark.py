@@ -0,0 +1,86 @@
+"""
+Audit trail paging: OFFSET-style deep pages vs keyset pages on (timestamp, id).
+
+Seeds a year of audit rows and times fetching pages deep into the trail.
+Keyset pages seek straight to the cursor through idx_audit_log_timestamp_id,
+so late pages cost the same as the first one.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.security.auth import AuthManager  # noqa: F401  (resolves the security/services import cycle)
+from src.security.audit import AuditLogger
+from src.security.encryption import DataEncryption, SecureStorage
+
+FULL_BENCH = os.environ.get("CASHFLOW_FULL_BENCH") == "1"
+ROWS = 500_000 if FULL_BENCH else 60_000
+PAGE_SIZE = 100
+PAGES = 50
+
+
+class _FileDB:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+def test_audit_paging(tmp_path):
+    storage = SecureStorage(DataEncryption("benchmark-master-key-0123456789abcdef"))
+    audit = AuditLogger(_FileDB(str(tmp_path / "audit.db")), storage)
+    audit.ensure_schema()
+    sealed = storage.store_sensitive_data("audit", {"api_key": "sk_live_0123456789"})
+    step = timedelta(days=365) / ROWS
+    start = datetime(2025, 1, 1)
+    audit.db.conn.executemany(
+        "INSERT INTO audit_log (timestamp, user_id, action, entity_type, entity_id, "
+        "level, details, details_encrypted) VALUES (?, ?, 'update', 'transaction', ?, 'info', ?, 1)",
+        (((start + step * i).isoformat(), f"user{i % 20}", str(i), sealed) for i in range(ROWS)),
+    )
+    audit.db.conn.commit()
+
+    # Deep pages the old way: sort the trail and skip everything before the page
+    offset = ROWS // 2
+    started = time.perf_counter()
+    for page in range(PAGES // 10):
+        audit.db.conn.execute(
+            "SELECT * FROM audit_log NOT INDEXED ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+            (PAGE_SIZE, offset + page * PAGE_SIZE),
+        ).fetchall()
+    offset_ms = (time.perf_counter() - started) * 1000 / (PAGES // 10)
+
+    # Walk the trail with cursors up to the same depth; time the last pages
+    cursor = None
+    timings = []
+    for _ in range(offset // PAGE_SIZE + PAGES):
+        started = time.perf_counter()
+        page = audit.get_audit_page(limit=PAGE_SIZE, cursor=cursor)
+        timings.append(time.perf_counter() - started)
+        cursor = page.next_cursor
+    keyset_ms = sum(timings[-PAGES:]) * 1000 / PAGES
+
+    started = time.perf_counter()
+    audit.decrypt_details(page.records)
+    decrypt_ms = (time.perf_counter() - started) * 1000
+
+    print(
+        f"\n{ROWS} audit rows, {PAGE_SIZE} rows/page, pages around row {offset}\n"
+        f"sorted scan + OFFSET: {offset_ms:8.2f} ms/page\n"
+        f"keyset (ts, id):      {keyset_ms:8.2f} ms/page\n"
+        f"batch decrypt page:   {decrypt_ms:8.2f} ms"
+    )
+    assert page.records
+    assert keyset_ms < offset_ms
@@ -0,0 +1,76 @@
+"""
+Audit logging latency on the request path: synchronous vs background writer.
+
+The synchronous AuditLogger encrypts, commits one transaction and writes a
+masked log line per call. With a writer the call only queues the entry; the
+benchmark reports per-call latency and the time to drain the queue.
+"""
+
+import logging
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.security.auth import AuthManager  # noqa: F401  (resolves the security/services import cycle)
+from src.security.audit import AuditAction, AuditLogger
+from src.security.encryption import DataEncryption, SecureStorage
+
+FULL_BENCH = os.environ.get("CASHFLOW_FULL_BENCH") == "1"
+CALLS = 20_000 if FULL_BENCH else 2_000
+
+
+class _FileDB:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+def _log(audit, count):
+    started = time.perf_counter()
+    for i in range(count):
+        audit.log_financial_operation(
+            "user@example.com",
+            AuditAction.UPDATE,
+            "transaction",
+            str(i),
+            amount=125.0,
+            currency="EUR",
+            details={"api_key": "sk_live_0123456789", "note": "invoice 42"},
+        )
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def test_audit_call_latency(tmp_path):
+    # Keep the masked log lines out of the measurement's output
+    logging.getLogger("src.security").setLevel(logging.WARNING)
+    storage = SecureStorage(DataEncryption("benchmark-master-key-0123456789abcdef"))
+
+    sync_audit = AuditLogger(_FileDB(str(tmp_path / "sync.db")), storage)
+    sync_audit.ensure_schema()
+    sync_us = _log(sync_audit, CALLS)
+
+    async_audit = AuditLogger(_FileDB(str(tmp_path / "async.db")), storage)
+    writer = async_audit.start_writer(spill_path=str(tmp_path / "spill.jsonl"))
+    async_us = _log(async_audit, CALLS)
+    started = time.perf_counter()
+    writer.stop()
+    drain_ms = (time.perf_counter() - started) * 1000
+    metrics = writer.metrics()
+
+    print(
+        f"\n{CALLS} audit calls\n"
+        f"synchronous:       {sync_us:8.1f} us/call\n"
+        f"background writer: {async_us:8.1f} us/call "
+        f"({metrics['batches']} batches, drained in {drain_ms:.0f} ms after the last call)"
+    )
+    assert metrics["written"] == CALLS
+    assert async_us < sync_us
@@ -0,0 +1,109 @@
+"""
+Bank balance queries: per-account loop vs one grouped query.
+
+The former ``get_account_balances`` ran three queries per active account, so
+the balances page cost 3N round trips. The grouped query reads everything in
+one statement; both use the repository's (account, date, amount) index.
+Daily balances over a quarter are computed from two queries
+instead of one ``get_account_balances`` call per day.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.repositories.bank_repository import BankRepository
+
+FULL_BENCH = os.environ.get("CASHFLOW_FULL_BENCH") == "1"
+ACCOUNTS = 40
+ENTRIES = 1_000_000 if FULL_BENCH else 200_000
+REPEATS = 5
+
+
+class _FileDB:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+def _legacy_balances(conn, as_of):
+    results = []
+    for a in conn.execute("SELECT * FROM bank_accounts WHERE is_active = 1 ORDER BY name").fetchall():
+        ob = conn.execute(
+            "SELECT opening_balance FROM bank_opening_balances WHERE bank_account_id = ?", (a["id"],)
+        ).fetchone() or {}
+        ledger = conn.execute(
+            "SELECT COALESCE(SUM(amount),0) AS net, "
+            "COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END),0) AS inflows, "
+            "COALESCE(SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END),0) AS outflows "
+            "FROM cash_ledger "
+            "WHERE bank_account_id = ? AND entry_date <= ?",
+            (a["id"], as_of),
+        ).fetchone()
+        adj = conn.execute(
+            "SELECT COALESCE(SUM(amount),0) AS total FROM bank_adjustments "
+            "WHERE bank_account_id = ? AND date <= ?",
+            (a["id"], as_of),
+        ).fetchone()
+        results.append(float(ob.get("opening_balance", 0.0) or 0.0) + ledger["net"] + adj["total"])
+    return results
+
+
+def _timed(func, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return result, (time.perf_counter() - start) / repeats
+
+
+def test_bank_balance_queries(tmp_path):
+    db = _FileDB(str(tmp_path / "bank.db"))
+    db.conn.execute("CREATE TABLE cash_ledger (id INTEGER PRIMARY KEY, entry_date TEXT, amount REAL)")
+    repo = BankRepository(db)
+    for i in range(ACCOUNTS):
+        repo.upsert_bank_account({"id": f"acct{i:02d}", "name": f"Account {i:02d}", "currency": "USD"})
+        repo.set_opening_balance(f"acct{i:02d}", "2023-12-31", 10_000.0)
+    rng = np.random.default_rng(7)
+    start = date(2024, 1, 1)
+    day_strings = [(start + timedelta(days=d)).isoformat() for d in range(365)]
+    db.conn.executemany(
+        "INSERT INTO cash_ledger (entry_date, amount, bank_account_id) VALUES (?, ?, ?)",
+        zip(
+            (day_strings[d] for d in rng.integers(0, 365, ENTRIES)),
+            rng.uniform(-500, 800, ENTRIES).round(2).tolist(),
+            (f"acct{a:02d}" for a in rng.integers(0, ACCOUNTS, ENTRIES)),
+        ),
+    )
+    db.conn.commit()
+
+    legacy, legacy_time = _timed(lambda: _legacy_balances(db.conn, "2024-09-30"))
+    grouped, grouped_time = _timed(lambda: repo.get_account_balances("2024-09-30"))
+    assert np.allclose(legacy, [a["current_balance"] for a in grouped])
+
+    quarter = [start + timedelta(days=d) for d in range(334, 365)]
+    _, per_day_time = _timed(lambda: [repo.get_account_balances(d) for d in quarter], repeats=1)
+    daily, daily_time = _timed(lambda: repo.get_daily_balances(quarter[0], quarter[-1]))
+    assert len(daily) == len(quarter) * ACCOUNTS
+
+    print(
+        f"\n{ACCOUNTS} accounts, {ENTRIES} ledger rows\n"
+        f"  balances  per-account: {legacy_time * 1000:8.1f} ms ({3 * ACCOUNTS + 1} queries)\n"
+        f"  balances  grouped:     {grouped_time * 1000:8.1f} ms (1 query)\n"
+        f"  daily x{len(quarter)} per-day:     {per_day_time * 1000:8.1f} ms\n"
+        f"  daily x{len(quarter)} vectorized:  {daily_time * 1000:8.1f} ms"
+    )
+    assert daily_time < per_day_time
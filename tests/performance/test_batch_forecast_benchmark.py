@@ -0,0 +1,65 @@
+"""
+Throughput of the batch forecasting API against per-series generate_forecast
+calls, for 1,000 series x 60 months.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.forecast_service import ForecastMethod, ForecastService
+
+N_SERIES = 1_000
+N_MONTHS = 60
+METHODS = (ForecastMethod.LINEAR, ForecastMethod.EXPONENTIAL, ForecastMethod.SEASONAL)
+
+
+@pytest.mark.performance
+def test_batch_forecast_throughput():
+    rng = np.random.default_rng(2)
+    months = pd.date_range("2020-01-01", periods=N_MONTHS, freq="MS")
+    t = np.arange(N_MONTHS)
+    matrix = (
+        rng.uniform(1_000, 50_000, (N_SERIES, 1)) * (1 + 0.15 * np.sin(2 * np.pi * t / 12))
+        + rng.normal(0, 500, (N_SERIES, N_MONTHS))
+    )
+    service = ForecastService()
+
+    # Per-series baseline on a sample, extrapolated to all series
+    sample = 100
+    t0 = time.perf_counter()
+    for row in matrix[:sample]:
+        history = [{"date": d, "value": v} for d, v in zip(months, row)]
+        for method in METHODS:
+            service.generate_forecast(history, 12, method=method, include_scenarios=False)
+    t_single = (time.perf_counter() - t0) * N_SERIES / sample
+
+    t0 = time.perf_counter()
+    result = service.generate_batch_forecast(matrix, 12, methods=METHODS)
+    t_batch = time.perf_counter() - t0
+
+    long = pd.DataFrame(
+        {
+            "series_id": np.repeat(np.arange(N_SERIES), N_MONTHS),
+            "date": np.tile(months, N_SERIES),
+            "value": matrix.ravel(),
+        }
+    )
+    t0 = time.perf_counter()
+    service.generate_batch_forecast(long, 12, methods=METHODS)
+    t_long = time.perf_counter() - t0
+
+    fits = N_SERIES * len(METHODS)
+    print(
+        f"\nbatch forecast {N_SERIES} series x {N_MONTHS} months x {len(METHODS)} methods: "
+        f"per-series~{t_single:.2f}s array={t_batch * 1000:.1f}ms ({fits / t_batch:,.0f} fits/s) "
+        f"long-format={t_long * 1000:.1f}ms"
+    )
+    assert len(result) == fits * 12
+    assert t_batch < t_single
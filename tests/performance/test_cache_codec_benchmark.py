@@ -0,0 +1,118 @@
+"""
+Payload size and encode/decode time for each CacheService codec.
+
+Compares the legacy JSON-in-JSON envelope against the binary codecs on a
+100k-row cost frame and a nested dict of Decimals. Run with ``-s`` to see
+the table.
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.cache_codecs import CODECS, COMPRESSORS, CacheSerializer, decode_legacy
+
+N_ROWS = 100_000
+
+
+def _legacy_dumps(value):
+    if isinstance(value, pd.DataFrame):
+        return json.dumps(
+            {
+                "type": "dataframe",
+                "data": value.to_json(orient="records", date_format="iso"),
+                "columns": list(value.columns),
+                "index": list(value.index),
+            }
+        )
+    return json.dumps({"type": "json", "value": value}, default=str)
+
+
+def _cost_frame(n):
+    rng = np.random.default_rng(11)
+    return pd.DataFrame(
+        {
+            "date": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 730, n), unit="D"),
+            "category": rng.choice(["rent", "payroll", "ads", "software", "travel"], n),
+            "currency": rng.choice(["USD", "CRC"], n),
+            "amount": np.round(rng.gamma(2.0, 300.0, n), 2),
+            "amount_usd": np.round(rng.gamma(2.0, 300.0, n), 2),
+            "description": [f"Invoice {i:06d}" for i in range(n)],
+        }
+    )
+
+
+def _metrics_dict():
+    start = datetime(2024, 1, 1)
+    return {
+        "generated_at": start,
+        "months": [
+            {
+                "month": (start + timedelta(days=31 * i)).strftime("%Y-%m"),
+                "revenue": Decimal(f"{10000 + i * 37}.25"),
+                "costs": Decimal(f"{7000 + i * 19}.10"),
+                "by_category": {c: Decimal(f"{i * 11}.{i % 100:02d}") for c in ("rent", "ads", "payroll")},
+            }
+            for i in range(500)
+        ],
+    }
+
+
+def _time(fn, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("value_kind", ["dataframe", "dict"])
+def test_codec_benchmark(value_kind):
+    value = _cost_frame(N_ROWS) if value_kind == "dataframe" else _metrics_dict()
+
+    variants = {"legacy-json": None}
+    codec_names = ("arrow", "parquet", "pickle") if value_kind == "dataframe" else ("msgpack", "json", "pickle")
+    for codec in codec_names:
+        if not CODECS[codec].available:
+            continue
+        for compression in (None, "zstd", "lz4"):
+            if compression and not COMPRESSORS[compression].available:
+                continue
+            variants[f"{codec}+{compression or 'raw'}"] = CacheSerializer(
+                dataframe_codec=codec, object_codec=codec, compression=compression
+            )
+
+    rows = []
+    for label, serializer in variants.items():
+        if serializer is None:
+            enc_t, payload = _time(lambda: _legacy_dumps(value).encode())
+            dec_t, decoded = _time(lambda: decode_legacy(payload.decode()))
+        else:
+            enc_t, payload = _time(lambda: serializer.dumps(value))
+            dec_t, decoded = _time(lambda: serializer.loads(payload))
+            if value_kind == "dataframe":
+                pd.testing.assert_frame_equal(decoded, value)
+            else:
+                assert decoded == value
+        rows.append((label, len(payload), enc_t, dec_t))
+
+    print(f"\n{value_kind} codec benchmark")
+    print(f"{'codec':<20} {'bytes':>12} {'encode ms':>10} {'decode ms':>10}")
+    for label, size, enc_t, dec_t in rows:
+        print(f"{label:<20} {size:>12,} {enc_t * 1000:>10.1f} {dec_t * 1000:>10.1f}")
+
+    legacy_size = rows[0][1]
+    default = CacheSerializer()
+    assert len(default.dumps(value)) < legacy_size
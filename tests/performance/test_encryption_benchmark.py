@@ -0,0 +1,66 @@
+"""
+DataEncryption throughput: per-message PBKDF2 (legacy) vs the v1 envelope.
+
+The legacy format derived a fresh Fernet key with 100k PBKDF2 iterations
+for every encrypt and decrypt. The envelope derives one key per master key
+and key id and then pays only for AES-GCM.
+"""
+
+import base64
+import os
+import sys
+import time
+
+from cryptography.fernet import Fernet
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.security.auth import AuthManager  # noqa: F401  (resolves the security/services import cycle)
+from src.security import encryption as encryption_module
+from src.security.encryption import DataEncryption
+
+FULL_BENCH = os.environ.get("CASHFLOW_FULL_BENCH") == "1"
+LEGACY_OPS = 50 if FULL_BENCH else 10
+ENVELOPE_OPS = 50_000 if FULL_BENCH else 10_000
+PAYLOAD = '{"api_key": "sk_live_0123456789", "amount": 1250.5, "currency": "USD"}'
+
+
+def _legacy_encrypt(encryption, plaintext):
+    salt = os.urandom(16)
+    token = Fernet(encryption._derive_key_with_salt(salt)).encrypt(plaintext.encode())
+    return base64.urlsafe_b64encode(salt + token).decode()
+
+
+def _rate(func, ops):
+    start = time.perf_counter()
+    for _ in range(ops):
+        func()
+    return ops / (time.perf_counter() - start)
+
+
+def test_encryption_throughput():
+    encryption_module.clear_derived_keys()
+    encryption = DataEncryption("benchmark-master-key-0123456789abcdef")
+
+    legacy_encrypt = _rate(lambda: _legacy_encrypt(encryption, PAYLOAD), LEGACY_OPS)
+    # Distinct salts, so the salted-key cache never hits: a page of old rows
+    legacy_rows = [_legacy_encrypt(encryption, PAYLOAD) for _ in range(LEGACY_OPS)]
+    encryption_module.clear_derived_keys()
+    rows = iter(legacy_rows)
+    legacy_decrypt = _rate(lambda: encryption.decrypt_string(next(rows)), LEGACY_OPS)
+
+    started = time.perf_counter()
+    encryption.encrypt_string(PAYLOAD)
+    first_call = time.perf_counter() - started
+    envelope_encrypt = _rate(lambda: encryption.encrypt_string(PAYLOAD), ENVELOPE_OPS)
+    sealed = encryption.encrypt_string(PAYLOAD)
+    envelope_decrypt = _rate(lambda: encryption.decrypt_string(sealed), ENVELOPE_OPS)
+
+    print(
+        "\nops/s          encrypt     decrypt\n"
+        f"  legacy     {legacy_encrypt:9.1f}   {legacy_decrypt:9.1f}\n"
+        f"  envelope   {envelope_encrypt:9.0f}   {envelope_decrypt:9.0f}\n"
+        f"  envelope key derivation (first call): {first_call * 1000:.1f} ms"
+    )
+    assert envelope_encrypt > 100 * legacy_encrypt
+    assert envelope_decrypt > 100 * legacy_decrypt
@@ -0,0 +1,56 @@
+"""
+Nightly-job sizing for the rolling-origin backtest: every method over
+1,000 series x 60 months, against a per-series loop.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.forecast_backtest import ForecastBacktester
+
+N_SERIES = 1_000
+N_MONTHS = 60
+HORIZON = 6
+
+
+@pytest.mark.performance
+def test_backtest_all_categories_throughput():
+    rng = np.random.default_rng(6)
+    t = np.arange(N_MONTHS)
+    matrix = (
+        rng.uniform(1_000, 50_000, (N_SERIES, 1)) * (1 + 0.2 * np.sin(2 * np.pi * t / 12))
+        + rng.normal(0, 800, (N_SERIES, N_MONTHS))
+    )
+    frame = pd.DataFrame(
+        {
+            "series_id": np.repeat(np.arange(N_SERIES), N_MONTHS),
+            "date": np.tile(pd.date_range("2020-01-01", periods=N_MONTHS, freq="MS"), N_SERIES),
+            "value": matrix.ravel(),
+        }
+    )
+
+    sample = 50
+    t0 = time.perf_counter()
+    for row in matrix[:sample]:
+        ForecastBacktester().backtest(row, HORIZON)
+    t_single = (time.perf_counter() - t0) * N_SERIES / sample
+
+    t0 = time.perf_counter()
+    scores = ForecastBacktester().backtest_many(frame, HORIZON)
+    t_batch = time.perf_counter() - t0
+
+    best = ForecastBacktester.best_methods(scores)
+    print(
+        f"\nbacktest {N_SERIES} series x {N_MONTHS} months, horizon {HORIZON}: "
+        f"per-series~{t_single:.2f}s batched={t_batch:.3f}s; "
+        f"best methods {best.value_counts().to_dict()}"
+    )
+    assert len(scores) == N_SERIES * 3
+    assert t_batch < t_single
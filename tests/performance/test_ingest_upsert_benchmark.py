@@ -0,0 +1,105 @@
+"""
+Throughput of IngestRepository bulk upserts against the per-row path.
+
+Imports N leads and N bookings into an empty database, then re-imports the
+same records (all updates). The 20k case runs by default; set
+CASHFLOW_FULL_BENCH=1 for the 250k Airtable-export case.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.repositories import ingest_repository
+from src.repositories.ingest_repository import IngestRepository
+from src.services.airtable_import_service import BookingModel, LeadModel
+
+FULL_BENCH = os.environ.get("CASHFLOW_FULL_BENCH") == "1"
+SIZES = [20_000] + ([250_000] if FULL_BENCH else [])
+
+
+class _FileDB:
+    """Minimal DatabaseConnection stand-in bound to one SQLite file."""
+
+    def __init__(self, path):
+        self.db_path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+def _records(n):
+    start = date(2022, 1, 1)
+    leads = [
+        LeadModel(
+            email=f"guest{i}@example.com",
+            created_date=start + timedelta(days=i % 900),
+            utm_source="google",
+            utm_medium="cpc",
+            utm_campaign="spring",
+            is_mql=i % 3 == 0,
+            is_sql=i % 5 == 0,
+        )
+        for i in range(n)
+    ]
+    bookings = [
+        BookingModel(
+            booking_id=f"BK-{i}",
+            booking_date=start + timedelta(days=i % 900),
+            arrival_date=start + timedelta(days=i % 900 + 30),
+            departure_date=start + timedelta(days=i % 900 + 34),
+            guests=2,
+            amount=250.0 + i % 500,
+        )
+        for i in range(n)
+    ]
+    return leads, bookings
+
+
+def _import(repo, leads, bookings, bulk):
+    t0 = time.perf_counter()
+    first = (repo.upsert_leads(leads, bulk=bulk), repo.upsert_bookings(bookings, bulk=bulk))
+    t_insert = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    second = (repo.upsert_leads(leads, bulk=bulk), repo.upsert_bookings(bookings, bulk=bulk))
+    return first, second, t_insert, time.perf_counter() - t0
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("n", SIZES)
+def test_bulk_upsert_throughput(tmp_path, n):
+    leads, bookings = _records(n)
+    ingest_repository.reset_schema_cache()
+
+    results = {}
+    for bulk in (False, True):
+        repo = IngestRepository(_FileDB(str(tmp_path / f"ingest_{bulk}.db")))
+        results[bulk] = _import(repo, leads, bookings, bulk)
+
+    (first, second, _, _) = results[True]
+    assert first == results[False][0] == ({"inserted": n, "updated": 0},) * 2
+    assert second == results[False][1] == ({"inserted": 0, "updated": n},) * 2
+
+    rows = 2 * n
+    per_row, bulk = results[False], results[True]
+    print(
+        f"\ningest {n} leads + {n} bookings: "
+        f"insert per-row={per_row[2]:.2f}s ({rows / per_row[2]:,.0f} rows/s) "
+        f"bulk={bulk[2]:.2f}s ({rows / bulk[2]:,.0f} rows/s); "
+        f"update per-row={per_row[3]:.2f}s bulk={bulk[3]:.2f}s"
+    )
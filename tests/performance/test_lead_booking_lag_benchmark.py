@@ -0,0 +1,197 @@
+"""
+Benchmark and parity checks for AnalyticsService.lead_to_booking_lag.
+
+Runs the legacy per-row matcher and the set-based as-of matcher over the same
+synthetic leads/bookings data and compares both results and wall time.
+
+The 10k case runs by default; set CASHFLOW_FULL_BENCH=1 to include the
+100k and 1M row cases (the per-row path takes minutes at 1M).
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.analytics_service import AnalyticsService
+
+FULL_BENCH = os.environ.get("CASHFLOW_FULL_BENCH") == "1"
+
+
+class _FileDB:
+    """Minimal DatabaseConnection stand-in bound to one SQLite file."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+def _build_db(path, n_bookings, seed=7):
+    rng = np.random.default_rng(seed)
+    n_emails = max(10, n_bookings // 2)
+    n_leads = n_bookings
+
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE leads (
+            lead_id TEXT PRIMARY KEY, email TEXT, created_at DATE,
+            mql_yes BOOLEAN, sql_yes BOOLEAN, utm_source TEXT, utm_medium TEXT,
+            utm_campaign TEXT, raw_source TEXT, unique_key TEXT UNIQUE
+        );
+        CREATE TABLE bookings (
+            booking_id TEXT PRIMARY KEY, booking_date DATE, arrival_date DATE,
+            departure_date DATE, guests INTEGER, amount REAL, email TEXT, raw_source TEXT
+        );
+        """
+    )
+
+    base = np.datetime64("2023-06-01")
+    sources = np.array(["google", "facebook", "", None, "newsletter", "referral"], dtype=object)
+    campaigns = np.array([f"camp_{i}" for i in range(25)] + [None], dtype=object)
+
+    lead_email = rng.integers(0, n_emails, n_leads)
+    lead_days = rng.integers(0, 900, n_leads)
+    lead_secs = rng.integers(0, 86400, n_leads)
+    with_time = rng.random(n_leads) < 0.3
+    leads = []
+    seen = set()
+    for i in range(n_leads):
+        day = str(base + lead_days[i])
+        if with_time[i]:
+            s = int(lead_secs[i])
+            created = f"{day}T{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d}"
+        else:
+            created = day
+        email = f"user{lead_email[i]}@example.com"
+        key = f"{email}|{created}"
+        if key in seen:
+            continue
+        seen.add(key)
+        leads.append(
+            (
+                f"L{i}", email, created, 0, 0,
+                sources[i % len(sources)], "cpc", campaigns[i % len(campaigns)],
+                "bench", key,
+            )
+        )
+    conn.executemany("INSERT INTO leads VALUES (?,?,?,?,?,?,?,?,?,?)", leads)
+
+    book_email = rng.integers(0, int(n_emails * 1.2), n_bookings)  # ~20% never seen as leads
+    book_days = rng.integers(0, 900, n_bookings)
+    amounts = np.round(rng.gamma(2.0, 400.0, n_bookings), 2)
+    guests = rng.integers(1, 8, n_bookings)
+    bookings = [
+        (
+            f"B{i}", str(base + book_days[i]), None, None,
+            int(guests[i]) if i % 97 else None,
+            float(amounts[i]) if i % 89 else None,
+            f"user{book_email[i]}@example.com" if i % 53 else "",
+            "bench",
+        )
+        for i in range(n_bookings)
+    ]
+    conn.executemany("INSERT INTO bookings VALUES (?,?,?,?,?,?,?,?)", bookings)
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def lag_db():
+    created = []
+
+    def _make(n_bookings):
+        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".db")
+        tmp.close()
+        created.append(tmp.name)
+        _build_db(tmp.name, n_bookings)
+        return _FileDB(tmp.name)
+
+    yield _make
+    for path in created:
+        os.unlink(path)
+
+
+def test_asof_matches_per_row_on_edge_cases(tmp_path):
+    """Same-day timestamps, unparseable dates, duplicates and empty UTM values."""
+    path = str(tmp_path / "edge.db")
+    _build_db(path, 0)
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO leads (lead_id, email, created_at, utm_source, utm_campaign, unique_key) VALUES (?,?,?,?,?,?)",
+        [
+            ("l1", "a@x.com", "2024-03-01", "google", "spring", "k1"),
+            ("l2", "a@x.com", "2024-03-05T09:00:00", "facebook", None, "k2"),  # same day: excluded
+            ("l3", "a@x.com", "2024-03-05", "", "late", "k3"),
+            ("l4", "b@x.com", "not a date", "google", "x", "k4"),
+            ("l5", "c@x.com", "2024-02-10", None, None, "k5"),
+            ("l6", "c@x.com", "", "ignored", "ignored", "k6"),
+            ("l7", "d@x.com", "2024-04-01", "late", "late", "k7"),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO bookings (booking_id, booking_date, guests, amount, email) VALUES (?,?,?,?,?)",
+        [
+            ("b1", "2024-03-05", 2, 100.0, "a@x.com"),
+            ("b2", "2024-03-04", None, None, "a@x.com"),
+            ("b3", "2024-03-10", 3, 50.5, "b@x.com"),
+            ("b4", "2024-03-10", 1, 20.0, "c@x.com"),
+            ("b5", "2024-03-15", 4, 75.0, "d@x.com"),
+            ("b6", "2024-03-15", 4, 75.0, "nobody@x.com"),
+            ("b7", "2024-03-20", "two", 10.0, "c@x.com"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    service = AnalyticsService(_FileDB(path))
+    legacy = service.lead_to_booking_lag("2024-01-01", "2024-12-31", method="per_row")
+    fast = service.lead_to_booking_lag("2024-01-01", "2024-12-31")
+
+    assert legacy["summary"]["matched_bookings"] == 3
+    assert fast == legacy
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize(
+    "n_rows",
+    [
+        10_000,
+        pytest.param(100_000, marks=pytest.mark.skipif(not FULL_BENCH, reason="set CASHFLOW_FULL_BENCH=1")),
+        pytest.param(1_000_000, marks=pytest.mark.skipif(not FULL_BENCH, reason="set CASHFLOW_FULL_BENCH=1")),
+    ],
+)
+def test_lag_matching_benchmark(lag_db, n_rows):
+    service = AnalyticsService(lag_db(n_rows))
+    start, end = "2023-01-01", "2026-12-31"
+
+    t0 = time.perf_counter()
+    legacy = service.lead_to_booking_lag(start, end, method="per_row")
+    t_per_row = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    fast = service.lead_to_booking_lag(start, end, method="asof")
+    t_asof = time.perf_counter() - t0
+
+    print(
+        f"\nlead_to_booking_lag n={n_rows:,}: per_row={t_per_row:.2f}s "
+        f"asof={t_asof:.2f}s speedup={t_per_row / max(t_asof, 1e-9):.1f}x"
+    )
+
+    assert legacy["summary"]["matched_bookings"] > 0
+    assert fast == legacy
+    assert t_asof < t_per_row
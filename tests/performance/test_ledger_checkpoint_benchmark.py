@@ -0,0 +1,99 @@
+"""
+Balance-as-of reads: full cash_ledger sums vs month-end checkpoints.
+
+Without checkpoints every lookup sums each account's whole history; with
+them it reads the last checkpoint and the entries of the current month.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.ledger_checkpoints import LedgerCheckpoints
+
+FULL_BENCH = os.environ.get("CASHFLOW_FULL_BENCH") == "1"
+ENTRIES = 2_000_000 if FULL_BENCH else 300_000
+ACCOUNTS = 40
+DAYS = 3 * 365
+LOOKUPS = 20
+
+
+class _FileDB:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+def _timed(func):
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        result = func()
+    return result, (time.perf_counter() - start) / LOOKUPS
+
+
+def test_checkpoint_balance_lookups(tmp_path):
+    db = _FileDB(str(tmp_path / "ledger.db"))
+    db.conn.execute(
+        "CREATE TABLE cash_ledger (id INTEGER PRIMARY KEY, entry_date TEXT, amount REAL, bank_account_id TEXT)"
+    )
+    rng = np.random.default_rng(11)
+    start = date(2022, 1, 1)
+    days = [(start + timedelta(days=d)).isoformat() for d in range(DAYS)]
+    db.conn.executemany(
+        "INSERT INTO cash_ledger (entry_date, amount, bank_account_id) VALUES (?, ?, ?)",
+        zip(
+            (days[d] for d in np.sort(rng.integers(0, DAYS, ENTRIES))),
+            rng.uniform(-500, 800, ENTRIES).round(2).tolist(),
+            (f"acct{a:02d}" for a in rng.integers(0, ACCOUNTS, ENTRIES)),
+        ),
+    )
+    db.conn.commit()
+    checkpoints = LedgerCheckpoints(db)
+    as_of = date.fromisoformat(days[-1]) - timedelta(days=10)
+
+    db.conn.execute(
+        "CREATE INDEX idx_cash_ledger_account_date ON cash_ledger(bank_account_id, entry_date, amount)"
+    )
+    raw, raw_time = _timed(lambda: checkpoints.totals_as_of(as_of))
+
+    assert checkpoints.install()
+    started = time.perf_counter()
+    checkpoints.refresh(as_of.isoformat()[:7])
+    refresh_time = time.perf_counter() - started
+    fast, fast_time = _timed(lambda: checkpoints.totals_as_of(as_of))
+    assert fast.keys() == raw.keys()
+    for account in raw:
+        assert fast[account].net == pytest.approx(raw[account].net)
+
+    started = time.perf_counter()
+    db.conn.execute(
+        "INSERT INTO cash_ledger (entry_date, amount, bank_account_id) VALUES (?, 1.0, 'acct00')",
+        (days[DAYS // 2],),
+    )
+    db.conn.commit()
+    checkpoints.refresh(as_of.isoformat()[:7])
+    backdated_time = time.perf_counter() - started
+
+    print(
+        f"\n{ENTRIES} ledger rows, {ACCOUNTS} accounts, {LOOKUPS} lookups\n"
+        f"  full history sums:   {raw_time * 1000:8.2f} ms/lookup\n"
+        f"  checkpoint + tail:   {fast_time * 1000:8.2f} ms/lookup\n"
+        f"  initial refresh:     {refresh_time * 1000:8.1f} ms\n"
+        f"  backdated + refresh: {backdated_time * 1000:8.1f} ms"
+    )
+    assert fast_time < raw_time
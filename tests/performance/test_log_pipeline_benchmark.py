@@ -0,0 +1,122 @@
+"""
+Time request handlers spend in log calls: synchronous handlers vs the log pipeline.
+
+Each simulated request logs a few records and then waits on I/O, and the log
+stream stalls on every write the way a piped stdout or a busy disk does. The
+synchronous setup masks on the calling thread (SecureLoggingFilter),
+JSON-encodes, and writes and flushes each record before returning. Through a
+LogPipeline the caller only copies the record onto a queue; masking,
+encoding and batched writes happen on the listener thread while requests wait
+on I/O. In a tight loop with nothing to wait on, the listener competes with
+the caller for the GIL and the pipeline gains little.
+"""
+
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.security.auth import AuthManager  # noqa: F401  (resolves the security/services import cycle)
+from src.security.pii_protection import SecureLoggingFilter, get_pii_detector, mask_log_record
+from src.utils.log_pipeline import BatchStreamHandler, LogPipeline
+
+FULL_BENCH = os.environ.get("CASHFLOW_FULL_BENCH") == "1"
+REQUESTS = 2_000 if FULL_BENCH else 300
+RECORDS_PER_REQUEST = 5
+RECORDS = REQUESTS * RECORDS_PER_REQUEST
+# Seconds each request waits on the database or an upstream API
+REQUEST_IO_WAIT = 0.001
+# Seconds a write to the log stream stalls
+WRITE_STALL = 0.0002
+
+
+class _SlowStream:
+    """File whose writes stall like a piped stdout or a busy disk."""
+
+    def __init__(self, path):
+        self.file = open(path, "w")
+        self.writes = 0
+
+    def write(self, data):
+        time.sleep(WRITE_STALL)
+        self.writes += 1
+        return self.file.write(data)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class _JSONFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(
+            {
+                "timestamp": record.created,
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+            }
+        )
+
+
+def _logger(name, handler):
+    log = logging.getLogger(f"log_pipeline_benchmark.{name}")
+    log.propagate = False
+    log.setLevel(logging.INFO)
+    log.handlers.clear()
+    log.addHandler(handler)
+    return log
+
+
+def _serve_requests(log):
+    """Microseconds per log call, not counting the requests' I/O waits."""
+    logging_time = 0.0
+    for request in range(REQUESTS):
+        started = time.perf_counter()
+        for i in range(RECORDS_PER_REQUEST):
+            log.info("Fetched %d transactions for account acc_%d in %.1f ms", i, request, 12.5)
+        logging_time += time.perf_counter() - started
+        time.sleep(REQUEST_IO_WAIT)
+    return logging_time * 1e6 / RECORDS
+
+
+def test_log_call_latency(tmp_path):
+    detector = get_pii_detector()
+    sync_path = tmp_path / "sync.log"
+    piped_path = tmp_path / "piped.log"
+
+    stream = _SlowStream(sync_path)
+    sync_handler = logging.StreamHandler(stream)
+    sync_handler.setFormatter(_JSONFormatter())
+    sync_handler.addFilter(SecureLoggingFilter(detector))
+    sync_us = _serve_requests(_logger("sync", sync_handler))
+    stream.close()
+
+    stream = _SlowStream(piped_path)
+    handler = BatchStreamHandler(stream)
+    handler.setFormatter(_JSONFormatter())
+    pipeline = LogPipeline([handler], name="benchmark", mask=mask_log_record).start()
+    piped_us = _serve_requests(_logger("piped", pipeline.handler))
+    pipeline.stop()
+    metrics = pipeline.metrics()
+    stream.close()
+
+    with open(sync_path) as sync_file, open(piped_path) as piped_file:
+        sync_lines = [json.loads(line)["message"] for line in sync_file]
+        piped_lines = [json.loads(line)["message"] for line in piped_file]
+
+    print(
+        f"\n{REQUESTS} requests x {RECORDS_PER_REQUEST} INFO records, masked and JSON-encoded, "
+        f"{WRITE_STALL * 1e6:.0f} us stall per write\n"
+        f"synchronous handler: {sync_us:7.1f} us/call\n"
+        f"log pipeline:        {piped_us:7.1f} us/call "
+        f"({stream.writes} writes, {metrics['dropped']} dropped)"
+    )
+    assert len(piped_lines) + metrics["dropped"] == RECORDS
+    assert set(piped_lines) <= set(sync_lines)
+    assert piped_us < sync_us
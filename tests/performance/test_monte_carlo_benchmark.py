@@ -0,0 +1,77 @@
+"""
+Wall time of the Monte Carlo engine against the original per-step loop.
+
+The 10k-path case (the Scenarios page default) runs by default; set
+CASHFLOW_FULL_BENCH=1 to add the 1M-path chunked run, sequential and on a
+process pool.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.forecast_service import ForecastService
+
+FULL_BENCH = os.environ.get("CASHFLOW_FULL_BENCH") == "1"
+PERIODS = 36
+
+
+def _history():
+    rng = np.random.default_rng(0)
+    return 10_000 * np.cumprod(1 + rng.normal(0.01, 0.05, 36))
+
+
+def _legacy_monte_carlo(historical, periods, iterations):
+    returns = np.diff(historical) / historical[:-1]
+    mean_return, std_return = np.mean(returns), np.std(returns)
+    simulations = []
+    for _ in range(iterations):
+        simulation = [historical[-1]]
+        for _ in range(periods):
+            random_return = np.random.normal(mean_return, std_return)
+            simulation.append(max(0, simulation[-1] * (1 + random_return)))
+        simulations.append(simulation[1:])
+    simulations = np.array(simulations)
+    return [float(np.percentile(simulations[:, p], 50)) for p in range(periods)]
+
+
+@pytest.mark.performance
+def test_monte_carlo_10k_paths():
+    history = _history()
+    service = ForecastService()
+
+    t0 = time.perf_counter()
+    legacy = _legacy_monte_carlo(history, PERIODS, 10_000)
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = service.run_monte_carlo(history, PERIODS, iterations=10_000, seed=1)
+    t_vec = time.perf_counter() - t0
+
+    print(
+        f"\nmonte carlo 10k x {PERIODS}: loop={t_legacy:.2f}s vectorized={t_vec * 1000:.1f}ms "
+        f"speedup={t_legacy / max(t_vec, 1e-9):.0f}x"
+    )
+    # Same model: medians agree up to sampling noise
+    np.testing.assert_allclose(result.median, legacy, rtol=0.05)
+    assert t_vec < t_legacy
+
+
+@pytest.mark.performance
+@pytest.mark.skipif(not FULL_BENCH, reason="set CASHFLOW_FULL_BENCH=1")
+@pytest.mark.parametrize("workers", [None, 4])
+def test_monte_carlo_1m_paths_chunked(workers):
+    service = ForecastService()
+    t0 = time.perf_counter()
+    result = service.run_monte_carlo(
+        _history(), PERIODS, iterations=1_000_000, seed=1, chunk_size=100_000, workers=workers
+    )
+    elapsed = time.perf_counter() - t0
+    print(f"\nmonte carlo 1M x {PERIODS} chunked (workers={workers}): {elapsed:.2f}s")
+    assert not result.exact
+    assert len(result.percentiles[95]) == PERIODS
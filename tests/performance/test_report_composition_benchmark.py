@@ -0,0 +1,130 @@
+"""
+Query count and latency of composed reports against one call per report.
+
+A dashboard showing P&L, cash flow, balance sheet and the executive summary
+for one range used to call each report on its own. ``generate_reports``
+loads the range once and builds all four from the same frames. The 200k row
+case runs by default; set CASHFLOW_FULL_BENCH=1 for 2M rows.
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.reporting_service import ReportingService
+
+FULL_BENCH = os.environ.get("CASHFLOW_FULL_BENCH") == "1"
+SIZES = [200_000] + ([2_000_000] if FULL_BENCH else [])
+START, END = date(2023, 1, 1), date(2024, 12, 31)
+
+
+class _FileDB:
+    """Minimal DatabaseConnection stand-in that counts executed queries."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+        self.queries = 0
+        self.conn.set_trace_callback(self._trace)
+
+    def _trace(self, sql):
+        if sql.lstrip().upper().startswith("SELECT"):
+            self.queries += 1
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+def _build_db(path, n, seed=11):
+    rng = np.random.default_rng(seed)
+    days = np.datetime64("2021-01-01") + rng.integers(0, 4 * 365, n)
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE sales_orders (id INTEGER PRIMARY KEY, order_date TEXT, amount REAL, currency TEXT, category TEXT);
+        CREATE TABLE costs (id INTEGER PRIMARY KEY, cost_date TEXT, amount REAL, currency TEXT, category TEXT);
+        CREATE INDEX idx_sales_orders_date ON sales_orders(order_date);
+        CREATE INDEX idx_costs_date ON costs(cost_date);
+        """
+    )
+    currencies = np.array(["USD", "CRC"])
+    categories = np.array(["rent", "payroll", "ads", "fees", "travel"])
+    conn.executemany(
+        "INSERT INTO sales_orders (order_date, amount, currency) VALUES (?,?,?)",
+        zip(days.astype(str), rng.uniform(10, 500, n).round(2), currencies[rng.integers(0, 2, n)]),
+    )
+    conn.executemany(
+        "INSERT INTO costs (cost_date, amount, currency, category) VALUES (?,?,?,?)",
+        zip(
+            days[::-1].astype(str),
+            rng.uniform(5, 300, n).round(2),
+            currencies[rng.integers(0, 2, n)],
+            categories[rng.integers(0, 5, n)],
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _separate_reports(service):
+    return [
+        service.generate_profit_loss_report(START, END),
+        service.generate_cash_flow_report(START, END),
+        service.generate_balance_sheet(END),
+        service.generate_executive_summary(START, END),
+    ]
+
+
+@pytest.mark.parametrize("n", SIZES)
+def test_composed_reports_benchmark(tmp_path, n):
+    path = str(tmp_path / "reports.db")
+    _build_db(path, n)
+    db = _FileDB(path)
+    service = ReportingService(db)
+
+    db.queries = 0
+    t0 = time.perf_counter()
+    separate = _separate_reports(service)
+    separate_s = time.perf_counter() - t0
+    separate_queries = db.queries
+
+    db.queries = 0
+    t0 = time.perf_counter()
+    composed = service.generate_reports(START, END)
+    composed_s = time.perf_counter() - t0
+    composed_queries = db.queries
+
+    db.queries = 0
+    t0 = time.perf_counter()
+    service.generate_reports(START, END, include_details=False)
+    totals_s = time.perf_counter() - t0
+
+    print(
+        f"\nreports over {n} rows: separate {separate_queries} queries {separate_s:.3f}s, "
+        f"composed {composed_queries} queries {composed_s:.3f}s, "
+        f"totals only {totals_s:.3f}s"
+    )
+
+    assert composed_queries == 1
+    assert composed_queries < separate_queries
+    pl, cash_flow, balance_sheet, summary = separate
+    assert composed["profit_loss"]["profitability"] == pytest.approx(pl["profitability"])
+    assert composed["cash_flow"]["summary"] == pytest.approx(cash_flow["summary"])
+    assert composed["balance_sheet"]["assets"]["total_assets"] == pytest.approx(
+        balance_sheet["assets"]["total_assets"]
+    )
+    assert composed["executive_summary"]["key_metrics"] == pytest.approx(
+        summary["key_metrics"]
+    )
@@ -0,0 +1,104 @@
+"""
+Peak memory of streaming exports against building the file in memory.
+
+The old export path loaded the table into a DataFrame and encoded the whole
+file at once, so peak memory grew with the row count. Streaming exports read
+and encode fixed-size chunks, so their peak should stay flat. 20k and 80k
+rows run by default; set CASHFLOW_FULL_BENCH=1 to add 500k rows.
+"""
+
+import io
+import os
+import sqlite3
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.report_export import ReportExporter
+from src.services.reporting_service import ReportFormat
+
+FULL_BENCH = os.environ.get("CASHFLOW_FULL_BENCH") == "1"
+SIZES = [20_000, 80_000] + ([500_000] if FULL_BENCH else [])
+FORMATS = [ReportFormat.CSV, ReportFormat.EXCEL, ReportFormat.PARQUET]
+
+
+class _FileDB:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+
+
+def _build_db(path, n, seed=5):
+    rng = np.random.default_rng(seed)
+    days = (np.datetime64("2020-01-01") + rng.integers(0, 5 * 365, n)).astype(str)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE cash_ledger (id INTEGER PRIMARY KEY, entry_date TEXT, amount REAL, "
+        "currency TEXT, description TEXT)"
+    )
+    conn.execute("CREATE INDEX idx_cash_ledger_date ON cash_ledger(entry_date)")
+    conn.executemany(
+        "INSERT INTO cash_ledger (entry_date, amount, currency, description) VALUES (?,?,?,?)",
+        zip(days, rng.uniform(-500, 500, n).round(2), ["USD"] * n, (f"entry {i}" for i in range(n))),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _in_memory_export(db, format_type):
+    frame = pd.read_sql_query("SELECT * FROM cash_ledger ORDER BY entry_date, id", db.conn)
+    if format_type == ReportFormat.CSV:
+        return frame.to_csv(index=False).encode()
+    buffer = io.BytesIO()
+    if format_type == ReportFormat.EXCEL:
+        frame.to_excel(buffer, index=False, engine="xlsxwriter")
+    else:
+        frame.to_parquet(buffer)
+    return buffer.getvalue()
+
+
+def _streamed_export(db, format_type):
+    size = 0
+    for block in ReportExporter(db).export("cash_ledger", format_type):
+        size += len(block)
+    return size
+
+
+def _measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024, elapsed
+
+
+@pytest.mark.parametrize("format_type", FORMATS)
+def test_streaming_export_memory_is_flat(tmp_path, format_type):
+    peaks = {}
+    for n in SIZES:
+        path = str(tmp_path / f"ledger_{n}.db")
+        _build_db(path, n)
+        db = _FileDB(path)
+        eager_mb, eager_s = _measure(_in_memory_export, db, format_type)
+        stream_mb, stream_s = _measure(_streamed_export, db, format_type)
+        peaks[n] = stream_mb
+        print(
+            f"\n{format_type} {n} rows: in-memory {eager_mb:.1f}MB {eager_s:.2f}s, "
+            f"streamed {stream_mb:.1f}MB {stream_s:.2f}s"
+        )
+        assert stream_mb < eager_mb
+
+    # Four times the rows should not need noticeably more memory
+    assert peaks[SIZES[-1]] < peaks[SIZES[0]] * 1.5 + 1
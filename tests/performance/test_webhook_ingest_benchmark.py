@@ -0,0 +1,152 @@
+"""
+Webhook ingestion throughput: per-request connection vs batched writer.
+
+The legacy handler opened a connection, ran CREATE TABLE IF NOT EXISTS and
+committed one insert per POST. The ingestor commits concurrent deliveries in
+shared batches. Both paths are driven by concurrent asyncio senders; the
+HTTP case goes through the FastAPI router over an ASGI transport.
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi import FastAPI
+
+from src.api import webhook_endpoints
+from src.services.webhook_ingest import WebhookEvent, WebhookIngestor
+
+FULL_BENCH = os.environ.get("CASHFLOW_FULL_BENCH") == "1"
+EVENTS = 20_000 if FULL_BENCH else 4_000
+LEGACY_EVENTS = 500
+SENDERS = 64
+COST_COLUMNS = ("name", "amount", "currency", "category", "cost_date", "description", "is_recurring")
+
+
+class _FileDB:
+    """DatabaseConnection stand-in with one WAL connection per thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.local.conn = conn
+        yield conn
+        conn.commit()
+
+
+def _payload(i):
+    return {
+        "type": "incoming_stripe_payout",
+        "id": f"po_{i}",
+        "date": "2025-08-19",
+        "amount": 100 + i,
+        "currency": "USD",
+        "description": f"Stripe payout {i}",
+    }
+
+
+def _legacy_insert(path, payload):
+    event = WebhookEvent.from_payload(payload)
+    record = event.cost_record
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    cur = conn.cursor()
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS costs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, amount REAL NOT NULL,
+            currency TEXT NOT NULL, category TEXT NOT NULL, cost_date TEXT NOT NULL,
+            description TEXT, is_recurring INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    cur.execute(
+        "INSERT INTO costs (name, amount, currency, category, cost_date, description, is_recurring) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        tuple(record[c] for c in COST_COLUMNS),
+    )
+    conn.commit()
+    conn.close()
+
+
+async def _drive(send, count):
+    counter = iter(range(count))
+
+    async def sender():
+        for i in counter:
+            await send(i)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(sender() for _ in range(SENDERS)))
+    return count / (time.perf_counter() - t0)
+
+
+def test_webhook_ingest_throughput(tmp_path, monkeypatch):
+    legacy_path = str(tmp_path / "legacy.db")
+
+    async def legacy_send(i):
+        await asyncio.to_thread(_legacy_insert, legacy_path, _payload(i))
+
+    legacy_rate = asyncio.run(_drive(legacy_send, LEGACY_EVENTS))
+
+    db = _FileDB(str(tmp_path / "batched.db"))
+    ingestor = WebhookIngestor(db)
+    ingestor.start()
+    try:
+        direct_rate = asyncio.run(_drive(lambda i: ingestor.ingest_async(_payload(i)), EVENTS))
+
+        monkeypatch.setattr(webhook_endpoints, "get_webhook_ingestor", lambda: ingestor)
+        app = FastAPI()
+        app.include_router(webhook_endpoints.router)
+
+        @app.post("/noop")
+        async def noop(payload: dict):
+            return {"status": "ok"}
+
+        async def over_http(path, offset):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+                async def send(i):
+                    response = await client.post(path, json=_payload(offset + i))
+                    assert response.status_code in (200, 202)
+
+                return await _drive(send, EVENTS)
+
+        # The in-process client shares the event loop, so a no-op route is the ceiling
+        noop_rate = asyncio.run(over_http("/noop", 0))
+        http_rate = asyncio.run(over_http("/api/v1/webhooks", EVENTS))
+        retry_rate = asyncio.run(_drive(lambda i: ingestor.ingest_async(_payload(i)), EVENTS))
+        metrics = ingestor.metrics()
+    finally:
+        ingestor.stop()
+
+    print(
+        f"\nwebhooks/s with {SENDERS} senders: legacy {legacy_rate:.0f}, "
+        f"batched {direct_rate:.0f}, batched over HTTP {http_rate:.0f} "
+        f"(no-op route {noop_rate:.0f}), "
+        f"retried duplicates {retry_rate:.0f}; avg batch {metrics['avg_batch_size']:.1f}, "
+        f"max queue depth {metrics['max_depth']}"
+    )
+
+    assert metrics["written"] == 2 * EVENTS
+    assert metrics["duplicates"] == EVENTS
+    assert direct_rate > 1_000
+    assert direct_rate > legacy_rate
@@ -0,0 +1,235 @@
+"""
+Unit tests for the analytics API: validators, compression and cursors.
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.analytics_endpoints import (
+    AnalyticsAPI,
+    decode_cursor,
+    encode_cursor,
+    get_analytics_api,
+    router,
+    shutdown_executor,
+)
+from src.services.table_versions import TableVersions
+
+
+class _FileDB:
+    """Minimal DatabaseConnection stand-in with dict rows like the pool."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = _FileDB(str(tmp_path / "analytics.db"))
+    db.conn.executescript(
+        """
+        CREATE TABLE sales_orders (id INTEGER PRIMARY KEY, date TEXT, order_date TEXT,
+                                   amount REAL, amount_usd REAL, currency TEXT, category TEXT);
+        CREATE TABLE costs (id INTEGER PRIMARY KEY, date TEXT, cost_date TEXT,
+                            amount REAL, amount_usd REAL, currency TEXT, category TEXT);
+        CREATE TABLE bookings (booking_id TEXT PRIMARY KEY, booking_date DATE, guests INTEGER,
+                               amount REAL, email TEXT);
+        CREATE TABLE leads (lead_id TEXT PRIMARY KEY, email TEXT, created_at DATE,
+                            utm_source TEXT, utm_medium TEXT, utm_campaign TEXT);
+        """
+    )
+    for day in range(1, 61):
+        iso = (date(2023, 12, 31) + timedelta(days=day)).isoformat()
+        db.conn.execute(
+            "INSERT INTO sales_orders (date, order_date, amount, amount_usd, currency) "
+            "VALUES (?,?,?,?, 'USD')",
+            (iso, iso, 100.0 + day, 100.0 + day),
+        )
+        db.conn.execute(
+            "INSERT INTO costs (date, cost_date, amount, amount_usd, currency, category) "
+            "VALUES (?,?,?,?, 'USD', 'rent')",
+            (iso, iso, 40.0, 40.0),
+        )
+        db.conn.execute(
+            "INSERT INTO bookings VALUES (?,?,?,?,?)", (f"b{day}", iso, 2, 250.0, f"g{day}@x.com")
+        )
+        db.conn.execute(
+            "INSERT INTO leads VALUES (?,?,?,?,?,?)",
+            (f"l{day}", f"g{day}@x.com", "2023-12-01", "google", "cpc", "winter"),
+        )
+    db.conn.commit()
+    TableVersions(db).install()
+    return db
+
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_analytics_api] = lambda: AnalyticsAPI(db)
+    os.environ["ANALYTICS_API_WORKERS"] = "2"
+    yield TestClient(app)
+    shutdown_executor()
+    os.environ.pop("ANALYTICS_API_WORKERS")
+
+
+RANGE = {"start_date": "2024-01-01", "end_date": "2024-02-29"}
+
+
+def test_etag_and_not_modified(client, db):
+    first = client.get("/api/v1/analytics/cash-flow-metrics", params=RANGE)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["last-modified"]
+    assert first.json()["transaction_count"] == 60
+
+    again = client.get(
+        "/api/v1/analytics/cash-flow-metrics", params=RANGE, headers={"If-None-Match": etag}
+    )
+    assert again.status_code == 304
+    assert again.content == b""
+
+    since = client.get(
+        "/api/v1/analytics/cash-flow-metrics",
+        params=RANGE,
+        headers={"If-Modified-Since": first.headers["last-modified"]},
+    )
+    assert since.status_code == 304
+
+    db.conn.execute("UPDATE costs SET amount_usd = 41.0 WHERE id = 1")
+    db.conn.commit()
+    changed = client.get(
+        "/api/v1/analytics/cash-flow-metrics", params=RANGE, headers={"If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_unrelated_table_change_keeps_etag(client, db):
+    etag = client.get("/api/v1/analytics/bookings/summary", params=RANGE).headers["etag"]
+    db.conn.execute("DELETE FROM costs WHERE id = 1")
+    db.conn.commit()
+    response = client.get(
+        "/api/v1/analytics/bookings/summary", params=RANGE, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+
+def test_etag_depends_on_query(client):
+    a = client.get("/api/v1/analytics/bookings/summary", params=RANGE)
+    b = client.get(
+        "/api/v1/analytics/bookings/summary",
+        params={"start_date": "2024-01-01", "end_date": "2024-01-31"},
+    )
+    assert a.headers["etag"] != b.headers["etag"]
+    assert a.json()["bookings_count"] == 60
+    assert b.json()["bookings_count"] == 31
+
+
+def test_gzip_response(client):
+    response = client.get(
+        "/api/v1/analytics/daily-trends",
+        params=dict(RANGE, limit=60),
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert len(response.json()["items"]) == 60
+
+    raw = client.get(
+        "/api/v1/analytics/daily-trends",
+        params=dict(RANGE, limit=60),
+        headers={"Accept-Encoding": "identity"},
+    )
+    assert "content-encoding" not in raw.headers
+    assert raw.headers["etag"] == response.headers["etag"]
+    assert raw.json() == response.json()
+
+
+def test_cursor_pagination_covers_range(client):
+    items, cursor, pages = [], None, 0
+    while True:
+        params = dict(RANGE, limit=25)
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/v1/analytics/bookings/daily", params=params).json()
+        items.extend(page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == 3
+    assert [item["date"][:10] for item in items][:2] == ["2024-01-01", "2024-01-02"]
+    assert len(items) == 60
+    assert sum(item["bookings_count"] for item in items) == 60
+
+
+def test_daily_trends_rows(client):
+    page = client.get(
+        "/api/v1/analytics/daily-trends",
+        params={"start_date": "2024-01-01", "end_date": "2024-01-03"},
+    ).json()
+    assert page["items"][0] == {"date": "2024-01-01", "sales": 101.0, "costs": 40.0, "net": 61.0}
+    assert page["next_cursor"] is None
+
+
+def test_invalid_cursor_and_range(client):
+    bad = client.get("/api/v1/analytics/daily-trends", params=dict(RANGE, cursor="!!"))
+    assert bad.status_code == 400
+    outside = client.get(
+        "/api/v1/analytics/daily-trends", params=dict(RANGE, cursor=encode_cursor(date(2025, 1, 1)))
+    )
+    assert outside.status_code == 400
+    reversed_range = {"start_date": "2024-02-01", "end_date": "2024-01-01"}
+    assert client.get("/api/v1/analytics/daily-trends", params=reversed_range).status_code == 400
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(date(2024, 3, 9))) == date(2024, 3, 9)
+
+
+def test_report_and_lag_endpoints(client):
+    report = client.get("/api/v1/analytics/reports/profit_loss", params=RANGE)
+    assert report.status_code == 200
+    assert report.json()["profitability"]["gross_profit"] == pytest.approx(7830.0 - 2400.0)
+    assert client.get("/api/v1/analytics/reports/forecast", params=RANGE).status_code == 404
+
+    lag = client.get("/api/v1/analytics/lead-booking-lag", params=RANGE).json()
+    assert lag["summary"]["matched_bookings"] == 60
+
+
+def test_untracked_tables_are_not_cacheable(tmp_path):
+    db = _FileDB(str(tmp_path / "bare.db"))
+    db.conn.execute(
+        "CREATE TABLE bookings (booking_id TEXT, booking_date DATE, guests INTEGER, amount REAL)"
+    )
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_analytics_api] = lambda: AnalyticsAPI(db)
+    os.environ["ANALYTICS_API_WORKERS"] = "1"
+    try:
+        response = TestClient(app).get("/api/v1/analytics/bookings/summary", params=RANGE)
+    finally:
+        shutdown_executor()
+        os.environ.pop("ANALYTICS_API_WORKERS")
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert response.headers["cache-control"] == "no-store"
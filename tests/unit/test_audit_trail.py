@@ -0,0 +1,126 @@
+"""
+Unit tests for keyset-paginated audit trails with lazily decrypted details.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.security.auth import AuthManager  # noqa: F401  (resolves the security/services import cycle)
+from src.security.audit import AuditLogger, decode_audit_cursor
+from src.security.encryption import DataEncryption, SecureStorage
+
+MASTER_KEY = "unit-test-master-key-0123456789abcdef"
+
+
+class _FileDB:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+@pytest.fixture
+def audit(tmp_path):
+    storage = SecureStorage(DataEncryption(MASTER_KEY))
+    logger = AuditLogger(_FileDB(str(tmp_path / "audit.db")), storage)
+    logger.ensure_schema()
+    start = datetime(2025, 1, 1)
+    rows = []
+    for i in range(250):
+        # Pairs of rows share a timestamp so paging has to break ties on id
+        timestamp = (start + timedelta(minutes=i // 2)).isoformat()
+        details = {"note": f"row {i}", "account_number": f"ACC{i:04d}"}
+        encrypted = i % 3 == 0
+        payload = storage.store_sensitive_data("audit", details) if encrypted else json.dumps(details)
+        rows.append(
+            (timestamp, f"user{i % 4}", "update", "transaction", str(i), float(i), "EUR",
+             "info", payload, encrypted, None, None)
+        )
+    logger.db.conn.executemany(
+        "INSERT INTO audit_log (timestamp, user_id, action, entity_type, entity_id, amount, "
+        "currency, level, details, details_encrypted, ip_address, user_agent) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    logger.db.conn.commit()
+    return logger
+
+
+def test_pages_cover_every_row_once_in_order(audit):
+    seen, cursor = [], None
+    while True:
+        page = audit.get_audit_page(limit=40, cursor=cursor)
+        seen.extend((r.timestamp, r.id) for r in page.records)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+        assert decode_audit_cursor(cursor) == seen[-1]
+    assert len(seen) == 250
+    assert len(set(seen)) == 250
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_filters_apply_across_pages(audit):
+    first = audit.get_audit_page(user_id="user1", limit=30)
+    second = audit.get_audit_page(user_id="user1", limit=30, cursor=first.next_cursor)
+    records = first.records + second.records
+    assert len(records) == 60
+    assert {r.user_id for r in records} == {"user1"}
+
+
+def test_details_are_decrypted_lazily(audit, monkeypatch):
+    calls = []
+    original = audit.secure_storage.retrieve_sensitive_data
+
+    def counting(data, as_dict=False):
+        calls.append(data)
+        return original(data, as_dict=as_dict)
+
+    monkeypatch.setattr(audit.secure_storage, "retrieve_sensitive_data", counting)
+    page = audit.get_audit_page(limit=50)
+    assert calls == []
+    assert "details" not in page.records[0].to_dict()
+
+    record = next(r for r in page.records if r.details_encrypted)
+    assert record.details.get()["note"] == f"row {record.entity_id}"
+    record.details.get()
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_batch_decrypt_matches_row_by_row(audit, parallel):
+    page = audit.get_audit_page(limit=60)
+    details = audit.decrypt_details(page.records, parallel=parallel)
+    assert set(details) == {r.id for r in page.records}
+    for record in page.records:
+        assert details[record.id]["account_number"] == f"ACC{int(record.entity_id):04d}"
+        assert record.details.loaded
+
+
+def test_audit_trail_keeps_its_row_format(audit):
+    trail = audit.get_audit_trail(limit=6)
+    assert len(trail) == 6
+    for entry in trail:
+        if entry["details_encrypted"]:
+            assert entry["details"]["note"] == f"row {entry['entity_id']}"
+        else:
+            assert json.loads(entry["details"])["note"] == f"row {entry['entity_id']}"
+
+
+def test_invalid_cursor_is_rejected(audit):
+    with pytest.raises(ValueError):
+        audit.get_audit_page(cursor="not-a-cursor")
@@ -0,0 +1,234 @@
+"""
+Unit tests for the background audit writer and its use by AuditLogger.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.security.auth import AuthManager  # noqa: F401  (resolves the security/services import cycle)
+from src.security.audit import AuditAction, AuditLogger
+from src.security.audit_writer import AuditWriter, default_spill_path
+from src.security.encryption import DataEncryption, SecureStorage
+
+MASTER_KEY = "unit-test-master-key-0123456789abcdef"
+
+
+class _FileDB:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+        self.lock = threading.Lock()
+        self.transactions = 0
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        with self.lock:
+            yield self.conn
+            self.conn.commit()
+            self.transactions += 1
+
+
+class _Sink:
+    """write_batch stand-in that can be blocked or made to fail."""
+
+    def __init__(self):
+        self.rows = []
+        self.batches = 0
+        self.fail = False
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, rows):
+        self.gate.wait(5)
+        if self.fail:
+            raise sqlite3.OperationalError("database is locked")
+        self.rows.extend(tuple(row) for row in rows)
+        self.batches += 1
+
+
+@pytest.fixture
+def spill_path(tmp_path):
+    return str(tmp_path / "audit.spill.jsonl")
+
+
+def test_rows_are_written_in_batches(spill_path):
+    sink = _Sink()
+    writer = AuditWriter(sink, spill_path=spill_path, batch_size=100)
+    sink.gate.clear()
+    writer.start()
+    for i in range(500):
+        writer.submit((i, "update"))
+    sink.gate.set()
+    assert writer.flush(5)
+    writer.stop()
+    assert sorted(sink.rows) == [(i, "update") for i in range(500)]
+    assert sink.batches <= 6
+
+
+def test_full_queue_spills_and_is_replayed(spill_path):
+    sink = _Sink()
+    writer = AuditWriter(
+        sink,
+        spill_path=spill_path,
+        queue_size=10,
+        batch_size=5,
+        flush_interval=0,
+        put_timeout=0.001,
+    )
+    sink.gate.clear()
+    writer.start()
+    for i in range(100):
+        writer.submit((i,))
+    assert writer.metrics()["spilled"] > 0
+    assert os.path.exists(spill_path)
+
+    sink.gate.set()
+    writer.stop()
+    assert sorted(sink.rows) == [(i,) for i in range(100)]
+    assert not os.path.exists(spill_path)
+
+
+def test_failed_batches_survive_until_the_database_recovers(spill_path):
+    sink = _Sink()
+    sink.fail = True
+    writer = AuditWriter(sink, spill_path=spill_path, retry_interval=0.0)
+    writer.start()
+    for i in range(20):
+        writer.submit((i,))
+    assert writer.flush(5)
+    assert writer.metrics()["failed_batches"] >= 1
+    assert sink.rows == []
+
+    sink.fail = False
+    writer.stop()
+    assert sorted(sink.rows) == [(i,) for i in range(20)]
+
+
+def test_spill_left_by_a_crash_is_written_on_start(spill_path):
+    with open(spill_path, "w") as handle:
+        handle.write('[1, "a"]\n[2, "b"]\n[3, "c')  # last line cut short
+    sink = _Sink()
+    writer = AuditWriter(sink, spill_path=spill_path)
+    writer.start()
+    writer.stop()
+    assert sink.rows == [(1, "a"), (2, "b")]
+
+
+def test_audit_logger_writes_through_the_writer(tmp_path):
+    db = _FileDB(str(tmp_path / "audit.db"))
+    audit = AuditLogger(db, SecureStorage(DataEncryption(MASTER_KEY)))
+    audit.start_writer(spill_path=str(tmp_path / "spill.jsonl"))
+    for i in range(200):
+        audit.log_financial_operation(
+            "user@example.com",
+            AuditAction.UPDATE,
+            "transaction",
+            str(i),
+            amount=float(i),
+            details={"api_key": f"sk_{i}"},
+        )
+
+    trail = audit.get_audit_trail(limit=1000)
+    audit.writer.stop()
+    assert len(trail) == 200
+    assert all(entry["details_encrypted"] for entry in trail)
+    assert {entry["details"]["api_key"] for entry in trail} == {f"sk_{i}" for i in range(200)}
+    # One schema transaction plus far fewer inserts than entries
+    assert db.transactions < 50
+
+
+def test_shared_spill_file_is_replayed_once(spill_path):
+    with open(spill_path, "w") as handle:
+        handle.writelines(f"[{i}]\n" for i in range(10))
+    sinks = [_Sink(), _Sink()]
+    writers = [AuditWriter(sink, spill_path=spill_path) for sink in sinks]
+    for sink in sinks:
+        sink.gate.clear()
+    results, errors = [], []
+    barrier = threading.Barrier(2)
+
+    def replay(writer):
+        barrier.wait()
+        try:
+            results.append(writer.replay_spill(force=True))
+        except Exception as e:  # pragma: no cover - the failure being tested for
+            errors.append(e)
+
+    threads = [threading.Thread(target=replay, args=(w,)) for w in writers]
+    for thread in threads:
+        thread.start()
+    for sink in sinks:
+        sink.gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == []
+    assert sorted(results) == [0, 10]
+    assert sorted(sinks[0].rows + sinks[1].rows) == [(i,) for i in range(10)]
+    assert os.listdir(os.path.dirname(spill_path)) == []
+
+
+def test_stale_replay_lock_and_orphaned_replay_file_are_recovered(spill_path):
+    with open(spill_path + ".lock", "w") as handle:
+        handle.write("999999999")  # a process that no longer exists
+    with open(spill_path + ".replay.123.456", "w") as handle:
+        handle.write("[1]\n")
+    sink = _Sink()
+    assert AuditWriter(sink, spill_path=spill_path).replay_spill(force=True) == 1
+    assert sink.rows == [(1,)]
+    assert os.listdir(os.path.dirname(spill_path)) == []
+
+
+def test_spill_files_are_private(spill_path):
+    sink = _Sink()
+    sink.fail = True
+    writer = AuditWriter(sink, spill_path=spill_path)
+    writer.submit(("user@example.com", "10.0.0.1"))
+    assert os.stat(spill_path).st_mode & 0o777 == 0o600
+
+
+def test_default_spill_files_are_per_database_in_a_private_directory(tmp_path, monkeypatch):
+    monkeypatch.delenv("AUDIT_SPILL_DIR", raising=False)
+    first = default_spill_path("audit_log", str(tmp_path / "a" / "app.db"))
+    second = default_spill_path("audit_log", str(tmp_path / "b" / "app.db"))
+    assert os.path.dirname(first) == str(tmp_path / "a" / "audit_spill")
+    assert os.path.basename(first) != os.path.basename(second)
+    assert os.stat(os.path.dirname(first)).st_mode & 0o077 == 0
+
+
+def test_spill_file_symlinks_are_not_followed(spill_path, tmp_path):
+    target = tmp_path / "elsewhere"
+    target.write_text("")
+    os.symlink(target, spill_path)
+    writer = AuditWriter(_Sink(), spill_path=spill_path)
+    with pytest.raises(OSError):
+        writer._append_spill([("user@example.com", "10.0.0.1")])
+    assert target.read_text() == ""
+
+
+def test_replay_errors_do_not_stop_the_writer(spill_path, monkeypatch):
+    sink = _Sink()
+    writer = AuditWriter(sink, spill_path=spill_path, retry_interval=0.0)
+    calls = []
+
+    def broken_replay(force=False):
+        calls.append(force)
+        raise FileNotFoundError(spill_path + ".replay")
+
+    monkeypatch.setattr(writer, "replay_spill", broken_replay)
+    writer.start()
+    writer.submit((1,))
+    assert writer.flush(5)
+    assert writer.running and writer._thread.is_alive()
+    monkeypatch.undo()
+    writer.stop()
+    assert calls and sink.rows == [(1,)]
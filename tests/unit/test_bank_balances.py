@@ -0,0 +1,165 @@
+"""
+Unit tests for grouped account balances and daily running balances.
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.repositories.bank_repository import BankRepository
+
+
+class _FileDB:
+    """Minimal DatabaseConnection stand-in that counts executed statements."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+        self.selects = 0
+        self.conn.set_trace_callback(self._trace)
+
+    def _trace(self, sql):
+        if sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            self.selects += 1
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+def _legacy_balances(conn, as_of=None):
+    """The former per-account implementation, as a reference."""
+    results = []
+    for a in conn.execute("SELECT * FROM bank_accounts WHERE is_active = 1 ORDER BY name").fetchall():
+        ob = conn.execute(
+            "SELECT opening_balance FROM bank_opening_balances WHERE bank_account_id = ?", (a["id"],)
+        ).fetchone() or {}
+        date_filter = " AND entry_date <= ?" if as_of else ""
+        params = (a["id"], as_of) if as_of else (a["id"],)
+        ledger = conn.execute(
+            "SELECT COALESCE(SUM(amount),0) AS net, "
+            "COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END),0) AS inflows, "
+            "COALESCE(SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END),0) AS outflows "
+            f"FROM cash_ledger WHERE bank_account_id = ?{date_filter}",
+            params,
+        ).fetchone()
+        adj = conn.execute(
+            "SELECT COALESCE(SUM(amount),0) AS total FROM bank_adjustments WHERE bank_account_id = ?"
+            + (" AND date <= ?" if as_of else ""),
+            params,
+        ).fetchone()
+        opening = float(ob.get("opening_balance", 0.0) or 0.0)
+        results.append(
+            {
+                "account_id": a["id"],
+                "name": a["name"],
+                "currency": a["currency"],
+                "opening_balance": opening,
+                "inflows": float(ledger["inflows"]),
+                "outflows": float(ledger["outflows"]),
+                "adjustments_total": float(adj["total"]),
+                "current_balance": opening + float(ledger["net"]) + float(adj["total"]),
+            }
+        )
+    return results
+
+
+@pytest.fixture
+def repo(tmp_path):
+    db = _FileDB(str(tmp_path / "bank.db"))
+    db.conn.execute(
+        "CREATE TABLE cash_ledger (id INTEGER PRIMARY KEY, entry_date TEXT, amount REAL, "
+        "currency TEXT, description TEXT)"
+    )
+    repo = BankRepository(db)
+    rng = np.random.default_rng(1)
+    for i in range(6):
+        account_id = repo.upsert_bank_account(
+            {"id": f"acct{i}", "name": f"Account {i}", "currency": "USD", "is_active": i != 5}
+        )
+        if i % 2 == 0:
+            repo.set_opening_balance(account_id, "2023-12-31", 1000.0 * (i + 1))
+    start = date(2024, 1, 1)
+    entries = [
+        (
+            (start + timedelta(days=int(rng.integers(0, 90)))).isoformat(),
+            round(float(rng.uniform(-500, 800)), 2),
+            f"acct{int(rng.integers(0, 6))}",
+        )
+        for _ in range(400)
+    ]
+    db.conn.executemany(
+        "INSERT INTO cash_ledger (entry_date, amount, bank_account_id) VALUES (?, ?, ?)", entries
+    )
+    # Entries without an account are ignored
+    db.conn.execute("INSERT INTO cash_ledger (entry_date, amount) VALUES ('2024-01-10', 99)")
+    for i in range(4):
+        repo.add_adjustment(
+            {
+                "bank_account_id": f"acct{i}",
+                "date": f"2024-02-0{i + 1}",
+                "amount": -25.0 * (i + 1),
+                "reason": "bank fee",
+            }
+        )
+    db.conn.commit()
+    return repo
+
+
+@pytest.mark.parametrize("as_of", [None, "2024-01-31", "2024-02-02", "2023-06-01"])
+def test_balances_match_per_account_queries(repo, as_of):
+    expected = _legacy_balances(repo.db.conn, as_of)
+    actual = repo.get_account_balances(as_of)
+    assert [a["account_id"] for a in actual] == [f"acct{i}" for i in range(5)]
+    for got, want in zip(actual, expected):
+        assert got == pytest.approx(want)
+
+
+def _count_selects(repo, func):
+    repo.db.selects = 0
+    func()
+    return repo.db.selects
+
+
+def test_balance_queries_do_not_scale_with_accounts(repo):
+    before = _count_selects(repo, lambda: repo.get_account_balances("2024-02-15"))
+    for i in range(6, 30):
+        repo.upsert_bank_account({"id": f"acct{i}", "name": f"Account {i}", "currency": "USD"})
+        repo.db.conn.execute(
+            "INSERT INTO cash_ledger (entry_date, amount, bank_account_id) VALUES ('2024-01-05', 10, ?)",
+            (f"acct{i}",),
+        )
+    assert _count_selects(repo, lambda: repo.get_account_balances("2024-02-15")) == before
+
+
+def test_daily_balances_match_point_in_time(repo):
+    frame = repo.get_daily_balances("2024-01-15", "2024-03-10")
+    assert len(frame) == 56 * 5
+    assert list(frame.columns) == ["date", "account_id", "name", "balance"]
+    for day in ("2024-01-15", "2024-02-01", "2024-02-03", "2024-03-10"):
+        expected = {a["account_id"]: a["current_balance"] for a in repo.get_account_balances(day)}
+        on_day = frame[frame["date"] == date.fromisoformat(day)]
+        assert dict(zip(on_day["account_id"], on_day["balance"])) == pytest.approx(expected)
+
+
+def test_daily_balances_filters_accounts(repo):
+    balance_queries = _count_selects(repo, lambda: repo.get_account_balances("2023-12-31"))
+    repo.db.selects = 0
+    frame = repo.get_daily_balances(date(2024, 1, 1), date(2024, 1, 7), account_ids=["acct2"])
+    assert set(frame["account_id"]) == {"acct2"}
+    assert len(frame) == 7
+    assert repo.db.selects == balance_queries + 1
+
+
+def test_daily_balances_empty_range(repo):
+    assert repo.get_daily_balances("2024-02-01", "2024-01-01").empty
@@ -0,0 +1,88 @@
+"""
+Unit tests for the batch forecasting API.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.batch_forecast import BATCH_METHODS, forecast_batch
+from src.services.forecast_service import ForecastMethod, ForecastService
+
+
+@pytest.fixture
+def matrix():
+    rng = np.random.default_rng(4)
+    t = np.arange(30)
+    season = 1 + 0.2 * np.sin(2 * np.pi * t / 12)
+    return (rng.uniform(500, 5000, (20, 1)) + rng.normal(20, 5, (20, 1)) * t) * season + rng.normal(0, 50, (20, 30))
+
+
+@pytest.mark.parametrize(
+    "method, single",
+    [
+        ("linear", lambda svc, v, p: svc._linear_forecast(v, p)),
+        ("exponential", lambda svc, v, p: svc._exponential_smoothing(v, p)),
+        ("seasonal", lambda svc, v, p: svc._seasonal_forecast(pd.DataFrame({"value": v}), p)),
+    ],
+)
+@pytest.mark.parametrize("length", [2, 8, 13, 30])
+def test_batch_matches_single_series_methods(matrix, method, single, length):
+    service = ForecastService()
+    values = matrix[:, :length]
+    batch = BATCH_METHODS[method](values, 6)
+    expected = np.stack([single(service, row, 6) for row in values])
+    np.testing.assert_allclose(batch, expected, rtol=1e-9, atol=1e-6)
+
+
+@pytest.mark.parametrize("method", ["linear", "exponential", "seasonal"])
+def test_single_point_series_forecast_flat(matrix, method):
+    # The single-series linear and seasonal fits need two points; the batch
+    # methods carry a lone observation forward
+    values = matrix[:, :1]
+    batch = BATCH_METHODS[method](values, 6)
+    np.testing.assert_allclose(batch, np.repeat(values, 6, axis=1))
+    if method == "exponential":
+        service = ForecastService()
+        expected = np.stack([service._exponential_smoothing(row, 6) for row in values])
+        np.testing.assert_allclose(batch, expected, rtol=1e-9, atol=1e-6)
+
+
+def test_tidy_result_from_array(matrix):
+    result = ForecastService().generate_batch_forecast(
+        matrix, 4, methods=[ForecastMethod.LINEAR, "moving_average"], series_ids=[f"s{i}" for i in range(20)]
+    )
+    assert list(result.columns) == ["series_id", "method", "step", "forecast", "lower", "upper"]
+    assert len(result) == 20 * 4 * 2
+    first = result[(result.series_id == "s0") & (result.method == "moving_average")]
+    assert first.step.tolist() == [1, 2, 3, 4]
+    assert np.allclose(first.forecast, matrix[0, -3:].mean())
+    widths = (first.upper - first.lower).to_numpy()
+    assert (np.diff(widths) > 0).all()
+
+
+def test_long_format_groups_ragged_series():
+    frame = pd.DataFrame(
+        {
+            "category": ["rent"] * 4 + ["ads"] * 3,
+            "month": ["2024-04-01", "2024-01-01", "2024-03-01", "2024-02-01", "2024-01-01", "2024-02-01", "2024-03-01"],
+            "amount": [400.0, 100.0, 300.0, None, 10.0, 20.0, 30.0],
+        }
+    )
+    result = forecast_batch(frame, 2, id_col="category", date_col="month", value_col="amount")
+
+    rent = result[result.series_id == "rent"].forecast.to_numpy()
+    # Sorted by month; the missing February is filled with the series mean
+    expected = ForecastService()._linear_forecast(np.array([100.0, 800 / 3, 300.0, 400.0]), 2)
+    np.testing.assert_allclose(rent, expected)
+    np.testing.assert_allclose(result[result.series_id == "ads"].forecast, [40.0, 50.0])
+
+
+def test_unknown_method_rejected(matrix):
+    with pytest.raises(ValueError):
+        forecast_batch(matrix, 3, methods=["arima"])
@@ -0,0 +1,117 @@
+"""
+Unit tests for the versioned binary cache codecs.
+"""
+
+import json
+import os
+import pickle
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services import cache_codecs
+from src.services.cache_codecs import FORMAT_VERSION, MAGIC, CacheSerializer, CodecError
+
+
+def _frame(n=1000):
+    rng = np.random.default_rng(3)
+    return pd.DataFrame(
+        {
+            "date": pd.date_range("2024-01-01", periods=n, freq="h"),
+            "amount": rng.normal(100, 25, n),
+            "count": rng.integers(0, 50, n).astype("int32"),
+            "category": pd.Categorical(rng.choice(["rent", "payroll", "ads"], n)),
+            "note": [f"row {i}" for i in range(n)],
+        },
+        index=pd.RangeIndex(10, 10 + n, name="row_id"),
+    )
+
+
+@pytest.mark.parametrize("codec", ["arrow", "parquet", "pickle"])
+def test_dataframe_round_trip_preserves_dtypes_and_index(codec):
+    df = _frame()
+    serializer = CacheSerializer(dataframe_codec=codec)
+    payload = serializer.dumps(df)
+    assert payload[:3] == MAGIC and payload[3] == FORMAT_VERSION
+    pd.testing.assert_frame_equal(serializer.loads(payload), df)
+
+
+@pytest.mark.parametrize("codec", ["msgpack", "json"])
+def test_object_round_trip_keeps_decimals_and_datetimes(codec):
+    value = {
+        "total": Decimal("1234.5600"),
+        "as_of": datetime(2024, 5, 1, 12, 30),
+        "day": date(2024, 5, 1),
+        "rows": [1, 2.5, "x", None, True],
+        "nested": {"a": [Decimal("0.1")]},
+    }
+    serializer = CacheSerializer(object_codec=codec)
+    assert serializer.loads(serializer.dumps(value)) == value
+
+
+def test_unsupported_values_fall_back_to_pickle():
+    value = {"ids": {1, 2, 3}}
+    serializer = CacheSerializer()
+    payload = serializer.dumps(value)
+    assert payload[4] == cache_codecs.CODECS["pickle"].codec_id
+    assert serializer.loads(payload) == value
+
+    mixed = pd.DataFrame({"x": [Decimal("1.1"), "a", 3]})
+    pd.testing.assert_frame_equal(serializer.loads(serializer.dumps(mixed)), mixed)
+
+
+@pytest.mark.parametrize("compression", ["zstd", "lz4", "zlib"])
+def test_large_payloads_are_compressed(compression):
+    serializer = CacheSerializer(compression=compression, compression_threshold=1024)
+    small, large = {"a": 1}, {"rows": ["same text"] * 5000}
+    assert serializer.dumps(small)[5] == 0
+    payload = serializer.dumps(large)
+    assert payload[5] != 0
+    assert len(payload) < len(CacheSerializer(compression=None).dumps(large))
+    assert serializer.loads(payload) == large
+
+
+def test_legacy_json_entries_still_decode():
+    serializer = CacheSerializer()
+    df = pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})
+    legacy_df = json.dumps(
+        {"type": "dataframe", "data": df.to_json(orient="records"), "columns": ["a", "b"], "index": [0, 1]}
+    )
+    pd.testing.assert_frame_equal(serializer.loads(legacy_df.encode()), df)
+    assert serializer.loads(json.dumps({"type": "decimal", "value": "1.50"})) == Decimal("1.50")
+    assert serializer.loads(
+        json.dumps({"type": "pickle", "value": pickle.dumps({1, 2}).hex()}).encode()
+    ) == {1, 2}
+
+
+def test_unknown_version_is_rejected():
+    payload = MAGIC + bytes((FORMAT_VERSION + 1, 3, 0)) + b"\x80"
+    with pytest.raises(CodecError):
+        CacheSerializer().loads(payload)
+
+
+@pytest.mark.parametrize("compression", sorted(cache_codecs.COMPRESSORS))
+def test_corrupt_compressed_payloads_raise_codec_error(compression):
+    compressor = cache_codecs.COMPRESSORS[compression]
+    if not compressor.available:
+        pytest.skip(f"{compression} not installed")
+    codec_id = cache_codecs.CODECS["json"].codec_id
+    payload = MAGIC + bytes((FORMAT_VERSION, codec_id, compressor.compression_id)) + b"\x00garbage"
+    with pytest.raises(CodecError):
+        CacheSerializer().loads(payload)
+
+
+@pytest.mark.parametrize("codec", sorted(cache_codecs.CODECS))
+def test_corrupt_payloads_raise_codec_error(codec):
+    codec = cache_codecs.CODECS[codec]
+    if not codec.available:
+        pytest.skip(f"{codec.name} not installed")
+    payload = MAGIC + bytes((FORMAT_VERSION, codec.codec_id, 0)) + b"\xc1\x80garbage"
+    with pytest.raises(CodecError):
+        CacheSerializer().loads(payload)
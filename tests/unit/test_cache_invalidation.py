@@ -0,0 +1,158 @@
+"""
+Unit tests for tag-based cache invalidation.
+"""
+
+import json
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services import cache_invalidation
+from src.services.cache import CacheService
+from src.services.cache_invalidation import notify_table_write, table_tags, write_tags
+
+
+@pytest.fixture
+def cache():
+    return CacheService("redis://localhost:1/0")
+
+
+def test_table_tags_cover_months_in_range():
+    assert table_tags("costs", date(2024, 11, 15), "2025-01-03") == {
+        "costs",
+        "costs@2024-11",
+        "costs@2024-12",
+        "costs@2025-01",
+    }
+    assert table_tags("costs") == {"costs", "costs@*"}
+    # Very long ranges depend on the whole table
+    assert table_tags("costs", "2010-01-01", "2024-12-31") == {"costs", "costs@*"}
+
+
+def test_write_tags_target_months_or_whole_table():
+    assert write_tags("costs", [date(2024, 5, 2), "2024-05-20T10:00:00"]) == {"costs@*", "costs@2024-05"}
+    assert write_tags("costs", ["2024-05-02", None]) == {"costs"}
+    assert write_tags("costs") == {"costs"}
+
+
+def test_write_invalidates_only_overlapping_entries(cache):
+    cache.set("may", 1, tags=table_tags("costs", "2024-05-01", "2024-05-31"))
+    cache.set("june", 2, tags=table_tags("costs", "2024-06-01", "2024-06-30"))
+    cache.set("all_costs", 3, tags=table_tags("costs"))
+    cache.set("sales", 4, tags=table_tags("sales_orders"))
+    cache.set("untagged", 5)
+
+    assert cache.invalidate_table("costs", ["2024-05-10"]) == 2
+    assert cache.get("may") is None and cache.get("all_costs") is None
+    assert cache.get("june") == 2 and cache.get("sales") == 4 and cache.get("untagged") == 5
+
+    assert cache.invalidate_table("costs") == 1
+    assert cache.get("june") is None
+
+
+def test_notify_table_write_reaches_registered_handlers(cache):
+    cache.set("ledger", 1, tags=table_tags("cash_ledger", "2024-01-01", "2024-03-31"))
+    handler = cache.invalidate_tags
+    cache_invalidation.register_invalidation_handler(handler)
+    try:
+        assert notify_table_write("cash_ledger", [date(2024, 4, 1)]) == 0
+        assert cache.get("ledger") == 1
+        assert notify_table_write("cash_ledger", [date(2024, 2, 1)]) == 1
+        assert cache.get("ledger") is None
+    finally:
+        cache_invalidation.unregister_invalidation_handler(handler)
+
+
+def test_failing_handler_does_not_break_writes():
+    def broken(tags):
+        raise RuntimeError("redis down")
+
+    cache_invalidation.register_invalidation_handler(broken)
+    try:
+        assert notify_table_write("costs", ["2024-01-01"]) == 0
+    finally:
+        cache_invalidation.unregister_invalidation_handler(broken)
+
+
+def test_remote_broadcast_drops_local_entries(cache):
+    seen = []
+    cache.local_invalidation_hooks.append(seen.append)
+    cache.set("costs_q1", 1, tags=table_tags("costs", "2024-01-01", "2024-03-31"))
+
+    own = {"data": json.dumps({"origin": cache.instance_id, "tags": ["costs"]}).encode()}
+    cache._on_invalidation_message(own)
+    assert cache.get("costs_q1") == 1
+
+    # L1 copies read back from Redis are dropped by the broadcast key list
+    cache.memory_cache.set("read_from_redis", 2, ttl=60)
+    remote = {
+        "data": json.dumps(
+            {"origin": "other-replica", "tags": ["costs"], "keys": ["read_from_redis"]}
+        ).encode()
+    }
+    cache._on_invalidation_message(remote)
+    assert cache.get("costs_q1") is None
+    assert cache.get("read_from_redis") is None
+    assert seen == [{"costs"}]
+    assert cache.get_stats()["invalidation"]["remote"] == 1
+
+
+def test_in_flight_load_is_not_cached_after_invalidation(cache):
+    def loader():
+        cache.invalidate_table("costs")
+        return "computed from old data"
+
+    tags = table_tags("costs")
+    assert cache.get_or_set("report", loader, tags=tags) == "computed from old data"
+    assert cache.get("report") is None
+
+
+def test_clear_pattern_uses_glob_semantics(cache):
+    cache.set("metrics_a", 1)
+    cache.set("metrics_b", 2)
+    cache.set("reports_a", 3)
+    assert cache.clear_pattern("metrics_*") == 2
+    assert cache.get("reports_a") == 3
+
+
+class _SharedRedis:
+    """Redis stand-in holding entries written by another replica."""
+
+    def __init__(self, serializer):
+        self.store = {"shared": serializer.dumps("from another replica")}
+        self.handlers = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def ttl(self, key):
+        return 60
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return self
+
+    def subscribe(self, **handlers):
+        self.handlers.update(handlers)
+
+    def run_in_thread(self, sleep_time=0, daemon=False):
+        return object()
+
+
+def test_read_only_replica_listens_for_invalidations(cache):
+    from src.services.cache import INVALIDATION_CHANNEL
+
+    redis_client = _SharedRedis(cache.serializer)
+    cache.redis_client = redis_client
+    assert cache.get("shared") == "from another replica"
+    assert cache.memory_cache.get("shared") == "from another replica"
+    assert INVALIDATION_CHANNEL in redis_client.handlers
+
+    del redis_client.store["shared"]
+    redis_client.handlers[INVALIDATION_CHANNEL](
+        {"data": json.dumps({"origin": "other-replica", "tags": [], "keys": ["shared"]})}
+    )
+    assert cache.get("shared") is None
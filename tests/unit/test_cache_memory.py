@@ -0,0 +1,170 @@
+"""
+Unit tests for the L1 memory tier and stampede protection in CacheService.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.cache import CacheService
+from src.services.cache_codecs import CODECS, FORMAT_VERSION, MAGIC
+from src.services.cache_memory import MemoryCache, estimate_size
+
+
+@pytest.fixture
+def cache():
+    # Nothing listens on port 1: the service runs on the memory tier only
+    service = CacheService("redis://localhost:1/0")
+    assert service.redis_client is None
+    return service
+
+
+def test_lru_eviction_is_bounded_by_bytes():
+    mem = MemoryCache(max_bytes=3000, sweep_interval=0)
+    for key in "abc":
+        mem.set(key, b"x" * 1000, ttl=60)
+    mem.get("a")  # "b" becomes least recently used
+    mem.set("d", b"x" * 1000, ttl=60)
+
+    assert sorted(mem.keys()) == ["a", "c", "d"]
+    assert mem.size_bytes == 3000
+    assert mem.get_stats()["evictions"] == 1
+
+    assert not mem.set("huge", b"x" * 5000, ttl=60)
+    assert mem.get_stats()["rejected"] == 1
+    assert "huge" not in mem
+
+
+def test_dataframe_size_uses_memory_usage():
+    df = pd.DataFrame({"a": range(1000), "b": ["text"] * 1000})
+    assert estimate_size(df) == int(df.memory_usage(deep=True).sum())
+
+
+def test_expired_entries_are_purged_without_reads():
+    mem = MemoryCache(sweep_interval=0.02)
+    mem.set("short", 1, ttl=0.01)
+    mem.set("long", 2, ttl=60)
+    deadline = time.monotonic() + 2
+    while "short" in mem.keys() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert mem.keys() == ["long"]
+    assert mem.get_stats()["expirations"] == 1
+    mem.close()
+
+
+def test_stale_window_serves_old_value():
+    mem = MemoryCache(sweep_interval=0)
+    mem.set("k", "v", ttl=0.01, stale_ttl=60)
+    time.sleep(0.02)
+    assert mem.lookup("k") == (True, "v", True)
+    assert mem.get_stats()["stale_hits"] == 1
+
+
+def test_single_flight_coalesces_concurrent_loads(cache):
+    calls = []
+    started = threading.Event()
+
+    def slow_loader():
+        calls.append(1)
+        started.set()
+        time.sleep(0.1)
+        return {"total": 42}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_set("metric", slow_loader, ttl=60)))
+        for _ in range(8)
+    ]
+    threads[0].start()
+    started.wait()
+    for t in threads[1:]:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"total": 42}] * 8
+    stats = cache.get_stats()["single_flight"]
+    assert stats["loads"] == 1
+    assert stats["coalesced"] >= 1
+
+
+def test_loader_errors_reach_every_waiter_and_are_not_cached(cache):
+    def failing():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_set("bad", failing, ttl=60)
+    assert cache.get_or_set("bad", lambda: "ok", ttl=60) == "ok"
+
+
+def test_stale_while_revalidate_refreshes_in_background(cache):
+    versions = iter(["v1", "v2"])
+    refreshed = threading.Event()
+
+    def loader():
+        value = next(versions)
+        if value == "v2":
+            refreshed.set()
+        return value
+
+    assert cache.get_or_set("hot", loader, ttl=0, stale_ttl=60) == "v1"
+    # Expired but within the stale window: old value returned without blocking
+    assert cache.get_or_set("hot", loader, ttl=0, stale_ttl=60) == "v1"
+    assert refreshed.wait(2)
+    deadline = time.monotonic() + 2
+    while cache.memory_cache.get("hot") != "v2" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.memory_cache.get("hot") == "v2"
+    assert cache.get_stats()["single_flight"]["background_refreshes"] == 1
+
+
+def test_health_reports_per_tier_counters(cache):
+    cache.set("a", 1, ttl=60)
+    cache.get("a")
+    cache.get("missing")
+
+    from src.services import cache as cache_module
+
+    original = cache_module.cache_service
+    cache_module.cache_service = cache
+    try:
+        health = cache_module.get_cache_health()
+    finally:
+        cache_module.cache_service = original
+
+    memory = health["tiers"]["memory"]
+    assert memory["hits"] == 1 and memory["misses"] == 1
+    assert health["tiers"]["redis"] == {"hits": 0, "misses": 0, "errors": 0}
+    assert health["redis_status"] == "not_configured"
+
+
+class _CorruptRedis:
+    """Redis stand-in holding one entry that no codec can decode."""
+
+    def __init__(self):
+        codec_id = CODECS["pickle"].codec_id
+        self.store = {"corrupt": MAGIC + bytes((FORMAT_VERSION, codec_id, 0)) + b"\x80garbage"}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def ttl(self, key):
+        return 60
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+
+def test_undecodable_redis_entries_are_misses(cache):
+    cache.redis_client = _CorruptRedis()
+    assert cache.get("corrupt") is None
+    assert "corrupt" not in cache.redis_client.store
+    assert cache.memory_cache.lookup("corrupt")[0] is False
+    assert cache.redis_stats["errors"] == 1
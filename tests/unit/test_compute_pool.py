@@ -0,0 +1,153 @@
+"""
+Unit tests for the process-pool compute backend and shared-memory arguments.
+"""
+
+import os
+import pickle
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.compute_pool import (
+    ComputePool,
+    SharedArray,
+    SharedFrame,
+    _share,
+    offloadable,
+)
+from src.services.forecast_service import ForecastService
+
+
+def array_stats(values):
+    return float(values.sum()), values.shape, os.getpid()
+
+
+def frame_summary(frame):
+    return {
+        "columns": list(frame.columns),
+        "dtypes": [str(d) for d in frame.dtypes],
+        "total": float(frame["amount"].sum()),
+        "labels": frame["label"].tolist()[:3],
+    }
+
+
+@offloadable
+def scaled_total(values, factor=1.0):
+    return float(values.sum() * factor)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ComputePool(max_workers=2, share_min_bytes=1024)
+    yield pool
+    pool.shutdown()
+
+
+def _segment_exists(name):
+    try:
+        shared_memory.SharedMemory(name=name).close()
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def test_warm_starts_all_workers(pool):
+    pids = pool.warm()
+    assert len(pids) == 2
+    assert os.getpid() not in pids
+
+
+def test_large_array_is_shared_and_released(pool):
+    values = np.arange(100_000, dtype=np.float64)
+    owned = []
+    handle = _share(values, owned, 1024)
+    assert isinstance(handle, SharedArray)
+    for shm in owned:
+        shm.close()
+        shm.unlink()
+
+    total, shape, pid = pool.submit(array_stats, values).result(timeout=30)
+    assert total == float(values.sum())
+    assert shape == values.shape
+    assert pid != os.getpid()
+
+
+def test_segments_unlinked_after_job(pool, monkeypatch):
+    created = []
+    original = SharedArray.create.__func__
+
+    def recording_create(cls, array):
+        handle, shm = original(cls, array)
+        created.append(shm.name)
+        return handle, shm
+
+    monkeypatch.setattr(SharedArray, "create", classmethod(recording_create))
+    pool.submit(array_stats, np.ones(10_000)).result(timeout=30)
+    assert created
+    assert not any(_segment_exists(name) for name in created)
+
+
+def test_small_arguments_are_pickled():
+    owned = []
+    small = np.ones(4)
+    assert _share(small, owned, 1024) is small
+    assert owned == []
+
+
+def test_dataframe_round_trip(pool):
+    n = 5_000
+    frame = pd.DataFrame(
+        {
+            "date": pd.date_range("2024-01-01", periods=n, freq="h"),
+            "amount": np.linspace(0, 1, n),
+            "count": np.arange(n),
+            "label": [f"row{i}" for i in range(n)],
+        }
+    )
+    owned = []
+    handle = _share(frame, owned, 1024)
+    assert isinstance(handle, SharedFrame)
+    segments = []
+    restored = handle.attach(segments)
+    pd.testing.assert_frame_equal(restored, frame)
+    del restored
+    for shm in segments + owned:
+        shm.close()
+    for shm in owned:
+        shm.unlink()
+
+    summary = pool.submit(frame_summary, frame).result(timeout=30)
+    assert summary["columns"] == ["date", "amount", "count", "label"]
+    assert summary["dtypes"] == ["datetime64[ns]", "float64", "int64", "object"]
+    assert summary["total"] == pytest.approx(frame["amount"].sum())
+    assert summary["labels"] == ["row0", "row1", "row2"]
+
+
+def test_offloadable_function(pool):
+    values = np.arange(50_000, dtype=np.float64)
+    assert scaled_total(values, factor=2.0) == float(values.sum() * 2)
+    assert scaled_total.offload(values, factor=2.0, pool=pool) == float(values.sum() * 2)
+
+
+def test_offloadable_method_matches_inline(pool):
+    service = ForecastService()
+    history = np.array([100.0, 110.0, 105.0, 120.0, 130.0, 125.0])
+    inline = service.run_monte_carlo(history, periods=6, iterations=2_000, seed=7)
+    remote = service.run_monte_carlo.offload(
+        history, periods=6, iterations=2_000, seed=7, pool=pool
+    )
+    assert remote.percentiles == inline.percentiles
+
+
+def test_services_pickle():
+    service = ForecastService()
+    service.backtester.cache.set("k", 1, 60)
+    clone = pickle.loads(pickle.dumps(service))
+    assert clone.monte_carlo_iterations == service.monte_carlo_iterations
+    # The process-local score cache is not carried over
+    assert clone.backtester.cache.get("k") is None
@@ -0,0 +1,148 @@
+"""
+Unit tests for the bounded SQLite connection pool behind DatabaseConnection.
+"""
+
+import gc
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.repositories.base import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    db_path = str(tmp_path / "pool.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.commit()
+    conn.close()
+    p = ConnectionPool(db_path, max_size=2, max_readers=2, timeout=1.0)
+    yield p
+    p.close_all()
+
+
+def test_pragmas_applied_to_every_connection(pool):
+    for readonly in (False, True):
+        with pool.connection(readonly=readonly) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+            assert conn.execute("PRAGMA query_only").fetchone()[0] == int(readonly)
+
+    with pool.connection(readonly=True) as reader:
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute("INSERT INTO items (name) VALUES ('x')")
+
+
+def test_nested_checkout_reuses_thread_connection(pool):
+    with pool.connection() as outer:
+        outer.execute("INSERT INTO items (name) VALUES ('a')")
+        with pool.connection(readonly=True) as inner:
+            assert inner is outer
+            assert inner.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+        outer.commit()
+    stats = pool.get_stats()
+    assert stats["reused_checkouts"] == 1
+    assert stats["in_use"] == 0
+
+
+def test_pool_is_bounded_and_reports_waits(pool):
+    held = pool.acquire()
+    other_ready = threading.Event()
+    release_now = threading.Event()
+
+    def hold_second():
+        conn = pool.acquire()
+        other_ready.set()
+        release_now.wait()
+        pool.release(conn)
+
+    t = threading.Thread(target=hold_second)
+    t.start()
+    other_ready.wait()
+
+    # Both write connections are taken: a third caller waits, then times out
+    errors = []
+
+    def third():
+        try:
+            pool.acquire()
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+
+    t3 = threading.Thread(target=third)
+    t3.start()
+    t3.join()
+    assert errors and pool.get_stats()["timeouts"] == 1
+
+    # Readers are unaffected by the exhausted writer lane
+    with pool.connection(readonly=True) as reader:
+        assert reader.execute("SELECT 1").fetchone()[0] == 1
+
+    waiter_got = []
+    waiter = threading.Thread(target=lambda: waiter_got.append(pool.acquire()))
+    waiter.start()
+    time.sleep(0.05)
+    release_now.set()
+    waiter.join()
+    t.join()
+
+    stats = pool.get_stats()
+    assert waiter_got
+    assert stats["lanes"]["write"]["size"] == 2
+    assert stats["waits"] >= 1
+    assert stats["wait_time_total"] > 0
+    pool.release(held)
+
+
+def test_connections_return_on_thread_exit(pool):
+    def leak():
+        pool.acquire()  # never released
+
+    t = threading.Thread(target=leak)
+    t.start()
+    t.join()
+    del t
+    gc.collect()
+    stats = pool.get_stats()
+    assert stats["thread_exit_returns"] == 1
+    assert stats["in_use"] == 0
+    assert stats["idle"] == 1
+
+
+def test_idle_connections_are_evicted(pool):
+    pool.idle_timeout = 0.01
+    with pool.connection():
+        pass
+    assert pool.get_stats()["idle"] == 1
+    time.sleep(0.05)
+    pool.evict_idle()
+    stats = pool.get_stats()
+    assert stats["idle"] == 0
+    assert stats["size"] == 0
+    assert stats["idle_evictions"] == 1
+
+
+def test_in_memory_database_shares_one_connection():
+    p = ConnectionPool(":memory:")
+    with p.connection() as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+        conn.commit()
+
+    seen = []
+    t = threading.Thread(
+        target=lambda: seen.append(
+            p.acquire(readonly=True).execute("SELECT COUNT(*) FROM t").fetchone()[0]
+        )
+    )
+    t.start()
+    t.join()
+    assert seen == [1]
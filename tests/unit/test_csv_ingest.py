@@ -0,0 +1,115 @@
+"""
+Unit tests for the streaming CSV ingest in airtable_import_service.
+"""
+
+import io
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+from dateutil import parser as date_parser
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.repositories import ingest_repository
+from src.repositories.ingest_repository import IngestRepository
+from src.services import airtable_import_service as imports
+
+LEADS_CSV = (
+    "﻿E-Mail;Submission Date;MQL;is_sql;Source;utm medium;Campaign;not_mql\r\n"
+    "A@Example.com;2024-03-01T09:00:00;yes;;Google;cpc;spring;\r\n"
+    "b@example.com;March 2, 2024;1;true;fb;social;\"multi\r\nline\";\r\n"
+    "a@example.com;2024-03-01T08:00:00;no;;bing;cpc;old;\r\n"
+    ";2024-03-03;yes;;x;y;z;\r\n"
+    "c@example.com;not a date;yes;;x;y;z;\r\n"
+    "d@example.com;2024-03-04;yes;yes;x;y;z;yes\r\n"
+)
+
+
+class _FileDB:
+    """Minimal DatabaseConnection stand-in bound to one SQLite file."""
+
+    def __init__(self, path):
+        self.db_path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+@pytest.mark.parametrize("chunk_size", [8, 64, imports.CSV_CHUNK_SIZE])
+def test_leads_parse_aliases_dedupe_and_diagnostics(monkeypatch, chunk_size):
+    monkeypatch.setattr(imports, "CSV_CHUNK_SIZE", chunk_size)
+    upload = io.BytesIO(LEADS_CSV.encode("utf-8"))
+
+    records, diag = imports.parse_csv_leads_with_diagnostics(upload)
+
+    assert diag["delimiter"] == ";"
+    assert diag["total_rows"] == 6
+    assert diag["dropped"] == {"missing_email": 1, "invalid_date": 1, "header_not_found": 0}
+    assert [(r.email, r.created_date, r.utm_source, r.is_mql, r.is_sql) for r in records] == [
+        # The 09:00 row beats the later 08:00 row for the same email and day
+        ("a@example.com", date(2024, 3, 1), "google", True, False),
+        ("b@example.com", date(2024, 3, 2), "fb", True, True),
+        ("d@example.com", date(2024, 3, 4), "x", False, False),
+    ]
+    assert records[1].utm_campaign == "multi\r\nline"
+    assert diag["groups_after_dedupe"] == 3 and diag["mql_true_after_dedupe"] == 2
+    assert not upload.closed
+
+
+def test_missing_critical_headers_count_rows():
+    records, diag = imports.parse_csv_leads_with_diagnostics(io.BytesIO(b"name,city\na,b\n\nc,d\n"))
+    assert records == []
+    assert diag["missing_headers"] == ["email", "created_at"]
+    assert diag["dropped"]["header_not_found"] == diag["total_rows"] == 2
+
+
+def test_iter_bookings_streams_batches_from_path(tmp_path):
+    path = tmp_path / "bookings.csv"
+    rows = ["booking_id,date,arrival,guests,amount,email"]
+    rows += [f"B{i % 25},2024-02-{i % 28 + 1:02d},2024-03-01,{i % 4},{i}.5,G{i}@X.com" for i in range(60)]
+    rows.append("B-bad,someday,,,,")
+    path.write_text("\n".join(rows) + "\n")
+
+    diag = {}
+    batches = list(imports.iter_csv_bookings(str(path), batch_size=16, diagnostics=diag))
+
+    assert [len(b) for b in batches] == [16, 16, 16, 12]
+    assert diag["duplicates_in_file"] == 25
+    assert diag["dropped"]["invalid_booking_date"] == 1
+    last = batches[-1][-1]
+    assert (last.booking_id, last.booking_date, last.guests, last.amount, last.email) == (
+        "B9", date(2024, 2, 4), 3, 59.5, "g59@x.com"
+    )
+    records, _ = imports.parse_csv_bookings_with_diagnostics(str(path))
+    assert len(records) == 25 and records[9] == last
+
+
+@pytest.mark.parametrize(
+    "value", ["2024-03-01", "2024-03-01T10:15:00", "2024-03-01 10:15:00.250", "2024-03-01T10:15:00+02:00", "03/01/2024"]
+)
+def test_iso_fast_path_matches_dateutil(value):
+    assert imports._parse_datetime(value) == date_parser.parse(value)
+
+
+def test_ingest_feeds_bulk_upsert(tmp_path):
+    ingest_repository.reset_schema_cache()
+    repo = IngestRepository(_FileDB(str(tmp_path / "ingest.db")))
+
+    first = imports.ingest_csv_leads(io.BytesIO(LEADS_CSV.encode()), repo=repo, batch_size=2)
+    again = imports.ingest_csv_leads(io.BytesIO(LEADS_CSV.encode()), repo=repo, batch_size=2)
+
+    assert (first["inserted"], first["updated"]) == (3, 0)
+    assert (again["inserted"], again["updated"]) == (0, 3)
+    with repo.db.get_connection() as conn:
+        row = conn.execute("SELECT utm_campaign FROM leads WHERE email = 'a@example.com'").fetchone()
+    assert row["utm_campaign"] == "spring"
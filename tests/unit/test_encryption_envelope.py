@@ -0,0 +1,165 @@
+"""
+Unit tests for the DataEncryption envelope format and derived-key cache.
+"""
+
+import base64
+import os
+import sqlite3
+import sys
+
+import pytest
+from cryptography.fernet import Fernet
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.security.auth import AuthManager  # noqa: F401  (resolves the security/services import cycle)
+from src.security import encryption as encryption_module
+from src.security.encryption import DataEncryption, DerivedKeyCache
+
+MASTER_KEY = "unit-test-master-key-0123456789abcdef"
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    encryption_module.clear_derived_keys()
+    yield
+    encryption_module.clear_derived_keys()
+
+
+def _legacy_ciphertext(encryption, plaintext):
+    """The per-message salted format written before the envelope existed."""
+    salt = os.urandom(16)
+    token = Fernet(encryption._derive_key_with_salt(salt)).encrypt(plaintext.encode())
+    return base64.urlsafe_b64encode(salt + token).decode()
+
+
+def test_envelope_round_trip_and_format():
+    encryption = DataEncryption(MASTER_KEY)
+    encrypted = encryption.encrypt_string("Sensitive financial data: $50,000")
+    version, key_id, body = encrypted.split(".")
+    assert version == "v1"
+    assert key_id == encryption.key_id
+    assert encryption.decrypt_string(encrypted) == "Sensitive financial data: $50,000"
+    # Random nonce per message
+    assert encryption.encrypt_string("same") != encryption.encrypt_string("same")
+    assert encryption.decrypt_dict(encryption.encrypt_dict({"a": 1})) == {"a": 1}
+
+
+def test_key_is_derived_once_per_master_key(monkeypatch):
+    calls = []
+    original = encryption_module.PBKDF2HMAC.derive
+
+    def counting_derive(self, key_material):
+        calls.append(1)
+        return original(self, key_material)
+
+    monkeypatch.setattr(encryption_module.PBKDF2HMAC, "derive", counting_derive)
+    first = DataEncryption(MASTER_KEY)
+    second = DataEncryption(MASTER_KEY)
+    for i in range(20):
+        assert second.decrypt_string(first.encrypt_string(str(i))) == str(i)
+    assert len(calls) == 1
+
+
+def test_tampered_or_foreign_envelopes_are_rejected():
+    encryption = DataEncryption(MASTER_KEY)
+    encrypted = encryption.encrypt_string("payload")
+    version, key_id, body = encrypted.split(".")
+
+    flipped = body[:-2] + ("A" if body[-2] != "A" else "B") + body[-1]
+    with pytest.raises(Exception):
+        encryption.decrypt_string(f"{version}.{key_id}.{flipped}")
+    # The key id is authenticated: relabelling the envelope fails
+    relabelled = DataEncryption(MASTER_KEY, key_id="other")
+    with pytest.raises(Exception):
+        relabelled.decrypt_string(f"v1.other.{body}")
+    with pytest.raises(ValueError):
+        encryption.decrypt_string(f"v1.bad!id.{body}")
+    with pytest.raises(Exception):
+        DataEncryption("another-master-key-0123456789abcdefgh").decrypt_string(encrypted)
+
+
+def test_envelopes_under_an_earlier_key_id_stay_readable_and_migrate():
+    old = DataEncryption(MASTER_KEY, key_id="key_2024")
+    encrypted = old.encrypt_string("rotated secret")
+    current = DataEncryption(MASTER_KEY, key_id="key-2025")
+
+    assert current.decrypt_string(encrypted) == "rotated secret"
+    assert not current.is_current_envelope(encrypted)
+    for migrate in (current.reencrypt, current.migrate_legacy_encrypted_data):
+        migrated = migrate(encrypted)
+        assert migrated.startswith("v1.key-2025.")
+        assert current.decrypt_string(migrated) == "rotated secret"
+        assert migrate(migrated) == migrated
+
+
+def test_migration_script_reencrypts_rows_under_an_earlier_key_id(tmp_path):
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'scripts'))
+    import migrate_encryption
+
+    old = DataEncryption(MASTER_KEY, key_id="key_2024")
+    current = DataEncryption(MASTER_KEY, key_id="key-2025")
+    # "_" would match any character in a LIKE pattern
+    lookalike = DataEncryption(MASTER_KEY, key_id="keyX2025")
+    table, column = next(iter(migrate_encryption.get_encrypted_columns().items()))
+    column = column[0]
+    db_path = tmp_path / "app.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"CREATE TABLE {table} ({column} TEXT)")
+    conn.executemany(
+        f"INSERT INTO {table} VALUES (?)",
+        [
+            (old.encrypt_string("a"),),
+            (current.encrypt_string("b"),),
+            (lookalike.encrypt_string("c"),),
+            (_legacy_ciphertext(current, "d"),),
+        ],
+    )
+    conn.commit()
+
+    assert migrate_encryption.migrate_database_encryption(db_path, current) == 3
+    values = [row[0] for row in conn.execute(f"SELECT {column} FROM {table} ORDER BY rowid")]
+    assert all(current.is_current_envelope(value) for value in values)
+    assert [current.decrypt_string(value) for value in values] == ["a", "b", "c", "d"]
+    conn.close()
+
+
+def test_legacy_ciphertexts_decrypt_and_migrate():
+    encryption = DataEncryption(MASTER_KEY)
+    legacy = _legacy_ciphertext(encryption, "old secret")
+    assert not encryption.is_envelope(legacy)
+    assert encryption.decrypt_string(legacy) == "old secret"
+
+    migrated = encryption.migrate_legacy_encrypted_data(legacy)
+    assert encryption.is_envelope(migrated)
+    assert encryption.decrypt_string(migrated) == "old secret"
+    assert encryption.migrate_legacy_encrypted_data(migrated) == migrated
+    assert encryption.reencrypt(migrated) == migrated
+
+
+def test_static_salt_ciphertexts_still_migrate():
+    encryption = DataEncryption(MASTER_KEY)
+    static = Fernet(encryption._derive_key_with_salt(b"cash_flow_salt")).encrypt(b"ancient")
+    legacy = base64.urlsafe_b64encode(static).decode()
+    migrated = encryption.migrate_legacy_encrypted_data(legacy)
+    assert encryption.decrypt_string(migrated) == "ancient"
+
+
+def test_key_cache_is_bounded_and_wipes_evicted_keys():
+    cache = DerivedKeyCache(max_entries=2)
+    secrets = [bytearray(b"\x01" * 32) for _ in range(3)]
+    for i, secret in enumerate(secrets):
+        cache.put(("k", str(i)), f"cipher{i}", secret)
+    assert len(cache) == 2
+    assert cache.get(("k", "0")) is None
+    assert secrets[0] == bytearray(32)
+    assert cache.get(("k", "2")) == "cipher2"
+
+    cache.clear()
+    assert len(cache) == 0
+    assert all(secret == bytearray(32) for secret in secrets)
+
+
+def test_invalid_key_id_rejected():
+    with pytest.raises(ValueError):
+        DataEncryption(MASTER_KEY, key_id="bad.id")
@@ -0,0 +1,113 @@
+"""
+Unit tests for the rolling-origin forecast backtest.
+"""
+
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.forecast_backtest import ForecastBacktester, backtest_matrix
+from src.services.forecast_service import ForecastMethod, ForecastService
+
+
+def _reference_scores(service, values, horizon, min_train):
+    """Straightforward per-origin loop for the linear method."""
+    ape, sape, scaled, covered, n = [], [], [], 0, 0
+    for origin in range(min_train, len(values)):
+        train, actual = values[:origin], values[origin : origin + horizon]
+        forecast = service._linear_forecast(train, len(actual))
+        intervals = service._calculate_confidence_intervals(train, forecast, len(actual))
+        scale = np.mean(np.abs(np.diff(train)))
+        for a, f, (lo, hi) in zip(actual, forecast, intervals):
+            if a != 0:
+                ape.append(abs(a - f) / abs(a))
+            sape.append(2 * abs(a - f) / (abs(a) + abs(f)) if abs(a) + abs(f) else 0.0)
+            scaled.append(abs(a - f) / scale)
+            covered += lo <= a <= hi
+            n += 1
+    return 100 * np.mean(ape), 100 * np.mean(sape), np.mean(scaled), covered / n
+
+
+def test_metrics_match_reference_loop():
+    rng = np.random.default_rng(3)
+    values = 100 + 5 * np.arange(24) + rng.normal(0, 8, 24)
+    values[[10, 20]] = 0.0
+    result = backtest_matrix(values[None, :], horizon=3, methods=["linear"], min_train=8)["linear"]
+
+    mape, smape, mase, coverage = _reference_scores(ForecastService(), values, 3, 8)
+    assert result["mape"][0] == pytest.approx(mape)
+    assert result["smape"][0] == pytest.approx(smape)
+    assert result["mase"][0] == pytest.approx(mase)
+    assert result["coverage"][0] == pytest.approx(coverage)
+    assert result["n_forecasts"][0] == sum(min(3, 24 - o) for o in range(8, 24))
+
+
+def test_accuracy_score_handles_zero_actuals():
+    service = ForecastService()
+    with np.errstate(all="raise"):
+        assert service._calculate_accuracy_score(np.zeros(12)) == 1.0
+        score = service._calculate_accuracy_score(np.array([100.0, 120, 0, 140, 0, 160, 170, 0]))
+    assert 0 <= score <= 1
+
+
+def test_scores_are_cached_by_data_hash(monkeypatch):
+    backtester = ForecastBacktester()
+    values = np.arange(20, dtype=float)
+    first = backtester.backtest(values, horizon=2)
+
+    calls = []
+    monkeypatch.setattr(
+        "src.services.forecast_backtest.backtest_matrix",
+        lambda *a, **k: calls.append(1) or backtest_matrix(*a, **k),
+    )
+    assert backtester.backtest(values.copy(), horizon=2) is first
+    assert not calls
+    edited = values.copy()
+    edited[-1] += 1
+    assert backtester.backtest(edited, horizon=2).data_hash != first.data_hash
+    assert calls
+
+
+def test_auto_picks_best_backtested_method():
+    t = np.arange(48)
+    seasonal = 1000 * (1 + 0.5 * np.sin(2 * np.pi * t / 12)) + 10 * t
+    history = [{"date": d, "value": v} for d, v in zip(pd.date_range("2020-01-01", periods=48, freq="MS"), seasonal)]
+
+    result = ForecastService().generate_forecast(history, 6, method=ForecastMethod.AUTO)
+
+    assert result.method == ForecastMethod.SEASONAL
+    scores = result.metadata["backtest"]["scores"]
+    assert scores["seasonal"]["mase"] < scores["linear"]["mase"]
+
+
+def test_backtest_many_matches_single_series():
+    rng = np.random.default_rng(8)
+    months = pd.date_range("2022-01-01", periods=30, freq="MS")
+    frame = pd.concat(
+        [
+            pd.DataFrame({"series_id": name, "date": months[:length], "value": rng.uniform(50, 150, length)})
+            for name, length in [("rent", 30), ("ads", 30), ("tools", 14)]
+        ]
+    )
+    backtester = ForecastBacktester(min_train=6)
+    many = backtester.backtest_many(frame, horizon=3).set_index(["series_id", "method"])
+
+    tools = frame[frame.series_id == "tools"].value.to_numpy()
+    single = backtester.backtest(tools, horizon=3).scores
+    for method, metrics in single.items():
+        for metric, value in metrics.items():
+            assert many.loc[("tools", method), metric] == pytest.approx(value)
+    assert set(ForecastBacktester.best_methods(many.reset_index()).index) == {"rent", "ads", "tools"}
+
+
+def test_backtesters_share_one_default_cache():
+    threads = threading.active_count()
+    backtesters = [ForecastBacktester() for _ in range(20)]
+    assert all(b.cache is backtesters[0].cache for b in backtesters)
+    assert threading.active_count() <= threads + 1
@@ -0,0 +1,122 @@
+"""
+Unit tests for IngestRepository bulk and per-row upserts.
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.repositories import ingest_repository
+from src.repositories.ingest_repository import IngestRepository
+from src.services.airtable_import_service import BookingModel, LeadModel
+
+
+class _FileDB:
+    """Minimal DatabaseConnection stand-in bound to one SQLite file."""
+
+    def __init__(self, path):
+        self.db_path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+@pytest.fixture
+def make_repo(tmp_path):
+    def make(name):
+        return IngestRepository(_FileDB(str(tmp_path / f"{name}.db")))
+
+    ingest_repository.reset_schema_cache()
+    return make
+
+
+def _leads(n, start=0, mql=True):
+    return [
+        LeadModel(
+            email=f"User{i % 7}@Example.com",
+            created_date=date(2024, 1, 1) + timedelta(days=i),
+            utm_source="google",
+            utm_medium="cpc",
+            utm_campaign=f"c{i}",
+            is_mql=mql,
+            is_sql=i % 2 == 0,
+        )
+        for i in range(start, start + n)
+    ]
+
+
+def _bookings(n, amount=100.0):
+    return [
+        BookingModel(
+            booking_id=f"BK-{i % 40}",  # repeats inside the input
+            booking_date=date(2024, 2, 1) + timedelta(days=i % 40),
+            arrival_date=None,
+            departure_date=None,
+            guests=2,
+            amount=amount + i,
+        )
+        for i in range(n)
+    ]
+
+
+def _table(repo, table, order):
+    with repo.db.get_connection() as conn:
+        rows = conn.execute(f"SELECT * FROM {table} ORDER BY {order}").fetchall()
+    for row in rows:
+        row.pop("lead_id", None)
+    return rows
+
+
+def test_bulk_counts_and_rows_match_per_row_path(make_repo):
+    bulk, per_row = make_repo("bulk"), make_repo("per_row")
+    for repo, kwargs in [(bulk, {"batch_size": 7}), (per_row, {"bulk": False})]:
+        assert repo.upsert_leads(_leads(30), **kwargs) == {"inserted": 30, "updated": 0}
+        assert repo.upsert_leads(_leads(30, start=20, mql=False), **kwargs) == {"inserted": 20, "updated": 10}
+    assert _table(bulk, "leads", "unique_key") == _table(per_row, "leads", "unique_key")
+
+    expected = per_row.upsert_bookings(_bookings(100), bulk=False)
+    assert expected == {"inserted": 40, "updated": 60}
+    assert bulk.upsert_bookings(_bookings(100), batch_size=33) == expected
+    assert bulk.upsert_bookings(_bookings(10, amount=5.0)) == {"inserted": 0, "updated": 10}
+    per_row.upsert_bookings(_bookings(10, amount=5.0), bulk=False)
+    assert _table(bulk, "bookings", "booking_id") == _table(per_row, "bookings", "booking_id")
+
+
+def test_schema_is_checked_once_per_process(make_repo, monkeypatch):
+    repo = make_repo("schema")
+    calls = []
+    original = IngestRepository.create_tables_if_missing
+    monkeypatch.setattr(
+        IngestRepository, "create_tables_if_missing", lambda self: calls.append(1) or original(self)
+    )
+    repo.upsert_leads(_leads(3))
+    repo.upsert_bookings(_bookings(3))
+    IngestRepository(repo.db).upsert_leads(_leads(3))
+    assert calls == [1]
+
+
+def test_failed_batch_falls_back_to_row_by_row(make_repo):
+    repo = make_repo("fallback")
+    repo.ensure_schema()
+    with repo.db.get_connection() as conn:
+        conn.execute(
+            "CREATE TRIGGER reject_bad BEFORE INSERT ON bookings "
+            "WHEN NEW.booking_id = 'BK-3' BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+        )
+    result = repo.upsert_bookings(_bookings(10), batch_size=4)
+
+    assert result == {"inserted": 9, "updated": 0}
+    ids = {row["booking_id"] for row in _table(repo, "bookings", "booking_id")}
+    assert "BK-3" not in ids and len(ids) == 9
@@ -0,0 +1,271 @@
+"""
+Unit tests for the persistent SQLite-backed job queue.
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.job_queue import (
+    JobError,
+    JobQueue,
+    SQLiteJobStore,
+    register_job,
+)
+
+
+class _FileDB:
+    """Minimal DatabaseConnection stand-in bound to one SQLite file."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+        self.lock = threading.RLock()
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        with self.lock:
+            yield self.conn
+            self.conn.commit()
+
+
+_calls = {"flaky": 0}
+_order = []
+
+
+def add(a, b):
+    return a + b
+
+
+def fail(message):
+    raise RuntimeError(message)
+
+
+def flaky():
+    _calls["flaky"] += 1
+    if _calls["flaky"] < 3:
+        raise RuntimeError("not yet")
+    return "ok"
+
+
+def sleepy(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def record(tag):
+    _order.append(tag)
+    return tag
+
+
+@register_job("tests.multiply")
+def multiply(a, b):
+    return a * b
+
+
+@pytest.fixture
+def db(tmp_path):
+    return _FileDB(str(tmp_path / "jobs.db"))
+
+
+@pytest.fixture
+def queue(db):
+    _calls["flaky"] = 0
+    _order.clear()
+    q = JobQueue(SQLiteJobStore(db), retry_backoff=0.01, idle_interval=0.05)
+    yield q
+    q.stop()
+
+
+def test_submit_and_result(queue):
+    job_id = queue.submit(add, 2, b=3)
+    assert queue.get_status(job_id)["status"] == "queued"
+
+    queue.start(workers=2)
+    assert queue.result(job_id, timeout=5) == 5
+    status = queue.get_status(job_id)
+    assert status["status"] == "completed"
+    assert status["attempts"] == 1
+
+
+def test_registered_name(queue):
+    job_id = queue.submit(multiply, 4, 5)
+    assert queue.get_status(job_id)["function"] == "tests.multiply"
+    queue.start(workers=1)
+    assert queue.result(job_id, timeout=5) == 20
+
+
+def test_async_wait(queue):
+    queue.start(workers=1)
+
+    async def run():
+        job_id = queue.submit(add, 1, 1)
+        return await queue.wait(job_id, timeout=5)
+
+    assert asyncio.run(run()) == 2
+
+
+def test_priority_order(queue):
+    queue.submit(record, "low", priority=-5)
+    queue.submit(record, "mid")
+    last = queue.submit(record, "high", priority=10)
+    queue.start(workers=1)
+    queue.result(last, timeout=5)
+    # The high-priority job ran first even though it was submitted last
+    assert _order[0] == "high"
+
+
+def test_retries_until_success(queue):
+    job_id = queue.submit(flaky, max_retries=3)
+    queue.start(workers=1)
+    assert queue.result(job_id, timeout=5) == "ok"
+    assert queue.get_status(job_id)["attempts"] == 3
+    assert queue.metrics()["retried"] == 2
+
+
+def test_failure_after_retries(queue):
+    job_id = queue.submit(fail, "boom", max_retries=1)
+    queue.start(workers=1)
+    with pytest.raises(JobError, match="boom"):
+        queue.result(job_id, timeout=5)
+    status = queue.get_status(job_id)
+    assert status["status"] == "failed"
+    assert status["attempts"] == 2
+
+
+def test_timeout(queue):
+    job_id = queue.submit(sleepy, 1.0, timeout=0.1)
+    queue.start(workers=1)
+    with pytest.raises(JobError, match="timed out"):
+        queue.result(job_id, timeout=5)
+    assert queue.metrics()["timed_out"] == 1
+
+
+def test_cancel_queued_job(queue):
+    job_id = queue.submit(add, 1, 2)
+    assert queue.cancel(job_id)
+    with pytest.raises(JobError):
+        queue.result(job_id, timeout=1)
+    assert not queue.cancel(job_id)
+
+
+def test_results_expire(db):
+    q = JobQueue(SQLiteJobStore(db), result_ttl=0.0, idle_interval=0.05)
+    job_id = q.submit(add, 1, 2)
+    future = q.future(job_id)
+    q.start(workers=1)
+    try:
+        assert future.result(timeout=5) == 3
+        assert q.get_status(job_id) is None
+        with pytest.raises(JobError, match="expired"):
+            q.result(job_id, timeout=1)
+        assert q.store.purge_expired() == 1
+    finally:
+        q.stop()
+
+
+def test_jobs_survive_restart(db):
+    first = JobQueue(SQLiteJobStore(db))
+    job_id = first.submit(add, 20, 22)
+
+    second = JobQueue(SQLiteJobStore(db), idle_interval=0.05)
+    second.start(workers=1)
+    try:
+        assert second.result(job_id, timeout=5) == 42
+    finally:
+        second.stop()
+
+
+def test_expired_lease_is_requeued(db):
+    store = SQLiteJobStore(db)
+    q = JobQueue(store, idle_interval=0.05)
+    job_id = q.submit(add, 1, 1, timeout=1.0, max_retries=1)
+    claimed = store.claim()
+    assert claimed.id == job_id
+    # Simulate a worker that died mid-job
+    assert store.fail_expired_leases(now=time.time() + 3600) == []
+    assert store.requeue_expired_leases(now=time.time() + 3600) == 1
+    q.start(workers=1)
+    try:
+        assert q.result(job_id, timeout=5) == 2
+        assert q.get_status(job_id)["attempts"] == 2
+    finally:
+        q.stop()
+
+
+def test_expired_lease_on_last_attempt_fails_the_job(db):
+    store = SQLiteJobStore(db)
+    q = JobQueue(store, idle_interval=0.05)
+    job_id = q.submit(add, 1, 1, timeout=1.0, max_retries=1)
+    future = q.future(job_id)
+    later = time.time() + 3600
+    for _ in range(2):
+        assert store.claim(now=later).id == job_id
+        # The worker dies again; the recovery pass counts the lost attempt
+        q._recover_leases(later + 3600)
+        later += 7200
+
+    status = q.get_status(job_id)
+    assert status["status"] == "failed"
+    assert status["attempts"] == 2
+    assert "lease expired" in status["error"]
+    with pytest.raises(JobError, match="lease expired"):
+        future.result(timeout=1)
+    assert q.metrics()["failed"] == 1
+
+
+def test_task_results_fail_fast_without_workers(queue):
+    from src.services.async_tasks import AsyncTaskProcessor
+
+    processor = AsyncTaskProcessor(job_queue=queue)
+    job_id = queue.submit(add, 2, 2)
+    with pytest.raises(JobError, match="no background workers"):
+        processor.get_task_result(job_id)
+    with pytest.raises(JobError, match="no background workers"):
+        asyncio.run(processor.wait_for_result(job_id))
+    assert processor.get_task_result("missing") is None
+
+    queue.start(workers=1)
+    assert processor.get_task_result(job_id, timeout=5) == 4
+    queue.stop()
+    # Finished tasks stay readable after the workers stop
+    assert processor.get_task_result(job_id) == 4
+
+
+def test_process_mode(queue):
+    job_id = queue.submit(add, 3, 4)
+    queue.start(workers=2, mode="process")
+    assert queue.result(job_id, timeout=30) == 7
+
+
+def test_metrics(queue):
+    queue.start(workers=2)
+    ids = [queue.submit(add, i, i) for i in range(10)]
+    assert [queue.result(i, timeout=5) for i in ids] == [i * 2 for i in range(10)]
+    metrics = queue.metrics()
+    assert metrics["submitted"] == 10
+    assert metrics["completed"] == 10
+    assert metrics["depth"]["completed"] == 10
+    assert metrics["depth"]["queued"] == 0
+    assert metrics["run_seconds_p95"] is not None
+    assert metrics["throughput_per_second"] > 0
+
+
+def test_lambdas_are_rejected(queue):
+    with pytest.raises(ValueError):
+        queue.submit(lambda: 1)
+
+
+def test_start_validates_mode(queue):
+    with pytest.raises(ValueError):
+        queue.start(mode="fiber")
@@ -0,0 +1,204 @@
+"""
+Unit tests for the month-end cash_ledger checkpoints.
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.ledger_checkpoints import LedgerCheckpoints, LedgerTotals, default_horizon
+
+ACCOUNTS = ("acct0", "acct1", "acct2", None)
+
+
+class _FileDB:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+def _raw_totals(conn, as_of=None):
+    """Per-account totals summed from the raw ledger."""
+    rows = conn.execute(
+        "SELECT COALESCE(bank_account_id, '') AS account, TOTAL(amount) AS net, "
+        "TOTAL(CASE WHEN amount >= 0 THEN amount ELSE 0 END) AS inflow, "
+        "TOTAL(CASE WHEN amount < 0 THEN -amount ELSE 0 END) AS outflow, COUNT(*) AS entries "
+        "FROM cash_ledger" + (" WHERE entry_date <= ?" if as_of else "") + " GROUP BY 1",
+        (as_of,) if as_of else (),
+    ).fetchall()
+    return {
+        r["account"]: LedgerTotals(r["net"], r["inflow"], r["outflow"], r["entries"]) for r in rows
+    }
+
+
+def _assert_totals_match(checkpoints, conn, as_of=None):
+    expected = _raw_totals(conn, as_of.isoformat() if as_of else None)
+    actual = checkpoints.totals_as_of(as_of)
+    assert set(actual) >= set(expected)
+    for account in actual:
+        want = expected.get(account, LedgerTotals())
+        got = actual[account]
+        assert got.net == pytest.approx(want.net)
+        assert got.inflow == pytest.approx(want.inflow)
+        assert got.outflow == pytest.approx(want.outflow)
+        assert got.entries == want.entries
+
+
+def _insert(conn, day, amount, account):
+    conn.execute(
+        "INSERT INTO cash_ledger (entry_date, amount, bank_account_id) VALUES (?, ?, ?)",
+        (day, amount, account),
+    )
+    conn.commit()
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = _FileDB(str(tmp_path / "ledger.db"))
+    db.conn.execute(
+        "CREATE TABLE cash_ledger (id INTEGER PRIMARY KEY, entry_date TEXT, amount REAL, "
+        "bank_account_id TEXT)"
+    )
+    rng = np.random.default_rng(3)
+    start = date(2024, 1, 1)
+    db.conn.executemany(
+        "INSERT INTO cash_ledger (entry_date, amount, bank_account_id) VALUES (?, ?, ?)",
+        [
+            (
+                (start + timedelta(days=int(rng.integers(0, 240)))).isoformat(),
+                round(float(rng.uniform(-400, 600)), 2),
+                ACCOUNTS[int(rng.integers(0, len(ACCOUNTS)))],
+            )
+            for _ in range(600)
+        ],
+    )
+    db.conn.commit()
+    return db
+
+
+@pytest.fixture
+def checkpoints(db):
+    checkpoints = LedgerCheckpoints(db)
+    assert checkpoints.install()
+    checkpoints.refresh("2024-06")
+    return checkpoints
+
+
+def _checkpoint_months(db, account):
+    return [
+        r["month"]
+        for r in db.conn.execute(
+            "SELECT month FROM ledger_checkpoints WHERE account = ? ORDER BY month", (account,)
+        ).fetchall()
+    ]
+
+
+def test_refresh_builds_month_end_checkpoints(db, checkpoints):
+    assert _checkpoint_months(db, "acct0") == [f"2024-0{m}" for m in range(1, 7)]
+    assert checkpoints.check()["ok"]
+    # Nothing changed, nothing to write
+    assert not any(checkpoints.refresh("2024-06").values())
+
+
+@pytest.mark.parametrize(
+    "as_of", [None, date(2023, 12, 31), date(2024, 1, 31), date(2024, 3, 15), date(2024, 8, 30)]
+)
+def test_totals_as_of_match_raw_sums(db, checkpoints, as_of):
+    _assert_totals_match(checkpoints, db.conn, as_of)
+
+
+def test_backdated_insert_invalidates_later_checkpoints(db, checkpoints):
+    _insert(db.conn, "2024-03-10", 1000.0, "acct1")
+    assert _checkpoint_months(db, "acct1") == ["2024-01", "2024-02"]
+    assert _checkpoint_months(db, "acct0")[-1] == "2024-06"
+    _assert_totals_match(checkpoints, db.conn, date(2024, 5, 1))
+
+    assert checkpoints.refresh("2024-06") == {"acct1": 4}
+    assert checkpoints.check()["ok"]
+    _assert_totals_match(checkpoints, db.conn, date(2024, 7, 1))
+
+
+def test_current_month_insert_keeps_checkpoints(db, checkpoints):
+    _insert(db.conn, "2024-07-02", 50.0, "acct1")
+    assert _checkpoint_months(db, "acct1")[-1] == "2024-06"
+    assert not any(checkpoints.refresh("2024-06").values())
+
+
+def test_update_and_delete_invalidate_both_months(db, checkpoints):
+    row = db.conn.execute(
+        "SELECT id FROM cash_ledger WHERE bank_account_id = 'acct2' AND entry_date LIKE '2024-05%'"
+    ).fetchone()
+    db.conn.execute(
+        "UPDATE cash_ledger SET entry_date = '2024-02-01', bank_account_id = 'acct0' WHERE id = ?",
+        (row["id"],),
+    )
+    db.conn.commit()
+    assert _checkpoint_months(db, "acct2")[-1] == "2024-04"
+    assert _checkpoint_months(db, "acct0") == ["2024-01"]
+    _assert_totals_match(checkpoints, db.conn, date(2024, 6, 30))
+
+    db.conn.execute("DELETE FROM cash_ledger WHERE bank_account_id IS NULL AND entry_date < '2024-02-01'")
+    db.conn.commit()
+    assert _checkpoint_months(db, "") == []
+    checkpoints.refresh("2024-06")
+    assert checkpoints.check()["ok"]
+    _assert_totals_match(checkpoints, db.conn, date(2024, 4, 30))
+
+
+def test_new_account_appears_without_refresh(db, checkpoints):
+    _insert(db.conn, "2024-02-10", 75.0, "acct9")
+    assert checkpoints.totals_as_of(date(2024, 3, 1))["acct9"] == LedgerTotals(75.0, 75.0, 0.0, 1)
+
+
+def test_check_detects_and_rebuild_repairs_drift(db, checkpoints):
+    db.conn.execute(
+        "UPDATE ledger_checkpoints SET balance = balance + 1 WHERE account = 'acct0' AND month = '2024-04'"
+    )
+    db.conn.commit()
+    report = checkpoints.check()
+    assert not report["ok"]
+    assert report["mismatches"][0]["month"] == "2024-04"
+
+    checkpoints.rebuild("2024-06")
+    assert checkpoints.check()["ok"]
+
+
+def test_range_totals_and_fallback(db, checkpoints):
+    start, end = date(2024, 2, 10), date(2024, 5, 20)
+    rows = db.conn.execute(
+        "SELECT TOTAL(amount) AS net, COUNT(*) AS n FROM cash_ledger WHERE entry_date BETWEEN ? AND ?",
+        (start.isoformat(), end.isoformat()),
+    ).fetchone()
+    totals = checkpoints.range_totals(start, end)
+    assert totals.net == pytest.approx(rows["net"])
+    assert totals.entries == rows["n"]
+
+    # Without triggers the checkpoints are ignored and raw sums are used
+    db.conn.execute("DROP TRIGGER trg_ledger_checkpoint_insert")
+    assert not checkpoints.ready()
+    _insert(db.conn, "2024-01-05", 10_000.0, "acct0")
+    _assert_totals_match(checkpoints, db.conn, date(2024, 6, 1))
+    # Reinstalling after missed writes rebuilds from scratch
+    assert checkpoints.install()
+    checkpoints.refresh("2024-06")
+    assert checkpoints.check()["ok"]
+    _assert_totals_match(checkpoints, db.conn, date(2024, 6, 1))
+
+
+def test_default_horizon_is_last_complete_month():
+    assert default_horizon(date(2024, 3, 1)) == "2024-02"
+    assert default_horizon(date(2024, 1, 31)) == "2023-12"
@@ -0,0 +1,205 @@
+"""
+Unit tests for the off-thread logging pipeline and latency histograms.
+"""
+
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.security.auth import AuthManager  # noqa: F401  (resolves the security/services import cycle)
+from src.security.pii_protection import mask_log_record
+from src.utils.log_pipeline import LatencyHistogram, LogPipeline
+
+
+class _Sink(logging.Handler):
+    """Batch handler stand-in that records batches and the thread writing them."""
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.batches = []
+        self.threads = set()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def emit_batch(self, records):
+        self.gate.wait(5)
+        self.threads.add(threading.current_thread().name)
+        self.batches.append([self.format(record) for record in records])
+
+    @property
+    def lines(self):
+        return [line for batch in self.batches for line in batch]
+
+
+@pytest.fixture
+def make_logger(request):
+    pipelines = []
+
+    def make(sink, **options):
+        pipeline = LogPipeline([sink], name=request.node.name, **options).start()
+        pipelines.append(pipeline)
+        log = logging.getLogger(f"test_log_pipeline.{request.node.name}.{len(pipelines)}")
+        log.propagate = False
+        log.setLevel(logging.DEBUG)
+        log.handlers.clear()
+        pipeline.attach(log)
+        return pipeline, log
+
+    yield make
+    for pipeline in pipelines:
+        pipeline.stop()
+
+
+def test_records_are_masked_and_written_in_batches_off_thread(make_logger):
+    sink = _Sink()
+    pipeline, log = make_logger(sink, mask=mask_log_record)
+    sink.gate.clear()
+    for i in range(300):
+        log.info("Reset sent to user%d@example.com", i)
+    sink.gate.set()
+    assert pipeline.flush(5)
+
+    assert len(sink.lines) == 300
+    assert all(line == "Reset sent to {{EMAIL}}" for line in sink.lines)
+    assert len(sink.batches) < 10
+    assert sink.threads == {f"log-pipeline-{pipeline.name}"}
+    assert pipeline.metrics()["written"] == 300
+
+
+def test_arguments_are_merged_before_the_record_is_queued(make_logger):
+    sink = _Sink()
+    pipeline, log = make_logger(sink)
+    sink.gate.clear()
+    state = {"status": "pending"}
+    log.info("Sync state %s", state)
+    state["status"] = "done"
+    sink.gate.set()
+    pipeline.flush(5)
+    assert sink.lines == ["Sync state {'status': 'pending'}"]
+
+
+def test_debug_records_are_rate_limited_and_sampled(make_logger):
+    sink = _Sink()
+    pipeline, log = make_logger(sink, debug_rate_limit=50, debug_sample_rate=0.5)
+    for _ in range(1000):
+        log.debug("Cache miss")
+        log.info("Request served")
+    pipeline.flush(5)
+
+    metrics = pipeline.metrics()
+    assert metrics["sampled_out"] == 500
+    assert 0 < metrics["rate_limited"] <= 500
+    assert sink.lines.count("Request served") == 1000
+    assert sink.lines.count("Cache miss") == 500 - metrics["rate_limited"]
+
+
+def test_full_queue_drops_and_reports_lost_records(make_logger):
+    sink = _Sink()
+    pipeline, log = make_logger(sink, queue_size=10, debug_rate_limit=0, put_timeout=0.001)
+    sink.gate.clear()
+    for i in range(100):
+        log.info("event %d", i)
+    dropped = pipeline.metrics()["dropped"]
+    assert dropped > 0
+
+    sink.gate.set()
+    pipeline.flush(5)
+    log.info("after")
+    pipeline.flush(5)
+    assert f"Log pipeline {pipeline.name} dropped {dropped} records, queue was full" in sink.lines
+    assert len(sink.lines) == 100 - dropped + 2
+
+
+def test_stop_writes_the_queue_and_later_records_inline(make_logger):
+    sink = _Sink(level=logging.WARNING)
+    pipeline, log = make_logger(sink)
+    sink.gate.clear()
+    for i in range(50):
+        log.warning("warning %d", i)
+        log.info("not for this handler")
+    sink.gate.set()
+    pipeline.stop()
+    assert sink.lines == [f"warning {i}" for i in range(50)]
+
+    log.error("after stop")
+    assert sink.lines[-1] == "after stop"
+    assert threading.current_thread().name in sink.threads
+
+
+def test_structlog_events_are_masked_field_by_field():
+    record = logging.LogRecord("demo", logging.INFO, __file__, 1, None, None, None)
+    record.msg = {
+        "event": "Login for jane@example.com",
+        "api_key": "sk_live_0123456789",
+        "attempts": 3,
+        "timestamp": "2025-01-01T10:00:00.000000Z",
+        "level": "info",
+    }
+    mask_log_record(record)
+    assert record.msg == {
+        "event": "Login for {{EMAIL}}",
+        "api_key": "{{REDACTED}}",
+        "attempts": 3,
+        "timestamp": "2025-01-01T10:00:00.000000Z",
+        "level": "info",
+    }
+
+
+def test_latency_histogram_buckets_and_quantiles():
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.observe(0.004)
+    for _ in range(10):
+        histogram.observe(0.3, success=False)
+    summary = histogram.to_dict()
+    assert summary["count"] == 100
+    assert summary["failures"] == 10
+    assert summary["buckets"]["le_0.005"] == 90
+    assert summary["buckets"]["le_0.5"] == 10
+    assert summary["p50_seconds"] == 0.005
+    assert summary["p95_seconds"] == 0.3
+    assert sum(summary["buckets"].values()) == 100
+
+
+def test_performance_logger_emits_one_histogram_per_operation(tmp_path, monkeypatch):
+    # utils.logger sets up its global logger (and logs/) on import. Loaded by
+    # path: test modules that put src/ on sys.path make "utils" src.utils
+    monkeypatch.chdir(tmp_path)
+    path = os.path.join(os.path.dirname(__file__), '..', '..', 'utils', 'logger.py')
+    spec = importlib.util.spec_from_file_location("test_log_pipeline_utils_logger", path)
+    logger_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(logger_module)
+
+    perf = logger_module.PerformanceLogger("test_log_pipeline.performance")
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    perf.logger.addHandler(handler)
+    perf.logger.setLevel(logging.INFO)
+    try:
+        for _ in range(200):
+            perf.start_timer("forecast")
+            perf.end_timer("forecast")
+        perf.record("export", 1.5, success=False)
+        assert records == []
+        perf.flush()
+    finally:
+        perf.logger.removeHandler(handler)
+
+    fields = {r.extra_fields["operation"]: r.extra_fields for r in records}
+    assert len(records) == 2
+    assert fields["forecast"]["count"] == 200
+    assert fields["export"]["buckets"]["le_2.5"] == 1
+    assert json.loads(logger_module.JSONFormatter().format(records[0]))["metric_type"] == (
+        "latency_histogram"
+    )
+    summary = perf.get_performance_summary("export")
+    assert summary["total_calls"] == 1 and summary["success_rate"] == 0.0
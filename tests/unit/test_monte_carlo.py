@@ -0,0 +1,84 @@
+"""
+Unit tests for the vectorized Monte Carlo engine and its ForecastService wiring.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.forecast_service import ForecastMethod, ForecastService, ScenarioType
+from src.services.monte_carlo import run_simulation, simulate_paths
+
+
+def _loop_paths(last_value, returns):
+    """The original per-step loop, fed with pre-drawn returns."""
+    out = np.empty_like(returns)
+    for i, row in enumerate(returns):
+        value = last_value
+        for t, r in enumerate(row):
+            value = max(0, value * (1 + r))
+            out[i, t] = value
+    return out
+
+
+@pytest.mark.parametrize("last_value", [1000.0, -50.0, 0.0])
+def test_vectorized_paths_match_step_loop(last_value):
+    rng = np.random.default_rng(5)
+    # Large volatility so floors at zero (1 + r < 0) actually happen
+    returns = rng.normal(0.02, 0.8, size=(500, 24))
+    np.testing.assert_allclose(simulate_paths(last_value, returns), _loop_paths(last_value, returns))
+
+
+def test_seeded_runs_are_reproducible():
+    a = run_simulation(1000, 0.01, 0.1, periods=12, iterations=5000, seed=42)
+    b = run_simulation(1000, 0.01, 0.1, periods=12, iterations=5000, seed=42)
+    c = run_simulation(1000, 0.01, 0.1, periods=12, iterations=5000, seed=43)
+    assert a.percentiles == b.percentiles
+    assert a.percentiles != c.percentiles
+    assert a.exact
+
+
+def test_bands_are_ordered():
+    result = run_simulation(1000, 0.01, 0.1, periods=12, iterations=5000, seed=1)
+    bands = np.array([result.percentiles[p] for p in (5, 25, 50, 75, 95)])
+    assert (np.diff(bands, axis=0) >= 0).all()
+
+
+def test_chunked_sketch_tracks_exact_percentiles():
+    kwargs = dict(last_value=1000, mean_return=0.01, std_return=0.15, periods=18, iterations=60_000, seed=9)
+    exact = run_simulation(**kwargs, chunk_size=60_000)
+    chunked = run_simulation(**kwargs, chunk_size=7_000)
+    assert not chunked.exact and chunked.metadata["chunks"] == 9
+    for p in (5, 25, 50, 75, 95):
+        # Different chunking draws different samples; allow sampling noise on top of the sketch error
+        np.testing.assert_allclose(chunked.percentiles[p], exact.percentiles[p], rtol=0.03)
+
+
+def test_process_pool_gives_identical_results():
+    kwargs = dict(last_value=500, mean_return=0.0, std_return=0.2, periods=6, iterations=20_000, seed=3, chunk_size=5_000)
+    sequential = run_simulation(**kwargs)
+    pooled = run_simulation(**kwargs, workers=2)
+    assert pooled.percentiles == sequential.percentiles
+
+
+def test_generate_forecast_includes_monte_carlo_bands():
+    service = ForecastService()
+    service.monte_carlo_seed = 7
+    history = [{"date": f"2024-{m:02d}-01", "value": 1000 + 50 * m} for m in range(1, 13)]
+
+    result = service.generate_forecast(history, periods=6, method=ForecastMethod.LINEAR, include_monte_carlo=True)
+
+    bands = result.metadata["monte_carlo"]["bands"]
+    assert set(bands) == {"p5", "p25", "p50", "p75", "p95"}
+    assert result.scenarios[ScenarioType.MONTE_CARLO] == bands["p50"]
+    assert len(bands["p95"]) == 6
+    assert service._monte_carlo_simulation(np.array([v["value"] for v in history]), 6) == bands["p50"]
+
+
+def test_zero_history_values_do_not_produce_nan():
+    result = ForecastService().run_monte_carlo(np.array([0.0, 100.0, 120.0, 0.0, 90.0]), 4, seed=1)
+    assert all(np.isfinite(v) for band in result.percentiles.values() for v in band)
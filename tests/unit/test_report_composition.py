@@ -0,0 +1,153 @@
+"""
+Unit tests for report composition: shared frames across ReportingService reports.
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.report_composition import load_report_frames
+from src.services.reporting_service import ReportingService, ReportType
+
+
+class _FileDB:
+    """Minimal DatabaseConnection stand-in that counts executed statements."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+        self.statements = []
+        self.conn.set_trace_callback(self._trace)
+
+    def _trace(self, sql):
+        if sql.lstrip().upper().startswith("SELECT"):
+            self.statements.append(sql)
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = _FileDB(str(tmp_path / "reports.db"))
+    db.conn.executescript(
+        """
+        CREATE TABLE sales_orders (id INTEGER PRIMARY KEY, order_date TEXT, amount REAL, currency TEXT, category TEXT);
+        CREATE TABLE costs (id INTEGER PRIMARY KEY, cost_date TEXT, amount REAL, currency TEXT, category TEXT);
+        """
+    )
+    db.conn.executemany(
+        "INSERT INTO sales_orders (order_date, amount, currency) VALUES (?,?,?)",
+        [
+            ("2023-12-20", 1000.0, "USD"),
+            ("2024-01-05", 300.0, "USD"),
+            ("2024-01-05", 20.0, "CRC"),
+            ("2024-01-05", 5.0, "USD"),
+            ("2024-01-18", 150.0, "USD"),
+            ("2024-02-10", 50.0, "USD"),
+        ],
+    )
+    db.conn.executemany(
+        "INSERT INTO costs (cost_date, amount, currency, category) VALUES (?,?,?,?)",
+        [
+            ("2023-12-31", 400.0, "USD", "rent"),
+            ("2024-01-05", 80.0, "USD", "rent"),
+            ("2024-01-20", 15.0, "USD", "fees"),
+            ("2024-01-20", 10.0, "USD", "fees"),
+            ("2024-02-01", 99.0, "USD", "rent"),
+        ],
+    )
+    db.conn.commit()
+    db.statements.clear()
+    return db
+
+
+START, END = date(2024, 1, 1), date(2024, 1, 31)
+
+
+def test_frames_loaded_in_one_query(db):
+    frames = load_report_frames(db.conn, START, END, with_prior_totals=True)
+    assert len(db.statements) == 1
+
+    assert frames.total_revenue == 475.0
+    assert frames.total_costs == 105.0
+    assert frames.prior_revenue == 1000.0
+    assert frames.prior_costs == 400.0
+    assert frames.closing_cash_balance == 970.0
+    assert frames.daily_cash_flow().to_dict("records") == [
+        {"date": "2024-01-05", "amount": 245.0, "cumulative": 245.0},
+        {"date": "2024-01-18", "amount": 150.0, "cumulative": 395.0},
+        {"date": "2024-01-20", "amount": -25.0, "cumulative": 370.0},
+    ]
+
+
+def test_frames_without_prior_totals(db):
+    frames = load_report_frames(db.conn, START, END)
+    assert not frames.has_prior_totals
+    with pytest.raises(ValueError):
+        frames.closing_cash_balance
+
+
+def test_composed_reports_match_standalone(db):
+    service = ReportingService(db)
+    standalone = {
+        ReportType.PROFIT_LOSS: service.generate_profit_loss_report(START, END),
+        ReportType.CASH_FLOW: service.generate_cash_flow_report(START, END),
+        ReportType.BALANCE_SHEET: service.generate_balance_sheet(END),
+        ReportType.EXECUTIVE_SUMMARY: service.generate_executive_summary(START, END),
+    }
+
+    db.statements.clear()
+    composed = service.generate_reports(START, END)
+    assert len(db.statements) == 1
+
+    for report_type, report in standalone.items():
+        report.pop("metadata")
+        composed[report_type].pop("metadata")
+        assert composed[report_type] == report, report_type
+
+
+def test_totals_only(db):
+    reports = ReportingService(db).generate_reports(
+        START,
+        END,
+        report_types=(ReportType.PROFIT_LOSS, ReportType.CASH_FLOW),
+        include_details=False,
+    )
+    pl = reports[ReportType.PROFIT_LOSS]
+    assert "by_date" not in pl["revenue"]
+    assert "by_date" not in pl["costs"]
+    assert pl["costs"]["by_category"] == {"fees": 25.0, "rent": 80.0}
+    assert pl["profitability"]["gross_profit"] == 370.0
+
+    cash_flow = reports[ReportType.CASH_FLOW]
+    assert "daily_cash_flow" not in cash_flow["operating_activities"]
+    assert cash_flow["operating_activities"]["net_operating_cash_flow"] == 370.0
+
+
+def test_executive_summary_single_query(db):
+    summary = ReportingService(db).generate_executive_summary(START, END)
+    assert len(db.statements) == 1
+    assert summary["key_metrics"]["total_revenue"] == 475.0
+    assert summary["key_metrics"]["operating_cash_flow"] == 370.0
+
+
+def test_balance_sheet_does_not_cross_join(db):
+    sheet = ReportingService(db).generate_balance_sheet(END)
+    # (1000 + 475) revenue - (400 + 105) costs up to the end of January
+    assert sheet["assets"]["total_assets"] == 970.0
+
+
+def test_unknown_report_type(db):
+    with pytest.raises(ValueError):
+        ReportingService(db).generate_reports(START, END, report_types=("forecast",))
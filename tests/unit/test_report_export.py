@@ -0,0 +1,239 @@
+"""
+Unit tests for streaming report exports (CSV, Excel, Parquet).
+"""
+
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.export_endpoints import get_report_exporter, router
+from src.services.report_export import (
+    FILE_EXTENSIONS,
+    ExportError,
+    ReportExporter,
+    frame_chunks,
+    iterate_in_thread,
+    query_chunks,
+    write_export,
+)
+from src.services.reporting_service import ReportFormat
+
+
+class _FileDB:
+    """Minimal DatabaseConnection stand-in with dict rows like the pool."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = _FileDB(str(tmp_path / "export.db"))
+    db.conn.executescript(
+        """
+        CREATE TABLE cash_ledger (id INTEGER PRIMARY KEY, entry_date TEXT, amount REAL,
+                                  currency TEXT, description TEXT);
+        """
+    )
+    db.conn.executemany(
+        "INSERT INTO cash_ledger (entry_date, amount, currency, description) VALUES (?,?,?,?)",
+        [
+            (f"2024-01-{day % 28 + 1:02d}", float(day), "USD", None if day % 5 else f"row {day}")
+            for day in range(25)
+        ],
+    )
+    db.conn.commit()
+    return db
+
+
+def _read(payload, format_type):
+    buffer = io.BytesIO(payload)
+    if format_type == ReportFormat.CSV:
+        return pd.read_csv(buffer)
+    if format_type == ReportFormat.EXCEL:
+        return pd.read_excel(buffer)
+    return pd.read_parquet(buffer)
+
+
+def test_query_chunks_respects_chunk_size(db):
+    chunks = list(query_chunks(db, "SELECT * FROM cash_ledger ORDER BY id", chunk_size=10))
+    assert [len(rows) for _, rows in chunks] == [10, 10, 5]
+    assert chunks[0][0] == ["id", "entry_date", "amount", "currency", "description"]
+    assert isinstance(chunks[0][1][0], tuple)
+
+
+def test_query_chunks_empty_result_keeps_columns(db):
+    chunks = list(query_chunks(db, "SELECT id, amount FROM cash_ledger WHERE 0", chunk_size=10))
+    assert chunks == [(["id", "amount"], [])]
+
+
+@pytest.mark.parametrize(
+    "format_type", [ReportFormat.CSV, ReportFormat.EXCEL, ReportFormat.PARQUET]
+)
+def test_round_trip(db, format_type):
+    exporter = ReportExporter(db, chunk_size=7)
+    payload = b"".join(exporter.export("cash_ledger", format_type))
+    exported = _read(payload, format_type)
+
+    expected = pd.DataFrame(
+        db.conn.execute("SELECT * FROM cash_ledger ORDER BY entry_date, id").fetchall()
+    )
+    assert list(exported.columns) == list(expected.columns)
+    assert exported["id"].tolist() == expected["id"].tolist()
+    assert exported["amount"].tolist() == expected["amount"].tolist()
+    assert exported["description"].notna().sum() == expected["description"].notna().sum()
+
+
+def test_date_filter(db):
+    exporter = ReportExporter(db)
+    payload = b"".join(
+        exporter.export(
+            "cash_ledger", ReportFormat.CSV, date(2024, 1, 5), date(2024, 1, 10)
+        )
+    )
+    exported = _read(payload, ReportFormat.CSV)
+    assert exported["entry_date"].between("2024-01-05", "2024-01-10").all()
+    assert len(exported) == 6
+
+
+def test_parquet_writes_row_group_per_chunk(db):
+    import pyarrow.parquet as pq
+
+    payload = b"".join(ReportExporter(db, chunk_size=10).export("cash_ledger", "parquet"))
+    metadata = pq.ParquetFile(io.BytesIO(payload)).metadata
+    assert metadata.num_row_groups == 3
+    assert metadata.num_rows == 25
+
+
+def test_unknown_dataset_and_format(db):
+    exporter = ReportExporter(db)
+    with pytest.raises(ExportError):
+        exporter.export("users", ReportFormat.CSV)
+    with pytest.raises(ExportError):
+        exporter.export("cash_ledger", ReportFormat.PDF)
+
+
+def test_write_export_from_frame():
+    frame = pd.DataFrame({"a": range(30), "b": [f"x{i}" for i in range(30)]})
+    for format_type in (ReportFormat.CSV, ReportFormat.EXCEL, ReportFormat.PARQUET):
+        with write_export(frame_chunks(frame, chunk_size=8), format_type) as exported:
+            pd.testing.assert_frame_equal(_read(exported.read(), format_type), frame)
+
+
+def test_export_endpoint(db):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_report_exporter] = lambda: ReportExporter(db, chunk_size=4)
+    client = TestClient(app)
+
+    response = client.get("/api/v1/exports/cash_ledger", params={"format": "parquet"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    assert 'filename="cash_ledger.parquet"' in response.headers["content-disposition"]
+    assert len(_read(response.content, ReportFormat.PARQUET)) == 25
+
+    assert client.get("/api/v1/exports/users").status_code == 400
+    assert client.get("/api/v1/exports/cash_ledger", params={"format": "pdf"}).status_code == 400
+
+
+def test_table_download_buttons_pass_streamlit_data_conversion(monkeypatch):
+    from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+    from src.ui.components import tables
+
+    buttons = []
+    monkeypatch.setattr(tables.st, "columns", lambda spec: [contextlib.nullcontext()] * len(spec))
+    monkeypatch.setattr(tables.st, "download_button", lambda label, **kw: buttons.append(kw))
+    frame = pd.DataFrame({"a": range(30), "b": [f"x{i}" for i in range(30)]})
+    tables.BaseTable._add_export_functionality(frame, "ledger")
+    assert len(buttons) == 3
+
+    for button in buttons:
+        # Plain bytes, which every supported Streamlit release accepts
+        assert isinstance(button["data"], bytes)
+        content, _ = convert_data_to_bytes_and_infer_mime(
+            button["data"], unsupported_error=TypeError("unsupported download data")
+        )
+        format_type = next(f for f, ext in FILE_EXTENSIONS.items() if button["file_name"].endswith(ext))
+        pd.testing.assert_frame_equal(_read(content, format_type), frame)
+
+
+class _ThreadTrackingDB(_FileDB):
+    """Records the thread that checks each connection out and back in."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.checkouts = []
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        acquired = threading.get_ident()
+        try:
+            yield self.conn
+        finally:
+            self.checkouts.append((acquired, threading.get_ident()))
+
+
+def test_iterate_in_thread_keeps_the_connection_on_one_thread(db, tmp_path):
+    tracking = _ThreadTrackingDB(str(tmp_path / "export.db"))
+    exporter = ReportExporter(tracking, chunk_size=3)
+    blocks = iterate_in_thread(exporter.export("cash_ledger", ReportFormat.CSV))
+
+    # Pull every block from a different thread, like iterate_in_threadpool
+    payload = []
+    while True:
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            block = pool.submit(next, blocks, None).result()
+        if block is None:
+            break
+        payload.append(block)
+    assert len(_read(b"".join(payload), ReportFormat.CSV)) == 25
+    [(acquired, released)] = tracking.checkouts
+    assert acquired == released != threading.get_ident()
+
+
+def test_closing_iterate_in_thread_releases_the_connection(db, tmp_path):
+    tracking = _ThreadTrackingDB(str(tmp_path / "export.db"))
+    exporter = ReportExporter(tracking, chunk_size=1)
+    blocks = iterate_in_thread(exporter.export("cash_ledger", ReportFormat.CSV), max_pending=1)
+    next(blocks)
+    blocks.close()
+    deadline = time.monotonic() + 5
+    while not tracking.checkouts and time.monotonic() < deadline:
+        time.sleep(0.01)
+    [(acquired, released)] = tracking.checkouts
+    assert acquired == released
+
+
+def test_iterate_in_thread_reraises_source_errors():
+    def failing():
+        yield b"ok"
+        raise ExportError("disk full")
+
+    blocks = iterate_in_thread(failing())
+    assert next(blocks) == b"ok"
+    with pytest.raises(ExportError, match="disk full"):
+        next(blocks)
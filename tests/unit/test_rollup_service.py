@@ -0,0 +1,186 @@
+"""
+Unit tests for the materialized daily/monthly rollups.
+"""
+
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.services.analytics_service import AnalyticsService
+from src.services.reporting_service import ReportingService
+from src.services.rollup_service import RollupService
+
+
+class _FileDB:
+    """Minimal DatabaseConnection stand-in bound to one SQLite file."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        yield self.conn
+        self.conn.commit()
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = _FileDB(str(tmp_path / "rollups.db"))
+    db.conn.executescript(
+        """
+        CREATE TABLE cash_ledger (
+            id INTEGER PRIMARY KEY, entry_date TEXT, description TEXT, amount REAL,
+            currency TEXT, account TEXT, category TEXT, source TEXT, external_id TEXT
+        );
+        CREATE TABLE bookings (
+            booking_id TEXT PRIMARY KEY, booking_date DATE, arrival_date DATE,
+            departure_date DATE, guests INTEGER, amount REAL, email TEXT, raw_source TEXT
+        );
+        CREATE TABLE sales_orders (id INTEGER PRIMARY KEY, order_date TEXT, amount REAL, currency TEXT, category TEXT);
+        CREATE TABLE costs (id INTEGER PRIMARY KEY, cost_date TEXT, amount REAL, currency TEXT, category TEXT);
+        """
+    )
+    db.conn.executemany(
+        "INSERT INTO cash_ledger (entry_date, amount, currency, category) VALUES (?,?,?,?)",
+        [
+            ("2024-01-30", 100.0, "USD", "sales"),
+            ("2024-01-31", -40.0, "USD", "rent"),
+            ("2024-02-01", 250.0, "CRC", None),
+            ("2024-02-15", -10.0, None, "fees"),
+        ],
+    )
+    db.conn.executemany(
+        "INSERT INTO bookings (booking_id, booking_date, guests, amount) VALUES (?,?,?,?)",
+        [
+            ("b1", "2024-01-15", 2, 500.0),
+            ("b2", "2024-01-15", None, 120.0),
+            ("b3", "2024-02-03", 4, None),
+            ("b4", "2024-03-31", 1, 80.0),
+        ],
+    )
+    db.conn.executemany(
+        "INSERT INTO sales_orders (order_date, amount) VALUES (?,?)",
+        [("2024-01-05", 300.0), ("2024-01-05", 20.0), ("2024-02-10", 50.0)],
+    )
+    db.conn.executemany(
+        "INSERT INTO costs (cost_date, amount) VALUES (?,?)",
+        [("2024-01-05", 80.0), ("2024-01-20", 15.0)],
+    )
+    db.conn.commit()
+    return db
+
+
+def _raw_results(db, start, end):
+    analytics = AnalyticsService(db)
+    return (
+        analytics.cash_ledger_by_date(start, end),
+        analytics.bookings_by_date(start, end),
+        analytics.bookings_by_month(start, end),
+    )
+
+
+def test_readers_fall_back_until_rebuilt(db):
+    rollups = RollupService(db)
+    start, end = date(2024, 1, 1), date(2024, 12, 31)
+    assert not rollups.covers("cash_ledger", start, end)
+
+    rollups.install()
+    assert not rollups.covers("cash_ledger", start, end)
+
+    rollups.rebuild()
+    assert rollups.covers("cash_ledger", start, end)
+    assert rollups.covers("sales_orders", start, end, date_column="order_date")
+    assert not rollups.covers("sales_orders", start, end, date_column="date")
+    # bookings has no amount_usd column
+    assert not rollups.covers("bookings", start, end, measures=("amount_usd",))
+
+
+def test_rollup_reads_match_raw_queries(db):
+    start, end = date(2024, 1, 10), date(2024, 3, 31)
+    before = _raw_results(db, start, end)
+    RollupService(db).rebuild()
+    after = _raw_results(db, start, end)
+
+    for raw_frame, rolled_frame in zip(before, after):
+        assert raw_frame.to_dict("records") == rolled_frame.to_dict("records")
+
+
+def test_cash_flow_report_reads_rollups(db):
+    RollupService(db).rebuild()
+    report = ReportingService(db).generate_cash_flow_report(date(2024, 1, 1), date(2024, 1, 31))
+    operating = report["operating_activities"]
+    assert operating["net_operating_cash_flow"] == 225.0
+    assert operating["daily_cash_flow"] == [
+        {"date": "2024-01-05", "amount": 240.0, "cumulative": 240.0},
+        {"date": "2024-01-20", "amount": -15.0, "cumulative": 225.0},
+    ]
+
+
+def test_triggers_apply_insert_update_delete(db):
+    rollups = RollupService(db)
+    rollups.rebuild()
+
+    db.conn.execute(
+        "INSERT INTO cash_ledger (entry_date, amount, currency, category) VALUES ('2024-02-01', -75.0, 'CRC', NULL)"
+    )
+    db.conn.execute("UPDATE cash_ledger SET entry_date = '2024-03-02', amount = 60 WHERE id = 1")
+    db.conn.execute("UPDATE cash_ledger SET description = 'no-op for rollups' WHERE id = 2")
+    db.conn.execute("DELETE FROM cash_ledger WHERE id = 4")
+    db.conn.execute("UPDATE bookings SET guests = 3 WHERE booking_id = 'b2'")
+    db.conn.execute("DELETE FROM bookings WHERE booking_id = 'b4'")
+    db.conn.commit()
+
+    report = rollups.check_consistency()
+    assert all(r["ok"] for r in report.values()), report
+
+    ledger = AnalyticsService(db).cash_ledger_by_date(date(2024, 1, 1), date(2024, 3, 31))
+    assert ledger.to_dict("records") == [
+        {"date": "2024-01-31", "inflow": 0.0, "outflow": 40.0},
+        {"date": "2024-02-01", "inflow": 250.0, "outflow": 75.0},
+        {"date": "2024-03-02", "inflow": 60.0, "outflow": 0.0},
+    ]
+    # Keys whose rows were all deleted disappear rather than lingering as zeros
+    months = db.conn.execute(
+        "SELECT month FROM rollup_monthly WHERE source = 'bookings' ORDER BY month"
+    ).fetchall()
+    assert [m["month"] for m in months] == ["2024-01", "2024-02"]
+
+
+def test_by_month_combines_whole_and_partial_months(db):
+    rollups = RollupService(db)
+    rollups.rebuild()
+    rows = rollups.by_month(
+        "cash_ledger", date(2024, 1, 31), date(2024, 2, 29), ("amount", "row_count")
+    )
+    assert rows == [
+        {"month": "2024-01", "amount": -40.0, "row_count": 1},
+        {"month": "2024-02", "amount": 240.0, "row_count": 2},
+    ]
+
+
+def test_consistency_check_detects_drift_and_partial_rebuild_repairs(db):
+    rollups = RollupService(db)
+    rollups.rebuild()
+
+    # Writes that bypass the triggers (e.g. bulk load with triggers dropped)
+    db.conn.execute("DROP TRIGGER trg_rollup_cash_ledger_insert")
+    db.conn.execute("INSERT INTO cash_ledger (entry_date, amount, currency, category) VALUES ('2024-02-20', 5, 'USD', 'x')")
+    db.conn.commit()
+    assert not rollups.covers("cash_ledger", date(2024, 1, 1), date(2024, 12, 31))
+
+    report = rollups.check_consistency(["cash_ledger"])["cash_ledger"]
+    assert not report["ok"]
+    assert {m["period"] for m in report["mismatches"]} == {"2024-02-20", "2024-02"}
+
+    rollups.rebuild(["cash_ledger"], since=date(2024, 2, 10))
+    assert rollups.check_consistency(["cash_ledger"])["cash_ledger"]["ok"]
+    assert rollups.covers("cash_ledger", date(2024, 1, 1), date(2024, 12, 31))
@@ -0,0 +1,274 @@
+"""
+Unit tests for the incremental Stripe/Airtable sync engine, run against a
+local stub HTTP server that mimics the two APIs' pagination.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.repositories import ingest_repository
+from src.repositories.ingest_repository import IngestRepository
+from src.services.cash_ledger_service import CashLedgerService
+from src.services.http_client import (
+    HttpFetchError,
+    ThrottledClient,
+    close_shared_session,
+    get_shared_session,
+)
+from src.services.sync_engine import (
+    AirtableTableSource,
+    IncrementalSyncEngine,
+    StripePayoutSource,
+    SyncCursorStore,
+)
+
+DAY = 86400
+
+
+class _FileDB:
+    """Minimal DatabaseConnection stand-in bound to one SQLite file."""
+
+    def __init__(self, path):
+        self.db_path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = lambda cur, row: {
+            col[0]: row[idx] for idx, col in enumerate(cur.description)
+        }
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        with self.lock:
+            yield self.conn
+            self.conn.commit()
+
+
+class _StubState:
+    def __init__(self):
+        self.payouts = []
+        self.records = {}
+        self.requests = []
+        self.throttle_next = 0
+        self.fail_all = False
+        self.lock = threading.Lock()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        state = self.server.state
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with state.lock:
+            state.requests.append((url.path, query))
+            if state.fail_all:
+                return self._send(503, {"error": "unavailable"})
+            if state.throttle_next:
+                state.throttle_next -= 1
+                return self._send(429, {"error": "rate limited"}, {"Retry-After": "0"})
+        if url.path == "/v1/payouts":
+            return self._send(200, self._payouts(state, query))
+        if url.path.startswith("/v0/"):
+            return self._send(200, self._records(state, unquote(url.path.split("/")[3]), query))
+        self._send(404, {"error": "not found"})
+
+    @staticmethod
+    def _payouts(state, query):
+        # Newest first, like Stripe
+        matching = sorted(
+            (p for p in state.payouts
+             if int(query["created[gte]"]) <= p["created"] < int(query["created[lt]"])),
+            key=lambda p: (-p["created"], p["id"]),
+        )
+        if "starting_after" in query:
+            ids = [p["id"] for p in matching]
+            matching = matching[ids.index(query["starting_after"]) + 1:]
+        limit = int(query["limit"])
+        return {"object": "list", "data": matching[:limit], "has_more": len(matching) > limit}
+
+    @staticmethod
+    def _records(state, table, query):
+        rows = state.records.get(table, [])
+        formula = query.get("filterByFormula")
+        if formula:
+            since = formula.split("'")[1]
+            rows = [r for r in rows if r["modified"] > since]
+        start = int(query.get("offset", 0))
+        size = int(query["pageSize"])
+        page = rows[start:start + size]
+        body = {"records": [{"id": r["id"], "fields": r["fields"]} for r in page]}
+        if start + size < len(rows):
+            body["offset"] = str(start + size)
+        return body
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.state = _StubState()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def db(tmp_path):
+    ingest_repository.reset_schema_cache()
+    return _FileDB(str(tmp_path / "sync.db"))
+
+
+def _payout(i, created, status="paid"):
+    return {"id": f"po_{i:05d}", "amount": 1000 + i, "currency": "usd",
+            "status": status, "created": created, "arrival_date": created + DAY}
+
+
+def _engine(db):
+    return IncrementalSyncEngine(
+        db, batch_size=50, concurrency=3,
+        client_factory=lambda: ThrottledClient(concurrency=3, backoff_base=0.01),
+    )
+
+
+def _ledger_ids(db):
+    with db.get_connection() as conn:
+        return {r["external_id"] for r in conn.execute("SELECT external_id FROM cash_ledger")}
+
+
+def test_stripe_sync_fetches_only_new_payouts(stub, db):
+    now = int(time.time())
+    state = stub.state
+    # 240 paid payouts over the last 300 days plus two still in transit
+    state.payouts = [_payout(i, now - 300 * DAY + i * DAY + 7) for i in range(240)]
+    state.payouts += [_payout(900, now - 20 * DAY, "in_transit"), _payout(901, now - 10 * DAY, "pending")]
+    state.throttle_next = 1
+
+    ledger = CashLedgerService(db)
+    source = StripePayoutSource("sk_test", ledger, base_url=f"{stub.base}/v1",
+                                window=timedelta(days=120))
+    engine = _engine(db)
+
+    first = engine.run([source])
+    assert first["stripe:payouts"]["fetched"] == 242
+    assert first["stripe:payouts"]["written"] == 240
+    assert first["_http"]["throttled"] == 1
+    assert len(_ledger_ids(db)) == 240
+    # Cursor waits at the oldest unsettled payout
+    cursor = SyncCursorStore(db).get("stripe:payouts")
+    assert cursor == str(now - 20 * DAY)
+    # Several windows were listed, some of them over more than one page
+    first_run = [q for path, q in state.requests if path == "/v1/payouts"]
+    assert len({q["created[gte]"] for q in first_run}) >= 3
+    assert any("starting_after" in q for q in first_run)
+
+    state.requests.clear()
+    state.payouts[-2]["status"] = "paid"
+    state.payouts[-1]["status"] = "paid"
+    state.payouts.append(_payout(950, now - 60))
+
+    second = engine.run([source])["stripe:payouts"]
+    assert second["previous_cursor"] == cursor
+    assert all(int(q["created[gte]"]) >= int(cursor) for _, q in state.requests)
+    # Only payouts created since the cursor were transferred
+    assert second["fetched"] == 3 + sum(1 for p in state.payouts[:240] if p["created"] >= int(cursor))
+    assert second["written"] == 3
+    assert {"po_00900", "po_00901", "po_00950"} <= _ledger_ids(db)
+    assert SyncCursorStore(db).get("stripe:payouts") == str(now - 60)
+
+
+def test_airtable_sync_uses_last_modified_filter(stub, db):
+    state = stub.state
+    old = "2024-01-01T00:00:00.000Z"
+    state.records["Main"] = [
+        {"id": f"rec{i}", "modified": old,
+         "fields": {"Email": f"lead{i}@example.com", "created_date": "2024-03-01", "MQL": True}}
+        for i in range(230)
+    ]
+    repo = IngestRepository(db)
+    source = AirtableTableSource("key", "appBase", "Main", "leads", repo, base_url=f"{stub.base}/v0")
+    engine = _engine(db)
+
+    first = engine.run([source])["airtable:Main"]
+    assert first["fetched"] == 230 and first["written"] == 230
+    assert first["batches"] == 5
+    assert "filterByFormula" not in state.requests[0][1]
+
+    state.requests.clear()
+    future = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.999Z")
+    state.records["Main"][3]["modified"] = future
+    state.records["Main"][3]["fields"]["utm_source"] = "Google"
+
+    second = engine.run([source])["airtable:Main"]
+    assert second["fetched"] == 1
+    assert "IS_AFTER(LAST_MODIFIED_TIME()" in state.requests[0][1]["filterByFormula"]
+    with db.get_connection() as conn:
+        row = conn.execute("SELECT utm_source FROM leads WHERE email = 'lead3@example.com'").fetchone()
+        total = conn.execute("SELECT COUNT(*) AS n FROM leads").fetchone()["n"]
+    assert row["utm_source"] == "google"
+    assert total == 230
+
+
+def test_failed_fetch_keeps_cursor(stub, db):
+    stub.state.fail_all = True
+    source = StripePayoutSource("sk_test", CashLedgerService(db), base_url=f"{stub.base}/v1")
+    engine = IncrementalSyncEngine(
+        db, client_factory=lambda: ThrottledClient(max_retries=2, backoff_base=0.001),
+    )
+    result = engine.run([source])
+
+    assert "503" in result["stripe:payouts"]["error"]
+    assert result["_http"]["retries"] >= 2
+    assert SyncCursorStore(db).get("stripe:payouts") is None
+
+
+def test_non_retryable_status_raises_immediately(stub):
+    async def main():
+        client = ThrottledClient(backoff_base=0.001)
+        try:
+            with pytest.raises(HttpFetchError) as exc:
+                await client.get_json(f"{stub.base}/missing")
+            return exc.value.status, client.stats
+        finally:
+            await close_shared_session()
+
+    status, stats = asyncio.run(main())
+    assert status == 404
+    assert stats["requests"] == 1 and stats["retries"] == 0
+
+
+def test_shared_session_is_reused_within_a_loop():
+    async def main():
+        first = get_shared_session()
+        same = get_shared_session()
+        await close_shared_session()
+        return first is same, first.closed
+
+    reused, closed = asyncio.run(main())
+    assert reused and closed
@@ -0,0 +1,255 @@
+"""
+Unit tests for batched, idempotent webhook ingestion.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import webhook_endpoints, webhook_handler, zapier_test_endpoints
+from src.services.webhook_ingest import (
+    QueueFullError,
+    WebhookError,
+    WebhookIngestor,
+    idempotency_key,
+)
+
+
+class _FileDB:
+    """DatabaseConnection stand-in with one dict-row connection per thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+
+    @contextmanager
+    def get_connection(self, readonly=False):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = lambda cur, row: {
+                col[0]: row[idx] for idx, col in enumerate(cur.description)
+            }
+            self.local.conn = conn
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def scalar(self, query):
+        with self.get_connection() as conn:
+            return next(iter(conn.execute(query).fetchone().values()))
+
+
+def _payload(i, **extra):
+    return dict(
+        {
+            "type": "outgoing_payment",
+            "date": "2025-08-19",
+            "amount": 100 + i,
+            "currency": "USD",
+            "to": "Google Ads",
+            "description": f"Payment {i}",
+        },
+        **extra,
+    )
+
+
+@pytest.fixture
+def db(tmp_path):
+    return _FileDB(str(tmp_path / "webhooks.db"))
+
+
+@pytest.fixture
+def ingestor(db):
+    ingestor = WebhookIngestor(db, batch_size=50, flush_interval=0.05)
+    ingestor.start()
+    yield ingestor
+    ingestor.stop()
+
+
+def test_concurrent_events_share_batches(ingestor, db):
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(lambda i: ingestor.ingest(_payload(i)), range(200)))
+
+    assert {r["status"] for r in results} == {"accepted"}
+    assert db.scalar("SELECT COUNT(*) FROM webhook_events") == 200
+    assert db.scalar("SELECT COUNT(*) FROM costs") == 200
+    assert db.scalar("SELECT MIN(category) FROM costs") == "Marketing"
+    metrics = ingestor.metrics()
+    assert metrics["written"] == 200
+    assert metrics["batches"] < 200
+    assert metrics["avg_batch_size"] > 1
+
+
+def test_retried_delivery_is_deduplicated(ingestor, db):
+    first = ingestor.ingest(_payload(1, id="evt_1"))
+    retry = ingestor.ingest(_payload(1, id="evt_1"))
+    assert first["status"] == "accepted"
+    assert retry == {"status": "duplicate", "idempotency_key": first["idempotency_key"]}
+
+    keyed = ingestor.ingest(_payload(2), key="evt_123")
+    same_key = ingestor.ingest(_payload(3), key="evt_123")
+    assert keyed["status"] == "accepted"
+    assert same_key["status"] == "duplicate"
+    assert db.scalar("SELECT COUNT(*) FROM costs") == 2
+    assert ingestor.metrics()["duplicates"] == 2
+
+
+def test_duplicates_within_one_batch(db):
+    ingestor = WebhookIngestor(db, batch_size=10, flush_interval=0.5)
+    ingestor.start()
+    try:
+        futures = [ingestor.submit(_payload(7), key="evt_7") for _ in range(3)]
+        statuses = sorted(f.result(5)["status"] for f in futures)
+    finally:
+        ingestor.stop()
+    assert statuses == ["accepted", "duplicate", "duplicate"]
+    assert db.scalar("SELECT COUNT(*) FROM costs") == 1
+
+
+def test_idempotency_key_sources():
+    assert idempotency_key({"id": "evt_1"}) == "evt_1"
+    assert idempotency_key({"id": "evt_1"}, "header") == "header"
+    assert idempotency_key({"event_id": "evt_2", "id": "obj_1"}) == "evt_2"
+    generated = idempotency_key({"a": 2, "b": 1})
+    assert generated.startswith("auto:")
+    assert generated != idempotency_key({"a": 2, "b": 1})
+
+
+def test_identical_keyless_wires_are_separate_payments(ingestor, db):
+    wire = {"type": "incoming_wire", "amount": 500, "date": "2025-08-19", "description": "Wire"}
+    first = ingestor.ingest(dict(wire))
+    second = ingestor.ingest(dict(wire))
+    assert first["status"] == second["status"] == "accepted"
+    assert first["idempotency_key"] != second["idempotency_key"]
+    assert db.scalar("SELECT COUNT(*) FROM costs") == 2
+
+
+def test_writer_purges_expired_keys(db):
+    ingestor = WebhookIngestor(db)
+    ingestor.ensure_schema()
+    with db.get_connection() as conn:
+        conn.execute(
+            "INSERT INTO webhook_events VALUES ('old', 'incoming_wire', '{}', ?, ?)",
+            ("2020-01-01T00:00:00+00:00", "2020-01-01T00:00:00+00:00"),
+        )
+    ingestor.start()
+    try:
+        ingestor.ingest(_payload(1, id="evt_new"))
+    finally:
+        ingestor.stop()
+    assert db.scalar("SELECT COUNT(*) FROM webhook_events") == 1
+
+
+def test_invalid_payloads(ingestor):
+    with pytest.raises(WebhookError):
+        ingestor.submit({"amount": 1})
+    with pytest.raises(WebhookError):
+        ingestor.submit({"type": "refund"})
+    with pytest.raises(WebhookError):
+        ingestor.submit({"type": "incoming_wire", "amount": "lots"})
+
+
+def test_text_id_costs_table(db):
+    with db.get_connection() as conn:
+        conn.execute(
+            "CREATE TABLE costs (id TEXT PRIMARY KEY, name TEXT NOT NULL, category TEXT, "
+            "amount REAL NOT NULL, currency TEXT DEFAULT 'USD', cost_date DATE, description TEXT)"
+        )
+    ingestor = WebhookIngestor(db)
+    ingestor.start()
+    try:
+        ingestor.ingest({"type": "incoming_wire", "amount": 2500, "description": "Wire"})
+    finally:
+        ingestor.stop()
+    with db.get_connection() as conn:
+        row = conn.execute("SELECT id, category, amount FROM costs").fetchone()
+    assert row["id"].startswith("wh_")
+    assert row["category"] == "Cash In – Wire"
+    assert row["amount"] == 2500
+
+
+def test_back_pressure_when_queue_is_full(db):
+    ingestor = WebhookIngestor(db, queue_size=2, batch_size=1, flush_interval=0)
+    release = threading.Event()
+    flushing = threading.Event()
+    original_flush = ingestor._flush
+
+    def slow_flush(batch):
+        flushing.set()
+        release.wait(5)
+        original_flush(batch)
+
+    ingestor._flush = slow_flush
+    ingestor.start()
+    try:
+        futures = [ingestor.submit(_payload(0))]
+        assert flushing.wait(5)
+        futures += [ingestor.submit(_payload(i)) for i in (1, 2)]
+        with pytest.raises(QueueFullError):
+            ingestor.submit(_payload(3))
+        metrics = ingestor.metrics()
+        assert metrics["rejected"] == 1
+        assert metrics["queue_depth"] == 2
+        assert metrics["queue_utilization"] == 1.0
+        release.set()
+        assert [f.result(5)["status"] for f in futures] == ["accepted"] * 3
+    finally:
+        release.set()
+        ingestor.stop()
+
+
+def test_stop_flushes_queued_events(db):
+    ingestor = WebhookIngestor(db, batch_size=1000, flush_interval=5.0)
+    ingestor.start()
+    futures = [ingestor.submit(_payload(i)) for i in range(20)]
+    ingestor.stop()
+    assert all(f.result(1)["status"] == "accepted" for f in futures)
+    assert db.scalar("SELECT COUNT(*) FROM costs") == 20
+
+
+def test_endpoint_status_codes(ingestor, monkeypatch):
+    monkeypatch.setattr(webhook_endpoints, "get_webhook_ingestor", lambda: ingestor)
+    app = FastAPI()
+    app.include_router(webhook_endpoints.router)
+    client = TestClient(app)
+
+    created = client.post("/api/v1/webhooks", json=_payload(1), headers={"Idempotency-Key": "k1"})
+    assert created.status_code == 202
+    assert created.json() == {"status": "accepted", "idempotency_key": "k1"}
+
+    retried = client.post("/api/v1/webhooks", json=_payload(1), headers={"Idempotency-Key": "k1"})
+    assert retried.status_code == 200
+    assert retried.json()["status"] == "duplicate"
+
+    assert client.post("/api/v1/webhooks", json={"type": "refund"}).status_code == 400
+    metrics = client.get("/api/v1/webhooks/metrics").json()
+    assert metrics["written"] == 1
+    assert metrics["queue_capacity"] == ingestor.metrics()["queue_capacity"]
+
+
+def test_zapier_test_routes_do_not_ingest(ingestor, db, monkeypatch):
+    monkeypatch.setattr(webhook_handler, "get_webhook_ingestor", lambda: ingestor)
+    app = FastAPI()
+    app.include_router(zapier_test_endpoints.router)
+    client = TestClient(app)
+
+    for route in ("stripe_payout", "incoming_wire", "outgoing_ocbc"):
+        response = client.post(f"/zapier/test/{route}")
+        assert response.status_code == 200
+        assert response.json()["ingest_status"] == "dry_run"
+    assert ingestor.metrics()["enqueued"] == 0
+    assert db.scalar("SELECT COUNT(*) FROM costs") == 0
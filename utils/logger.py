@@ -2,6 +2,7 @@
 Structured Logging with JSON Format and Performance Metrics
 """
 
+import atexit
 import logging
 import json
 import sys
@@ -9,11 +10,39 @@ from datetime import datetime
 from typing import Dict, Any, Optional
 from pathlib import Path
 import streamlit as st
-from logging.handlers import RotatingFileHandler
 import threading
 import time
 import functools
 
+from src.utils.log_pipeline import (
+    BatchRotatingFileHandler,
+    BatchStreamHandler,
+    LatencyHistogram,
+    LogPipeline,
+    PipelineHandler,
+)
+
+# Seconds between histogram records for each timed operation
+HISTOGRAM_EMIT_INTERVAL = 60.0
+
+
+def _session_user_context() -> Dict[str, str]:
+    """User fields from the Streamlit session, if there is a signed-in user"""
+    if hasattr(st.session_state, 'user') and st.session_state.user:
+        return {
+            'user_id': st.session_state.user.get('email', 'unknown'),
+            'user_role': st.session_state.user.get('role', 'unknown'),
+        }
+    return {}
+
+
+class SessionContextFilter(logging.Filter):
+    """Copies the session's user onto records while still on the caller's thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.user_context = _session_user_context()
+        return True
+
 class JSONFormatter(logging.Formatter):
     """Custom JSON formatter for structured logging"""
     
@@ -28,10 +57,12 @@ class JSONFormatter(logging.Formatter):
             'line': record.lineno,
         }
         
-        # Add user context if available
-        if hasattr(st.session_state, 'user') and st.session_state.user:
-            log_entry['user_id'] = st.session_state.user.get('email', 'unknown')
-            log_entry['user_role'] = st.session_state.user.get('role', 'unknown')
+        # Add user context; SessionContextFilter captures it before the record
+        # is queued, since the session is not reachable from the listener thread
+        user_context = getattr(record, 'user_context', None)
+        if user_context is None:
+            user_context = _session_user_context()
+        log_entry.update(user_context)
         
         # Add exception info if present
         if record.exc_info:
@@ -44,12 +75,22 @@ class JSONFormatter(logging.Formatter):
         return json.dumps(log_entry, ensure_ascii=False)
 
 class PerformanceLogger:
-    """Logger for performance metrics and timing"""
+    """Logger for performance metrics and timing.
+
+    Timed calls are recorded in a latency histogram per operation. One
+    histogram record per operation is logged every ``emit_interval`` seconds
+    (and on ``flush``) instead of a log line per call.
+    """
     
-    def __init__(self, logger_name: str = 'performance'):
+    def __init__(self, logger_name: str = 'performance',
+                 emit_interval: float = HISTOGRAM_EMIT_INTERVAL):
         self.logger = logging.getLogger(logger_name)
+        self.emit_interval = emit_interval
         self.timers = {}
-        self.metrics = {}
+        # Histograms since start, and since the last emitted record
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._window: Dict[str, LatencyHistogram] = {}
+        self._window_started = time.monotonic()
         self._lock = threading.Lock()
     
     def start_timer(self, operation: str, context: Dict[str, Any] = None):
@@ -57,42 +98,60 @@ class PerformanceLogger:
         timer_key = f"{operation}_{threading.current_thread().ident}"
         with self._lock:
             self.timers[timer_key] = {
-                'start_time': time.time(),
+                'start_time': time.perf_counter(),
                 'operation': operation,
                 'context': context or {}
             }
     
     def end_timer(self, operation: str, success: bool = True, additional_metrics: Dict[str, Any] = None):
-        """End timing and log performance metrics"""
+        """End timing and record the duration in the operation's histogram.
+
+        ``additional_metrics`` is accepted for compatibility; per-call details
+        are no longer logged, only counted in the histogram.
+        """
         timer_key = f"{operation}_{threading.current_thread().ident}"
         
         with self._lock:
-            if timer_key not in self.timers:
+            timer_info = self.timers.pop(timer_key, None)
+            if timer_info is None:
                 self.logger.warning(f"Timer not found for operation: {operation}")
                 return
-            
-            timer_info = self.timers.pop(timer_key)
-            duration = time.time() - timer_info['start_time']
-            
+            duration = time.perf_counter() - timer_info['start_time']
+            self._observe(operation, duration, success)
+            due = time.monotonic() - self._window_started >= self.emit_interval
+        
+        if due:
+            self.flush()
+    
+    def record(self, operation: str, duration: float, success: bool = True):
+        """Record a duration measured elsewhere"""
+        with self._lock:
+            self._observe(operation, duration, success)
+    
+    def _observe(self, operation: str, duration: float, success: bool):
+        for histograms in (self.histograms, self._window):
+            histogram = histograms.get(operation)
+            if histogram is None:
+                histogram = histograms[operation] = LatencyHistogram()
+            histogram.observe(duration, success)
+    
+    def flush(self):
+        """Log one histogram record per operation timed since the last flush"""
+        with self._lock:
+            window, self._window = self._window, {}
+            started, self._window_started = self._window_started, time.monotonic()
+        
+        window_seconds = round(time.monotonic() - started, 3)
+        for operation, histogram in window.items():
             metrics = {
+                'metric_type': 'latency_histogram',
                 'operation': operation,
-                'duration_seconds': round(duration, 4),
-                'success': success,
-                'context': timer_info['context'],
-                'timestamp': datetime.now().isoformat()
+                'window_seconds': window_seconds,
+                **histogram.to_dict(),
             }
-            
-            if additional_metrics:
-                metrics.update(additional_metrics)
-            
-            # Store metrics for analysis
-            if operation not in self.metrics:
-                self.metrics[operation] = []
-            self.metrics[operation].append(metrics)
-            
-            # Log performance
             self.logger.info(
-                f"Performance: {operation} completed in {duration:.4f}s",
+                f"Performance: {operation} {histogram.count} calls, "
+                f"p95 {metrics['p95_seconds']:.4f}s",
                 extra={'extra_fields': metrics}
             )
     
@@ -100,26 +159,25 @@ class PerformanceLogger:
         """Get performance summary for operations"""
         with self._lock:
             if operation:
-                if operation not in self.metrics:
+                histogram = self.histograms.get(operation)
+                if histogram is None:
                     return {}
                 
-                operation_metrics = self.metrics[operation]
-                durations = [m['duration_seconds'] for m in operation_metrics]
-                
                 return {
                     'operation': operation,
-                    'total_calls': len(operation_metrics),
-                    'avg_duration': sum(durations) / len(durations),
-                    'min_duration': min(durations),
-                    'max_duration': max(durations),
-                    'success_rate': sum(1 for m in operation_metrics if m['success']) / len(operation_metrics)
+                    'total_calls': histogram.count,
+                    'avg_duration': histogram.total / histogram.count,
+                    'min_duration': histogram.min,
+                    'max_duration': histogram.max,
+                    'p50_duration': histogram.quantile(0.5),
+                    'p95_duration': histogram.quantile(0.95),
+                    'p99_duration': histogram.quantile(0.99),
+                    'success_rate': 1 - histogram.failures / histogram.count
                 }
-            else:
-                # Summary for all operations
-                summary = {}
-                for op in self.metrics:
-                    summary[op] = self.get_performance_summary(op)
-                return summary
+            operations = list(self.histograms)
+        
+        # Summary for all operations
+        return {op: self.get_performance_summary(op) for op in operations}
 
 class CashFlowLogger:
     """Main application logger with structured logging and performance tracking"""
@@ -131,12 +189,22 @@ class CashFlowLogger:
         self._setup_logging()
     
     def _setup_logging(self):
-        """Setup logging configuration"""
+        """Setup logging configuration.
+
+        Both loggers feed one LogPipeline: callers only queue records, and the
+        pipeline's listener thread JSON-encodes them and writes them in batches.
+        """
         # Create logs directory
         log_dir = Path('logs')
         log_dir.mkdir(exist_ok=True)
         
-        # Clear existing handlers
+        # Clear existing handlers, stopping the pipeline of an earlier setup
+        perf_logger = self.performance_logger.logger
+        for target in (self.logger, perf_logger):
+            for handler in list(target.handlers):
+                if isinstance(handler, PipelineHandler):
+                    handler.pipeline.close()
+                    target.removeHandler(handler)
         self.logger.handlers.clear()
         
         # Set log level
@@ -148,9 +216,10 @@ class CashFlowLogger:
         
         # JSON formatter
         json_formatter = JSONFormatter()
+        app_records = logging.Filter(self.app_name)
         
         # File handler with rotation
-        file_handler = RotatingFileHandler(
+        file_handler = BatchRotatingFileHandler(
             log_dir / f'{self.app_name}.log',
             maxBytes=10*1024*1024,  # 10MB
             backupCount=5
@@ -159,7 +228,7 @@ class CashFlowLogger:
         file_handler.setLevel(logging.INFO)
         
         # Error file handler
-        error_handler = RotatingFileHandler(
+        error_handler = BatchRotatingFileHandler(
             log_dir / f'{self.app_name}_errors.log',
             maxBytes=5*1024*1024,  # 5MB
             backupCount=3
@@ -168,24 +237,33 @@ class CashFlowLogger:
         error_handler.setLevel(logging.ERROR)
         
         # Console handler for development
-        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler = BatchStreamHandler(sys.stdout)
         console_handler.setFormatter(json_formatter)
         console_handler.setLevel(logging.WARNING)
         
-        # Add handlers
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(error_handler)
-        self.logger.addHandler(console_handler)
+        for handler in (file_handler, error_handler, console_handler):
+            handler.addFilter(app_records)
         
         # Performance logger setup
-        perf_handler = RotatingFileHandler(
+        perf_handler = BatchRotatingFileHandler(
             log_dir / f'{self.app_name}_performance.log',
             maxBytes=5*1024*1024,
             backupCount=3
         )
         perf_handler.setFormatter(json_formatter)
-        self.performance_logger.logger.addHandler(perf_handler)
-        self.performance_logger.logger.setLevel(logging.INFO)
+        perf_handler.addFilter(logging.Filter(perf_logger.name))
+        perf_logger.setLevel(logging.INFO)
+        
+        self.pipeline = LogPipeline(
+            [file_handler, error_handler, console_handler, perf_handler],
+            name=self.app_name,
+        ).start()
+        self.pipeline.attach(self.logger, perf_logger)
+        
+        # Session state is only reachable from the caller's thread
+        for target in (self.logger, perf_logger):
+            if not any(isinstance(f, SessionContextFilter) for f in target.filters):
+                target.addFilter(SessionContextFilter())
     
     def log_user_action(self, action: str, details: Dict[str, Any] = None, user_id: str = None):
         """Log user actions with context"""
@@ -291,11 +369,12 @@ class CashFlowLogger:
 def performance_monitor(operation_name: str = None):
     """Decorator to monitor function performance"""
     def decorator(func):
+        op_name = operation_name or f"{func.__module__}.{func.__name__}"
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            op_name = operation_name or f"{func.__module__}.{func.__name__}"
-            perf_logger = PerformanceLogger()
-            
+            # Shared so calls accumulate in one histogram per operation
+            perf_logger = app_logger.performance_logger
             perf_logger.start_timer(op_name, {'function': func.__name__})
             
             try:
@@ -311,16 +390,16 @@ def performance_monitor(operation_name: str = None):
 
 def log_user_action(action: str, details: Dict[str, Any] = None):
     """Convenience function to log user actions"""
-    logger = CashFlowLogger()
-    logger.log_user_action(action, details)
+    app_logger.log_user_action(action, details)
 
 def log_financial_operation(operation: str, amount: float = None, currency: str = None, details: Dict[str, Any] = None):
     """Convenience function to log financial operations"""
-    logger = CashFlowLogger()
-    logger.log_financial_operation(operation, amount, currency, details)
+    app_logger.log_financial_operation(operation, amount, currency, details)
 
 # Global logger instance
 app_logger = CashFlowLogger()
+# Log the histograms of the last partial window; runs before the pipelines stop
+atexit.register(app_logger.performance_logger.flush)
 
 # Backward compatibility
 def setup_logging():